@@ -902,31 +902,21 @@ def show_dashboard():
                 except Exception as e:
                     st.error(f"Eroare la sincronizare: {e}")
 
-    # Get invoice data from Supabase (synced from Oblio)
+    # Get invoice months from Supabase (aggregated server-side, synced from Oblio)
     try:
         from utils.supabase_client import get_supabase_client
+        from utils.data_sync import get_invoice_months
         supabase = get_supabase_client()
 
-        # Get all non-canceled invoices
-        response = supabase.table('invoices').select('total, invoice_type, issue_date, series_name, invoice_number').eq('is_canceled', False).execute()
-        all_invoices = response.data if response.data else []
-
         # Get last sync time
         sync_response = supabase.table('sync_logs').select('finished_at').eq('sync_type', 'oblio_sync').eq('status', 'completed').order('finished_at', desc=True).limit(1).execute()
         last_sync = sync_response.data[0]['finished_at'] if sync_response.data else None
 
-        # Extract available months
-        months_set = set()
-        for inv in all_invoices:
-            if inv.get('issue_date'):
-                month = inv['issue_date'][:7]  # YYYY-MM
-                months_set.add(month)
-
-        available_months = sorted(months_set, reverse=True)
+        # Available months (YYYY-MM) with non-canceled invoices
+        available_months = get_invoice_months()
 
     except Exception as e:
         st.error(f"Eroare la incarcarea datelor: {e}")
-        all_invoices = []
         available_months = []
         last_sync = None
 
@@ -950,12 +940,15 @@ def show_dashboard():
     with col_filter1:
         selected_period = st.selectbox("Perioada:", filter_options, key="dashboard_period")
 
-    # Filter invoices by selected period
+    # Selected period
+    period_start, period_end = None, None
     if selected_period == "Tot timpul":
-        invoices = all_invoices
         period_label = "toate datele"
     else:
-        invoices = [i for i in all_invoices if i.get('issue_date', '').startswith(selected_period)]
+        import calendar
+        year, month = map(int, selected_period.split('-'))
+        period_start = date(year, month, 1)
+        period_end = date(year, month, calendar.monthrange(year, month)[1])
         # Format month name
         try:
             month_date = datetime.strptime(selected_period, "%Y-%m")
@@ -965,26 +958,35 @@ def show_dashboard():
         except:
             period_label = selected_period
 
-    # Calculate totals for filtered period
-    facturi_normale = [i for i in invoices if i.get('invoice_type') == 'Normala']
-    facturi_storno = [i for i in invoices if i.get('invoice_type') == 'Storno']
-    facturi_stornate = [i for i in invoices if i.get('invoice_type') == 'Stornata']
+    # Totals for the selected period, per invoice type (aggregated in the database)
+    try:
+        from utils.data_sync import get_invoice_stats
+        invoice_stats = get_invoice_stats(period_start, period_end)
+    except Exception as e:
+        st.error(f"Eroare la incarcarea totalurilor: {e}")
+        invoice_stats = {}
+
+    empty_stats = {'count': 0, 'amount': 0.0}
+    facturi_normale = invoice_stats.get('Normala', empty_stats)
+    facturi_storno = invoice_stats.get('Storno', empty_stats)
+    facturi_stornate = invoice_stats.get('Stornata', empty_stats)
 
-    total_facturi = len(facturi_normale)
-    total_stornari = len(facturi_storno)
-    total_stornate = len(facturi_stornate)
+    total_facturi = facturi_normale['count']
+    total_stornari = facturi_storno['count']
+    total_stornate = facturi_stornate['count']
+    total_documente = sum(s['count'] for s in invoice_stats.values())
 
     # Total TOATE facturile (ce arata Oblio ca total)
-    total_toate = sum(float(i.get('total', 0)) for i in invoices)
+    total_toate = sum(s['amount'] for s in invoice_stats.values())
 
     # Facturi active = Normale (fara stornate)
-    cifra_normale = sum(float(i.get('total', 0)) for i in facturi_normale)
+    cifra_normale = facturi_normale['amount']
 
     # Stornari (valori negative)
-    stornari_total = sum(float(i.get('total', 0)) for i in facturi_storno)
+    stornari_total = facturi_storno['amount']
 
     # Stornate (facturi care au fost anulate)
-    stornate_total = sum(float(i.get('total', 0)) for i in facturi_stornate)
+    stornate_total = facturi_stornate['amount']
 
     # Show period info
     with col_filter2:
@@ -1025,22 +1027,24 @@ def show_dashboard():
         </div>
         """, unsafe_allow_html=True)
 
-    # Invoice list expander
-    if invoices:
-        with st.expander(f"Vezi lista facturilor ({len(invoices)} documente)"):
-            # Create dataframe
-            df_data = []
-            for inv in sorted(invoices, key=lambda x: x.get('issue_date', ''), reverse=True):
-                df_data.append({
-                    'Data': inv.get('issue_date', ''),
-                    'Serie/Nr': f"{inv.get('series_name', '')}{inv.get('invoice_number', '')}",
-                    'Total': float(inv.get('total', 0)),
-                    'Tip': inv.get('invoice_type', '')
-                })
+    # Invoice list - rows are fetched only on request, for the selected period
+    if total_documente and st.toggle(f"Vezi lista facturilor ({total_documente} documente)", key="dashboard_invoice_list"):
+        from utils.data_sync import get_invoices_for_period
+        invoices = get_invoices_for_period(period_start, period_end, include_canceled=False)
+
+        # Create dataframe
+        df_data = []
+        for inv in invoices:
+            df_data.append({
+                'Data': inv.get('issue_date', ''),
+                'Serie/Nr': f"{inv.get('series_name', '')}{inv.get('invoice_number', '')}",
+                'Total': float(inv.get('total', 0)),
+                'Tip': inv.get('invoice_type', '')
+            })
 
-            df = pd.DataFrame(df_data)
-            df['Total'] = df['Total'].apply(lambda x: f"{x:,.2f} RON")
-            st.dataframe(df, use_container_width=True, hide_index=True)
+        df = pd.DataFrame(df_data)
+        df['Total'] = df['Total'].apply(lambda x: f"{x:,.2f} RON")
+        st.dataframe(df, use_container_width=True, hide_index=True)
 
     # Section header
     st.markdown("""
@@ -1080,7 +1084,7 @@ def show_export_opuri():
 
     # Import processor
     try:
-        from utils.opuri_processor import generate_opuri_export
+        from utils.export_cache import genereaza_export_opuri_memorat
     except ImportError as e:
         st.error(f"Eroare la import: {e}")
         return
@@ -1091,19 +1095,19 @@ def show_export_opuri():
 
     if client:
         try:
-            gls_count = len(client.table("gls_parcels").select("id", count="exact").execute().data)
-            sameday_count = len(client.table("sameday_parcels").select("id", count="exact").execute().data)
-            netopia_count = len(client.table("netopia_transactions").select("id", count="exact").execute().data)
-            invoices_count = len(client.table("invoices").select("id", count="exact").execute().data)
-            mt940_count = len(client.table("bank_transactions").select("id", count="exact").execute().data)
+            # Numar de randuri citit din server (fara descarcarea randurilor), cache pana se schimba datele
+            from utils.table_inventory import get_table_counts
+            counts = get_table_counts()
+
+            gls_count = counts['gls_parcels']
+            sameday_count = counts['sameday_parcels']
+            netopia_count = counts['netopia_transactions']
+            invoices_count = counts['invoices']
+            mt940_count = counts['bank_transactions']
 
             # Borderouri GLS din email
-            try:
-                borderouri_count = len(client.table("gls_borderouri").select("id", count="exact").execute().data)
-                borderouri_matched = len(client.table("gls_borderouri").select("id", count="exact").eq("op_matched", True).execute().data)
-            except:
-                borderouri_count = 0
-                borderouri_matched = 0
+            borderouri_count = counts['gls_borderouri']
+            borderouri_matched = counts['gls_borderouri_matched']
 
             st.markdown("""
             <div class="section-header">
@@ -1191,7 +1195,7 @@ def show_export_opuri():
     </div>
     """, unsafe_allow_html=True)
 
-    st.info("Fisierul Gomag este folosit pentru a potrivi AWB-urile cu Order ID-urile. Daca nu il incarci, Order ID-urile vor fi goale.")
+    st.info("Fisierul Gomag este folosit pentru a potrivi AWB-urile cu Order ID-urile. Comenzile din fiecare upload sunt salvate in baza de date; daca nu incarci fisierul, se folosesc comenzile sincronizate anterior.")
 
     gomag_file = st.file_uploader(
         "Fisier Gomag (XLSX)",
@@ -1209,17 +1213,29 @@ def show_export_opuri():
                 # Read Gomag if provided
                 gomag_df = None
                 if gomag_file:
-                    gomag_df = pd.read_excel(gomag_file, dtype=str)
+                    from utils.gomag_cache import incarca_gomag
+                    from utils.gomag_orders import sincronizeaza_comenzi_gomag
+                    gomag_df = incarca_gomag(gomag_file)
                     st.info(f"Gomag incarcat: {len(gomag_df)} randuri")
 
-                # Generate export
-                excel_buffer = generate_opuri_export(
+                    # Salveaza doar comenzile noi/modificate in gomag_orders
+                    try:
+                        gomag_stats = sincronizeaza_comenzi_gomag(gomag_df, gomag_file.name)
+                        st.info(f"Comenzi Gomag sincronizate: {gomag_stats['inserted']} noi, {gomag_stats['updated']} modificate, {gomag_stats['skipped']} neschimbate")
+                    except Exception as sync_err:
+                        st.warning(f"Comenzile Gomag nu au putut fi salvate: {sync_err}")
+
+                # Generate export (servit din cache daca datele perioadei nu s-au schimbat)
+                excel_buffer, din_cache = genereaza_export_opuri_memorat(
                     start_date.strftime('%Y-%m-%d'),
                     end_date.strftime('%Y-%m-%d'),
                     gomag_df
                 )
 
-                st.success("Export generat cu succes!")
+                if din_cache:
+                    st.success("Export servit din cache (datele nu s-au schimbat de la ultima generare)")
+                else:
+                    st.success("Export generat cu succes!")
 
                 # Download button
                 timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
@@ -2572,10 +2588,13 @@ def show_data_sync():
     client = get_supabase_client()
     if client:
         try:
-            gls_count = len(client.table("gls_parcels").select("id", count="exact").execute().data)
-            sameday_count = len(client.table("sameday_parcels").select("id", count="exact").execute().data)
-            netopia_count = len(client.table("netopia_transactions").select("id", count="exact").execute().data)
-            invoices_count = len(client.table("invoices").select("id", count="exact").execute().data)
+            from utils.table_inventory import get_table_counts
+            counts = get_table_counts(['gls_parcels', 'sameday_parcels', 'netopia_transactions', 'invoices'])
+
+            gls_count = counts['gls_parcels']
+            sameday_count = counts['sameday_parcels']
+            netopia_count = counts['netopia_transactions']
+            invoices_count = counts['invoices']
 
             col1, col2, col3, col4 = st.columns(4)
             with col1:
@@ -2849,6 +2868,7 @@ def show_data_sync():
                     'processed': 0,
                     'inserted': 0,
                     'skipped': 0,
+                    'reused_files': 0,
                     'errors': []
                 }
 
@@ -2859,78 +2879,26 @@ def show_data_sync():
                     try:
                         if file_ext == 'csv':
                             # Import CSV
-                            from utils.bank_statement_parser import BankStatementParser
-                            from utils.supabase_client import get_supabase_client
-                            import hashlib
-
-                            parser = BankStatementParser()
-                            content = bank_file.read()
-                            result = parser.parse_file(content, file_name)
-
-                            if 'error' in result and result['error']:
-                                total_stats['errors'].append(f"{file_name}: {result['error']}")
-                                continue
-
-                            transactions = result.get('transactions', [])
-                            supabase = get_supabase_client()
-
-                            for trans in transactions:
-                                total_stats['processed'] += 1
-
-                                # Generate unique hash for deduplication
-                                referinta = trans.get('referinta', '')
-                                trans_data = trans.get('data')
-                                suma = trans.get('suma', 0)
-
-                                if trans_data:
-                                    date_str = trans_data.strftime('%Y-%m-%d')
-                                else:
-                                    date_str = ''
-
-                                hash_data = f"{date_str}|{referinta}|{suma}"
-                                trans_hash = hashlib.md5(hash_data.encode()).hexdigest()
-
-                                # Check if exists by hash (safe, no special char issues)
-                                existing = supabase.table('bank_transactions').select('id').eq(
-                                    'transaction_hash', trans_hash
-                                ).execute()
-
-                                if existing.data:
-                                    total_stats['skipped'] += 1
-                                    continue
-
-                                # Insert transaction
-                                record = {
-                                    'op_reference': referinta,
-                                    'transaction_date': date_str,
-                                    'amount': suma,
-                                    'source': trans.get('category', ''),
-                                    'details': trans.get('descriere', ''),
-                                    'file_name': file_name,
-                                    'transaction_hash': trans_hash,
-                                    'is_income': trans.get('is_income', False),
-                                    'is_capital_transfer': trans.get('is_capital_transfer', False),
-                                }
-
-                                try:
-                                    supabase.table('bank_transactions').insert(record).execute()
-                                    total_stats['inserted'] += 1
-                                except Exception as insert_err:
-                                    if 'duplicate' in str(insert_err).lower():
-                                        total_stats['skipped'] += 1
-                                    else:
-                                        total_stats['errors'].append(f"{trans['referinta']}: {str(insert_err)}")
+                            from utils.bank_statement_ingest import import_csv_statement
+
+                            stats = import_csv_statement(bank_file.read(), file_name)
+
+                            total_stats['processed'] += stats.get('processed', 0)
+                            total_stats['inserted'] += stats.get('inserted', 0)
+                            total_stats['skipped'] += stats.get('skipped', 0)
+                            total_stats['reused_files'] += stats.get('reused_files', 0)
+                            total_stats['errors'].extend(stats.get('errors', []))
 
                         elif file_ext == 'pdf':
                             # Import PDF
-                            from utils.pdf_parser import parse_bt_pdf_from_bytes, save_pdf_transactions_to_supabase
+                            from utils.pdf_parser import import_pdf_to_supabase
 
-                            transactions = parse_bt_pdf_from_bytes(bank_file)
-                            stats = save_pdf_transactions_to_supabase(transactions, file_name)
+                            stats = import_pdf_to_supabase(bank_file, file_name)
 
                             total_stats['processed'] += stats.get('processed', 0)
                             total_stats['inserted'] += stats.get('inserted', 0)
                             total_stats['skipped'] += stats.get('skipped', 0)
+                            total_stats['reused_files'] += stats.get('reused_files', 0)
                             total_stats['errors'].extend(stats.get('errors', []))
 
                         elif file_ext == 'txt':
@@ -2945,6 +2913,7 @@ def show_data_sync():
                                 total_stats['processed'] += stats.get('processed', 0)
                                 total_stats['inserted'] += stats.get('inserted', 0)
                                 total_stats['skipped'] += stats.get('skipped', 0)
+                                total_stats['reused_files'] += stats.get('reused_files', 0)
                                 total_stats['errors'].extend(stats.get('errors', []))
 
                     except Exception as e:
@@ -2959,6 +2928,9 @@ def show_data_sync():
                 with col_c:
                     st.metric("Ignorate (duplicate)", total_stats['skipped'])
 
+                if total_stats['reused_files']:
+                    st.info(f"{total_stats['reused_files']} fisier(e) identice cu importuri anterioare au fost sarite fara reprocesare.")
+
                 if total_stats['errors']:
                     with st.expander(f"Erori ({len(total_stats['errors'])})"):
                         for err in total_stats['errors'][:10]:
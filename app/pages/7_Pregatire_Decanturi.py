@@ -19,11 +19,11 @@ from utils.decanturi_processor import (
     proceseaza_bonuri_productie,
     genereaza_tabel_raport,
     genereaza_export_excel,
-    get_bonuri_procesate_pentru_comenzi,
-    adauga_bon,
+    RegistruBonuri,
     get_bonuri_azi,
     get_statistici_azi,
-    get_product_database
+    get_product_database,
+    reincarca_baza_produse
 )
 from utils.auth import is_authenticated, login_form
 
@@ -44,6 +44,12 @@ def main():
     st.title("Pregătire Decanturi")
     st.markdown("Procesare comenzi și generare rapoarte de producție")
 
+    # Potrivire aproximativă pentru produsele negăsite exact în baza de date
+    with st.expander("Potrivire SKU aproximativă"):
+        fuzzy_activ = st.checkbox("Caută SKU-ul aproximativ pentru produsele negăsite", value=False, key="fuzzy_activ")
+        prag_fuzzy = st.slider("Scor minim", 0.5, 1.0, 0.85, 0.01, disabled=not fuzzy_activ, key="prag_fuzzy")
+    prag = prag_fuzzy if fuzzy_activ else None
+
     # Tabs
     tab1, tab2, tab3 = st.tabs(["Raport Producție", "Bonuri Producție", "Statistici"])
 
@@ -60,8 +66,8 @@ def main():
         if uploaded_file is not None:
             with st.spinner("Procesare fișier..."):
                 try:
-                    file_content = uploaded_file.read()
-                    raport, raport_intregi, finalizate, total = proceseaza_comenzi(file_content)
+                    file_content = uploaded_file.getvalue()
+                    raport, raport_intregi, finalizate, total = proceseaza_comenzi(file_content, prag_fuzzy=prag)
 
                     # Statistici
                     col1, col2, col3 = st.columns(3)
@@ -83,12 +89,15 @@ def main():
 
                         df_data = []
                         for sku, info in sorted_raport:
-                            df_data.append({
+                            rand = {
                                 'SKU': sku,
                                 'Produs': info['nume'],
                                 'ML': info['cantitate_ml'],
                                 'Bucăți': info['bucati']
-                            })
+                            }
+                            if prag is not None:
+                                rand['Scor SKU'] = round(info['scor_sku'], 2)
+                            df_data.append(rand)
 
                         df = pd.DataFrame(df_data)
                         st.dataframe(df, use_container_width=True, hide_index=True)
@@ -141,17 +150,17 @@ def main():
         if uploaded_file_bonuri is not None:
             with st.spinner("Procesare fișier..."):
                 try:
-                    file_content = uploaded_file_bonuri.read()
-                    bonuri = proceseaza_bonuri_productie(file_content)
+                    file_content = uploaded_file_bonuri.getvalue()
+                    bonuri = proceseaza_bonuri_productie(file_content, prag_fuzzy=prag)
 
                     if bonuri:
                         # Obține bonuri deja procesate pentru Smart Resume
                         order_numbers = list(set(b['order_number'] for b in bonuri))
-                        procesate = get_bonuri_procesate_pentru_comenzi(order_numbers)
+                        registru = RegistruBonuri(order_numbers)
 
                         # Marchează bonurile deja procesate
                         for bon in bonuri:
-                            bon['procesat'] = (bon['sku'], bon['order_number']) in procesate
+                            bon['procesat'] = registru.exista(bon['sku'], bon['order_number'])
 
                         # Statistici
                         total_bonuri = len(bonuri)
@@ -188,6 +197,8 @@ def main():
                                 'Comanda': b['order_number'],
                                 'Status': 'Nou' if not b.get('procesat') else 'Procesat'
                             } for b in bonuri_display])
+                            if prag is not None:
+                                df_bonuri['Scor SKU'] = [round(b['scor_sku'], 2) for b in bonuri_display]
 
                             st.dataframe(df_bonuri, use_container_width=True, hide_index=True)
 
@@ -202,19 +213,21 @@ def main():
                             # Buton pentru marcarea ca procesate
                             if st.button("Marchează toate ca procesate", type="primary"):
                                 with st.status("Salvare în baza de date...", expanded=True) as status:
-                                    saved = 0
                                     for bon in bonuri_display:
                                         if not bon.get('procesat'):
-                                            st.write(f"Salvare: {bon['sku']} (comanda #{bon['order_number']})")
-                                            if adauga_bon(
+                                            registru.adauga(
                                                 bon['sku'],
                                                 bon['nume'],
                                                 bon['cantitate'],
                                                 bon['order_id'],
                                                 bon['order_number']
-                                            ):
-                                                saved += 1
-                                    status.update(label=f"Salvate {saved} bonuri!", state="complete")
+                                            )
+                                    registru.flush()
+                                    saved = registru.scrise
+                                    if registru.erori:
+                                        status.update(label=f"Salvate {saved} bonuri, eroare: {registru.erori[-1]}", state="error")
+                                    else:
+                                        status.update(label=f"Salvate {saved} bonuri!", state="complete")
                                 st.rerun()
                         else:
                             st.info("Nu există bonuri noi de procesat.")
@@ -264,7 +277,7 @@ def main():
 
         if st.button("Reîncarcă Baza de Date"):
             with st.spinner("Încărcare din Google Sheets..."):
-                product_db, reverse_db = get_product_database()
+                product_db, reverse_db = reincarca_baza_produse()
                 st.success(f"Încărcate {len(product_db)} produse!")
 
         product_db, _ = get_product_database()
@@ -0,0 +1,324 @@
+"""
+Local analytics mirror of the Supabase tables (SQLite).
+
+Reports normally go through PostgREST: every read is a network round trip
+returning JSON rows. When ANALYTICS_MIRROR_PATH is set, the tables used by
+the reports are replicated into a local SQLite file, and readers can run
+plain SQL (joins, GROUP BY) against it, with no network at all.
+
+Replication is incremental: for each table only the rows with updated_at
+at or after the last replicated one are pulled (ordered by updated_at, id)
+and upserted by id. Deletes are detected by comparing the server row count
+with the mirrored ids; only when they differ are the server ids pulled and
+the missing rows deleted. A full refresh (full=True) rebuilds the tables.
+
+A sync pulls every table first and then applies all of them in a single
+SQLite transaction, stamped with a new generation in _mirror_state: a failed
+sync leaves the mirror as it was, and readers using snapshot() never mix
+tables from different syncs.
+
+Usage (from the app directory):
+    python -m utils.analytics_mirror [--full] [--path mirror.sqlite]
+"""
+
+import os
+import json
+import time
+import sqlite3
+import argparse
+import threading
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, List, Optional
+
+import pandas as pd
+
+from .supabase_client import get_supabase_client, fetch_all
+from .query_cache import get_data_version
+
+# Mirror file; the mirror is disabled when not set
+MIRROR_PATH = os.getenv('ANALYTICS_MIRROR_PATH')
+
+# Seconds after which ensure_fresh() pulls changes made by other processes
+MAX_AGE = int(os.getenv('ANALYTICS_MIRROR_MAX_AGE', '60'))
+
+# Mirrored tables and the columns indexed locally
+MIRRORED_TABLES = {
+    'bank_transactions': ('transaction_date', 'source', 'batch_id'),
+    'invoices': ('issue_date', 'invoice_type'),
+    'gls_parcels': ('delivery_date', 'parcel_number'),
+    'sameday_parcels': ('delivery_date', 'awb_number'),
+    'netopia_transactions': ('batch_id',),
+    'gls_borderouri': ('borderou_date',),
+    'gls_borderou_parcels': ('borderou_id',),
+    'gomag_orders': ('order_number', 'awb_norm'),
+}
+
+# Column used as replication cursor (set by trigger or on every upsert)
+CURSOR_COLUMN = 'updated_at'
+
+_sync_lock = threading.Lock()
+_last_sync: Dict = {'at': None, 'data_version': None}
+
+
+def is_enabled(path: Optional[str] = None) -> bool:
+    """True if a mirror file is configured."""
+    return bool(path or MIRROR_PATH)
+
+
+def connect(path: Optional[str] = None) -> sqlite3.Connection:
+    """Open the mirror (a new connection per call, safe across threads)."""
+    path = path or MIRROR_PATH
+    if not path:
+        raise RuntimeError("ANALYTICS_MIRROR_PATH is not set")
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    conn = sqlite3.connect(path, timeout=30)
+    conn.row_factory = sqlite3.Row
+    conn.execute('pragma journal_mode=wal')
+    conn.execute(
+        'create table if not exists _mirror_state ('
+        'table_name text primary key, cursor text, synced_at text, row_count integer, generation integer)'
+    )
+    if 'generation' not in _columns(conn, '_mirror_state'):
+        conn.execute('alter table _mirror_state add column generation integer')
+    return conn
+
+
+@contextmanager
+def snapshot(path: Optional[str] = None) -> Iterator[sqlite3.Connection]:
+    """
+    A connection that reads one consistent state of the mirror.
+
+    All queries run on it (read_rows(..., conn=conn)) see the same sync
+    generation, even if a sync commits in the meantime.
+    """
+    conn = connect(path)
+    try:
+        conn.execute('begin')
+        yield conn
+    finally:
+        conn.rollback()
+        conn.close()
+
+
+# ============================================
+# Replication
+# ============================================
+
+def _columns(conn: sqlite3.Connection, table: str) -> List[str]:
+    return [row['name'] for row in conn.execute(f'pragma table_info("{table}")')]
+
+
+def _ensure_table(conn: sqlite3.Connection, table: str, columns: Iterable[str]) -> List[str]:
+    """Create the table (untyped columns) and add any column not seen before."""
+    conn.execute(f'create table if not exists "{table}" (id primary key)')
+    existing = _columns(conn, table)
+    for column in columns:
+        if column not in existing:
+            conn.execute(f'alter table "{table}" add column "{column}"')
+            existing.append(column)
+
+    for column in MIRRORED_TABLES.get(table, ()):
+        if column in existing:
+            conn.execute(f'create index if not exists "idx_{table}_{column}" on "{table}" ("{column}")')
+    return existing
+
+
+def _sqlite_value(value):
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (dict, list)):
+        return json.dumps(value)
+    return value
+
+
+def _upsert(conn: sqlite3.Connection, table: str, rows: List[Dict]) -> None:
+    columns = list(dict.fromkeys(column for row in rows for column in row))
+    _ensure_table(conn, table, columns)
+
+    placeholders = ', '.join('?' for _ in columns)
+    names = ', '.join(f'"{column}"' for column in columns)
+    conn.executemany(
+        f'insert or replace into "{table}" ({names}) values ({placeholders})',
+        ([_sqlite_value(row.get(column)) for column in columns] for row in rows)
+    )
+
+
+def _fetch_changes(conn: sqlite3.Connection, client, table: str, full: bool) -> Dict:
+    """Pull what a sync of the table has to apply (nothing is written yet)."""
+    state = conn.execute('select cursor from _mirror_state where table_name = ?', (table,)).fetchone()
+    cursor = None if full or state is None else state['cursor']
+
+    def build_query():
+        query = client.table(table).select('*')
+        if cursor:
+            query = query.gte(CURSOR_COLUMN, cursor)
+        return query.order(CURSOR_COLUMN, nullsfirst=True).order('id')
+
+    rows = fetch_all(build_query)
+
+    deleted = []
+    if not full and _columns(conn, table):
+        local_ids = {row[0] for row in conn.execute(f'select id from "{table}"')}
+        pulled_ids = {row['id'] for row in rows}
+        if not cursor:
+            # Every server row was pulled
+            deleted = list(local_ids - pulled_ids)
+        else:
+            # Without deletes the server has exactly the mirrored rows plus the new ones
+            server_count = client.table(table).select('id', count='exact', head=True).execute().count
+            if server_count != len(local_ids | pulled_ids):
+                server_ids = {row['id'] for row in fetch_all(lambda: client.table(table).select('id').order('id'))}
+                deleted = list(local_ids - server_ids)
+
+    return {'cursor': cursor, 'rows': rows, 'deleted': deleted}
+
+
+def _apply_changes(conn: sqlite3.Connection, table: str, changes: Dict, full: bool, generation: int) -> None:
+    rows = changes['rows']
+    if full:
+        conn.execute(f'drop table if exists "{table}"')
+    if rows:
+        _upsert(conn, table, rows)
+    else:
+        _ensure_table(conn, table, ())
+    conn.executemany(f'delete from "{table}" where id = ?', ((row_id,) for row_id in changes['deleted']))
+
+    cursors = [row[CURSOR_COLUMN] for row in rows if row.get(CURSOR_COLUMN)]
+    row_count = conn.execute(f'select count(*) from "{table}"').fetchone()[0]
+    conn.execute(
+        'insert or replace into _mirror_state (table_name, cursor, synced_at, row_count, generation)'
+        ' values (?, ?, ?, ?, ?)',
+        (table, max(cursors) if cursors else changes['cursor'], time.strftime('%Y-%m-%dT%H:%M:%S'),
+         row_count, generation)
+    )
+
+
+def sync_mirror(tables: Optional[Iterable[str]] = None, full: bool = False, path: Optional[str] = None) -> Dict[str, int]:
+    """
+    Pull the changed rows of the mirrored tables into the local file.
+
+    The changes of all tables are held in memory and written in one
+    transaction: if any table fails to sync, nothing is written.
+
+    Args:
+        tables: Tables to replicate (default: all of MIRRORED_TABLES)
+        full: Rebuild the tables from scratch
+        path: Mirror file (default: ANALYTICS_MIRROR_PATH)
+
+    Returns:
+        Dict table -> number of rows pulled
+    """
+    client = get_supabase_client()
+    with _sync_lock:
+        data_version = get_data_version()
+        conn = connect(path)
+        try:
+            changes = {table: _fetch_changes(conn, client, table, full) for table in tables or MIRRORED_TABLES}
+            with conn:
+                conn.execute('begin immediate')
+                generation = conn.execute('select coalesce(max(generation), 0) + 1 from _mirror_state').fetchone()[0]
+                for table, table_changes in changes.items():
+                    _apply_changes(conn, table, table_changes, full, generation)
+        finally:
+            conn.close()
+        if not path:
+            _last_sync.update(at=time.monotonic(), data_version=data_version)
+    return {table: len(table_changes['rows']) for table, table_changes in changes.items()}
+
+
+def ensure_fresh() -> bool:
+    """
+    Make the mirror current enough to read and tell whether to use it.
+
+    Syncs incrementally after a local write (data version bump) or once the
+    last sync is older than MAX_AGE. If that sync fails (no network), the
+    mirror is left unchanged but lacks the changes that made it stale, so
+    readers are told to use Supabase instead.
+
+    Returns:
+        True if readers should query the mirror (preferably through snapshot())
+    """
+    if not is_enabled():
+        return False
+
+    stale = (
+        _last_sync['at'] is None
+        or _last_sync['data_version'] != get_data_version()
+        or time.monotonic() - _last_sync['at'] > MAX_AGE
+    )
+    if stale:
+        try:
+            sync_mirror()
+        except Exception as e:
+            print(f"Analytics mirror sync error: {e}")
+            return False
+
+    try:
+        conn = connect()
+        try:
+            return conn.execute('select count(*) from _mirror_state').fetchone()[0] > 0
+        finally:
+            conn.close()
+    except Exception as e:
+        print(f"Analytics mirror unavailable: {e}")
+        return False
+
+
+# ============================================
+# Reads
+# ============================================
+
+def read_rows(sql: str, params: Iterable = (), path: Optional[str] = None,
+              conn: Optional[sqlite3.Connection] = None) -> List[Dict]:
+    """Run a query on the mirror (or on a snapshot() connection) and return the rows as dicts."""
+    if conn is not None:
+        return [dict(row) for row in conn.execute(sql, tuple(params))]
+    conn = connect(path)
+    try:
+        return [dict(row) for row in conn.execute(sql, tuple(params))]
+    finally:
+        conn.close()
+
+
+def read_frame(sql: str, params: Iterable = (), path: Optional[str] = None,
+               conn: Optional[sqlite3.Connection] = None) -> pd.DataFrame:
+    """Run a query on the mirror (or on a snapshot() connection) and return a DataFrame."""
+    if conn is not None:
+        return pd.read_sql_query(sql, conn, params=tuple(params))
+    conn = connect(path)
+    try:
+        return pd.read_sql_query(sql, conn, params=tuple(params))
+    finally:
+        conn.close()
+
+
+def get_mirror_status(path: Optional[str] = None) -> List[Dict]:
+    """Per table: rows in the mirror, replication cursor, last sync time and generation."""
+    return read_rows(
+        'select table_name, row_count, cursor, synced_at, generation from _mirror_state order by table_name',
+        path=path
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replicate the Supabase report tables into a local SQLite file")
+    parser.add_argument('--path', default=MIRROR_PATH, help="Mirror file (default: ANALYTICS_MIRROR_PATH)")
+    parser.add_argument('--full', action='store_true', help="Rebuild the tables from scratch")
+    parser.add_argument('tables', nargs='*', help="Tables to replicate (default: all)")
+    args = parser.parse_args()
+
+    if not args.path:
+        parser.error("set ANALYTICS_MIRROR_PATH or pass --path")
+
+    t0 = time.perf_counter()
+    pulled = sync_mirror(args.tables or None, full=args.full, path=args.path)
+    for table, count in pulled.items():
+        print(f"  {table}: {count} rows pulled")
+    for row in get_mirror_status(args.path):
+        print(f"  {row['table_name']}: {row['row_count']} rows, cursor {row['cursor']}, generation {row['generation']}")
+    print(f"[Sync] {time.perf_counter() - t0:.2f}s -> {args.path}")
+
+
+if __name__ == "__main__":
+    main()
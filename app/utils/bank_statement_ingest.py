@@ -0,0 +1,162 @@
+"""
+Bank statement ingest for CSV exports
+
+Hashes every transaction up front, checks which hashes already exist with
+chunked `in_` queries and bulk-inserts only the new rows, instead of one
+select and one insert per transaction.
+"""
+
+from typing import List, Dict, Iterable
+
+from .supabase_client import get_supabase_client
+from .import_registry import (
+    compute_file_hash,
+    compute_transaction_hash,
+    get_registry_entry,
+    register_import,
+    log_registry_reuse,
+    find_existing_transaction_hashes
+)
+from .query_cache import bumps_data_version
+
+# Rows per bulk insert request
+INSERT_CHUNK_SIZE = 500
+
+
+def _is_duplicate_error(error: Exception) -> bool:
+    error_str = str(error)
+    return 'duplicate' in error_str.lower() or '23505' in error_str
+
+
+@bumps_data_version
+def insert_transactions(records: List[Dict], chunk_size: int = INSERT_CHUNK_SIZE) -> Dict:
+    """
+    Bulk-insert bank_transactions rows in chunks.
+
+    A chunk that fails (e.g. a duplicate imported before transaction_hash
+    existed) is retried row by row, so one bad row does not drop the rest.
+
+    Returns:
+        Dict with inserted, skipped and errors
+    """
+    supabase = get_supabase_client()
+    stats = {'inserted': 0, 'skipped': 0, 'errors': []}
+
+    for i in range(0, len(records), chunk_size):
+        chunk = records[i:i + chunk_size]
+        try:
+            supabase.table('bank_transactions').insert(chunk).execute()
+            stats['inserted'] += len(chunk)
+            continue
+        except Exception:
+            pass
+
+        for record in chunk:
+            try:
+                supabase.table('bank_transactions').insert(record).execute()
+                stats['inserted'] += 1
+            except Exception as e:
+                if _is_duplicate_error(e):
+                    stats['skipped'] += 1
+                else:
+                    stats['errors'].append(f"{record.get('op_reference', '')}: {str(e)}")
+
+    return stats
+
+
+def build_csv_records(transactions: Iterable[Dict], file_name: str) -> List[Dict]:
+    """Map transactions from BankStatementParser to bank_transactions rows."""
+    records = []
+    for trans in transactions:
+        referinta = trans.get('referinta', '')
+        trans_data = trans.get('data')
+        suma = trans.get('suma', 0)
+        date_str = trans_data.strftime('%Y-%m-%d') if trans_data else ''
+
+        records.append({
+            'op_reference': referinta,
+            'transaction_date': date_str,
+            'amount': suma,
+            'source': trans.get('category', ''),
+            'details': trans.get('descriere', ''),
+            'file_name': file_name,
+            'transaction_hash': compute_transaction_hash(date_str, referinta, suma),
+            'is_income': trans.get('is_income', False),
+            'is_capital_transfer': trans.get('is_capital_transfer', False),
+        })
+
+    return records
+
+
+def ingest_records(records: List[Dict]) -> Dict:
+    """
+    Insert only the records whose transaction_hash is not in the database yet.
+
+    Repeated hashes inside the same statement are counted as skipped, like
+    the existing rows.
+
+    Returns:
+        Dict with processed, inserted, skipped and errors
+    """
+    stats = {'processed': len(records), 'inserted': 0, 'skipped': 0, 'errors': []}
+
+    existing_hashes = find_existing_transaction_hashes(r['transaction_hash'] for r in records)
+
+    new_records = []
+    for record in records:
+        if record['transaction_hash'] in existing_hashes:
+            stats['skipped'] += 1
+            continue
+        existing_hashes.add(record['transaction_hash'])
+        new_records.append(record)
+
+    insert_stats = insert_transactions(new_records)
+    stats['inserted'] = insert_stats['inserted']
+    stats['skipped'] += insert_stats['skipped']
+    stats['errors'] = insert_stats['errors']
+
+    return stats
+
+
+def import_csv_statement(content: bytes, file_name: str) -> Dict:
+    """
+    Import a CSV bank statement into bank_transactions.
+
+    Identical files already in the import registry are skipped without
+    parsing; the file is registered only if every row was stored.
+
+    Returns:
+        Dict with processed, inserted, skipped, reused_files and errors
+    """
+    from .bank_statement_parser import BankStatementParser
+
+    file_hash = compute_file_hash(content)
+    entry = get_registry_entry(file_hash)
+    if entry:
+        log_registry_reuse('csv_import', [file_name], [entry])
+        return {
+            'processed': 0,
+            'inserted': 0,
+            'skipped': int(entry.get('transactions_count') or 0),
+            'reused_files': 1,
+            'errors': []
+        }
+
+    result = BankStatementParser().parse_file(content, file_name)
+    if result.get('error'):
+        return {
+            'processed': 0,
+            'inserted': 0,
+            'skipped': 0,
+            'reused_files': 0,
+            'errors': [f"{file_name}: {result['error']}"]
+        }
+
+    records = build_csv_records(result.get('transactions', []), file_name)
+    stats = ingest_records(records)
+    stats['reused_files'] = 0
+
+    if not stats['errors']:
+        register_import(file_hash, file_name, 'csv', stats)
+
+    return stats
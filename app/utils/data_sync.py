@@ -4,13 +4,28 @@ Data synchronization module for MT940 and Oblio data
 
 from typing import List, Dict, Tuple, Optional
 from datetime import datetime, date
+from collections import Counter
 import json
+import os
 
-from .supabase_client import get_supabase_client
-from .oblio_api import get_all_invoices, transform_invoice_for_db
-from .mt940_parser import extrage_referinte_op_din_mt940_folder, get_sursa_incasare
-
+import pandas as pd
 
+from .supabase_client import get_supabase_client, fetch_all
+from .oblio_api import get_all_invoices, transform_invoice_for_db
+from .mt940_parser import listeaza_fisiere_mt940, parseaza_fisiere_mt940, get_sursa_incasare
+from .import_registry import (
+    compute_path_hash,
+    compute_transaction_hash,
+    get_registry_entries,
+    register_import,
+    describe_reused_entries,
+    find_existing_transaction_hashes
+)
+from .query_cache import bumps_data_version, cached_query
+from . import analytics_mirror
+
+
+@bumps_data_version
 def import_mt940_to_supabase(
     folder_path: str,
     file_names: Optional[List[str]] = None
@@ -18,6 +33,10 @@ def import_mt940_to_supabase(
     """
     Import MT940 transactions to Supabase with deduplication.
 
+    Files already in the import registry (same content hash) are skipped
+    without parsing. For the others, only transactions whose canonical hash
+    is not yet in bank_transactions are inserted.
+
     Returns:
         Dict with import statistics
     """
@@ -36,41 +55,82 @@ def import_mt940_to_supabase(
         'inserted': 0,
         'skipped': 0,
         'failed': 0,
+        'reused_files': 0,
         'errors': []
     }
 
     try:
-        # Extract transactions from MT940 files
-        transactions = extrage_referinte_op_din_mt940_folder(folder_path)
-
-        for op_ref, amount, trans_date, batch_id, details in transactions:
-            stats['processed'] += 1
-
-            # Determine source
-            source = get_sursa_incasare(details)
-
-            # Prepare record
-            record = {
-                'op_reference': op_ref,
-                'transaction_date': trans_date,
-                'amount': amount,
-                'source': source,
-                'batch_id': batch_id,
-                'details': details,
-                'file_name': file_names[0] if file_names and len(file_names) > 0 else None
-            }
+        # Hash statement files and skip the ones already imported
+        file_paths = listeaza_fisiere_mt940(folder_path)
+        file_hashes = {path: compute_path_hash(path) for path in file_paths}
+
+        registered = get_registry_entries(list(file_hashes.values()))
+        reused_entries = [registered[file_hashes[p]] for p in file_paths if file_hashes[p] in registered]
+        new_files = [p for p in file_paths if file_hashes[p] not in registered]
+        stats['reused_files'] = len(reused_entries)
+
+        # Extract transactions from the new MT940 files
+        parsed_files = parseaza_fisiere_mt940(new_files)
+
+        records = []
+        record_files = []
+        for path, (transactions, parse_error) in zip(new_files, parsed_files):
+            if parse_error:
+                stats['failed'] += 1
+                stats['errors'].append(f"{os.path.basename(path)}: {parse_error}")
+                continue
+
+            for op_ref, amount, trans_date, batch_id, details in transactions:
+                stats['processed'] += 1
+
+                # Prepare record
+                records.append({
+                    'op_reference': op_ref,
+                    'transaction_date': trans_date,
+                    'amount': amount,
+                    'source': get_sursa_incasare(details),
+                    'batch_id': batch_id,
+                    'details': details,
+                    'file_name': file_names[0] if file_names and len(file_names) > 0 else None,
+                    'transaction_hash': compute_transaction_hash(trans_date, op_ref, amount)
+                })
+                record_files.append(path)
+
+        # Transactions from overlapping statements are already in the database
+        existing_hashes = find_existing_transaction_hashes(r['transaction_hash'] for r in records)
+        failed_files = {p for p, (_, parse_error) in zip(new_files, parsed_files) if parse_error}
+
+        for record, path in zip(records, record_files):
+            if record['transaction_hash'] in existing_hashes:
+                stats['skipped'] += 1
+                continue
 
             try:
-                # Try to insert (will fail if duplicate due to UNIQUE constraint)
+                # Insert (may still fail as duplicate for rows imported before hashing)
                 supabase.table('bank_transactions').insert(record).execute()
                 stats['inserted'] += 1
+                existing_hashes.add(record['transaction_hash'])
             except Exception as e:
                 error_str = str(e)
                 if 'duplicate' in error_str.lower() or '23505' in error_str:
                     stats['skipped'] += 1
                 else:
                     stats['failed'] += 1
-                    stats['errors'].append(f"{op_ref}: {error_str}")
+                    stats['errors'].append(f"{record['op_reference']}: {error_str}")
+                    failed_files.add(path)
+
+        # Register fully imported files so identical re-uploads are skipped
+        records_per_file = Counter(record_files)
+        for path in new_files:
+            if path in failed_files:
+                continue
+            register_import(
+                file_hashes[path],
+                os.path.basename(path),
+                'mt940',
+                {'processed': records_per_file[path]},
+                sync_log_id
+            )
 
         # Update sync log
         supabase.table('sync_logs').update({
@@ -80,7 +140,10 @@ def import_mt940_to_supabase(
             'records_inserted': stats['inserted'],
             'records_skipped': stats['skipped'],
             'records_failed': stats['failed'],
-            'details': json.dumps({'errors': stats['errors'][:10]})  # Keep first 10 errors
+            'details': json.dumps({
+                'errors': stats['errors'][:10],  # Keep first 10 errors
+                'registry_reused': describe_reused_entries(reused_entries)
+            })
         }).eq('id', sync_log_id).execute()
 
     except Exception as e:
@@ -95,6 +158,7 @@ def import_mt940_to_supabase(
     return stats
 
 
+@bumps_data_version
 def sync_oblio_invoices(
     issued_after: Optional[date] = None,
     issued_before: Optional[date] = None
@@ -173,6 +237,11 @@ def sync_oblio_invoices(
     return stats
 
 
+# Length of the ISO date prefix that identifies each period
+_PERIOD_KEY_LENGTH = {'day': 10, 'month': 7, 'year': 4}
+
+
+@cached_query
 def get_profit_data(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None,
@@ -181,6 +250,12 @@ def get_profit_data(
     """
     Get profit data grouped by time period.
 
+    Reads the bank_transactions_daily rollup (one row per day and source,
+    kept up to date by a trigger on bank_transactions), so the query size
+    depends on the number of days, not on the number of transactions.
+    Months and years are derived from the daily rows with a vectorized
+    groupby.
+
     Args:
         start_date: Start date filter
         end_date: End date filter
@@ -191,68 +266,81 @@ def get_profit_data(
     """
     supabase = get_supabase_client()
 
-    # Build query
-    query = supabase.table('bank_transactions').select('transaction_date, amount, source')
-
-    if start_date:
-        query = query.gte('transaction_date', start_date.isoformat())
-    if end_date:
-        query = query.lte('transaction_date', end_date.isoformat())
+    def build_query():
+        query = supabase.table('bank_transactions_daily').select('transaction_date, source, total_amount')
+        if start_date:
+            query = query.gte('transaction_date', start_date.isoformat())
+        if end_date:
+            query = query.lte('transaction_date', end_date.isoformat())
+        return query.order('transaction_date').order('source')
 
-    response = query.order('transaction_date').execute()
-    transactions = response.data
+    rows = fetch_all(build_query)
+    if not rows:
+        return []
 
-    # Group by period
-    grouped = {}
-    for trans in transactions:
-        trans_date = datetime.strptime(trans['transaction_date'], '%Y-%m-%d')
+    daily = pd.DataFrame(rows)
+    daily['period'] = daily['transaction_date'].str[:_PERIOD_KEY_LENGTH.get(group_by, 4)]
+    daily['total_amount'] = daily['total_amount'].astype(float)
 
-        if group_by == 'day':
-            key = trans_date.strftime('%Y-%m-%d')
-        elif group_by == 'month':
-            key = trans_date.strftime('%Y-%m')
-        else:  # year
-            key = trans_date.strftime('%Y')
+    by_source = daily.groupby(['period', 'source'], sort=True)['total_amount'].sum()
+    totals = by_source.groupby(level='period', sort=True).sum()
 
-        if key not in grouped:
-            grouped[key] = {'date': key, 'total': 0, 'by_source': {}}
-
-        grouped[key]['total'] += float(trans['amount'])
-
-        source = trans['source']
-        if source not in grouped[key]['by_source']:
-            grouped[key]['by_source'][source] = 0
-        grouped[key]['by_source'][source] += float(trans['amount'])
+    grouped = {
+        period: {'date': period, 'total': float(total), 'by_source': {}}
+        for period, total in totals.items()
+    }
+    for (period, source), amount in by_source.items():
+        grouped[period]['by_source'][source or None] = float(amount)
 
     return list(grouped.values())
 
 
+@cached_query
 def get_dashboard_stats() -> Dict:
-    """Get statistics for dashboard."""
-    supabase = get_supabase_client()
-
-    # Get total transactions
-    trans_response = supabase.table('bank_transactions').select('amount, source').execute()
-    transactions = trans_response.data
-
-    total_amount = sum(float(t['amount']) for t in transactions)
-    total_count = len(transactions)
+    """
+    Get statistics for dashboard.
 
-    # Group by source
+    Totals are aggregated in the database (bank_transactions_monthly and
+    invoices_monthly views), so only a few rows per month are transferred.
+    With the local analytics mirror enabled, the same totals are computed
+    there with SQL, without any request to Supabase.
+    """
+    if analytics_mirror.ensure_fresh():
+        with analytics_mirror.snapshot() as conn:
+            trans_rows = analytics_mirror.read_rows(
+                'select source, count(*) as transaction_count, coalesce(sum(amount), 0) as total_amount'
+                ' from bank_transactions group by source',
+                conn=conn
+            )
+            inv_rows = analytics_mirror.read_rows(
+                'select count(*) as invoice_count, coalesce(sum(total), 0) as total_amount'
+                " from invoices where invoice_type = 'Normala'",
+                conn=conn
+            )
+    else:
+        supabase = get_supabase_client()
+        trans_rows = supabase.table('bank_transactions_monthly').select('source, transaction_count, total_amount').execute().data
+        inv_rows = supabase.table('invoices_monthly').select('invoice_count, total_amount').eq('invoice_type', 'Normala').execute().data
+
+    # Transactions, grouped by source
+    total_amount = 0
+    total_count = 0
     by_source = {}
-    for t in transactions:
-        source = t['source']
+    for row in trans_rows:
+        count = int(row['transaction_count'])
+        amount = float(row['total_amount'])
+        total_amount += amount
+        total_count += count
+
+        source = row['source']
         if source not in by_source:
             by_source[source] = {'count': 0, 'amount': 0}
-        by_source[source]['count'] += 1
-        by_source[source]['amount'] += float(t['amount'])
-
-    # Get invoice stats
-    inv_response = supabase.table('invoices').select('total, invoice_type').execute()
-    invoices = inv_response.data
+        by_source[source]['count'] += count
+        by_source[source]['amount'] += amount
 
-    invoice_total = sum(float(i['total']) for i in invoices if i['invoice_type'] == 'Normala')
-    invoice_count = len([i for i in invoices if i['invoice_type'] == 'Normala'])
+    # Invoice stats
+    invoice_total = sum(float(i['total_amount']) for i in inv_rows)
+    invoice_count = sum(int(i['invoice_count']) for i in inv_rows)
 
     return {
         'bank_transactions': {
@@ -267,6 +355,42 @@ def get_dashboard_stats() -> Dict:
     }
 
 
+@cached_query
+def get_invoice_months() -> List[str]:
+    """Months (YYYY-MM) with non-canceled invoices, newest first."""
+    supabase = get_supabase_client()
+
+    response = supabase.table('invoices_monthly').select('month').eq('is_canceled', False).execute()
+    return sorted({row['month'] for row in response.data if row.get('month')}, reverse=True)
+
+
+@cached_query
+def get_invoice_stats(
+    start_date: Optional[date] = None,
+    end_date: Optional[date] = None
+) -> Dict[str, Dict]:
+    """
+    Count and total of non-canceled invoices per invoice type, for a period.
+
+    Aggregated server-side by the dashboard_invoice_stats function.
+
+    Returns:
+        Dict invoice_type -> {'count', 'amount'}
+    """
+    supabase = get_supabase_client()
+
+    response = supabase.rpc('dashboard_invoice_stats', {
+        'p_start': start_date.isoformat() if start_date else None,
+        'p_end': end_date.isoformat() if end_date else None
+    }).execute()
+
+    return {
+        row['invoice_type']: {'count': int(row['invoice_count']), 'amount': float(row['total_amount'])}
+        for row in response.data or []
+    }
+
+
+@cached_query
 def get_recent_sync_logs(limit: int = 10) -> List[Dict]:
     """Get recent sync logs."""
     supabase = get_supabase_client()
@@ -280,6 +404,7 @@ def get_recent_sync_logs(limit: int = 10) -> List[Dict]:
     return response.data
 
 
+@cached_query
 def get_opuri_report_data(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None
@@ -326,15 +451,20 @@ def get_opuri_report_data(
     return report_data
 
 
+@cached_query
 def get_invoices_for_period(
     start_date: Optional[date] = None,
-    end_date: Optional[date] = None
+    end_date: Optional[date] = None,
+    include_canceled: bool = True
 ) -> List[Dict]:
     """Get invoices for a specific period."""
     supabase = get_supabase_client()
 
     query = supabase.table('invoices').select('*')
 
+    if not include_canceled:
+        query = query.eq('is_canceled', False)
+
     if start_date:
         query = query.gte('issue_date', start_date.isoformat())
     if end_date:
@@ -344,6 +474,7 @@ def get_invoices_for_period(
     return response.data
 
 
+@cached_query
 def get_transactions_for_period(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None
@@ -4,15 +4,23 @@ Processor pentru comenzi decanturi - Migrat din aplicația Flask pregatire_decan
 Procesează fișiere Excel cu comenzi și generează rapoarte de producție
 """
 
+import numpy as np
 import pandas as pd
 import re
+import os
+import json
 import requests
 import io
+import hashlib
 import logging
-from collections import defaultdict
+import threading
+import itertools
+from collections import OrderedDict
 from datetime import datetime, timedelta
 from typing import Dict, List, Tuple, Optional, Set
-from utils.supabase_client import get_supabase_client
+from utils.supabase_client import get_supabase_client, fetch_all
+from utils.import_registry import LOOKUP_CHUNK_SIZE
+from utils.index_produse import IndexFuzzyProduse
 
 # Configurare logging
 logger = logging.getLogger(__name__)
@@ -20,10 +28,43 @@ logger = logging.getLogger(__name__)
 # URL Google Sheets pentru baza de date produse
 GOOGLE_SHEET_URL = "https://docs.google.com/spreadsheets/d/17FhRBDaknpXgsoTXOkpEWcMf2o55uOjDymlaGiiKUwU/export?format=csv&gid=1884124540"
 
-# Cache pentru baza de date produse
-_product_db_cache: Optional[Dict[str, str]] = None
-_product_db_cache_time: Optional[datetime] = None
-_product_db_reverse_cache: Optional[Dict[str, str]] = None  # SKU -> Nume
+# Copia locală a bazei de date produse (se încarcă instant la pornire)
+PRODUCT_DB_CACHE_PATH = os.getenv(
+    'PRODUCT_DB_CACHE_PATH',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'uploads', 'product_db.json')
+)
+
+# După cât timp copia este considerată veche și se reîmprospătează în fundal
+PRODUCT_DB_MAX_AGE = timedelta(hours=1)
+
+# Catalogul curent: produse (nume normalizat -> SKU), nume (SKU -> nume), versiune,
+# etag / last_modified (pentru cereri condiționate), actualizat_la
+_catalog: Optional[Dict] = None
+_catalog_lock = threading.Lock()
+_catalog_thread: Optional[threading.Thread] = None
+
+# Indexul fuzzy al catalogului curent: (versiune catalog, index)
+_index_fuzzy: Optional[Tuple[Optional[str], IndexFuzzyProduse]] = None
+
+# Statusurile comenzilor procesate implicit
+STATUSURI_IMPLICITE = ['Finalizata', 'Confirmata']
+
+# Numărul maxim de fișiere de comenzi parsate păstrate în memorie (LRU)
+MAX_COMENZI_CACHE = 8
+
+# Cache comenzi parsate: (hash conținut, statusuri, versiune bază produse) -> rezultate
+_comenzi_cache: "OrderedDict[Tuple, Dict]" = OrderedDict()
+_comenzi_cache_lock = threading.Lock()
+
+# Bonuri trimise într-un singur upsert de registrul de bonuri
+BONURI_UPSERT_CHUNK_SIZE = 200
+
+# Regex-uri precompilate pentru parsarea produselor din comenzi
+_RE_DECANT = re.compile(r'Decant (\d+) ml parfum (.+?),')
+_RE_BUCATI = re.compile(r'(\d+\.\d+)$')
+_RE_SUFIX_BUCATI = re.compile(r', \d+\.\d+$')
+_RE_NON_ALFANUMERIC = re.compile(r'[^a-z0-9]')
+_RE_SKU_DECANT = re.compile(r'-\d+$')
 
 
 def normalize_name(text: str) -> str:
@@ -41,50 +82,187 @@ def normalize_name(text: str) -> str:
     return text
 
 
+def _parseaza_catalog(content: bytes) -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Construiește (nume normalizat -> SKU, SKU -> nume) din CSV-ul exportat din Google Sheets."""
+    product_db = {}
+    reverse_db = {}
+
+    df_db = pd.read_csv(io.BytesIO(content))
+    numar = len(df_db)
+    nume_coloana = df_db['Denumire Produs'] if 'Denumire Produs' in df_db.columns else [''] * numar
+    sku_coloana = df_db['Cod Produs (SKU)'] if 'Cod Produs (SKU)' in df_db.columns else [''] * numar
+
+    for nume, sku in zip(nume_coloana, sku_coloana):
+        nume = str(nume)
+        sku = str(sku).strip()
+        if nume and sku and sku.lower() != 'nan':
+            product_db[normalize_name(nume)] = sku
+            reverse_db[sku] = nume
+
+    return product_db, reverse_db
+
+
 def load_product_db() -> Tuple[Dict[str, str], Dict[str, str]]:
     """
-    Încarcă baza de date produse din Google Sheets
+    Încarcă baza de date produse din Google Sheets (fără cache)
     Returns: (dict normalizat -> SKU, dict SKU -> nume)
     """
-    product_db = {}
-    reverse_db = {}
-
     try:
         logger.info("Downloading product database from Google Sheets...")
         response = requests.get(GOOGLE_SHEET_URL, timeout=10)
         response.raise_for_status()
 
-        df_db = pd.read_csv(io.BytesIO(response.content))
+        product_db, reverse_db = _parseaza_catalog(response.content)
+        logger.info(f"Loaded {len(product_db)} products from database")
+        return product_db, reverse_db
 
-        for _, row in df_db.iterrows():
-            nume = str(row.get('Denumire Produs', ''))
-            sku = str(row.get('Cod Produs (SKU)', '')).strip()
-            if nume and sku and sku.lower() != 'nan':
-                norm_nume = normalize_name(nume)
-                product_db[norm_nume] = sku
-                reverse_db[sku] = nume
+    except Exception as e:
+        logger.error(f"Error loading product database: {e}")
+        return {}, {}
 
-        logger.info(f"Loaded {len(product_db)} products from database")
+
+def _citeste_catalog_disc() -> Optional[Dict]:
+    """Catalogul salvat pe disc, sau None dacă lipsește / nu poate fi citit."""
+    try:
+        with open(PRODUCT_DB_CACHE_PATH, 'r', encoding='utf-8') as f:
+            catalog = json.load(f)
+        catalog['actualizat_la'] = datetime.fromisoformat(catalog['actualizat_la'])
+        return catalog
+    except FileNotFoundError:
+        return None
+    except Exception as e:
+        logger.warning(f"Product database cache unreadable: {e}")
+        return None
+
+
+def _scrie_catalog_disc(catalog: Dict) -> None:
+    """Salvează catalogul pe disc (fișier temporar + rename, fără fișiere parțiale)."""
+    try:
+        os.makedirs(os.path.dirname(PRODUCT_DB_CACHE_PATH), exist_ok=True)
+        temporar = f"{PRODUCT_DB_CACHE_PATH}.{os.getpid()}.tmp"
+        with open(temporar, 'w', encoding='utf-8') as f:
+            json.dump({**catalog, 'actualizat_la': catalog['actualizat_la'].isoformat()}, f, ensure_ascii=False)
+        os.replace(temporar, PRODUCT_DB_CACHE_PATH)
+    except Exception as e:
+        logger.warning(f"Could not save product database cache: {e}")
+
+
+def _actualizeaza_catalog(fortat: bool = False) -> bool:
+    """
+    Descarcă catalogul din Google Sheets, condiționat (ETag / Last-Modified).
+
+    Dacă exportul nu s-a schimbat (304 sau același conținut), doar momentul
+    actualizării se modifică. O eroare de rețea sau un CSV fără produse nu
+    înlocuiește catalogul existent.
+
+    Returns:
+        True dacă descărcarea a reușit
+    """
+    global _catalog
+    curent = _catalog
+
+    headers = {}
+    if curent and not fortat:
+        if curent.get('etag'):
+            headers['If-None-Match'] = curent['etag']
+        if curent.get('last_modified'):
+            headers['If-Modified-Since'] = curent['last_modified']
+
+    try:
+        logger.info("Downloading product database from Google Sheets...")
+        response = requests.get(GOOGLE_SHEET_URL, headers=headers, timeout=10)
+
+        if response.status_code == 304 and curent and curent.get('versiune'):
+            catalog = {**curent, 'actualizat_la': datetime.now()}
+        else:
+            response.raise_for_status()
+            versiune = hashlib.sha256(response.content).hexdigest()
+
+            if curent and curent.get('versiune') == versiune:
+                catalog = {**curent}
+            else:
+                product_db, reverse_db = _parseaza_catalog(response.content)
+                if not product_db:
+                    raise ValueError("CSV fără produse")
+                catalog = {'produse': product_db, 'nume': reverse_db, 'versiune': versiune}
+                logger.info(f"Loaded {len(product_db)} products from database")
+
+            catalog.update(
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+                actualizat_la=datetime.now()
+            )
 
     except Exception as e:
         logger.error(f"Error loading product database: {e}")
+        return False
+
+    _catalog = catalog
+    _scrie_catalog_disc(catalog)
+    return True
 
-    return product_db, reverse_db
+
+def _porneste_actualizare_fundal() -> None:
+    """Pornește reîmprospătarea catalogului într-un thread (cel mult unul odată)."""
+    global _catalog_thread
+    with _catalog_lock:
+        if _catalog_thread is not None and _catalog_thread.is_alive():
+            return
+        _catalog_thread = threading.Thread(target=_actualizeaza_catalog, name='product-db-refresh', daemon=True)
+        _catalog_thread.start()
 
 
 def get_product_database() -> Tuple[Dict[str, str], Dict[str, str]]:
     """
-    Returnează baza de date de produse, cu cache de 1 oră
+    Returnează baza de date de produse (stale-while-revalidate).
+
+    Catalogul se citește din copia de pe disc; dacă e mai vechi de
+    PRODUCT_DB_MAX_AGE, se returnează imediat și se reîmprospătează în fundal.
+    Doar la prima pornire, fără copie pe disc, descărcarea este sincronă.
     """
-    global _product_db_cache, _product_db_cache_time, _product_db_reverse_cache
+    global _catalog
+
+    with _catalog_lock:
+        if _catalog is None:
+            _catalog = _citeste_catalog_disc()
+        prima_incarcare = _catalog is None
+        if prima_incarcare:
+            # Fără copie locală: se descarcă o singură dată sincron; la eșec,
+            # catalogul gol se reîncearcă doar în fundal
+            if not _actualizeaza_catalog():
+                _catalog = {'produse': {}, 'nume': {}, 'versiune': None, 'actualizat_la': datetime.min}
+
+    catalog = _catalog
+    if not prima_incarcare and datetime.now() - catalog['actualizat_la'] >= PRODUCT_DB_MAX_AGE:
+        _porneste_actualizare_fundal()
+
+    return catalog['produse'], catalog['nume']
+
+
+def reincarca_baza_produse() -> Tuple[Dict[str, str], Dict[str, str]]:
+    """Descarcă acum catalogul (buton din pagină); la eșec rămâne catalogul existent."""
+    get_product_database()
+    _actualizeaza_catalog(fortat=True)
+    return _catalog['produse'], _catalog['nume']
+
+
+def get_versiune_catalog() -> Optional[str]:
+    """Versiunea catalogului curent (hash-ul CSV-ului), pentru cheile de cache."""
+    get_product_database()
+    return _catalog.get('versiune') if _catalog else None
+
 
-    if _product_db_cache is not None and _product_db_cache_time is not None:
-        if datetime.now() - _product_db_cache_time < timedelta(hours=1):
-            return _product_db_cache, _product_db_reverse_cache
+def get_index_fuzzy() -> IndexFuzzyProduse:
+    """Indexul fuzzy al catalogului curent, construit o singură dată per versiune."""
+    global _index_fuzzy
+    product_db, _ = get_product_database()
+    versiune = get_versiune_catalog()
 
-    _product_db_cache, _product_db_reverse_cache = load_product_db()
-    _product_db_cache_time = datetime.now()
-    return _product_db_cache, _product_db_reverse_cache
+    index = _index_fuzzy
+    if index is None or index[0] != versiune or len(index[1]) != len(product_db):
+        index = (versiune, IndexFuzzyProduse(product_db))
+        _index_fuzzy = index
+    return index[1]
 
 
 def extrage_info_produs(text_produs: str) -> Optional[Tuple[str, int, int]]:
@@ -160,132 +338,273 @@ def detecteaza_coloane(df: pd.DataFrame) -> Tuple[str, str]:
     return coloana_status, coloana_produse
 
 
-def proceseaza_comenzi(file_content: bytes) -> Tuple[Dict, Dict, int, int]:
+def detecteaza_coloane_comanda(df: pd.DataFrame) -> Tuple[Optional[str], Optional[str]]:
     """
-    Procesează fișierul cu comenzi și returnează raportul de producție
+    Detectează coloanele cu ID-ul și numărul comenzii (ultima potrivire câștigă)
+    Returns: (coloana_order_id, coloana_order_number)
+    """
+    coloana_order_id = None
+    coloana_order_number = None
+    for col in df.columns:
+        col_lower = str(col).lower()
+        if 'order_id' in col_lower or 'orderid' in col_lower or col_lower == 'id':
+            coloana_order_id = col
+        if 'order_number' in col_lower or 'ordernumber' in col_lower or 'numar' in col_lower:
+            coloana_order_number = col
+    return coloana_order_id, coloana_order_number
+
+
+def parseaza_comenzi(
+    df: pd.DataFrame,
+    statuses: List[str] = None,
+    prag_fuzzy: Optional[float] = None
+) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Parsează comenzile cu statusurile date într-un singur tabel de produse.
+
+    Coloana de produse este despărțită după ' | ' (explode), iar ml, bucățile
+    și numele se extrag vectorizat, cu regex-uri precompilate. SKU-ul se
+    obține printr-un singur map al numelor normalizate pe baza de date produse.
+    Din tabelul rezultat se construiesc atât raportul agregat, cât și bonurile.
+
+    Cu prag_fuzzy, numele negăsite exact se caută în indexul fuzzy al
+    catalogului și se acceptă SKU-urile cu scor cel puțin egal cu pragul.
 
     Args:
-        file_content: Conținutul fișierului Excel ca bytes
+        df: Comenzile citite din Excel
+        statuses: Statusurile comenzilor de procesat (implicit Finalizata, Confirmata)
+        prag_fuzzy: Scorul minim (0..1) al potrivirii aproximative; None = doar exact
 
     Returns:
-        (raport_decanturi, raport_intregi, comenzi_finalizate, total_comenzi)
+        (comenzi_filtrate, produse) - produse are câte un rând per produs, cu
+        indexul comenzii și coloanele tip ('decant' / 'intreg'), nume,
+        cantitate_ml, bucati, sku (plus scor_sku cu prag_fuzzy: 1 exact,
+        scorul potrivirii aproximative, 0 negăsit)
     """
-    product_db, reverse_db = get_product_database()
+    if statuses is None:
+        statuses = STATUSURI_IMPLICITE
 
-    df = pd.read_excel(io.BytesIO(file_content))
+    product_db, _ = get_product_database()
     coloana_status, coloana_produse = detecteaza_coloane(df)
 
-    df_finalizate = df[df[coloana_status].astype(str).str.contains('Finalizata|Confirmata', case=False, na=False)]
+    comenzi = df[df[coloana_status].astype(str).str.contains('|'.join(statuses), case=False, na=False)]
 
-    raport = defaultdict(lambda: {'nume': '', 'cantitate_ml': 0, 'bucati': 0})
-    raport_intregi = defaultdict(lambda: {'nume': '', 'bucati': 0, 'sku': 'N/A'})
+    produs = comenzi[coloana_produse].astype(str).str.split(' | ', regex=False).explode().str.strip()
 
-    for idx, row in df_finalizate.iterrows():
-        produse_text = str(row[coloana_produse])
-        produse = produse_text.split(' | ')
+    # Textele de produs se repetă între comenzi: fiecare text distinct se parsează o singură dată
+    coduri, texte = pd.factorize(produs.astype(object))
+    texte = pd.Series(texte, dtype=object)
 
-        for produs in produse:
-            info = extrage_info_produs(produs.strip())
-            if info:
-                nume_parfum, cantitate_ml, numar_bucati = info
+    decant = texte.str.extract(_RE_DECANT)
+    are_decant = texte.str.contains('Decant', regex=False)
+    este_decant = are_decant & decant[0].notna()
 
-                produs_clean = re.sub(r', \d+\.\d+$', '', produs.strip())
-                produs_norm = normalize_name(produs_clean)
+    bucati = texte.str.extract(_RE_BUCATI)[0]
+    produs_norm = (
+        texte.str.replace(_RE_SUFIX_BUCATI, '', regex=True)
+        .str.lower()
+        .str.replace('parfum', '', regex=False)
+        .str.replace(_RE_NON_ALFANUMERIC, '', regex=True)
+    )
+    sku = produs_norm.map(product_db).astype(object)
 
-                sku = product_db.get(produs_norm, 'N/A')
+    if prag_fuzzy is not None:
+        scor_sku = sku.notna().astype(float)
+        index = get_index_fuzzy()
+        for pozitie in np.flatnonzero(sku.isna().to_numpy()):
+            gasit = index.cauta(produs_norm.iat[pozitie], prag_fuzzy)
+            if gasit:
+                sku.iat[pozitie], scor_sku.iat[pozitie] = gasit
 
-                if sku != 'N/A' and not re.search(r'-\d+$', sku):
-                    continue
-
-                raport[sku]['nume'] = nume_parfum
-                raport[sku]['cantitate_ml'] = cantitate_ml
-                raport[sku]['bucati'] += numar_bucati
-            else:
-                info_intreg = extrage_info_produs_intreg(produs.strip())
-                if info_intreg:
-                    nume_produs, numar_bucati = info_intreg
+    sku = sku.fillna('N/A')
 
-                    produs_clean = re.sub(r', \d+\.\d+$', '', produs.strip())
-                    produs_norm = normalize_name(produs_clean)
+    # Decanturile cu SKU de produs întreg (fără sufix -ml) nu intră în raport
+    sku_decant_invalid = (sku != 'N/A') & ~sku.str.contains(_RE_SKU_DECANT)
+    nume_intreg = texte.where(bucati.isna(), texte.str.rsplit(',', n=1).str[0].str.strip())
 
-                    sku = product_db.get(produs_norm, 'N/A')
+    atribute = pd.DataFrame({
+        'tip': este_decant.map({True: 'decant', False: 'intreg'}),
+        'nume': decant[1].str.strip().where(este_decant, nume_intreg),
+        'cantitate_ml': pd.to_numeric(decant[0], errors='coerce').fillna(0).astype(int),
+        'bucati': bucati.astype(float).fillna(1.0).astype(int),
+        'sku': sku,
+        'pastrat': (este_decant & ~sku_decant_invalid) | ~are_decant,
+    })
+    if prag_fuzzy is not None:
+        atribute['scor_sku'] = scor_sku
 
-                    key = sku if sku != 'N/A' else nume_produs
-                    raport_intregi[key]['nume'] = nume_produs
-                    raport_intregi[key]['bucati'] += numar_bucati
-                    raport_intregi[key]['sku'] = sku
+    produse = atribute.iloc[coduri].set_axis(produs.index)
+    produse = produse[produse.pop('pastrat')]
 
-    return dict(raport), dict(raport_intregi), len(df_finalizate), len(df)
+    return comenzi, produse
 
 
-def proceseaza_bonuri_productie(file_content: bytes, statuses: List[str] = None) -> List[Dict]:
+def raport_din_produse(produse: pd.DataFrame) -> Tuple[Dict, Dict]:
     """
-    Procesează fișierul și extrage bonuri de producție NEAGREGATE (per comandă)
+    Raportul de producție agregat din tabelul de produse (parseaza_comenzi)
 
-    Args:
-        file_content: Conținutul fișierului Excel ca bytes
-        statuses: Lista de statusuri de comenzi de procesat
+    Cu potrivire fuzzy (coloana scor_sku), fiecare intrare are și scor_sku,
+    cel mai mic scor dintre produsele agregate.
 
     Returns:
-        Lista de bonuri cu SKU, nume produs, cantitate, order_id, order_number
+        (raport_decanturi, raport_intregi)
     """
-    if statuses is None:
-        statuses = ['Finalizata', 'Confirmata']
+    cu_scor = 'scor_sku' in produse.columns
+
+    decanturi = produse[produse['tip'] == 'decant']
+    agregat = decanturi.groupby('sku', sort=False).agg(
+        nume=('nume', 'last'), cantitate_ml=('cantitate_ml', 'last'), bucati=('bucati', 'sum')
+    )
+    raport = {
+        sku: {'nume': nume, 'cantitate_ml': int(cantitate_ml), 'bucati': int(bucati)}
+        for sku, nume, cantitate_ml, bucati in agregat.itertuples()
+    }
+    if cu_scor:
+        for sku, scor in decanturi.groupby('sku', sort=False)['scor_sku'].min().items():
+            raport[sku]['scor_sku'] = float(scor)
+
+    intregi = produse[produse['tip'] == 'intreg']
+    cheie = intregi['sku'].where(intregi['sku'] != 'N/A', intregi['nume'])
+    agregat = intregi.groupby(cheie, sort=False).agg(
+        nume=('nume', 'last'), bucati=('bucati', 'sum'), sku=('sku', 'last')
+    )
+    raport_intregi = {
+        key: {'nume': nume, 'bucati': int(bucati), 'sku': sku}
+        for key, nume, bucati, sku in agregat.itertuples()
+    }
+    if cu_scor:
+        for key, scor in intregi.groupby(cheie, sort=False)['scor_sku'].min().items():
+            raport_intregi[key]['scor_sku'] = float(scor)
+
+    return raport, raport_intregi
+
+
+def bonuri_din_produse(comenzi: pd.DataFrame, produse: pd.DataFrame) -> List[Dict]:
+    """
+    Bonurile de producție NEAGREGATE (câte unul per decant și comandă)
+    din tabelul de produse (parseaza_comenzi); cu potrivire fuzzy, fiecare
+    bon are și scor_sku
+    """
+    _, reverse_db = get_product_database()
+    coloana_order_id, coloana_order_number = detecteaza_coloane_comanda(comenzi)
 
-    product_db, reverse_db = get_product_database()
+    # ID-urile se calculează o dată per comandă, nu per produs
+    id_comenzi = {}
+    for idx, row in zip(comenzi.index, comenzi.to_dict('records')):
+        order_id = int(row[coloana_order_id]) if coloana_order_id and pd.notna(row.get(coloana_order_id)) else idx
+        order_number = int(row[coloana_order_number]) if coloana_order_number and pd.notna(row.get(coloana_order_number)) else order_id
+        id_comenzi[idx] = (order_id, order_number)
 
-    df = pd.read_excel(io.BytesIO(file_content))
-    coloana_status, coloana_produse = detecteaza_coloane(df)
+    decanturi = produse[produse['tip'] == 'decant']
 
-    # Detectare coloana Order ID
-    coloana_order_id = None
-    coloana_order_number = None
-    for col in df.columns:
-        col_lower = str(col).lower()
-        if 'order_id' in col_lower or 'orderid' in col_lower or col_lower == 'id':
-            coloana_order_id = col
-        if 'order_number' in col_lower or 'ordernumber' in col_lower or 'numar' in col_lower:
-            coloana_order_number = col
+    # Obține numele corect din baza de date
+    nume_corect = decanturi['sku'].map(reverse_db).fillna(decanturi['nume'])
 
-    # Filtrare după status
-    status_pattern = '|'.join(statuses)
-    df_filtrate = df[df[coloana_status].astype(str).str.contains(status_pattern, case=False, na=False)]
+    bonuri = [
+        {
+            'sku': sku,
+            'nume': nume,
+            'cantitate': int(bucati),
+            'cantitate_ml': int(cantitate_ml),
+            'order_id': id_comenzi[idx][0],
+            'order_number': id_comenzi[idx][1]
+        }
+        for idx, sku, nume, bucati, cantitate_ml in zip(
+            decanturi.index, decanturi['sku'], nume_corect, decanturi['bucati'], decanturi['cantitate_ml']
+        )
+    ]
+    if 'scor_sku' in decanturi.columns:
+        for bon, scor in zip(bonuri, decanturi['scor_sku']):
+            bon['scor_sku'] = float(scor)
+    return bonuri
 
-    bonuri = []
 
-    for idx, row in df_filtrate.iterrows():
-        order_id = int(row[coloana_order_id]) if coloana_order_id and pd.notna(row.get(coloana_order_id)) else idx
-        order_number = int(row[coloana_order_number]) if coloana_order_number and pd.notna(row.get(coloana_order_number)) else order_id
+def _comenzi_parsate(file_content: bytes, statuses: List[str] = None, prag_fuzzy: Optional[float] = None) -> Dict:
+    """
+    Comenzile parsate dintr-un fișier, din cache dacă același conținut a mai fost procesat.
 
-        produse_text = str(row[coloana_produse])
-        produse = produse_text.split(' | ')
+    Cheia este hash-ul SHA-256 al conținutului, statusurile, versiunea bazei
+    de date produse (SKU-urile depind de ea) și pragul potrivirii fuzzy. Intrarea păstrează tabelul de
+    produse, iar raportul și bonurile se adaugă la prima cerere, deci ambele tab-uri
+    și toate rerun-urile Streamlit folosesc aceeași parsare.
+    """
+    cheie = (
+        hashlib.sha256(file_content).hexdigest(),
+        tuple(STATUSURI_IMPLICITE if statuses is None else statuses),
+        get_versiune_catalog(),
+        prag_fuzzy,
+    )
+
+    with _comenzi_cache_lock:
+        intrare = _comenzi_cache.get(cheie)
+        if intrare is not None:
+            _comenzi_cache.move_to_end(cheie)
+            return intrare
 
-        for produs in produse:
-            info = extrage_info_produs(produs.strip())
-            if info:
-                nume_parfum, cantitate_ml, numar_bucati = info
+    df = pd.read_excel(io.BytesIO(file_content))
+    comenzi, produse = parseaza_comenzi(df, statuses, prag_fuzzy)
+    intrare = {'comenzi': comenzi, 'produse': produse, 'total': len(df)}
 
-                produs_clean = re.sub(r', \d+\.\d+$', '', produs.strip())
-                produs_norm = normalize_name(produs_clean)
+    with _comenzi_cache_lock:
+        _comenzi_cache[cheie] = intrare
+        while len(_comenzi_cache) > MAX_COMENZI_CACHE:
+            _comenzi_cache.popitem(last=False)
+    return intrare
 
-                sku = product_db.get(produs_norm, 'N/A')
 
-                if sku != 'N/A' and not re.search(r'-\d+$', sku):
-                    continue
+def goleste_cache_comenzi() -> None:
+    """Golește cache-ul de comenzi parsate."""
+    with _comenzi_cache_lock:
+        _comenzi_cache.clear()
 
-                # Obține numele corect din baza de date
-                nume_corect = reverse_db.get(sku, nume_parfum)
 
-                bonuri.append({
-                    'sku': sku,
-                    'nume': nume_corect,
-                    'cantitate': numar_bucati,
-                    'cantitate_ml': cantitate_ml,
-                    'order_id': order_id,
-                    'order_number': order_number
-                })
+def proceseaza_comenzi(file_content: bytes, prag_fuzzy: Optional[float] = None) -> Tuple[Dict, Dict, int, int]:
+    """
+    Procesează fișierul cu comenzi și returnează raportul de producție
 
-    return bonuri
+    Args:
+        file_content: Conținutul fișierului Excel ca bytes
+        prag_fuzzy: Scorul minim al potrivirii aproximative a SKU-urilor (None = doar exact)
+
+    Returns:
+        (raport_decanturi, raport_intregi, comenzi_finalizate, total_comenzi)
+    """
+    intrare = _comenzi_parsate(file_content, prag_fuzzy=prag_fuzzy)
+    if 'raport' not in intrare:
+        intrare['raport'] = raport_din_produse(intrare['produse'])
+
+    raport, raport_intregi = intrare['raport']
+    return (
+        {sku: dict(info) for sku, info in raport.items()},
+        {key: dict(info) for key, info in raport_intregi.items()},
+        len(intrare['comenzi']),
+        intrare['total'],
+    )
+
+
+def proceseaza_bonuri_productie(
+    file_content: bytes,
+    statuses: List[str] = None,
+    prag_fuzzy: Optional[float] = None
+) -> List[Dict]:
+    """
+    Procesează fișierul și extrage bonuri de producție NEAGREGATE (per comandă)
+
+    Args:
+        file_content: Conținutul fișierului Excel ca bytes
+        statuses: Lista de statusuri de comenzi de procesat
+        prag_fuzzy: Scorul minim al potrivirii aproximative a SKU-urilor (None = doar exact)
+
+    Returns:
+        Lista de bonuri cu SKU, nume produs, cantitate, order_id, order_number
+        (plus scor_sku cu prag_fuzzy)
+    """
+    intrare = _comenzi_parsate(file_content, statuses, prag_fuzzy)
+    if 'bonuri' not in intrare:
+        intrare['bonuri'] = bonuri_din_produse(intrare['comenzi'], intrare['produse'])
+
+    # Copii: pagina marchează bonurile (procesat) pe listă
+    return [dict(bon) for bon in intrare['bonuri']]
 
 
 # ============ SUPABASE DATABASE FUNCTIONS ============
@@ -295,17 +614,26 @@ def get_bonuri_procesate_pentru_comenzi(order_numbers: List[int]) -> Set[Tuple[s
     Returnează toate bonurile procesate pentru o listă de comenzi.
     Util pentru Smart Resume - verifică ce s-a procesat deja.
 
+    Comenzile sunt citite în loturi (.in_ pe order_number), paginat.
+
     Returns:
         Set de tuple (sku, order_number) deja procesate
     """
+    order_numbers = [o for o in dict.fromkeys(order_numbers) if o is not None]
     if not order_numbers:
         return set()
 
     try:
         client = get_supabase_client()
-        response = client.table('bonuri_procesate').select('sku, order_number').in_('order_number', order_numbers).execute()
-
-        return {(row['sku'], row['order_number']) for row in response.data}
+        procesate = set()
+        for i in range(0, len(order_numbers), LOOKUP_CHUNK_SIZE):
+            chunk = order_numbers[i:i + LOOKUP_CHUNK_SIZE]
+            rows = fetch_all(
+                lambda: client.table('bonuri_procesate').select('sku, order_number').in_('order_number', chunk).order('id')
+            )
+            procesate.update((row['sku'], row['order_number']) for row in rows)
+
+        return procesate
     except Exception as e:
         logger.error(f"Error reading from Supabase: {e}")
         return set()
@@ -378,9 +706,9 @@ def get_statistici_azi() -> Dict:
         client = get_supabase_client()
         today = datetime.now().strftime('%Y-%m-%d')
 
-        response = client.table('bonuri_procesate').select('*').eq('data_procesare', today).execute()
-
-        bonuri = response.data
+        bonuri = fetch_all(
+            lambda: client.table('bonuri_procesate').select('order_number, cantitate').eq('data_procesare', today).order('id')
+        )
 
         return {
             'total_bonuri': len(bonuri),
@@ -392,6 +720,146 @@ def get_statistici_azi() -> Dict:
         return {'total_bonuri': 0, 'total_comenzi': 0, 'total_cantitate': 0}
 
 
+class RegistruBonuri:
+    """
+    Registru de bonuri pentru o rulare (un lot de comenzi).
+
+    Bonurile deja procesate pentru comenzile lotului se preîncarcă o singură
+    dată (get_bonuri_procesate_pentru_comenzi), iar verificările de existență
+    se fac din memorie. Bonurile reușite se păstrează într-un tampon și se
+    scriu în upsert-uri de câte BONURI_UPSERT_CHUNK_SIZE (la umplerea
+    tamponului și la flush()), deci o rulare de câteva sute de bonuri face
+    doar câteva cereri către Supabase. Statisticile rulării se țin incremental.
+
+    Folosire:
+        with RegistruBonuri(order_numbers) as registru:
+            if not registru.exista(sku, order_number):
+                ...
+                registru.adauga(sku, nume, cantitate, order_id, order_number)
+    """
+
+    def __init__(self, order_numbers: Optional[List[int]] = None, marime_lot: int = BONURI_UPSERT_CHUNK_SIZE):
+        self.marime_lot = marime_lot
+        self.procesate: Set[Tuple[str, int]] = set()
+        self.cereri = 0
+        self.scrise = 0
+        self.erori: List[str] = []
+        self._tampon: "OrderedDict[Tuple, Dict]" = OrderedDict()
+        self._comenzi: Set[int] = set()
+        self._fara_comanda = itertools.count()
+        self._statistici = {'total_bonuri': 0, 'total_comenzi': 0, 'total_cantitate': 0.0}
+        self._lock = threading.RLock()
+
+        if order_numbers:
+            self.preincarca(order_numbers)
+
+    def preincarca(self, order_numbers: List[int]) -> int:
+        """
+        Încarcă bonurile deja procesate pentru comenzile date.
+
+        Returns:
+            Numărul de bonuri (sku, comandă) găsite
+        """
+        order_numbers = [o for o in dict.fromkeys(order_numbers) if o is not None]
+        procesate = get_bonuri_procesate_pentru_comenzi(order_numbers)
+        with self._lock:
+            self.cereri += -(-len(order_numbers) // LOOKUP_CHUNK_SIZE)
+            self.procesate.update(procesate)
+        return len(procesate)
+
+    def exista(self, sku: str, order_number: int) -> bool:
+        """Verifică din memorie dacă bonul (sku, comandă) este deja procesat."""
+        with self._lock:
+            return (sku, order_number) in self.procesate
+
+    def adauga(self, sku: str, nume: str, cantitate: float, order_id: int = None, order_number: int = None) -> bool:
+        """
+        Înregistrează un bon procesat cu succes (scris la următorul flush).
+
+        Returns:
+            True dacă bonul este nou, False dacă era deja înregistrat
+        """
+        rand = {
+            'sku': sku,
+            'nume_produs': nume,
+            'cantitate': cantitate,
+            'order_id': order_id,
+            'order_number': order_number,
+            'data_procesare': datetime.now().strftime('%Y-%m-%d')
+        }
+
+        with self._lock:
+            if order_number is not None:
+                cheie = (sku, order_number)
+                nou = cheie not in self.procesate
+                self.procesate.add(cheie)
+            else:
+                # Fără comandă nu există conflict (sku, order_number): fiecare bon e un rând nou
+                cheie = (sku, None, next(self._fara_comanda))
+                nou = True
+
+            self._tampon[cheie] = rand
+            if nou:
+                self._statistici['total_bonuri'] += 1
+                self._statistici['total_cantitate'] += float(cantitate or 0)
+                if order_number:
+                    self._comenzi.add(order_number)
+                    self._statistici['total_comenzi'] = len(self._comenzi)
+
+            if len(self._tampon) >= self.marime_lot:
+                self.flush()
+        return nou
+
+    def flush(self) -> int:
+        """
+        Scrie bonurile din tampon în Supabase (upsert în loturi).
+
+        Un lot eșuat rămâne în tampon și se reîncearcă la următorul flush.
+
+        Returns:
+            Numărul de bonuri scrise la acest apel (total rulare: self.scrise)
+        """
+        with self._lock:
+            if not self._tampon:
+                return 0
+
+            client = get_supabase_client()
+            chei = list(self._tampon)
+            scrise = 0
+            for i in range(0, len(chei), self.marime_lot):
+                lot = chei[i:i + self.marime_lot]
+                self.cereri += 1
+                try:
+                    client.table('bonuri_procesate').upsert(
+                        [self._tampon[cheie] for cheie in lot],
+                        on_conflict='sku,order_number'
+                    ).execute()
+                except Exception as e:
+                    logger.error(f"Error saving to Supabase: {e}")
+                    self.erori.append(str(e))
+                    continue
+
+                for cheie in lot:
+                    del self._tampon[cheie]
+                scrise += len(lot)
+
+            self.scrise += scrise
+            logger.info(f"Bonuri saved: {scrise} ({len(self._tampon)} pending)")
+            return scrise
+
+    def get_statistici(self) -> Dict:
+        """Statisticile rulării: bonuri noi, comenzi, cantitate, bonuri încă nescrise."""
+        with self._lock:
+            return {**self._statistici, 'in_asteptare': len(self._tampon)}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.flush()
+        return False
+
+
 def genereaza_tabel_raport(raport: Dict) -> List[Dict]:
     """
     Generează datele pentru tabel în format optimizat
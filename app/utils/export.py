@@ -1,15 +1,154 @@
 """
 Export functionalitate pentru generarea fisierului Excel final
+
+Sectiunile GLS/Sameday/Netopia se pregatesc ca DataFrame-uri (status, randuri
+goale si coloane derivate calculate pe coloane), iar randurile sunt scrise
+secvential, cu openpyxl in modul write-only si stiluri partajate.
 """
 
 import pandas as pd
+from copy import copy
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
-from openpyxl.utils.dataframe import dataframe_to_rows
-from typing import List, Dict, Optional
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.utils import get_column_letter
+from typing import List, Dict, Optional, Tuple
 from io import BytesIO
 from datetime import datetime
 
+from .mt940_parser import clasifica_incasare
+
+
+# Coloanele export-ului: (titlu, latime)
+COLOANE_EXPORT = [
+    ("Data OP", 12), ("Numar OP", 18), ("Borderou", 35), ("Curier", 12),
+    ("AWB/Order ID", 20), ("Nr. Factura", 15), ("Suma", 12), ("Status", 10),
+]
+
+
+def _fill(culoare: str) -> PatternFill:
+    return PatternFill(start_color=culoare, end_color=culoare, fill_type="solid")
+
+
+def _stiluri_export() -> List[NamedStyle]:
+    """Stilurile partajate ale export-ului (un singur obiect per stil, nu per celula)."""
+    thin = Side(style='thin')
+    return [
+        NamedStyle(name="exp_header", font=Font(bold=True, color="FFFFFF"), fill=_fill("1e293b"),
+                   alignment=Alignment(horizontal='center'),
+                   border=Border(left=thin, right=thin, top=thin, bottom=thin)),
+        NamedStyle(name="exp_GLS", font=copy(DEFAULT_FONT), fill=_fill("3b82f6")),
+        NamedStyle(name="exp_Sameday", font=copy(DEFAULT_FONT), fill=_fill("ef4444")),
+        NamedStyle(name="exp_Netopia", font=copy(DEFAULT_FONT), fill=_fill("06b6d4")),
+        NamedStyle(name="exp_bold", font=Font(bold=True)),
+    ]
+
+
+def _indexeaza_incasari(incasari_mt940: List[tuple]) -> Tuple[Dict, Dict, List]:
+    """
+    Construieste o singura data cautarile in incasarile MT940.
+
+    Returns:
+        Tuple: ({(sursa, suma): (op_ref, data, batchid)} - ultima incasare castiga,
+                {batchid: pozitie} - prima incasare cu batchid-ul,
+                [(pozitie, suma)] - incasarile Netopia, in ordine)
+    """
+    pe_sursa_suma = {}
+    pe_batchid = {}
+    netopia = []
+    for pozitie, (op_ref, suma, data, batchid, details) in enumerate(incasari_mt940):
+        sursa, _ = clasifica_incasare(details)
+        pe_sursa_suma[(sursa, round(suma, 2))] = (op_ref, data, batchid)
+        if batchid:
+            pe_batchid.setdefault(batchid, pozitie)
+        if sursa == "Netopia":
+            netopia.append((pozitie, suma))
+    return pe_sursa_suma, pe_batchid, netopia
+
+
+def _op_netopia(batchid, suma_total: float, incasari_mt940: List[tuple],
+                pe_batchid: Dict, netopia: List) -> Tuple[str, str]:
+    """Prima incasare cu acelasi batchid sau o incasare Netopia cu suma apropiata."""
+    pozitii = []
+    if batchid and batchid in pe_batchid:
+        pozitii.append(pe_batchid[batchid])
+    pozitie_suma = next((p for p, suma in netopia if abs(suma - suma_total) < 1), None)
+    if pozitie_suma is not None:
+        pozitii.append(pozitie_suma)
+
+    if not pozitii:
+        return "", ""
+    op_ref, _, data, _, _ = incasari_mt940[min(pozitii)]
+    return op_ref, data
+
+
+def _coloana(df: pd.DataFrame, coloane: Tuple[str, ...], implicit) -> pd.Series:
+    """Prima coloana existenta din `coloane`, altfel o coloana constanta."""
+    for col in coloane:
+        if col in df.columns:
+            return df[col]
+    return pd.Series([implicit] * len(df), index=df.index, dtype=object)
+
+
+def pregateste_sectiune(potrivite: pd.DataFrame, coloane_id: Tuple[str, ...]) -> pd.DataFrame:
+    """
+    Randurile unei sectiuni (un borderou) ca DataFrame: id, factura, suma, status.
+
+    Status = OK pentru facturile prezente (nenule si nevide), altfel LIPSA.
+    """
+    factura = _coloana(potrivite, ('numar factura',), '')
+    prezenta = factura.notna()
+
+    return pd.DataFrame({
+        'id': _coloana(potrivite, coloane_id, '').astype(object),
+        'factura': factura.astype(object).where(prezenta, ''),
+        'suma': _coloana(potrivite, ('suma',), 0).astype(object),
+        'status': (prezenta & factura.fillna('').astype(bool)).map({True: 'OK', False: 'LIPSA'}),
+    }, index=potrivite.index)
+
+
+class _ScriitorExport:
+    """Scrie randurile export-ului secvential (openpyxl write-only)."""
+
+    def __init__(self):
+        self.wb = Workbook(write_only=True)
+        for stil in _stiluri_export():
+            self.wb.add_named_style(stil)
+
+        self.ws = self.wb.create_sheet("Facturi Grupate")
+        for col, (_, latime) in enumerate(COLOANE_EXPORT, 1):
+            self.ws.column_dimensions[get_column_letter(col)].width = latime
+
+        self.ws.append([self._celula(titlu, "exp_header") for titlu, _ in COLOANE_EXPORT])
+
+    def _celula(self, valoare, stil: str) -> WriteOnlyCell:
+        cell = WriteOnlyCell(self.ws, value=valoare)
+        cell.style = stil
+        return cell
+
+    def sectiune(self, curier: str, borderou: str, op_ref: str, data_op: str,
+                 randuri: pd.DataFrame, suma_total: float) -> None:
+        """Scrie randurile unui borderou, randul TOTAL si un rand gol."""
+        stil_curier = f"exp_{curier}"
+        primul = True
+        for id_, factura, suma, status in randuri.itertuples(index=False, name=None):
+            if primul:
+                prefix = [data_op, op_ref, borderou, self._celula(curier, stil_curier)]
+                primul = False
+            else:
+                prefix = [None, None, None, self._celula(None, stil_curier)]
+            self.ws.append(prefix + [id_, factura, suma, status])
+
+        self.ws.append([None] * 5 + [self._celula("TOTAL:", "exp_bold"), self._celula(suma_total, "exp_bold")])
+        self.ws.append([])
+
+    def salveaza(self) -> BytesIO:
+        buffer = BytesIO()
+        self.wb.save(buffer)
+        buffer.seek(0)
+        return buffer
+
 
 def genereaza_export_excel(
     rezultate_gls: List[Dict],
@@ -23,180 +162,29 @@ def genereaza_export_excel(
     Returns:
         BytesIO: Buffer cu fisierul Excel
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Facturi Grupate"
-
-    # Stiluri
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill(start_color="1e293b", end_color="1e293b", fill_type="solid")
-    gls_fill = PatternFill(start_color="3b82f6", end_color="3b82f6", fill_type="solid")
-    sameday_fill = PatternFill(start_color="ef4444", end_color="ef4444", fill_type="solid")
-    netopia_fill = PatternFill(start_color="06b6d4", end_color="06b6d4", fill_type="solid")
-    border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
-
-    # Header
-    headers = ["Data OP", "Numar OP", "Borderou", "Curier", "AWB/Order ID", "Nr. Factura", "Suma", "Status"]
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center')
-        cell.border = border
-
-    # Ajusteaza latimea coloanelor
-    ws.column_dimensions['A'].width = 12
-    ws.column_dimensions['B'].width = 18
-    ws.column_dimensions['C'].width = 35
-    ws.column_dimensions['D'].width = 12
-    ws.column_dimensions['E'].width = 20
-    ws.column_dimensions['F'].width = 15
-    ws.column_dimensions['G'].width = 12
-    ws.column_dimensions['H'].width = 10
-
-    row_num = 2
-
-    # Creeaza dictionar cu incasari MT940 pentru potrivire
-    incasari_dict = {}
-    for op_ref, suma, data, batchid, details in incasari_mt940:
-        details_upper = details.upper()
-        if "GLS" in details_upper or "GENERAL LOGISTICS" in details_upper:
-            sursa = "GLS"
-        elif "DELIVERY SOLUTIONS" in details_upper:
-            sursa = "Sameday"
-        elif "NETOPIA" in details_upper or "BATCHID" in details_upper:
-            sursa = "Netopia"
-        else:
-            sursa = "Altul"
-
-        key = (sursa, round(suma, 2))
-        incasari_dict[key] = (op_ref, data, batchid)
-
-    # Proceseaza GLS
-    for rezultat in rezultate_gls:
-        borderou = rezultat['borderou']
-        suma_total = rezultat['suma_total']
-        potrivite = rezultat['potrivite']
-
-        # Cauta OP-ul potrivit
-        key = ("GLS", round(suma_total, 2))
-        op_info = incasari_dict.get(key, ("", "", None))
-        op_ref, data_op, _ = op_info
-
-        first_row = True
-        for _, row in potrivite.iterrows():
-            awb = row.get('AWB_normalizat', '')
-            factura = row.get('numar factura', '')
-            suma = row.get('suma', 0)
-
-            ws.cell(row=row_num, column=1, value=data_op if first_row else "")
-            ws.cell(row=row_num, column=2, value=op_ref if first_row else "")
-            ws.cell(row=row_num, column=3, value=borderou if first_row else "")
-            cell_curier = ws.cell(row=row_num, column=4, value="GLS" if first_row else "")
-            cell_curier.fill = gls_fill
-            ws.cell(row=row_num, column=5, value=awb)
-            ws.cell(row=row_num, column=6, value=factura if pd.notna(factura) else "")
-            ws.cell(row=row_num, column=7, value=suma)
-            ws.cell(row=row_num, column=8, value="OK" if pd.notna(factura) and factura else "LIPSA")
-
-            first_row = False
-            row_num += 1
-
-        # Rand total
-        ws.cell(row=row_num, column=6, value="TOTAL:")
-        ws.cell(row=row_num, column=6).font = Font(bold=True)
-        ws.cell(row=row_num, column=7, value=suma_total)
-        ws.cell(row=row_num, column=7).font = Font(bold=True)
-        row_num += 2
-
-    # Proceseaza Sameday
-    for rezultat in rezultate_sameday:
-        borderou = rezultat['borderou']
-        suma_total = rezultat['suma_total']
-        potrivite = rezultat['potrivite']
-
-        # Cauta OP-ul potrivit
-        key = ("Sameday", round(suma_total, 2))
-        op_info = incasari_dict.get(key, ("", "", None))
-        op_ref, data_op, _ = op_info
-
-        first_row = True
-        for _, row in potrivite.iterrows():
-            awb = row.get('AWB_normalizat', row.get('AWB', ''))
-            factura = row.get('numar factura', '')
-            suma = row.get('suma', 0)
-
-            ws.cell(row=row_num, column=1, value=data_op if first_row else "")
-            ws.cell(row=row_num, column=2, value=op_ref if first_row else "")
-            ws.cell(row=row_num, column=3, value=borderou if first_row else "")
-            cell_curier = ws.cell(row=row_num, column=4, value="Sameday" if first_row else "")
-            cell_curier.fill = sameday_fill
-            ws.cell(row=row_num, column=5, value=awb)
-            ws.cell(row=row_num, column=6, value=factura if pd.notna(factura) else "")
-            ws.cell(row=row_num, column=7, value=suma)
-            ws.cell(row=row_num, column=8, value="OK" if pd.notna(factura) and factura else "LIPSA")
-
-            first_row = False
-            row_num += 1
-
-        # Rand total
-        ws.cell(row=row_num, column=6, value="TOTAL:")
-        ws.cell(row=row_num, column=6).font = Font(bold=True)
-        ws.cell(row=row_num, column=7, value=suma_total)
-        ws.cell(row=row_num, column=7).font = Font(bold=True)
-        row_num += 2
-
-    # Proceseaza Netopia
+    scriitor = _ScriitorExport()
+
+    # Cautarile in incasarile MT940, construite o singura data
+    pe_sursa_suma, pe_batchid, netopia = _indexeaza_incasari(incasari_mt940)
+
+    # Proceseaza GLS si Sameday (OP-ul potrivit dupa sursa si suma)
+    for rezultate, curier, coloane_id in [
+        (rezultate_gls, "GLS", ('AWB_normalizat',)),
+        (rezultate_sameday, "Sameday", ('AWB_normalizat', 'AWB')),
+    ]:
+        for rezultat in rezultate:
+            suma_total = rezultat['suma_total']
+            op_ref, data_op, _ = pe_sursa_suma.get((curier, round(suma_total, 2)), ("", "", None))
+
+            randuri = pregateste_sectiune(rezultat['potrivite'], coloane_id)
+            scriitor.sectiune(curier, rezultat['borderou'], op_ref, data_op, randuri, suma_total)
+
+    # Proceseaza Netopia (OP-ul potrivit prin batchid sau suma)
     for rezultat in rezultate_netopia:
-        borderou = rezultat['borderou']
         suma_total = rezultat['suma_total']
-        batchid = rezultat.get('batchid')
-        potrivite = rezultat['potrivite']
-
-        # Cauta OP-ul potrivit prin batchid sau suma
-        op_ref, data_op = "", ""
-        for (op, suma, data, bid, details) in incasari_mt940:
-            if batchid and bid == batchid:
-                op_ref, data_op = op, data
-                break
-            elif "NETOPIA" in details.upper() and abs(suma - suma_total) < 1:
-                op_ref, data_op = op, data
-                break
-
-        first_row = True
-        for _, row in potrivite.iterrows():
-            order_id = row.get('numar_comanda_norm', row.get('numar comanda', ''))
-            factura = row.get('numar factura', '')
-            suma = row.get('suma', 0)
-
-            ws.cell(row=row_num, column=1, value=data_op if first_row else "")
-            ws.cell(row=row_num, column=2, value=op_ref if first_row else "")
-            ws.cell(row=row_num, column=3, value=borderou if first_row else "")
-            cell_curier = ws.cell(row=row_num, column=4, value="Netopia" if first_row else "")
-            cell_curier.fill = netopia_fill
-            ws.cell(row=row_num, column=5, value=order_id)
-            ws.cell(row=row_num, column=6, value=factura if pd.notna(factura) else "")
-            ws.cell(row=row_num, column=7, value=suma)
-            ws.cell(row=row_num, column=8, value="OK" if pd.notna(factura) and factura else "LIPSA")
-
-            first_row = False
-            row_num += 1
-
-        # Rand total
-        ws.cell(row=row_num, column=6, value="TOTAL:")
-        ws.cell(row=row_num, column=6).font = Font(bold=True)
-        ws.cell(row=row_num, column=7, value=suma_total)
-        ws.cell(row=row_num, column=7).font = Font(bold=True)
-        row_num += 2
-
-    # Salveaza in buffer
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-
-    return buffer
+        op_ref, data_op = _op_netopia(rezultat.get('batchid'), suma_total, incasari_mt940, pe_batchid, netopia)
+
+        randuri = pregateste_sectiune(rezultat['potrivite'], ('numar_comanda_norm', 'numar comanda'))
+        scriitor.sectiune("Netopia", rezultat['borderou'], op_ref, data_op, randuri, suma_total)
+
+    return scriitor.salveaza()
@@ -0,0 +1,116 @@
+"""
+Cache pentru export-ul OP-uri (XLSX generat)
+
+Un export este memorat cu cheia (perioada, hash Gomag, versiunea datelor).
+Versiunea datelor = ultima sincronizare din sync_logs care a scris randuri +
+cel mai recent updated_at din fiecare tabela citita de export. Orice
+sincronizare sau modificare schimba versiunea, deci exportul se regenereaza
+automat; descarcarile repetate pe aceleasi date sunt servite din memorie.
+
+Citirile exportului trec prin query_cache (local procesului, cu TTL), care nu
+vede scrierile altor procese; de aceea, cand versiunea datelor se schimba,
+query_cache este golit inainte de generare, ca sub cheia noua sa nu ajunga un
+export construit din randuri vechi.
+"""
+
+from collections import OrderedDict
+from io import BytesIO
+from typing import Optional, Tuple
+
+import pandas as pd
+
+from .supabase_client import get_supabase_client
+from .gomag_cache import hash_gomag
+from .opuri_processor import generate_opuri_export
+from .query_cache import clear_query_cache
+
+# Tabelele citite de generate_opuri_export (coloana updated_at, vezi migrarea)
+TABELE_EXPORT_OPURI = (
+    'bank_transactions', 'gls_borderouri', 'gls_borderou_parcels', 'gls_parcels',
+    'sameday_parcels', 'netopia_transactions', 'gomag_orders',
+)
+
+# Numarul maxim de exporturi pastrate in memorie (LRU)
+MAX_EXPORTURI_CACHE = 16
+
+_cache_exporturi: "OrderedDict[Tuple, bytes]" = OrderedDict()
+
+# Versiunea datelor la ultima generare (query_cache este la zi fata de ea)
+_versiune_vazuta: Optional[Tuple] = None
+
+
+def versiune_date() -> Optional[Tuple]:
+    """
+    Versiunea curenta a datelor folosite de export.
+
+    Returns:
+        Tuple (id ultimul sync_log cu randuri scrise, max updated_at per tabela),
+        sau None daca versiunea nu poate fi determinata (fara cache)
+    """
+    client = get_supabase_client()
+    if not client:
+        return None
+
+    try:
+        # Sincronizarile fara randuri noi nu schimba datele; actualizarile apar in updated_at
+        log = client.table('sync_logs').select('id').gt('records_inserted', 0).order('id', desc=True).limit(1).execute()
+        versiune = [log.data[0]['id'] if log.data else None]
+
+        for tabel in TABELE_EXPORT_OPURI:
+            result = client.table(tabel).select('updated_at').order('updated_at', desc=True).limit(1).execute()
+            versiune.append(result.data[0]['updated_at'] if result.data else None)
+
+        return tuple(versiune)
+    except Exception as e:
+        print(f"Export cache: Nu s-a putut citi versiunea datelor: {e}")
+        return None
+
+
+def goleste_cache_exporturi() -> None:
+    """Goleste cache-ul de exporturi OP-uri."""
+    _cache_exporturi.clear()
+
+
+def genereaza_export_opuri_memorat(
+    start_date: str,
+    end_date: str,
+    gomag_df: Optional[pd.DataFrame] = None
+) -> Tuple[BytesIO, bool]:
+    """
+    Export-ul OP-uri pentru o perioada, din cache daca datele nu s-au schimbat.
+
+    Fara versiune a datelor (Supabase indisponibil) sau pentru un frame Gomag
+    care nu vine din gomag_cache.incarca_gomag (fara hash), exportul se genereaza mereu.
+
+    Returns:
+        Tuple: (buffer XLSX, True daca a fost servit din cache)
+    """
+    gomag_hash = hash_gomag(gomag_df)
+    versiune = versiune_date()
+    if versiune is None or (gomag_df is not None and gomag_hash is None):
+        return generate_opuri_export(start_date, end_date, gomag_df), False
+
+    perioada = (start_date, end_date, gomag_hash)
+    cheie = perioada + (versiune,)
+
+    if cheie in _cache_exporturi:
+        _cache_exporturi.move_to_end(cheie)
+        return BytesIO(_cache_exporturi[cheie]), True
+
+    # Datele s-au schimbat (poate in alt proces): citirile memorate pot fi vechi
+    global _versiune_vazuta
+    if versiune != _versiune_vazuta:
+        clear_query_cache()
+        _versiune_vazuta = versiune
+
+    buffer = generate_opuri_export(start_date, end_date, gomag_df)
+
+    # Exporturile aceleiasi perioade pe versiuni mai vechi ale datelor nu mai pot fi servite
+    for veche in [k for k in _cache_exporturi if k[:3] == perioada]:
+        del _cache_exporturi[veche]
+
+    _cache_exporturi[cheie] = buffer.getvalue()
+    while len(_cache_exporturi) > MAX_EXPORTURI_CACHE:
+        _cache_exporturi.popitem(last=False)
+
+    return buffer, False
@@ -9,6 +9,7 @@ import requests
 from typing import List, Dict, Optional
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from .query_cache import bumps_data_version
 
 load_dotenv()
 
@@ -270,6 +271,7 @@ def get_existing_gls_parcels() -> set:
         return set()
 
 
+@bumps_data_version
 def save_gls_parcels_to_supabase(parcels: List[Dict], sync_month: str = None) -> Dict:
     """
     Salveaza coletele GLS in Supabase.
@@ -17,6 +17,7 @@ from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from io import BytesIO
 from dotenv import load_dotenv
+from .query_cache import bumps_data_version
 
 load_dotenv()
 
@@ -197,6 +198,82 @@ def download_gls_borderou_attachment(email_id) -> Tuple[Optional[bytes], Optiona
         mail.logout()
 
 
+# Valorile text pe care pandas.read_excel le considera lipsa (NaN)
+_VALORI_LIPSA = {
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+}
+
+_DATA_TRANSFER_RE = re.compile(r'(\d{2})\.(\d{2})\.(\d{4})')
+
+# Coloanele pastrate dupa header: 0 (pentru randul cu data transferului), 1 = Număr colet,
+# 3 = Livrat la data, 4 = Sumă ramburs, 6 = Postal Address
+_COLOANE_COLET = (0, 1, 3, 4, 6)
+
+
+def _normalizeaza_celula(value):
+    """Aduce valoarea unei celule openpyxl la forma data de pandas.read_excel."""
+    if isinstance(value, str):
+        return None if value in _VALORI_LIPSA else value
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    return value
+
+
+def _coloane_colet(row: tuple) -> tuple:
+    """Pastreaza din rand doar coloanele folosite pentru colete."""
+    return tuple(row[i] if len(row) > i else None for i in _COLOANE_COLET)
+
+
+def _citeste_randuri_xlsx(xlsx_bytes: bytes) -> Tuple[List[tuple], List[tuple], Optional[int]]:
+    """
+    Citeste prima foaie XLSX in mod read-only si gaseste header-ul
+    (randul care contine "colet" si "ramburs") in aceeasi trecere.
+
+    Randurile de dupa header se pastreaza doar cu coloanele folosite.
+    Randurile goale de la final sunt eliminate (ca la pandas.read_excel),
+    astfel ca indexul randurilor ramane acelasi ca in implementarea bazata
+    pe DataFrame.
+
+    Returns:
+        Tuple: (randuri pana la header inclusiv, colete dupa header, header_row)
+        - daca header-ul nu se gaseste, header_row este None si toate
+        randurile sunt in prima lista
+    """
+    from openpyxl import load_workbook
+
+    wb = load_workbook(BytesIO(xlsx_bytes), read_only=True, data_only=True)
+    try:
+        ws = wb.worksheets[0]
+        randuri = []
+        colete = []
+        header_row = None
+        ultimul_nevid = 0
+        for values in ws.iter_rows(values_only=True):
+            row = tuple(_normalizeaza_celula(v) for v in values)
+            nevid = any(v is not None for v in row)
+
+            if header_row is not None:
+                colete.append(_coloane_colet(row))
+                if nevid:
+                    ultimul_nevid = len(colete)
+                continue
+
+            randuri.append(row)
+            if nevid:
+                ultimul_nevid = len(randuri)
+                row_str = ' '.join(str(v).lower() for v in row if v is not None)
+                if 'colet' in row_str and 'ramburs' in row_str:
+                    header_row = len(randuri) - 1
+                    ultimul_nevid = 0
+
+        if header_row is None:
+            return randuri[:ultimul_nevid], [], None
+        return randuri, colete[:ultimul_nevid], header_row
+    finally:
+        wb.close()
+
+
 def parse_gls_borderou_xlsx(xlsx_bytes: bytes) -> Dict:
     """
     Parseaza fisierul XLSX cu borderou GLS.
@@ -208,6 +285,10 @@ def parse_gls_borderou_xlsx(xlsx_bytes: bytes) -> Dict:
     - Row 8+: Coletele
     - Last row: Total (suma in coloana 4)
 
+    Foaia este citita in mod read-only (openpyxl), header-ul este gasit la
+    aceeasi trecere prin randuri, iar blocul de colete este procesat pe
+    coloane (pandas), nu rand cu rand.
+
     Args:
         xlsx_bytes: Continutul fisierului XLSX
 
@@ -217,68 +298,66 @@ def parse_gls_borderou_xlsx(xlsx_bytes: bytes) -> Dict:
     import pandas as pd
 
     try:
-        # Citeste XLSX fara header
-        df = pd.read_excel(BytesIO(xlsx_bytes), header=None)
+        randuri, bloc, header_row = _citeste_randuri_xlsx(xlsx_bytes)
+        if header_row is None:
+            header_row = 7  # Default
+            bloc = [_coloane_colet(row) for row in randuri[header_row + 1:]]
 
-        # Extrage data transferului din row 5
+        # Extrage data transferului din row 5 (coloana 0 este pastrata si dupa header)
         transfer_date = None
-        if len(df) > 5:
-            date_text = str(df.iloc[5][0])
-            date_match = re.search(r'(\d{2})\.(\d{2})\.(\d{4})', date_text)
+        if len(randuri) + len(bloc) > 5:
+            rand_data = randuri[5] if len(randuri) > 5 else bloc[5 - len(randuri)]
+            date_text = str(rand_data[0]) if rand_data and rand_data[0] is not None else 'nan'
+            date_match = _DATA_TRANSFER_RE.search(date_text)
             if date_match:
                 day, month, year = date_match.groups()
                 transfer_date = f"{year}-{month}-{day}"
 
-        # Gaseste randul cu header-uri (contine "colet" si "ramburs")
-        header_row = 7  # Default
-        for i in range(len(df)):
-            row_str = ' '.join(str(v).lower() for v in df.iloc[i].values if pd.notna(v))
-            if 'colet' in row_str and 'ramburs' in row_str:
-                header_row = i
-                break
-
-        # Extrage coletele (de la header_row + 1 pana la ultima linie)
-        parcels = []
-        total_from_file = 0
-
-        for i in range(header_row + 1, len(df)):
-            row = df.iloc[i]
-
-            # Coloana 1 = Număr colet
-            parcel_number = row[1] if len(row) > 1 and pd.notna(row[1]) else None
-
-            # Coloana 4 = Sumă ramburs
-            amount = row[4] if len(row) > 4 and pd.notna(row[4]) else 0
-
-            # Coloana 6 = Postal Address (contine numele)
-            address = str(row[6]) if len(row) > 6 and pd.notna(row[6]) else ''
-
-            # Coloana 3 = Livrat la data
-            delivery_date = row[3] if len(row) > 3 and pd.notna(row[3]) else None
-
-            # Daca nu are parcel_number, e linia de total
-            if parcel_number is None or str(parcel_number) == 'nan':
-                # Aceasta e linia de total
-                try:
-                    total_from_file = float(amount)
-                except:
-                    pass
-                continue
-
-            # Extrage numele din adresa (prima parte inainte de RO-)
-            recipient_name = address.split('RO-')[0].strip() if 'RO-' in address else address[:50]
-
-            try:
-                cod_amount = float(amount)
-            except:
-                cod_amount = 0
-
-            parcels.append({
-                'parcel_number': str(int(parcel_number)) if isinstance(parcel_number, float) else str(parcel_number),
+        # Blocul de colete (de la header_row + 1 pana la ultima linie), pe coloane
+        coloane = {
+            index: pd.Series([row[pozitie] for row in bloc], dtype=object)
+            for pozitie, index in enumerate(_COLOANE_COLET)
+        }
+        del randuri, bloc  # Coloanele tin referinte doar la valorile folosite
+
+        # Coloana 1 = Număr colet, 3 = Livrat la data, 4 = Sumă ramburs, 6 = Postal Address
+        parcel_numbers = coloane[1]
+        delivery_dates = coloane[3]
+        amounts = coloane[4]
+        amounts = amounts.where(amounts.notna(), 0)
+        addresses = coloane[6]
+
+        # Randurile fara parcel_number sunt linii de total; se pastreaza ultima suma valida
+        is_parcel = parcel_numbers.notna() & (parcel_numbers.astype(str) != 'nan')
+        sume_total = pd.to_numeric(amounts[~is_parcel], errors='coerce').dropna()
+        total_from_file = float(sume_total.iloc[-1]) if len(sume_total) else 0
+
+        parcel_numbers = parcel_numbers[is_parcel]
+        cod_amounts = pd.to_numeric(amounts[is_parcel], errors='coerce').fillna(0).astype(float)
+
+        # Extrage numele din adresa (prima parte inainte de RO-)
+        addresses = addresses[is_parcel].where(addresses[is_parcel].notna(), '').astype(str)
+        are_ro = addresses.str.contains('RO-', regex=False)
+        recipient_names = addresses.str.split('RO-', n=1, regex=False).str[0].str.strip().where(
+            are_ro, addresses.str[:50]
+        )
+
+        parcel_strs = parcel_numbers.map(
+            lambda v: str(int(v)) if isinstance(v, float) else str(v)
+        )
+        delivery_strs = delivery_dates[is_parcel].map(lambda v: str(v) if v else None)
+
+        parcels = [
+            {
+                'parcel_number': parcel_number,
                 'cod_amount': cod_amount,
                 'recipient_name': recipient_name,
-                'delivery_date': str(delivery_date) if delivery_date else None
-            })
+                'delivery_date': delivery_date
+            }
+            for parcel_number, cod_amount, recipient_name, delivery_date in zip(
+                parcel_strs.tolist(), cod_amounts.tolist(), recipient_names.tolist(), delivery_strs.tolist()
+            )
+        ]
 
         # Calculeaza totalul din colete
         calculated_total = round(sum(p['cod_amount'] for p in parcels), 2)
@@ -306,6 +385,7 @@ def parse_gls_borderou_xlsx(xlsx_bytes: bytes) -> Dict:
         }
 
 
+@bumps_data_version
 def sync_gls_borderouri_from_email(days_back: int = 60) -> Dict:
     """
     Sincronizeaza borderouri GLS din email in Supabase.
@@ -400,6 +480,7 @@ def sync_gls_borderouri_from_email(days_back: int = 60) -> Dict:
     return stats
 
 
+@bumps_data_version
 def match_borderouri_with_bank_transactions() -> Dict:
     """
     Potriveste borderourile GLS cu tranzactiile bancare.
@@ -0,0 +1,140 @@
+"""
+Cache columnar pentru exporturile Gomag (XLSX)
+
+Un export Gomag este parsat o singura data: rezultatul, cu coloanele deja
+normalizate (nume de coloane, AWB, numar comanda), se salveaza ca fisier
+Arrow IPC, cu cheia = hash-ul SHA-256 al continutului XLSX. Incarcarile
+urmatoare ale aceluiasi fisier sunt citite prin memory-map, fara openpyxl.
+"""
+
+import os
+import hashlib
+from io import BytesIO
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+try:
+    import pyarrow as pa
+except ImportError:  # Fara pyarrow, exportul se parseaza la fiecare incarcare
+    pa = None
+
+
+GOMAG_CACHE_DIR = os.getenv(
+    'GOMAG_CACHE_DIR',
+    os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'uploads', 'gomag_cache')
+)
+
+# Marcaj (in DataFrame.attrs) pentru frame-urile deja normalizate
+ATTR_NORMALIZAT = 'gomag_normalizat'
+ATTR_HASH = 'gomag_hash'
+
+
+def normalizeaza_gomag(gomag_df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Normalizeaza exportul Gomag o singura data.
+
+    - nume de coloane fara spatii la capete, cu litere mici
+    - awb_norm: AWB fara spatii si fara 0 la inceput (opuri_processor)
+    - awb_norm_gls: AWB fara spatii si fara 0 la inceput (borderouri GLS)
+    - awb_norm_sameday: AWB fara spatii la capete (borderouri Sameday)
+    - numar_comanda_norm: numarul comenzii fara spatii la capete
+
+    Un frame deja normalizat este returnat neschimbat; altfel se lucreaza pe o copie.
+    """
+    if gomag_df.attrs.get(ATTR_NORMALIZAT):
+        return gomag_df
+
+    gomag = gomag_df.copy()
+    gomag.columns = gomag.columns.str.strip().str.lower()
+
+    if 'awb' in gomag.columns:
+        awb = gomag['awb'].astype(str)
+        gomag['awb_norm'] = awb.str.strip().str.replace(' ', '').str.lstrip('0')
+        gomag['awb_norm_gls'] = awb.str.replace(' ', '').str.lstrip('0')
+        gomag['awb_norm_sameday'] = awb.str.strip()
+
+    if 'numar comanda' in gomag.columns:
+        gomag['numar_comanda_norm'] = gomag['numar comanda'].astype(str).str.strip()
+
+    gomag.attrs[ATTR_NORMALIZAT] = True
+    return gomag
+
+
+def _cale_cache(file_hash: str) -> str:
+    return os.path.join(GOMAG_CACHE_DIR, f"{file_hash}.arrow")
+
+
+def _citeste_cache(path: str) -> pd.DataFrame:
+    """Citeste un export din cache prin memory-map."""
+    with pa.memory_map(path, 'r') as source:
+        gomag = pa.ipc.open_file(source).read_all().to_pandas()
+
+    # Arrow intoarce None pentru celulele goale; read_excel(dtype=str) dadea NaN
+    gomag = gomag.astype(object).where(gomag.notna(), np.nan)
+    gomag.attrs[ATTR_NORMALIZAT] = True
+    return gomag
+
+
+def _scrie_cache(gomag: pd.DataFrame, path: str) -> None:
+    """Scrie exportul normalizat in cache (atomic, prin fisier temporar)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(gomag, preserve_index=False)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp_path, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp_path, path)
+
+
+def incarca_gomag(sursa: Union[bytes, str, BytesIO], use_cache: bool = True) -> pd.DataFrame:
+    """
+    Incarca un export Gomag (XLSX), din cache daca a mai fost incarcat.
+
+    Args:
+        sursa: Continutul XLSX (bytes), calea catre fisier sau un file-like (upload Streamlit)
+        use_cache: False = parseaza mereu XLSX-ul si nu scrie in cache
+
+    Returns:
+        DataFrame normalizat (vezi normalizeaza_gomag)
+    """
+    if isinstance(sursa, str):
+        with open(sursa, 'rb') as f:
+            content = f.read()
+    elif hasattr(sursa, 'read'):
+        if hasattr(sursa, 'seek'):
+            sursa.seek(0)
+        content = sursa.read()
+    else:
+        content = sursa
+
+    file_hash = hashlib.sha256(content).hexdigest()
+    path = _cale_cache(file_hash)
+
+    if use_cache and pa is not None and os.path.exists(path):
+        try:
+            gomag = _citeste_cache(path)
+            gomag.attrs[ATTR_HASH] = file_hash
+            return gomag
+        except Exception as e:
+            print(f"Gomag cache: Nu s-a putut citi {path}: {e}")
+
+    gomag = normalizeaza_gomag(pd.read_excel(BytesIO(content), dtype=str))
+    gomag.attrs[ATTR_HASH] = file_hash
+
+    if use_cache and pa is not None:
+        try:
+            _scrie_cache(gomag, path)
+        except Exception as e:
+            print(f"Gomag cache: Nu s-a putut salva {path}: {e}")
+
+    return gomag
+
+
+def hash_gomag(gomag_df: Optional[pd.DataFrame]) -> Optional[str]:
+    """Hash-ul continutului XLSX din care a fost incarcat exportul (daca e cunoscut)."""
+    if gomag_df is None:
+        return None
+    return gomag_df.attrs.get(ATTR_HASH)
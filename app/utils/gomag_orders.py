@@ -0,0 +1,333 @@
+"""
+Comenzi Gomag persistate in Supabase (tabela gomag_orders)
+
+La fiecare upload al exportului Gomag se sincronizeaza doar comenzile noi sau
+modificate (delta dupa un hash al randului). Export-ul OP-uri poate rezolva
+apoi AWB-urile si comenzile direct din tabela indexata, fara fisierul Gomag,
+prin cautari in lot (`in_` pe coloane indexate) in loc de o cautare per colet.
+
+Aceleasi functii de rezolvare lucreaza si pe un DataFrame Gomag in memorie,
+cu acelasi rezultat ca match_awb_with_gomag. Un AWB comun mai multor comenzi
+se rezolva la prima comanda din export: la sincronizare aceasta este marcata
+cu awb_principal, iar cautarile in tabela o prefera pe ea.
+"""
+
+import bisect
+import hashlib
+import json
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+
+from .supabase_client import get_supabase_client
+from .gomag_cache import normalizeaza_gomag
+from .import_registry import LOOKUP_CHUNK_SIZE
+from .query_cache import bumps_data_version
+
+# Randuri per upsert
+UPSERT_CHUNK_SIZE = 500
+
+# AWB-uri per cerere de cautare dupa prefix (or=(awb_norm.like.X*,...))
+PREFIX_CHUNK_SIZE = 30
+
+_COLOANE_COMANDA = ('numar factura', 'total comanda', 'total factura')
+
+
+def normalizeaza_awb(awb) -> str:
+    """Normalizeaza un AWB la fel ca in Gomag (fara spatii si fara 0 la inceput)."""
+    return str(awb).strip().replace(' ', '').lstrip('0')
+
+
+def curata_numar_factura(numar_factura) -> str:
+    """Numarul facturii ca text ('' daca lipseste), fara zecimale '.0'."""
+    numar_factura = str(numar_factura).strip()
+    if numar_factura and numar_factura != 'nan':
+        try:
+            return str(int(float(numar_factura)))
+        except:
+            return numar_factura
+    return ''
+
+
+def _text(value) -> Optional[str]:
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return None
+    return str(value)
+
+
+def _chunks(values: List, size: int) -> Iterable[List]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+# ============================================
+# Sincronizare export Gomag -> gomag_orders
+# ============================================
+
+def _construieste_inregistrari(gomag: pd.DataFrame) -> List[Dict]:
+    """
+    Cate o inregistrare per comanda (prima aparitie din export).
+
+    awb_principal marcheaza prima comanda din export pentru fiecare AWB, cea
+    aleasa de match_awb_with_gomag cand AWB-ul este comun mai multor comenzi.
+    """
+    col_comanda = 'numar comanda' if 'numar comanda' in gomag.columns else 'id'
+
+    records = {}
+    principale = {}  # awb_norm -> prima comanda din export
+    for row in gomag.to_dict('records'):
+        order_number = _text(row.get(col_comanda))
+        order_number = order_number.strip() if order_number else None
+        awb = _text(row.get('awb'))
+        awb_norm = normalizeaza_awb(awb) if awb is not None else None
+        if order_number and awb_norm is not None:
+            principale.setdefault(awb_norm, order_number)
+        if not order_number or order_number in records:
+            continue
+
+        record = {
+            'order_number': order_number,
+            'awb': awb,
+            'awb_norm': awb_norm,
+            'awb_principal': awb_norm is None or principale[awb_norm] == order_number,
+            'invoice_number': _text(row.get('numar factura')),
+            'total_comanda': _text(row.get('total comanda')),
+            'total_factura': _text(row.get('total factura')),
+        }
+        record['row_hash'] = hashlib.md5(
+            json.dumps(record, sort_keys=True).encode()
+        ).hexdigest()
+        records[order_number] = record
+
+    return list(records.values())
+
+
+@bumps_data_version
+def sincronizeaza_comenzi_gomag(gomag_df: pd.DataFrame, file_name: Optional[str] = None) -> Dict:
+    """
+    Sincronizeaza un export Gomag in tabela gomag_orders.
+
+    Se trimit doar comenzile noi sau cele modificate fata de ultima sincronizare.
+
+    Returns:
+        Dict cu statistici (processed, inserted, updated, skipped, errors)
+    """
+    supabase = get_supabase_client()
+    gomag = normalizeaza_gomag(gomag_df)
+
+    stats = {'processed': 0, 'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': []}
+
+    if 'numar comanda' not in gomag.columns and 'id' not in gomag.columns:
+        stats['errors'].append("Gomag: Lipseste coloana 'Numar Comanda'")
+        return stats
+
+    records = _construieste_inregistrari(gomag)
+    stats['processed'] = len(records)
+
+    # Hash-urile existente, doar pentru comenzile din export
+    existing = {}
+    for chunk in _chunks([r['order_number'] for r in records], LOOKUP_CHUNK_SIZE):
+        response = supabase.table('gomag_orders').select('order_number, row_hash').in_('order_number', chunk).execute()
+        for row in response.data or []:
+            existing[row['order_number']] = row['row_hash']
+
+    delta = []
+    for record in records:
+        if record['order_number'] not in existing:
+            stats['inserted'] += 1
+        elif existing[record['order_number']] != record['row_hash']:
+            stats['updated'] += 1
+        else:
+            stats['skipped'] += 1
+            continue
+        delta.append({**record, 'updated_at': datetime.now().isoformat()})
+
+    for chunk in _chunks(delta, UPSERT_CHUNK_SIZE):
+        try:
+            supabase.table('gomag_orders').upsert(chunk, on_conflict='order_number').execute()
+        except Exception as e:
+            stats['errors'].append(f"Gomag upsert: {str(e)}")
+
+    try:
+        supabase.table('sync_logs').insert({
+            'sync_type': 'gomag_sync',
+            'status': 'completed' if not stats['errors'] else 'failed',
+            'file_names': [file_name] if file_name else [],
+            'finished_at': datetime.now().isoformat(),
+            'records_processed': stats['processed'],
+            'records_inserted': stats['inserted'] + stats['updated'],
+            'records_skipped': stats['skipped'],
+            'records_failed': len(stats['errors']),
+            'details': json.dumps({'errors': stats['errors'][:10], 'updated': stats['updated']})
+        }).execute()
+    except Exception as e:
+        print(f"Gomag: Nu s-a putut scrie sync log: {e}")
+
+    return stats
+
+
+# ============================================
+# Rezolvare AWB -> (Order ID, Numar Factura)
+# ============================================
+
+def _rezultat_din_rand(row) -> Tuple[str, str]:
+    order_id = str(row.get('numar comanda', row.get('id', ''))).strip()
+    return order_id, curata_numar_factura(row.get('numar factura', ''))
+
+
+def _rezolva_awb_din_frame(awbs: List[str], gomag_df: pd.DataFrame) -> Dict[str, Tuple[str, str]]:
+    """Rezolva AWB-urile pe un DataFrame Gomag (acelasi rezultat ca match_awb_with_gomag)."""
+    rezultate = {awb: ('', '') for awb in awbs}
+    if gomag_df is None or gomag_df.empty:
+        return rezultate
+
+    gomag = normalizeaza_gomag(gomag_df)
+    if 'awb' not in gomag.columns:
+        return rezultate
+
+    awb_norm = gomag['awb_norm']
+    valori = awb_norm.tolist()
+
+    # Prima pozitie (in ordinea din export) pentru fiecare AWB normalizat
+    prima_pozitie = {}
+    for pozitie, valoare in enumerate(valori):
+        prima_pozitie.setdefault(valoare, pozitie)
+    sortate = sorted(prima_pozitie)
+
+    for awb in rezultate:
+        cheie = normalizeaza_awb(awb)
+        pozitie = prima_pozitie.get(cheie)
+
+        # Daca nu gaseste, incearca fara ultimele 3 caractere (pentru GLS)
+        if pozitie is None and len(cheie) > 10:
+            pozitie = prima_pozitie.get(cheie[:-3])
+
+        # Daca nu gaseste, incearca cu ultimele 3 caractere adaugate (doar daca exista vreun prefix)
+        if pozitie is None:
+            i = bisect.bisect_left(sortate, cheie)
+            if i < len(sortate) and sortate[i].startswith(cheie):
+                pozitie = int(awb_norm.str.startswith(cheie).to_numpy().argmax())
+
+        if pozitie is not None:
+            rezultate[awb] = _rezultat_din_rand(gomag.iloc[pozitie])
+
+    return rezultate
+
+
+def _rezolva_awb_din_tabel(awbs: List[str]) -> Dict[str, Tuple[str, str]]:
+    """
+    Rezolva AWB-urile din gomag_orders, cu cautari in lot pe awb_norm.
+
+    Un AWB comun mai multor comenzi se rezolva la comanda awb_principal (prima
+    din exportul sincronizat), ca in _rezolva_awb_din_frame; intre comenzi din
+    exporturi diferite, ambele principale, decide numarul comenzii.
+    """
+    rezultate = {awb: ('', '') for awb in awbs}
+    supabase = get_supabase_client()
+
+    chei = {awb: normalizeaza_awb(awb) for awb in rezultate}
+    candidati = set(chei.values())
+    candidati.update(c[:-3] for c in chei.values() if len(c) > 10)
+    candidati.discard('')
+
+    # Potriviri exacte (si fara ultimele 3 caractere), intr-un singur lot de cereri
+    randuri = {}
+    for chunk in _chunks(sorted(candidati), LOOKUP_CHUNK_SIZE):
+        response = supabase.table('gomag_orders').select(
+            'order_number, awb_norm, invoice_number'
+        ).in_('awb_norm', chunk).order('awb_principal', desc=True).order('order_number').execute()
+        for row in response.data or []:
+            randuri.setdefault(row['awb_norm'], row)
+
+    lipsa = []
+    for awb, cheie in chei.items():
+        row = randuri.get(cheie)
+        if row is None and len(cheie) > 10:
+            row = randuri.get(cheie[:-3])
+        if row is not None:
+            rezultate[awb] = (row['order_number'], curata_numar_factura(row.get('invoice_number') or ''))
+        elif cheie.isalnum():
+            lipsa.append(awb)
+
+    # Potriviri dupa prefix (AWB cu ultimele 3 caractere adaugate in Gomag)
+    for chunk in _chunks(lipsa, PREFIX_CHUNK_SIZE):
+        filtru = ','.join(f"awb_norm.like.{chei[awb]}*" for awb in chunk)
+        response = supabase.table('gomag_orders').select(
+            'order_number, awb_norm, invoice_number'
+        ).or_(filtru).order('awb_principal', desc=True).order('order_number').execute()
+        prefixe = response.data or []
+        for awb in chunk:
+            row = next((r for r in prefixe if (r.get('awb_norm') or '').startswith(chei[awb])), None)
+            if row is not None:
+                rezultate[awb] = (row['order_number'], curata_numar_factura(row.get('invoice_number') or ''))
+
+    return rezultate
+
+
+def rezolva_awb(awbs: Iterable, gomag_df: Optional[pd.DataFrame] = None) -> Dict[str, Tuple[str, str]]:
+    """
+    Rezolva un lot de AWB-uri la (Order ID, Numar Factura).
+
+    Cu gomag_df se cauta in exportul incarcat; fara el, in tabela gomag_orders.
+
+    Returns:
+        Dict AWB -> (order_id, numar_factura), ('', '') daca nu se gaseste
+    """
+    awbs = list(dict.fromkeys(awbs))
+    if gomag_df is not None:
+        return _rezolva_awb_din_frame(awbs, gomag_df)
+
+    try:
+        return _rezolva_awb_din_tabel(awbs)
+    except Exception as e:
+        print(f"Gomag: Eroare la cautarea AWB-urilor: {e}")
+        return {awb: ('', '') for awb in awbs}
+
+
+# ============================================
+# Rezolvare Order ID -> factura si totaluri
+# ============================================
+
+def rezolva_comenzi(order_ids: Iterable[str], gomag_df: Optional[pd.DataFrame] = None) -> Dict[str, Dict]:
+    """
+    Rezolva un lot de numere de comanda la datele din Gomag.
+
+    Returns:
+        Dict order_id -> {'numar factura', 'total comanda', 'total factura'}
+        (doar pentru comenzile gasite; cheile lipsesc daca exportul nu are coloana)
+    """
+    order_ids = [str(o) for o in dict.fromkeys(order_ids) if o]
+    rezultate = {}
+    if not order_ids:
+        return rezultate
+
+    if gomag_df is not None:
+        if gomag_df.empty:
+            return rezultate
+        gomag = normalizeaza_gomag(gomag_df)
+        if 'numar comanda' not in gomag.columns:
+            return rezultate
+        cautate = set(order_ids)
+        coloane = [c for c in _COLOANE_COMANDA if c in gomag.columns]
+        for pozitie, numar in enumerate(gomag['numar comanda'].astype(str).tolist()):
+            if numar in cautate and numar not in rezultate:
+                rezultate[numar] = {c: gomag[c].iat[pozitie] for c in coloane}
+        return rezultate
+
+    try:
+        supabase = get_supabase_client()
+        for chunk in _chunks(order_ids, LOOKUP_CHUNK_SIZE):
+            response = supabase.table('gomag_orders').select(
+                'order_number, invoice_number, total_comanda, total_factura'
+            ).in_('order_number', chunk).execute()
+            for row in response.data or []:
+                rezultate[row['order_number']] = {
+                    'numar factura': row.get('invoice_number'),
+                    'total comanda': row.get('total_comanda'),
+                    'total factura': row.get('total_factura'),
+                }
+    except Exception as e:
+        print(f"Gomag: Eroare la cautarea comenzilor: {e}")
+
+    return rezultate
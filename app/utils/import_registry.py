@@ -0,0 +1,175 @@
+"""
+Import registry for bank statement files (MT940, PDF, CSV)
+
+Every imported file is registered by the SHA-256 hash of its content, so
+re-uploading an identical statement is skipped before any parsing. Each
+transaction also gets a canonical hash (stored in
+bank_transactions.transaction_hash), so overlapping statements only send
+their new transactions to the database.
+"""
+
+from typing import List, Dict, Iterable, Optional, Set
+from datetime import datetime
+import hashlib
+import json
+
+from .supabase_client import get_supabase_client
+from .query_cache import bumps_data_version
+
+# Max values per `in_` filter, to keep the PostgREST URL short
+LOOKUP_CHUNK_SIZE = 200
+
+
+def compute_file_hash(content: bytes) -> str:
+    """SHA-256 of the file content."""
+    return hashlib.sha256(content).hexdigest()
+
+
+def compute_path_hash(path: str, block_size: int = 1 << 20) -> str:
+    """SHA-256 of a file on disk, read in blocks."""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            sha.update(block)
+    return sha.hexdigest()
+
+
+def compute_transaction_hash(transaction_date: str, op_reference: str, amount) -> str:
+    """
+    Canonical transaction hash, identical for MT940, PDF and CSV imports.
+
+    Uses the same "date|reference|amount" MD5 format as the CSV import,
+    so hashes already stored in bank_transactions stay valid.
+    """
+    try:
+        amount = float(amount)
+    except (TypeError, ValueError):
+        amount = 0.0
+    hash_data = f"{transaction_date or ''}|{op_reference or ''}|{amount}"
+    return hashlib.md5(hash_data.encode()).hexdigest()
+
+
+def _chunks(values: List, size: int = LOOKUP_CHUNK_SIZE) -> Iterable[List]:
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
+
+
+def get_registry_entries(file_hashes: List[str]) -> Dict[str, Dict]:
+    """
+    Get the registry entries for the given file hashes.
+
+    Returns:
+        Dict file_hash -> registry row (only for files already imported)
+    """
+    supabase = get_supabase_client()
+    hashes = list(dict.fromkeys(h for h in file_hashes if h))
+
+    entries = {}
+    for chunk in _chunks(hashes):
+        response = supabase.table('import_registry').select('*').in_('file_hash', chunk).execute()
+        for row in response.data or []:
+            entries[row['file_hash']] = row
+
+    return entries
+
+
+def get_registry_entry(file_hash: str) -> Optional[Dict]:
+    """Get the registry entry for one file hash, or None if never imported."""
+    return get_registry_entries([file_hash]).get(file_hash)
+
+
+def register_import(
+    file_hash: str,
+    file_name: Optional[str],
+    file_type: str,
+    stats: Dict,
+    sync_log_id: Optional[int] = None
+) -> Optional[Dict]:
+    """
+    Register a successfully imported file.
+
+    Args:
+        file_hash: Content hash (compute_file_hash)
+        file_name: Original file name
+        file_type: 'mt940', 'pdf' or 'csv'
+        stats: Import statistics (processed/inserted/skipped)
+        sync_log_id: Sync log of the import, if any
+
+    Returns:
+        The registry row
+    """
+    supabase = get_supabase_client()
+
+    record = {
+        'file_hash': file_hash,
+        'file_name': file_name,
+        'file_type': file_type,
+        'transactions_count': stats.get('processed', 0),
+        'records_inserted': stats.get('inserted', 0),
+        'records_skipped': stats.get('skipped', 0),
+        'sync_log_id': sync_log_id,
+        'imported_at': datetime.now().isoformat()
+    }
+
+    response = supabase.table('import_registry').upsert(record, on_conflict='file_hash').execute()
+    return response.data[0] if response.data else None
+
+
+def describe_reused_entries(entries: Iterable[Dict]) -> List[Dict]:
+    """Short description of reused registry entries, for sync_logs details."""
+    return [
+        {
+            'registry_id': entry.get('id'),
+            'file_hash': entry.get('file_hash'),
+            'file_name': entry.get('file_name'),
+            'imported_at': entry.get('imported_at')
+        }
+        for entry in entries
+    ]
+
+
+@bumps_data_version
+def log_registry_reuse(sync_type: str, file_names: List[str], entries: List[Dict]) -> None:
+    """
+    Record in sync_logs an import that was fully served by the registry.
+
+    Args:
+        sync_type: Sync type (e.g. 'pdf_import', 'csv_import')
+        file_names: Uploaded file names
+        entries: Reused registry rows
+    """
+    supabase = get_supabase_client()
+    now = datetime.now().isoformat()
+
+    supabase.table('sync_logs').insert({
+        'sync_type': sync_type,
+        'status': 'completed',
+        'file_names': file_names,
+        'finished_at': now,
+        'records_processed': 0,
+        'records_inserted': 0,
+        'records_skipped': sum(int(e.get('transactions_count') or 0) for e in entries),
+        'records_failed': 0,
+        'details': json.dumps({'registry_reused': describe_reused_entries(entries)})
+    }).execute()
+
+
+def find_existing_values(table: str, column: str, values: Iterable[str]) -> Set[str]:
+    """
+    Return which of the given values already exist in table.column,
+    using chunked `in_` queries instead of one query per value.
+    """
+    supabase = get_supabase_client()
+    unique_values = list(dict.fromkeys(v for v in values if v))
+
+    existing = set()
+    for chunk in _chunks(unique_values):
+        response = supabase.table(table).select(column).in_(column, chunk).execute()
+        existing.update(row[column] for row in response.data or [] if row.get(column))
+
+    return existing
+
+
+def find_existing_transaction_hashes(transaction_hashes: Iterable[str]) -> Set[str]:
+    """Return the transaction hashes already present in bank_transactions."""
+    return find_existing_values('bank_transactions', 'transaction_hash', transaction_hashes)
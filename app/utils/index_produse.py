@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+Index fuzzy pentru numele de produse (rezolvarea SKU-urilor negăsite exact)
+
+Numele normalizate din baza de date produse sunt indexate după trigrame de
+caractere (index inversat trigramă -> produse). O căutare numără trigramele
+comune cu fiecare produs printr-un singur np.bincount, păstrează primii
+candidați după coeficientul Dice și îi reevaluează cu difflib doar pe
+aceștia, deci timpul nu crește cu dimensiunea catalogului.
+"""
+
+import re
+from collections import defaultdict
+from difflib import SequenceMatcher
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+_RE_NUMERE = re.compile(r'\d+')
+
+
+def _trigrame(text: str) -> set:
+    text = f"#{text}#"
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class IndexFuzzyProduse:
+    """
+    Index trigramă peste numele normalizate (normalize_name) ale produselor.
+
+    Un candidat este acceptat doar dacă are aceleași numere ca textul căutat
+    (ml, volum), ca un decant de 5 ml să nu fie rezolvat la SKU-ul de 10 ml.
+    """
+
+    def __init__(self, product_db: Dict[str, str]):
+        self.chei = list(product_db)
+        self.sku = [product_db[cheie] for cheie in self.chei]
+        self.numere = [_RE_NUMERE.findall(cheie) for cheie in self.chei]
+
+        postari = defaultdict(list)
+        numar_trigrame = []
+        for pozitie, cheie in enumerate(self.chei):
+            trigrame = _trigrame(cheie)
+            numar_trigrame.append(len(trigrame))
+            for trigrama in trigrame:
+                postari[trigrama].append(pozitie)
+
+        self.postari = {trigrama: np.array(pozitii, dtype=np.int32) for trigrama, pozitii in postari.items()}
+        self.numar_trigrame = np.array(numar_trigrame, dtype=np.float64)
+
+    def __len__(self) -> int:
+        return len(self.chei)
+
+    def candidati(self, text_normalizat: str, top_k: int = 5) -> List[Tuple[str, str, float]]:
+        """
+        Cei mai apropiați top_k candidați, cu același set de numere.
+
+        Returns:
+            Lista (sku, nume normalizat, scor 0..1), descrescător după scor
+        """
+        if not text_normalizat or not self.chei:
+            return []
+
+        trigrame = _trigrame(text_normalizat)
+        liste = [self.postari[t] for t in trigrame if t in self.postari]
+        if not liste:
+            return []
+
+        comune = np.bincount(np.concatenate(liste), minlength=len(self.chei))
+        dice = 2.0 * comune / (len(trigrame) + self.numar_trigrame)
+
+        # Preselecție după Dice (mai mulți decât top_k, unii cad la filtrul de numere)
+        preselectie = min(len(dice), max(top_k * 4, 16))
+        pozitii = np.argpartition(-dice, preselectie - 1)[:preselectie]
+        pozitii = pozitii[np.argsort(-dice[pozitii], kind='stable')]
+
+        numere = _RE_NUMERE.findall(text_normalizat)
+        rezultate = []
+        for pozitie in pozitii:
+            if dice[pozitie] <= 0 or self.numere[pozitie] != numere:
+                continue
+            scor = SequenceMatcher(None, text_normalizat, self.chei[pozitie]).ratio()
+            rezultate.append((self.sku[pozitie], self.chei[pozitie], scor))
+
+        rezultate.sort(key=lambda r: r[2], reverse=True)
+        return rezultate[:top_k]
+
+    def cauta(self, text_normalizat: str, prag: float = 0.0) -> Optional[Tuple[str, float]]:
+        """
+        Cel mai bun SKU pentru un nume normalizat negăsit exact.
+
+        Returns:
+            (sku, scor) dacă scorul este cel puțin prag, altfel None
+        """
+        candidati = self.candidati(text_normalizat, top_k=1)
+        if candidati and candidati[0][2] >= prag:
+            return candidati[0][0], candidati[0][2]
+        return None
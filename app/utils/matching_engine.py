@@ -16,6 +16,8 @@ from itertools import combinations
 from .supabase_client import get_supabase_client
 from .oblio_api import get_all_invoices, _get_access_token, _get_headers, OBLIO_API_BASE, OBLIO_CIF
 from .smart_matching import find_parcel_combination, match_gls_parcels_to_bank_transactions, match_sameday_parcels_to_bank_transactions
+from .query_cache import cached_query
+from . import analytics_mirror
 import requests
 
 
@@ -125,6 +127,7 @@ def search_invoice_by_number_in_oblio(invoice_number: str) -> Optional[Dict]:
         return None
 
 
+@cached_query
 def match_transactions_with_invoices(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None
@@ -225,6 +228,7 @@ def match_transactions_with_invoices(
     }
 
 
+@cached_query
 def generate_opuri_report_data(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None
@@ -408,6 +412,7 @@ def export_opuri_to_excel(
         return False
 
 
+@cached_query
 def get_matching_statistics(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None
@@ -415,9 +420,15 @@ def get_matching_statistics(
     """
     Calculeaza statistici despre matching-ul tranzactii-facturi.
 
+    Cu oglinda locala activa (analytics_mirror), totalurile se calculeaza
+    acolo, cu SQL, fara cereri catre Supabase.
+
     Returns:
         Dict cu statistici
     """
+    if analytics_mirror.ensure_fresh():
+        return _get_matching_statistics_oglinda(start_date, end_date)
+
     supabase = get_supabase_client()
 
     # Numar tranzactii
@@ -460,6 +471,48 @@ def get_matching_statistics(
     }
 
 
+def _get_matching_statistics_oglinda(start_date: Optional[date], end_date: Optional[date]) -> Dict:
+    """get_matching_statistics din oglinda locala (acelasi rezultat)."""
+    def filtru(coloana: str) -> Tuple[str, List[str]]:
+        conditii, parametri = ['1 = 1'], []
+        if start_date:
+            conditii.append(f"{coloana} >= ?")
+            parametri.append(start_date.isoformat())
+        if end_date:
+            conditii.append(f"{coloana} <= ?")
+            parametri.append(end_date.isoformat())
+        return ' and '.join(conditii), parametri
+
+    by_source = {}
+    with analytics_mirror.snapshot() as conn:
+        where, parametri = filtru('transaction_date')
+        for row in analytics_mirror.read_rows(
+            "select source, count(*) as count, coalesce(sum(amount), 0) as amount"
+            f" from bank_transactions where {where} group by source",
+            parametri, conn=conn
+        ):
+            by_source[row['source']] = {'count': row['count'], 'amount': float(row['amount'])}
+
+        where, parametri = filtru('issue_date')
+        invoices = analytics_mirror.read_rows(
+            f"select count(*) as count, coalesce(sum(total), 0) as amount from invoices where {where}",
+            parametri, conn=conn
+        )[0]
+
+    total_trans_amount = sum(s['amount'] for s in by_source.values())
+    total_inv_amount = float(invoices['amount'])
+
+    return {
+        'total_transactions': sum(s['count'] for s in by_source.values()),
+        'total_invoices': invoices['count'],
+        'transactions_amount': total_trans_amount,
+        'invoices_amount': total_inv_amount,
+        'difference': total_trans_amount - total_inv_amount,
+        'by_source': by_source
+    }
+
+
+@cached_query
 def generate_smart_opuri_report(
     start_date: Optional[date] = None,
     end_date: Optional[date] = None
@@ -494,6 +547,7 @@ def generate_smart_opuri_report(
     }
 
 
+@cached_query
 def get_pending_parcels_summary() -> Dict:
     """
     Returneaza un sumar al coletelor care nu au fost inca potrivite cu OP-uri.
@@ -524,6 +578,7 @@ def get_pending_parcels_summary() -> Dict:
     return pending_summary
 
 
+@cached_query
 def analyze_parcel_discrepancy(
     source: str,
     op_reference: str,
@@ -1,39 +1,118 @@
 """
 Parser pentru fisiere MT940 (Banca Transilvania)
 Extrage incasarile relevante (GLS, Sameday, Netopia, eMag)
+
+Fisierele sunt citite linie cu linie (fara a incarca tot extrasul in memorie)
+si impartite in tag-uri MT940. Mai multe fisiere se parseaza in paralel,
+intr-un pool de procese.
 """
 
 import re
 import os
-from typing import List, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterable, Iterator, List, Tuple, Optional
+
+
+# Cuvintele cheie pentru sursa incasarii, in ordinea prioritatii.
+# 'Altul' marcheaza incasarile relevante care nu au o sursa dedicata.
+_SURSE_INCASARI = (
+    ('GLS', ('GLS', 'GENERAL LOGISTICS')),
+    ('Sameday', ('DELIVERY SOLUTIONS', 'SAMEDAY')),
+    ('Netopia', ('NETOPIA', 'BATCHID')),
+    ('eMag', ('DANTE INTERNATIONAL', 'EMAG')),
+    ('Altul', ('TRANSFER RAMBURS', 'INCS RBS')),
+)
+
+_PRIORITATE_CUVANT = {
+    cuvant: prioritate
+    for prioritate, (_, cuvinte) in enumerate(_SURSE_INCASARI)
+    for cuvant in cuvinte
+}
+
+# Se aplica pe textul deja transformat in majuscule (mai rapid decat re.IGNORECASE)
+_SURSA_RE = re.compile('|'.join(re.escape(c) for c in _PRIORITATE_CUVANT))
+_SUMA_RE = re.compile(r'[\d,]+')
+_REFERINTA_RE = re.compile(r'//([A-Za-z0-9]+)')
+_BATCHID_RE = re.compile(r'BATCHID\s*[:\s]*(\d+)', re.IGNORECASE)
+
+
+def clasifica_incasare(details: str) -> Tuple[str, bool]:
+    """
+    Clasifica o incasare dupa detalii, intr-o singura trecere prin text.
+
+    Returns:
+        Tuple: (sursa, relevanta) - sursa este 'Altul' daca nu se recunoaste
+    """
+    prioritate_minima = None
+    for match in _SURSA_RE.finditer(details.upper()):
+        prioritate = _PRIORITATE_CUVANT[match.group(0)]
+        if prioritate_minima is None or prioritate < prioritate_minima:
+            prioritate_minima = prioritate
+            if prioritate == 0:
+                break
+
+    if prioritate_minima is None:
+        return 'Altul', False
+    return _SURSE_INCASARI[prioritate_minima][0], True
+
+
+def listeaza_fisiere_mt940(folder_path: str) -> List[str]:
+    """Returneaza caile fisierelor MT940 dintr-un folder, in ordine alfabetica."""
+    if not folder_path or not os.path.isdir(folder_path):
+        return []
+
+    return [
+        os.path.join(folder_path, file)
+        for file in sorted(os.listdir(folder_path))
+        if file.startswith('MT940') and file.endswith('.txt')
+    ]
+
+
+def parseaza_fisiere_mt940(cai: List[str], max_workers: Optional[int] = None) -> List[Tuple[List[Tuple], Optional[str]]]:
+    """
+    Parseaza mai multe fisiere MT940 in paralel, intr-un pool de procese.
+
+    Returns:
+        Lista de tuple (referinte, eroare), in aceeasi ordine ca `cai`
+    """
+    if len(cai) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(_parseaza_fisier_mt940, cai))
+
+    return [_parseaza_fisier_mt940(cale) for cale in cai]
 
 
-def extrage_referinte_op_din_mt940_folder(folder_path: str) -> List[Tuple]:
+def extrage_referinte_op_din_mt940_folder(folder_path: str, max_workers: Optional[int] = None) -> List[Tuple]:
     """
     Extrage referintele OP din toate fisierele MT940 dintr-un folder.
 
+    Fisierele sunt parsate in paralel; rezultatele se combina in ordinea
+    alfabetica a numelor de fisier.
+
     Returns:
         Lista de tuple: (op_ref, suma, data, batchid, details)
     """
     referinte = []
 
-    if not folder_path or not os.path.isdir(folder_path):
-        return referinte
-
-    for file in os.listdir(folder_path):
-        if file.startswith('MT940') and file.endswith('.txt'):
-            file_path = os.path.join(folder_path, file)
-            try:
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    text = f.read()
-                refs = _parseaza_mt940(text)
-                referinte.extend(refs)
-            except Exception as e:
-                print(f"MT940: Eroare la citirea {file}: {e}")
+    cai = listeaza_fisiere_mt940(folder_path)
+    for cale, (refs, eroare) in zip(cai, parseaza_fisiere_mt940(cai, max_workers)):
+        if eroare:
+            print(f"MT940: Eroare la citirea {os.path.basename(cale)}: {eroare}")
+            continue
+        referinte.extend(refs)
 
     return referinte
 
 
+def _parseaza_fisier_mt940(file_path: str) -> Tuple[List[Tuple], Optional[str]]:
+    """Parseaza un fisier MT940 de pe disc (ruleaza si in procesele din pool)."""
+    try:
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return _parseaza_linii_mt940(f), None
+    except Exception as e:
+        return [], str(e)
+
+
 def _parseaza_mt940(text: str) -> List[Tuple]:
     """
     Parseaza un fisier MT940 si extrage incasarile (credite).
@@ -47,103 +126,108 @@ def _parseaza_mt940(text: str) -> List[Tuple]:
     - D = Debit (plata)
     - suma foloseste virgula ca separator decimal
     """
+    return _parseaza_linii_mt940(text.replace('\r\n', '\n').replace('\r', '\n').split('\n'))
+
+
+def _itereaza_taguri_mt940(lines: Iterable[str]) -> Iterator[Tuple[Optional[str], List[str]]]:
+    """
+    Imparte liniile MT940 in tag-uri.
+
+    Orice linie care incepe cu ':' deschide un tag nou; liniile urmatoare
+    (fara ':') sunt continuarea lui. Textul dinaintea primului tag este ignorat.
+
+    Yields:
+        Tuple: (tag, linii) - tag este None pentru linii ':' fara format de tag,
+        iar linii[0] este continutul de dupa tag
+    """
+    tag = None
+    continut = None
+
+    for line in lines:
+        line = line.strip()
+        if line.startswith(':'):
+            if continut is not None:
+                yield tag, continut
+            sfarsit_tag = line.find(':', 1)
+            tag = line[1:sfarsit_tag] if sfarsit_tag > 1 else ''
+            if tag.isalnum():
+                continut = [line[sfarsit_tag + 1:]]
+            else:
+                tag = None
+                continut = [line]
+        elif continut is not None:
+            continut.append(line)
+
+    if continut is not None:
+        yield tag, continut
+
+
+def _parseaza_linia_61(tranzactie_line: str) -> Optional[Tuple[float, str, str]]:
+    """
+    Parseaza continutul unui tag :61:.
+
+    Returns:
+        Tuple: (suma, data, op_ref) sau None daca linia e invalida
+        sau nu este o incasare (credit cu suma pozitiva)
+    """
+    # Dupa data valutei si data inregistrarii urmeaza C (credit) sau D (debit)
+    if len(tranzactie_line) < 11 or tranzactie_line[10] != 'C':
+        return None
+
+    suma_match = _SUMA_RE.match(tranzactie_line, 11)
+    if not suma_match:
+        return None
+
+    try:
+        suma_float = float(suma_match.group(0).replace(',', '.'))
+    except ValueError:
+        return None
+    if suma_float <= 0:
+        return None
+
+    # Primele 6 caractere = YYMMDD
+    data_op = f"20{tranzactie_line[0:2]}-{tranzactie_line[2:4]}-{tranzactie_line[4:6]}"
+
+    ref_match = _REFERINTA_RE.search(tranzactie_line)
+    op_ref = ref_match.group(1) if ref_match else ""
+
+    return suma_float, data_op, op_ref
+
+
+def _parseaza_linii_mt940(lines: Iterable[str]) -> List[Tuple]:
+    """Extrage incasarile relevante dintr-un flux de linii MT940."""
     referinte = []
-    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
-
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
-
-        if line.startswith(':61:'):
-            tranzactie_line = line[4:]
-
-            if len(tranzactie_line) >= 10:
-                # Extrage data (primele 6 caractere = YYMMDD)
-                data_yy = tranzactie_line[0:2]
-                data_mm = tranzactie_line[2:4]
-                data_dd = tranzactie_line[4:6]
-                data_op = f"20{data_yy}-{data_mm}-{data_dd}"
-
-                # Gaseste C (credit) sau D (debit)
-                rest = tranzactie_line[10:]
-
-                if rest and rest[0] in ['C', 'D']:
-                    tip_tranzactie = rest[0]
-                    rest = rest[1:]
-
-                    # Extrage suma
-                    suma_match = re.match(r'([\d,]+)', rest)
-                    if suma_match:
-                        suma_str = suma_match.group(1).replace(',', '.')
-                        try:
-                            suma_float = float(suma_str)
-                        except ValueError:
-                            suma_float = 0
-
-                        # Extrage referinta
-                        ref_match = re.search(r'//([A-Za-z0-9]+)', tranzactie_line)
-                        op_ref = ref_match.group(1) if ref_match else ""
-
-                        # Colecteaza detaliile din :86:
-                        details_text = ""
-                        i += 1
-                        while i < len(lines):
-                            next_line = lines[i].strip()
-                            if next_line.startswith(':86:'):
-                                details_text = next_line[4:]
-                                i += 1
-                                while i < len(lines) and not lines[i].strip().startswith(':'):
-                                    details_text += " " + lines[i].strip()
-                                    i += 1
-                                break
-                            elif next_line.startswith(':'):
-                                break
-                            i += 1
-
-                        # Verifica daca este o incasare relevanta
-                        if tip_tranzactie == 'C' and suma_float > 0:
-                            is_relevant = False
-                            details_upper = details_text.upper()
-
-                            if "GLS" in details_upper or "GENERAL LOGISTICS" in details_upper:
-                                is_relevant = True
-                            elif "DELIVERY SOLUTIONS" in details_upper or "SAMEDAY" in details_upper:
-                                is_relevant = True
-                            elif "NETOPIA" in details_upper or "BATCHID" in details_upper:
-                                is_relevant = True
-                            elif "DANTE INTERNATIONAL" in details_upper or "EMAG" in details_upper:
-                                is_relevant = True
-                            elif "TRANSFER RAMBURS" in details_upper:
-                                is_relevant = True
-                            elif "INCS RBS" in details_upper:
-                                is_relevant = True
-
-                            if is_relevant:
-                                # Extrage batchId daca exista
-                                batchid = None
-                                batch_match = re.search(r'BATCHID\s*[:\s]*(\d+)', details_text, re.IGNORECASE)
-                                if batch_match:
-                                    batchid = batch_match.group(1)
-
-                                referinte.append((op_ref, suma_float, data_op, batchid, details_text))
-
-                        continue
-        i += 1
+    tranzactie = None  # incasare :61: care asteapta detaliile din :86:
+
+    def adauga(tranzactie, details_text):
+        suma_float, data_op, op_ref = tranzactie
+        _, relevanta = clasifica_incasare(details_text)
+        if not relevanta:
+            return
+
+        batch_match = _BATCHID_RE.search(details_text)
+        batchid = batch_match.group(1) if batch_match else None
+
+        referinte.append((op_ref, suma_float, data_op, batchid, details_text))
+
+    for tag, continut in _itereaza_taguri_mt940(lines):
+        if tranzactie is not None:
+            # Detaliile se iau doar din :86: care urmeaza imediat dupa :61:
+            details_text = ' '.join(continut) if tag == '86' else ""
+            adauga(tranzactie, details_text)
+            tranzactie = None
+            if tag == '86':
+                continue
+
+        if tag == '61':
+            tranzactie = _parseaza_linia_61(continut[0])
+
+    if tranzactie is not None:
+        adauga(tranzactie, "")
 
     return referinte
 
 
 def get_sursa_incasare(details: str) -> str:
     """Determina sursa incasarii din detalii."""
-    details_upper = details.upper()
-
-    if "GLS" in details_upper or "GENERAL LOGISTICS" in details_upper:
-        return "GLS"
-    elif "DELIVERY SOLUTIONS" in details_upper or "SAMEDAY" in details_upper:
-        return "Sameday"
-    elif "NETOPIA" in details_upper or "BATCHID" in details_upper:
-        return "Netopia"
-    elif "DANTE INTERNATIONAL" in details_upper or "EMAG" in details_upper:
-        return "eMag"
-    else:
-        return "Altul"
+    return clasifica_incasare(details)[0]
@@ -12,6 +12,7 @@ from io import StringIO, BytesIO
 from typing import List, Dict, Optional
 from datetime import datetime
 from dotenv import load_dotenv
+from .query_cache import bumps_data_version
 
 load_dotenv()
 
@@ -317,6 +318,7 @@ def sync_netopia_batch(batch_id: str, api_key: str = None) -> Dict:
     return result
 
 
+@bumps_data_version
 def save_netopia_transactions_to_supabase(transactions: List[Dict], batch_id: str, report_month: str = None) -> Dict:
     """
     Salveaza tranzactiile Netopia in Supabase.
@@ -378,6 +380,7 @@ def save_netopia_transactions_to_supabase(transactions: List[Dict], batch_id: st
     return stats
 
 
+@bumps_data_version
 def save_netopia_batch_to_supabase(batch_info: Dict) -> bool:
     """
     Salveaza informatiile despre un batch Netopia in Supabase.
@@ -12,10 +12,15 @@ Data: 2025-11-19
 
 import time
 import json
+import csv
 import sys
 import os
 import re
 import platform
+import queue
+import threading
+from contextlib import contextmanager
+from datetime import datetime
 from selenium import webdriver
 from selenium.webdriver.common.by import By
 from selenium.webdriver.common.keys import Keys
@@ -28,7 +33,8 @@ import logging
 import cloudinary
 import cloudinary.uploader
 # Import Supabase database functions (migrated from PostgreSQL)
-from utils.decanturi_processor import adauga_bon, verificare_bon_exista, get_bonuri_procesate_pentru_comenzi
+from utils.decanturi_processor import adauga_bon, RegistruBonuri
+from utils.oblio_http import OblioHttpClient, OblioHttpEroare, OblioSesiuneInvalida, StocInsuficient
 
 # Configurare Cloudinary (din environment variables pentru securitate)
 cloudinary.config(
@@ -37,6 +43,42 @@ cloudinary.config(
   api_secret = os.getenv('CLOUDINARY_API_SECRET')
 )
 
+# Numărul maxim de browsere paralele (workeri) pentru process_bonuri_paralel
+MAX_WORKERI = int(os.getenv('OBLIO_MAX_WORKERS', '4'))
+
+# Încercări per bon într-un worker (prima încercare + reîncercări)
+INCERCARI_BON = 2
+
+# Pagina este "liniștită": document încărcat și nicio cerere jQuery AJAX în curs
+JS_RETEA_INACTIVA = (
+    "return document.readyState === 'complete' && "
+    "(!window.jQuery || window.jQuery.active === 0);"
+)
+
+# Numărul de cereri jQuery AJAX terminate pe pagina curentă (contorul se
+# instalează la primul apel); null fără jQuery
+JS_CERERI_AJAX = (
+    "if (window.jQuery && !window.__cereriAjax) {"
+    " window.__cereriAjax = {n: 0};"
+    " window.jQuery(document).ajaxComplete(function() { window.__cereriAjax.n++; });"
+    "}"
+    "return window.__cereriAjax ? window.__cereriAjax.n : null;"
+)
+
+# Elemente care apar după submit-ul de login (câmp 2FA sau mesaj de eroare)
+SELECTOR_REZULTAT_LOGIN = (
+    "#sms_code, #two_factor_code, #2fa_code, input[name='code'], .alert-danger, .error"
+)
+
+# Pașii cronometrați ai unui bon de producție (profil de timp în stats['timings'])
+PASI_BON = ('navigate', 'autocomplete', 'recipe', 'save', 'launch', 'finalize', 'verify')
+
+# CSV cu timpii per pas, câte un rând per bon (gol = dezactivat)
+TIMINGS_CSV = os.getenv('OBLIO_TIMINGS_CSV', os.path.join(
+    os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'exports', 'oblio_timings.csv'
+))
+_timings_lock = threading.Lock()
+
 # Configurare logging
 logging.basicConfig(
     level=logging.INFO,
@@ -49,10 +91,26 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+def _scrie_timpi_csv(timpi):
+    """Adaugă timpii unui bon în TIMINGS_CSV (antetul doar la fișier nou)"""
+    if not TIMINGS_CSV:
+        return
+    coloane = ['timestamp', 'sku', 'quantity', 'mod', 'success', *PASI_BON, 'total']
+    with _timings_lock:
+        os.makedirs(os.path.dirname(TIMINGS_CSV) or '.', exist_ok=True)
+        fisier_nou = not os.path.exists(TIMINGS_CSV) or os.path.getsize(TIMINGS_CSV) == 0
+        with open(TIMINGS_CSV, 'a', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=coloane, extrasaction='ignore')
+            if fisier_nou:
+                writer.writeheader()
+            writer.writerow(timpi)
+
+
 class OblioAutomation:
     """Clasa pentru automatizarea bonurilor de producție în Oblio"""
 
-    def __init__(self, use_existing_profile=True, headless=False, log_callback=None, input_callback=None):
+    def __init__(self, use_existing_profile=True, headless=False, log_callback=None, input_callback=None,
+                 http_mode=False):
         """
         Inițializare automation
 
@@ -61,30 +119,204 @@ class OblioAutomation:
             headless (bool): Rulează în mod headless (fără interfață grafică)
             log_callback (callable): Funcție pentru logging live: log_callback(message, level)
             input_callback (callable): Funcție pentru input interactiv: input_callback(prompt_dict) -> str
+            http_mode (bool): EXPERIMENTAL, neverificat pe oblio.eu - creează bonurile prin cereri HTTP
+                (OblioHttpClient), cu Selenium ca fallback (vezi utils/oblio_http.py)
         """
         self.driver = None
+        self.http_mode = http_mode
+        self.http_client = None
         self.use_existing_profile = use_existing_profile
         self.headless = headless
         self.log_callback = log_callback
         self.input_callback = input_callback
         self.stop_requested = False # Flag pentru oprire
+        self._stop_event = threading.Event() # Oprire comună pentru workerii din process_bonuri_paralel
+        self._stats_lock = threading.Lock()
+        self._log_lock = threading.Lock()
+        self.registru = None # RegistruBonuri al rulării curente (bonuri salvate în loturi)
+        self._timpi = None # Timpii per pas ai bonului curent (vezi _pas)
+        self._bon_trimis = False # Formularul bonului curent a fost trimis (bonul poate exista în Oblio)
         self.stats = {
             'total': 0,
             'success': 0,
             'failed': 0,
-            'errors': []
+            'errors': [],
+            'timings': []
         }
 
     def stop(self):
         """Oprește execuția automatizării"""
         self._log("🛑 Comandă de oprire primită! Se oprește după pasul curent...", 'warning')
         self.stop_requested = True
+        self._stop_event.set()
+
+    def _oprire_ceruta(self):
+        """True dacă s-a cerut oprirea (pe această instanță sau pe pool-ul din care face parte)"""
+        return self.stop_requested or self._stop_event.is_set()
 
     def _check_stop(self):
         """Verifică dacă s-a cerut oprirea și aruncă excepție"""
-        if self.stop_requested:
+        if self._oprire_ceruta():
             raise Exception("Execuție oprită manual de utilizator (STOP)")
 
+    @contextmanager
+    def _registru_activ(self, order_numbers=None):
+        """
+        Registrul de bonuri al rulării: bonurile procesate deja pentru comenzile
+        date se preîncarcă o dată, bonurile reușite se scriu în loturi la final.
+        Apelurile imbricate (process_bonuri -> batch) folosesc același registru.
+        """
+        if self.registru is not None:
+            if order_numbers:
+                self.registru.preincarca(order_numbers)
+            yield self.registru
+            return
+
+        self.registru = RegistruBonuri(order_numbers)
+        try:
+            yield self.registru
+        finally:
+            registru, self.registru = self.registru, None
+            registru.flush()
+            if registru.erori:
+                self._log(f"⚠️ Eroare salvare DB: {registru.erori[-1]}", 'warning')
+            else:
+                self._log(f"💾 Salvat în DB: {registru.get_statistici()['total_bonuri']} bonuri", 'info')
+
+    def _porneste_cronometru(self, sku, quantity):
+        """Începe profilul de timp al unui bon"""
+        self._timpi = {'sku': sku, 'quantity': quantity, 'mod': 'selenium'}
+        self._pas_curent = None
+        self._start_bon = self._start_pas = time.perf_counter()
+
+    def _pas(self, nume):
+        """Închide pasul curent (durata se adună în profil) și începe pasul nume"""
+        if self._timpi is None:
+            return
+        acum = time.perf_counter()
+        if self._pas_curent:
+            durata = self._timpi.get(self._pas_curent, 0) + acum - self._start_pas
+            self._timpi[self._pas_curent] = round(durata, 3)
+        self._pas_curent, self._start_pas = nume, acum
+
+    def _opreste_cronometru(self, success):
+        """Încheie profilul bonului: îl adaugă în stats['timings'] și în TIMINGS_CSV"""
+        if self._timpi is None:
+            return None
+        self._pas(None)
+        timpi, self._timpi = self._timpi, None
+        timpi.update(
+            total=round(time.perf_counter() - self._start_bon, 3),
+            success=bool(success),
+            timestamp=datetime.now().isoformat(timespec='seconds'),
+        )
+        with self._stats_lock:
+            self.stats.setdefault('timings', []).append(timpi)
+        try:
+            _scrie_timpi_csv(timpi)
+        except OSError as e:
+            logger.warning(f"⚠️ Nu s-au putut scrie timpii în {TIMINGS_CSV}: {e}")
+        return timpi
+
+    def _bon_reusit(self, sku, quantity, production_id=None):
+        """Contorizează un bon finalizat și îl înregistrează în DB (cu order tracking)."""
+        msg = f"🎉 BON DE PRODUCȚIE FINALIZAT CU SUCCES! SKU={sku}, Cantitate={quantity}"
+        if production_id:
+            msg += f", ID={production_id}"
+            msg += f"\n   📋 Link: https://www.oblio.eu/stock/preview_production/{production_id}"
+        self._log(msg, 'success')
+        self.stats['success'] += 1
+
+        # Salvare în DB cu order tracking
+        try:
+            voucher_info = getattr(self, '_current_voucher_info', {})
+            nume = voucher_info.get('nume', f"Produs {sku}")
+            order_id = voucher_info.get('order_id')
+            order_number = voucher_info.get('order_number')
+
+            self._salveaza_bon(sku, nume, quantity, order_id, order_number)
+            if order_number:
+                self._log(f"💾 Înregistrat: {sku} comanda #{order_number}", 'info')
+            else:
+                self._log(f"💾 Înregistrat: {sku}", 'info')
+        except Exception as e:
+            self._log(f"⚠️ Eroare salvare DB: {e}", 'warning')
+
+    def _bon_esuat(self, sku, quantity, error, reincercabil=False):
+        """
+        Contorizează un bon eșuat.
+
+        reincercabil: eroarea a apărut înainte ca bonul să existe în Oblio (înainte
+        de trimiterea formularului), deci bonul se poate relua fără să se dubleze.
+        """
+        self.stats['failed'] += 1
+        self.stats['errors'].append({
+            'sku': sku,
+            'quantity': quantity,
+            'error': error,
+            'reincercabil': reincercabil
+        })
+
+    def _get_http_client(self, oblio_cookies=None):
+        """
+        Clientul HTTP al sesiunii: cookie-urile browser-ului (dacă e deja logat),
+        altfel cookie-urile primite.
+        """
+        if self.http_client is None:
+            cookies = None
+            if self.driver:
+                try:
+                    cookies = self.driver.get_cookies()
+                except Exception:
+                    cookies = None
+            cookies = cookies or oblio_cookies
+            if cookies:
+                self.http_client = OblioHttpClient(cookies)
+        return self.http_client
+
+    def _create_production_voucher_http(self, sku, quantity, oblio_cookies=None):
+        """
+        Creează bonul prin OblioHttpClient.
+
+        Returns:
+            bool: rezultatul bonului, sau None dacă trebuie reluat cu Selenium
+                  (fără cookies, sesiune expirată, pagină neașteptată - bonul nu a fost creat)
+        """
+        client = self._get_http_client(oblio_cookies)
+        if client is None:
+            self._log("ℹ️ Mod HTTP fără cookies Oblio - folosesc Selenium", 'info')
+            return None
+
+        fallback = False
+        try:
+            rezultat = client.creeaza_bon(sku, quantity)
+        except OblioSesiuneInvalida as e:
+            self._log(f"⚠️ Mod HTTP indisponibil ({e}) - revin la Selenium", 'warning')
+            self.http_client = None
+            client.close()
+            fallback = True
+            return None
+        except StocInsuficient as e:
+            self._log(f"⚠️ {e}. Se sare peste acest bon.", 'warning')
+            return False
+        except OblioHttpEroare as e:
+            self._log(f"❌ EROARE la crearea bonului (HTTP): {e}", 'error')
+            self._bon_esuat(sku, quantity, str(e))
+            return False
+        finally:
+            # Pașii cererilor HTTP intră în profilul bonului (la fallback cronometrează Selenium)
+            if self._timpi is not None and not fallback:
+                self._timpi.update(client.timpi, mod='http')
+
+        self._bon_reusit(sku, quantity, rezultat['production_id'])
+        return True
+
+    def _salveaza_bon(self, sku, nume, cantitate, order_id=None, order_number=None):
+        """Înregistrează un bon reușit (în registrul rulării dacă există, altfel direct)."""
+        if self.registru is not None:
+            return self.registru.adauga(sku, nume, cantitate, order_id, order_number)
+        return adauga_bon(sku, nume, cantitate, order_id, order_number)
+
     def _log(self, message, level='info'):
         """
         Log message prin callback sau logger standard
@@ -145,7 +377,7 @@ class OblioAutomation:
             login_url = "https://www.oblio.eu/login/"
             self._log(f"🌐 Navigare la: {login_url}", 'info')
             self.driver.get(login_url)
-            time.sleep(2)
+            self.wait_for_network_idle()
 
             # Verifică dacă suntem deja logați
             if "login" not in self.driver.current_url.lower():
@@ -160,7 +392,7 @@ class OblioAutomation:
                 )
                 cookie_button.click()
                 self._log("✅ Cookie consent acceptat!", 'success')
-                time.sleep(1)
+                self.wait_for_invisible(By.ID, 'CybotCookiebotDialog', timeout=3)
             except TimeoutException:
                 self._log("ℹ️ Cookie consent nu a apărut (deja acceptat)", 'info')
             except Exception as e:
@@ -190,7 +422,7 @@ class OblioAutomation:
 
             email_input.clear()
             email_input.send_keys(email)
-            time.sleep(0.5)
+            self.wait_for_value(email_input, email)
 
             # STEP 2: Cere parolă
             self._log("🔑 Se așteaptă parola...", 'info')
@@ -216,7 +448,7 @@ class OblioAutomation:
 
             password_input.clear()
             password_input.send_keys(password)
-            time.sleep(0.5)
+            self.wait_for_value(password_input, password)
 
             # Găsește și click buton login
             self._log("🖱️ Click pe butonul de login...", 'info')
@@ -243,7 +475,7 @@ class OblioAutomation:
             else:
                 login_button.click()
 
-            time.sleep(3)
+            self._asteapta_rezultat_login()
 
             # Verifică dacă există erori de autentificare
             try:
@@ -314,7 +546,7 @@ class OblioAutomation:
                 # Completează codul 2FA
                 two_fa_input.clear()
                 two_fa_input.send_keys(two_fa_code)
-                time.sleep(0.5)
+                self.wait_for_value(two_fa_input, two_fa_code)
 
                 # Găsește buton submit 2FA
                 submit_2fa_button = None
@@ -338,7 +570,8 @@ class OblioAutomation:
                 else:
                     two_fa_input.send_keys(Keys.ENTER)
 
-                time.sleep(3)
+                self.wait_for_url_change(current_url, timeout=15)
+                self.wait_for_network_idle()
 
             # STEP 4: Verifică succesul
             current_url = self.driver.current_url
@@ -548,6 +781,170 @@ class OblioAutomation:
             logger.warning(f"⚠️ Overlay încă vizibil după {timeout}s")
             return False
 
+    def wait_for_condition(self, condition, timeout=5, poll=0.05):
+        """
+        Așteaptă ca o condiție (funcție de driver) să fie adevărată
+
+        Args:
+            condition: Funcție care primește driver-ul (ex: lambda d: ..., EC.*)
+            timeout: Timeout în secunde
+            poll: Intervalul de verificare în secunde
+
+        Returns:
+            Rezultatul condiției sau False la timeout
+        """
+        try:
+            return WebDriverWait(
+                self.driver, timeout, poll_frequency=poll,
+                ignored_exceptions=(NoSuchElementException, StaleElementReferenceException)
+            ).until(condition)
+        except TimeoutException:
+            return False
+
+    def wait_for_network_idle(self, timeout=10):
+        """
+        Așteaptă încărcarea completă a paginii și terminarea cererilor AJAX (jQuery)
+
+        Args:
+            timeout: Timeout în secunde
+
+        Returns:
+            True dacă pagina s-a liniștit, False la timeout
+        """
+        if self.wait_for_condition(lambda d: d.execute_script(JS_RETEA_INACTIVA), timeout=timeout):
+            return True
+        logger.debug(f"⚠️ Pagina încă are cereri în curs după {timeout}s")
+        return False
+
+    def _cereri_ajax(self):
+        """Numărul de cereri AJAX terminate pe pagină (None fără jQuery); se citește înaintea unei acțiuni"""
+        try:
+            return self.driver.execute_script(JS_CERERI_AJAX)
+        except Exception:
+            return None
+
+    def _ajax_terminat(self, inainte):
+        """True dacă, față de contorul inainte, s-a terminat o cerere AJAX și nu mai e niciuna în curs"""
+        if inainte is None:
+            return False
+        dupa = self.driver.execute_script(JS_CERERI_AJAX)
+        return dupa is not None and dupa > inainte and self.driver.execute_script(JS_RETEA_INACTIVA)
+
+    def wait_for_ajax_after(self, inainte, timeout=5):
+        """
+        Așteaptă cererea AJAX declanșată de o acțiune (contorul inainte citit cu
+        _cereri_ajax înaintea ei): să înceapă și să se termine. Spre deosebire de
+        wait_for_network_idle, nu trece dacă cererea încă nu a pornit.
+
+        Returns:
+            True dacă o cerere s-a terminat, False la timeout (sau fără jQuery)
+        """
+        if inainte is None:
+            return self.wait_for_network_idle(timeout=timeout)
+        return bool(self.wait_for_condition(lambda d: self._ajax_terminat(inainte), timeout=timeout))
+
+    def wait_for_url_change(self, old_url, timeout=10):
+        """Așteaptă ca URL-ul curent să fie diferit de old_url"""
+        return bool(self.wait_for_condition(EC.url_changes(old_url), timeout=timeout))
+
+    def wait_for_url_contains(self, fragment, timeout=10):
+        """Așteaptă ca URL-ul curent să conțină fragmentul dat"""
+        return bool(self.wait_for_condition(EC.url_contains(fragment), timeout=timeout))
+
+    def wait_for_invisible(self, by, selector, timeout=5):
+        """Așteaptă ca un element (popup, dialog) să dispară sau să devină invizibil"""
+        return bool(self.wait_for_condition(EC.invisibility_of_element_located((by, selector)), timeout=timeout))
+
+    def wait_for_value(self, element, expected=None, timeout=3):
+        """
+        Așteaptă ca un input să aibă valoare (sau exact valoarea expected)
+
+        Returns:
+            True dacă valoarea a apărut, False la timeout
+        """
+        def are_valoare(driver):
+            valoare = element.get_attribute('value') or ''
+            return valoare == str(expected) if expected is not None else bool(valoare.strip())
+
+        return bool(self.wait_for_condition(are_valoare, timeout=timeout))
+
+    def _vizibil(self, selector):
+        """True dacă cel puțin un element pentru selectorul CSS este afișat"""
+        return any(e.is_displayed() for e in self.driver.find_elements(By.CSS_SELECTOR, selector))
+
+    def _asteapta_rezultat_login(self, timeout=15):
+        """
+        După submit-ul de login: așteaptă părăsirea paginii de login sau apariția
+        câmpului 2FA / a unei erori, apoi încărcarea paginii
+        """
+        self.wait_for_condition(
+            lambda d: "login" not in d.current_url.lower() or self._vizibil(SELECTOR_REZULTAT_LOGIN),
+            timeout=timeout
+        )
+        self.wait_for_network_idle()
+
+    def _asteapta_selectie_produs(self, timeout=3):
+        """Așteaptă ca Oblio să completeze ID-ul produsului (#pp_name_id) sau să afișeze un mesaj"""
+        return self.wait_for_condition(
+            lambda d: d.find_element(By.ID, "pp_name_id").get_attribute("value") or self._vizibil("#modal-message"),
+            timeout=timeout
+        )
+
+    def _completeaza_cantitate(self, pp_quantity_input, quantity, timeout=5):
+        """
+        Completează cantitatea bonului și așteaptă ca Oblio să recalculeze rețeta:
+        #ap_1_quantity2 (consumul) diferit de cel de dinainte sau, dacă nu se
+        schimbă, cererea AJAX de recalculare terminată
+
+        Returns:
+            True dacă rețeta este la zi, False la timeout sau fără rețetă
+        """
+        def consum(driver):
+            return (driver.find_element(By.ID, "ap_1_quantity2").get_attribute("value") or '').strip()
+
+        def numar(valoare):
+            try:
+                return float(str(valoare).replace(',', '.'))
+            except ValueError:
+                return str(valoare).strip()
+
+        # Rețeta produsului selectat trebuie să fie încărcată, altfel nu avem cu ce compara
+        if not self.wait_for_condition(consum, timeout=3):
+            logger.warning("⚠️ Rețeta produsului (#ap_1_quantity2) nu a apărut")
+            pp_quantity_input.click()
+            pp_quantity_input.send_keys(Keys.CONTROL + "a")
+            pp_quantity_input.send_keys(Keys.DELETE)
+            pp_quantity_input.send_keys(str(quantity))
+            return False
+
+        cantitate_veche = pp_quantity_input.get_attribute('value') or ''
+        consum_vechi = consum(self.driver)
+        inainte = self._cereri_ajax()
+
+        # clear() uneori nu funcționează, deci folosim Ctrl+A + Delete
+        pp_quantity_input.click()
+        pp_quantity_input.send_keys(Keys.CONTROL + "a")
+        pp_quantity_input.send_keys(Keys.DELETE)
+        pp_quantity_input.send_keys(str(quantity))
+
+        if numar(cantitate_veche) == numar(quantity):
+            return True
+
+        if self.wait_for_condition(
+            lambda d: (consum(d) and consum(d) != consum_vechi) or self._ajax_terminat(inainte),
+            timeout=timeout
+        ):
+            return True
+        logger.warning(f"⚠️ Rețeta nu a fost recalculată după {timeout}s (consum: {consum_vechi})")
+        return False
+
+    def _asteapta_redirect(self, fragment, timeout=15):
+        """Așteaptă redirect-ul (URL care conține fragmentul) sau afișarea unei erori"""
+        return self.wait_for_condition(
+            lambda d: fragment in d.current_url or self._vizibil(".alert-danger, #modal-message"),
+            timeout=timeout
+        )
+
     def safe_click(self, element, retries=3, wait_after=0.5):
         """
         Click sigur pe un element, cu retry și handling pentru overlay-uri interceptate
@@ -555,7 +952,7 @@ class OblioAutomation:
         Args:
             element: WebElement pe care să se facă click
             retries: Număr de încercări (default 3)
-            wait_after: Timp de așteptare după click (default 0.5s)
+            wait_after: Timeout pentru terminarea cererilor AJAX după click (default 0.5s)
 
         Returns:
             True dacă click-ul a reușit, False altfel
@@ -569,11 +966,10 @@ class OblioAutomation:
 
                 # Scroll element în view dacă e necesar
                 self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", element)
-                time.sleep(0.3)
 
                 # Încearcă click normal
                 element.click()
-                time.sleep(wait_after)
+                self.wait_for_network_idle(timeout=wait_after)
                 return True
 
             except Exception as e:
@@ -585,7 +981,7 @@ class OblioAutomation:
                     # Alternativa 1: Click prin JavaScript
                     try:
                         self.driver.execute_script("arguments[0].click();", element)
-                        time.sleep(wait_after)
+                        self.wait_for_network_idle(timeout=wait_after)
                         return True
                     except:
                         pass
@@ -593,7 +989,7 @@ class OblioAutomation:
                     # Alternativa 2: ActionChains
                     try:
                         ActionChains(self.driver).move_to_element(element).click().perform()
-                        time.sleep(wait_after)
+                        self.wait_for_network_idle(timeout=wait_after)
                         return True
                     except:
                         pass
@@ -601,14 +997,12 @@ class OblioAutomation:
                     # Alternativa 3: Închide modalele vizibile și reîncearcă
                     try:
                         self._close_blocking_modals()
-                        time.sleep(0.5)
+                        self.wait_for_overlays_gone(timeout=2)
                     except:
                         pass
                 else:
                     logger.error(f"❌ Eroare la click: {e}")
 
-                time.sleep(0.5)
-
         logger.error(f"❌ Nu s-a putut face click după {retries} încercări")
         return False
 
@@ -741,7 +1135,7 @@ class OblioAutomation:
             # Navighează la domeniul Oblio mai întâi (necesar pentru a seta cookies)
             logger.info("🌐 Navigare la domeniul Oblio pentru a seta cookies...")
             self.driver.get("https://www.oblio.eu")
-            time.sleep(1)
+            self.wait_for_network_idle()
             
             # Adaugă fiecare cookie
             logger.info(f"🍪 Încărcare {len(cookies)} cookies...")
@@ -778,7 +1172,7 @@ class OblioAutomation:
             # Refresh pagina pentru a aplica cookies
             logger.info("🔄 Refresh pagină pentru aplicare cookies...")
             self.driver.refresh()
-            time.sleep(2)
+            self.wait_for_network_idle()
             
             # Verifică dacă suntem autentificați
             current_url = self.driver.current_url
@@ -811,29 +1205,20 @@ class OblioAutomation:
         login_url = "https://www.oblio.eu/login/"
         logger.info(f"🌐 Navigare la: {login_url}")
         self.driver.get(login_url)
-        time.sleep(2)
+        self.wait_for_network_idle()
         
-        # Așteaptă ca utilizatorul să se logheze
+        # Așteaptă ca utilizatorul să se logheze (URL-ul părăsește pagina de login)
         start_time = time.time()
         logged_in = False
         
         while time.time() - start_time < timeout:
-            current_url = self.driver.current_url
-            
-            # Verifică dacă nu mai suntem pe pagina de login
-            if "login" not in current_url.lower():
-                logger.info(f"✅ Login detectat! URL curent: {current_url}")
+            remaining = int(timeout - (time.time() - start_time))
+            logger.info(f"⏳ Așteaptă login... ({remaining}s rămase)")
+
+            if self.wait_for_condition(lambda d: "login" not in d.current_url.lower(), timeout=min(10, remaining)):
+                logger.info(f"✅ Login detectat! URL curent: {self.driver.current_url}")
                 logged_in = True
                 break
-            
-            # Verifică periodic
-            elapsed = int(time.time() - start_time)
-            remaining = timeout - elapsed
-            
-            if elapsed % 10 == 0:  # Log la fiecare 10 secunde
-                logger.info(f"⏳ Așteaptă login... ({remaining}s rămase)")
-            
-            time.sleep(1)
         
         if logged_in:
             logger.info("✅ Utilizator autentificat cu succes!")
@@ -862,7 +1247,7 @@ class OblioAutomation:
             login_url = "https://www.oblio.eu/login/"
             logger.info(f"🌐 Navigare la: {login_url}")
             self.driver.get(login_url)
-            time.sleep(2)
+            self.wait_for_network_idle()
             
             # Verifică dacă suntem deja logați (redirectați către dashboard)
             if "dashboard" in self.driver.current_url or "stock" in self.driver.current_url:
@@ -885,7 +1270,7 @@ class OblioAutomation:
             email_input.clear()
             email_input.send_keys(email)
             logger.info(f"⌨️ Email introdus: {email}")
-            time.sleep(0.5)
+            self.wait_for_value(email_input, email)
             
             # Găsește câmpul de parolă
             logger.info("🔍 Căutare câmp parolă...")
@@ -902,7 +1287,7 @@ class OblioAutomation:
             password_input.clear()
             password_input.send_keys(password)
             logger.info("⌨️ Parolă introdusă")
-            time.sleep(0.5)
+            self.wait_for_value(password_input, password)
             
             # Verifică și închide cookie banner dacă există
             try:
@@ -920,7 +1305,7 @@ class OblioAutomation:
                         if cookie_button.is_displayed():
                             logger.info("🍪 Click pe buton 'Accept Cookies'...")
                             cookie_button.click()
-                            time.sleep(1)
+                            self.wait_for_invisible(By.ID, 'CybotCookiebotDialog', timeout=3)
                             break
                     except:
                         continue
@@ -957,7 +1342,7 @@ class OblioAutomation:
                 login_button.click()
             
             # Așteaptă să se încarce pagina după login
-            time.sleep(3)
+            self._asteapta_rezultat_login()
             
             # Verifică dacă login-ul a reușit
             current_url = self.driver.current_url
@@ -1003,7 +1388,8 @@ class OblioAutomation:
                             
                             # Submit
                             code_input.send_keys(Keys.ENTER)
-                            time.sleep(3)
+                            self.wait_for_url_change(current_url, timeout=15)
+                            self.wait_for_network_idle()
                             
                             # Verifică din nou URL-ul
                             current_url = self.driver.current_url
@@ -1056,21 +1442,18 @@ class OblioAutomation:
 
             return False
 
-    def type_slowly(self, element, text, delay=0.005):
+    def type_slowly(self, element, text):
         """
-        Tastează text character-by-character (pentru autocomplete)
+        Tastează text pentru autocomplete (send_keys trimite câte un eveniment
+        de tastă per caracter) și așteaptă ca valoarea să apară în câmp
 
         Args:
             element: WebElement input
             text: Textul de tastat
-            delay: Delay între caractere (secunde) - optimizat pentru viteză
         """
         element.clear()
-        for char in text:
-            element.send_keys(char)
-            if delay > 0:
-                time.sleep(delay)
-        # logger.debug(f"⌨️ Tastat: {text}")
+        element.send_keys(text)
+        self.wait_for_value(element, text, timeout=2)
 
     def create_production_voucher(self, sku, quantity, oblio_cookies=None, oblio_email=None, oblio_password=None,
                                    nume=None, order_id=None, order_number=None):
@@ -1090,6 +1473,20 @@ class OblioAutomation:
         Returns:
             bool: True dacă succès, False dacă eșec
         """
+        self._porneste_cronometru(sku, quantity)
+        success = False
+        try:
+            success = self._create_production_voucher(sku, quantity, oblio_cookies, oblio_email, oblio_password,
+                                                      nume, order_id, order_number)
+            return success
+        finally:
+            self._opreste_cronometru(success)
+
+    def _create_production_voucher(self, sku, quantity, oblio_cookies=None, oblio_email=None, oblio_password=None,
+                                   nume=None, order_id=None, order_number=None):
+        """Corpul create_production_voucher (pașii sunt cronometrați cu _pas)"""
+        self._bon_trimis = False
+
         # Salvăm parametrii pentru folosire la salvarea în DB
         self._current_voucher_info = {
             'nume': nume or f"Produs {sku}",
@@ -1100,8 +1497,19 @@ class OblioAutomation:
         self._log(f"🎯 Creare bon: SKU={sku}, Cantitate={quantity}", 'info')
         self._log(f"{'='*60}", 'info')
 
+        # Mod HTTP: câteva cereri în loc de formularul din browser; Selenium rămâne fallback
+        if self.http_mode:
+            rezultat = self._create_production_voucher_http(sku, quantity, oblio_cookies)
+            if rezultat is not None:
+                return rezultat
+            if self.driver is None and not self.setup_driver():
+                self._log("❌ Nu s-a putut porni Chrome WebDriver pentru fallback!", 'error')
+                self._bon_esuat(sku, quantity, 'Mod HTTP indisponibil și Chrome nu a pornit', reincercabil=True)
+                return False
+
         try:
             # Navighează la pagina de producție
+            self._pas('navigate')
             url = "https://www.oblio.eu/stock/production/"
             
             # Optimizare: Verificăm dacă suntem deja pe pagină pentru a evita reload
@@ -1111,7 +1519,6 @@ class OblioAutomation:
             else:
                 self._log(f"🌐 Navigare la: {url}", 'info')
                 self.driver.get(url)
-                # time.sleep(2) # Eliminat sleep fix
             
             # Așteptăm ca elementul principal să fie vizibil
             try:
@@ -1133,7 +1540,7 @@ class OblioAutomation:
                         # Navighează din nou la pagina de producție
                         self._log(f"🌐 Re-navigare la: {url}", 'info')
                         self.driver.get(url)
-                        time.sleep(2)
+                        self.wait_for_network_idle()
                     else:
                         self._log("⚠️ Autentificare cu cookies eșuată", 'warning')
 
@@ -1157,7 +1564,7 @@ class OblioAutomation:
                     # După login, navighează la pagina de producție
                     self._log(f"🌐 Navigare la pagina de producție...", 'info')
                     self.driver.get(url)
-                    time.sleep(3)  # Așteaptă încărcare pagină
+                    self.wait_for_network_idle()
 
                     # Verifică URL curent
                     current_url = self.driver.current_url
@@ -1167,10 +1574,11 @@ class OblioAutomation:
                     if "production" not in current_url.lower():
                         self._log(f"⚠️ Nu suntem pe pagina de producție! Re-navighează...", 'warning')
                         self.driver.get(url)
-                        time.sleep(3)
+                        self.wait_for_network_idle()
                         self._log(f"📍 URL după re-navigare: {self.driver.current_url}", 'info')
 
             # PASUL 1: Găsește și completează câmpul SKU
+            self._pas('autocomplete')
             logger.info("🔍 Căutare câmp SKU (#pp_name)...")
             pp_name_input = self.wait_for_element(By.ID, "pp_name", timeout=20)
 
@@ -1181,7 +1589,7 @@ class OblioAutomation:
 
             # Tastează SKU character-by-character pentru autocomplete
             logger.info(f"⌨️ Tastare SKU: {sku}")
-            self.type_slowly(pp_name_input, sku, delay=0.01)
+            self.type_slowly(pp_name_input, sku)
 
             # Trigger autocomplete
             pp_name_input.send_keys(Keys.SPACE)
@@ -1202,23 +1610,22 @@ class OblioAutomation:
                     logger.info(f"🖱️ Click pe primul rezultat: {first_item.text[:50]}...")
                     first_item.click()
                     # Așteaptă puțin ca Oblio să populeze câmpurile ascunse (ID produs)
-                    time.sleep(0.5)
+                    self._asteapta_selectie_produs()
                 else:
                     logger.warning("⚠️ Autocomplete gol, încerc ENTER...")
                     pp_name_input.send_keys(Keys.ENTER)
-                    time.sleep(0.5)
+                    self._asteapta_selectie_produs()
             except TimeoutException:
                 logger.warning("⚠️ Timeout autocomplete, încerc ENTER...")
                 pp_name_input.send_keys(Keys.ENTER)
-                time.sleep(0.5)
+                self._asteapta_selectie_produs()
             except Exception as e:
                 logger.warning(f"⚠️ Eroare autocomplete: {e}, încerc ENTER...")
                 pp_name_input.send_keys(Keys.ENTER)
-                time.sleep(0.5)
+                self._asteapta_selectie_produs()
 
             # PASUL 3: Verifică că produsul a fost selectat
             logger.info("🔍 Verificare selecție produs...")
-            time.sleep(1)
 
             # Verifică dacă a apărut pop-up cu mesaj de eroare/instrucțiuni
             try:
@@ -1231,7 +1638,7 @@ class OblioAutomation:
                         try:
                             ok_btn = modal_message.find_element(By.CSS_SELECTOR, ".ok-message-modal")
                             ok_btn.click()
-                            time.sleep(0.5)
+                            self.wait_for_invisible(By.ID, 'modal-message', timeout=2)
                         except:
                             pass
                         raise Exception(f"Produsul cu SKU '{sku}' NU EXISTĂ în baza de date Oblio! Verifică SKU-ul.")
@@ -1247,23 +1654,16 @@ class OblioAutomation:
             except NoSuchElementException:
                 raise Exception("Element #pp_name_id nu a fost găsit!")
 
-            # PASUL 4: Completează cantitatea
+            # PASUL 4: Completează cantitatea (Oblio recalculează rețeta)
+            self._pas('recipe')
             logger.info(f"🔢 Completare cantitate: {quantity}")
             pp_quantity_input = self.wait_for_element(By.ID, "pp_quantity", timeout=10)
 
             if not pp_quantity_input:
                 raise Exception("Element #pp_quantity nu a fost găsit!")
 
-            # FIX: Șterge COMPLET câmpul înainte de a introduce valoarea
-            # clear() uneori nu funcționează, deci folosim Ctrl+A + Delete
-            pp_quantity_input.click()
-            time.sleep(0.2)
-            pp_quantity_input.send_keys(Keys.CONTROL + "a")  # Select all
-            time.sleep(0.1)
-            pp_quantity_input.send_keys(Keys.DELETE)  # Delete
-            time.sleep(0.1)
-            pp_quantity_input.send_keys(str(quantity))  # Introduce cantitatea
-            time.sleep(0.5) # Așteaptă ca Oblio să calculeze rețeta (optimizat)
+            # Oblio recalculează rețeta (AJAX); verificarea de stoc citește consumul nou
+            self._completeaza_cantitate(pp_quantity_input, quantity)
             logger.info(f"✅ Cantitate setată: {quantity}")
 
             # --- VERIFICARE STOC (NOU) ---
@@ -1308,6 +1708,7 @@ class OblioAutomation:
             # --- END VERIFICARE STOC ---
 
             # PASUL 5: Click pe butonul de previzualizare/salvare
+            self._pas('save')
             logger.info("🔍 Căutare buton salvare...")
 
             # Încearcă diferite selectoare
@@ -1405,7 +1806,7 @@ class OblioAutomation:
                         if modal_button.is_displayed():
                             logger.info(f"✅ Modal găsit, închid: {selector}")
                             modal_button.click()
-                            time.sleep(1)
+                            self.wait_for_overlays_gone(timeout=3)
                             break
                     except:
                         continue
@@ -1415,12 +1816,13 @@ class OblioAutomation:
             # Scroll la buton pentru a fi sigur că e vizibil
             try:
                 self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", save_button)
-                time.sleep(0.5)
                 logger.info("✅ Scroll la butonul de salvare")
             except:
                 pass
 
             # Click salvare (Previzualizare) - FORȚAT prin JavaScript
+            # De aici bonul poate exista în Oblio: erorile nu se mai reiau (bon dublat)
+            self._bon_trimis = True
             logger.info("🖱️ Click buton salvare (prin JavaScript pentru bypass validare UI)...")
 
             # Încearcă direct JavaScript click pentru bypass event handlers
@@ -1464,14 +1866,12 @@ class OblioAutomation:
                 """, save_button)
 
                 logger.info(f"✅ Click executat: {click_result}")
-                time.sleep(2)
 
             except Exception as e:
                 logger.warning(f"⚠️ JavaScript click eșuat: {e}")
                 # Ultimate fallback: click normal
                 try:
                     save_button.click()
-                    time.sleep(1)
                 except Exception as e2:
                     logger.error(f"❌ Click normal EȘUAT: {e2}")
 
@@ -1495,7 +1895,7 @@ class OblioAutomation:
 
             # PASUL 6: Verifică dacă am fost redirectat la pagina de preview
             logger.info("🔍 Verificare redirect la pagina de preview...")
-            time.sleep(3)  # Mărit de la 1.5s la 3s pentru a aștepta redirect
+            self._asteapta_redirect('/stock/preview_production/')
 
             current_url = self.driver.current_url
             logger.info(f"📍 URL curent după submit: {current_url}")
@@ -1513,6 +1913,7 @@ class OblioAutomation:
                     logger.info(f"✅ REDIRECT LA PREVIEW! ID producție: {production_id}")
 
                     # PASUL 7: Click pe butonul "Lanseaza in Productie"
+                    self._pas('launch')
                     logger.info("🔍 Căutare buton 'Lanseaza in Productie'...")
                     launch_button = None
 
@@ -1537,8 +1938,14 @@ class OblioAutomation:
                         raise Exception("Butonul 'Lanseaza in Productie' nu a fost găsit!")
 
                     logger.info("🖱️ Click pe 'Lanseaza in Productie'...")
+                    inainte = self._cereri_ajax()
                     launch_button.click()
-                    time.sleep(0.5) # Optimizat: 1.5s → 0.5s
+                    # Popup-ul OK, pagina reîncărcată sau cererea de lansare terminată
+                    self.wait_for_condition(
+                        lambda d: self._vizibil(".ok-message-modal, #modal-message") or EC.staleness_of(launch_button)(d)
+                        or self._ajax_terminat(inainte),
+                        timeout=3
+                    )
 
                     # PASUL 8: Click pe butonul OK din popup modal
                     logger.info("🔍 Căutare buton OK în popup modal...")
@@ -1563,11 +1970,12 @@ class OblioAutomation:
                     if ok_button:
                         logger.info("🖱️ Click pe butonul OK din popup...")
                         ok_button.click()
-                        time.sleep(0.5) # Optimizat: 1s → 0.5s
+                        self.wait_for_element(By.CSS_SELECTOR, f"a[href*='production_complete/{production_id}']", timeout=10)
                     else:
                         logger.warning("⚠️ Butonul OK nu a fost găsit (poate nu a apărut popup-ul)")
 
                     # PASUL 9: Click pe butonul "Finalizeaza Productia"
+                    self._pas('finalize')
                     logger.info("🔍 Căutare buton 'Finalizeaza Productia'...")
                     finalize_button = None
 
@@ -1591,16 +1999,20 @@ class OblioAutomation:
                         raise Exception("Butonul 'Finalizeaza Productia' nu a fost găsit!")
 
                     logger.info("🖱️ Click pe 'Finalizeaza Productia'...")
+                    inainte = self._cereri_ajax()
                     finalize_button.click()
-                    time.sleep(1) # Optimizat: 2s → 1s
+                    # Rezultatul click-ului: popup-ul de confirmare preț, pagina reîncărcată
+                    # sau cererea de finalizare terminată
+                    self.wait_for_condition(
+                        lambda d: self._vizibil(".ok-confirm-modal1") or EC.staleness_of(finalize_button)(d)
+                        or self._ajax_terminat(inainte),
+                        timeout=5
+                    )
 
                     # PASUL 10: Handler pentru popup-ul de confirmare preț
                     # "Pretul de vanzare este mai mic decat costul de achizitie. Continuati?"
                     logger.info("🔍 Verificare popup confirmare preț...")
                     try:
-                        # Așteaptă puțin pentru a permite popup-ului să apară
-                        time.sleep(0.5)
-
                         # Căutăm butonul "DA" din popup-ul de confirmare preț
                         price_confirm_selectors = [
                             (By.CSS_SELECTOR, "button.ok-confirm-modal1"),
@@ -1624,7 +2036,8 @@ class OblioAutomation:
                         if price_confirm_button and price_confirm_button.is_displayed():
                             logger.info("🖱️ Click pe butonul 'DA' din popup-ul de confirmare preț...")
                             price_confirm_button.click()
-                            time.sleep(1)
+                            self.wait_for_invisible(By.CSS_SELECTOR, ".ok-confirm-modal1", timeout=5)
+                            self.wait_for_network_idle(timeout=5)
                             logger.info("✅ Popup confirmare preț acceptat!")
                         else:
                             logger.info("ℹ️ Popup confirmare preț nu a apărut (preț OK)")
@@ -1640,6 +2053,7 @@ class OblioAutomation:
 
             # Metodă 2: Dacă nu am fost redirectat, verificăm în raportul de producție
             if not success:
+                self._pas('verify')
                 # Verificăm dacă există un mesaj de eroare pe pagină
                 try:
                     error_msg = self.driver.find_element(By.CSS_SELECTOR, ".alert-danger, .error-message, .text-danger")
@@ -1652,7 +2066,7 @@ class OblioAutomation:
 
                 logger.info("🔍 Navigare la raportul de producție pentru verificare...")
                 self.driver.get("https://www.oblio.eu/report/production")
-                time.sleep(3)
+                self.wait_for_network_idle()
 
                 # Căutăm un bon cu data de azi și SKU-ul nostru
                 from datetime import datetime
@@ -1707,47 +2121,16 @@ class OblioAutomation:
 
             # Rezultat final
             if success:
-                msg = f"🎉 BON DE PRODUCȚIE FINALIZAT CU SUCCES! SKU={sku}, Cantitate={quantity}"
-                if production_id:
-                    msg += f", ID={production_id}"
-                    msg += f"\n   📋 Link: https://www.oblio.eu/stock/preview_production/{production_id}"
-                self._log(msg, 'success')
-                self.stats['success'] += 1
-
-                # Salvare în DB cu order tracking
-                try:
-                    voucher_info = getattr(self, '_current_voucher_info', {})
-                    nume = voucher_info.get('nume', f"Produs {sku}")
-                    order_id = voucher_info.get('order_id')
-                    order_number = voucher_info.get('order_number')
-
-                    adauga_bon(sku, nume, quantity, order_id, order_number)
-                    if order_number:
-                        self._log(f"💾 Salvat în DB: {sku} comanda #{order_number}", 'info')
-                    else:
-                        self._log(f"💾 Salvat în DB: {sku}", 'info')
-                except Exception as e:
-                    self._log(f"⚠️ Eroare salvare DB: {e}", 'warning')
-
+                self._bon_reusit(sku, quantity, production_id)
                 return True
             else:
                 self._log(f"❌ BONUL NU A FOST FINALIZAT! SKU={sku} - Eroare la finalizarea producției", 'error')
-                self.stats['failed'] += 1
-                self.stats['errors'].append({
-                    'sku': sku,
-                    'quantity': quantity,
-                    'error': 'Bon nu a fost finalizat - eroare la unul din pașii de finalizare'
-                })
+                self._bon_esuat(sku, quantity, 'Bon nu a fost finalizat - eroare la unul din pașii de finalizare')
                 return False
 
         except Exception as e:
             self._log(f"❌ EROARE la crearea bonului: {e}", 'error')
-            self.stats['failed'] += 1
-            self.stats['errors'].append({
-                'sku': sku,
-                'quantity': quantity,
-                'error': str(e)
-            })
+            self._bon_esuat(sku, quantity, str(e), reincercabil=not self._bon_trimis)
 
             # Screenshot pentru debugging - upload la Cloudinary cu URL în log
             try:
@@ -1782,7 +2165,7 @@ class OblioAutomation:
             url = "https://www.oblio.eu/stock/transfer/"
             self._log(f"🌐 Navigare la: {url}", 'info')
             self.driver.get(url)
-            time.sleep(3)
+            self.wait_for_network_idle()
 
             # PASUL 1: Selectare Gestiune Sursă (Materiale consumabile)
             self._log("🔍 Selectare gestiune sursă: Materiale consumabile...", 'info')
@@ -1792,7 +2175,7 @@ class OblioAutomation:
                 gestiune_select = Select(self.wait_for_element(By.ID, "gestiune1"))
                 gestiune_select.select_by_value("237258") # Materiale consumabile
                 self._log("✅ Gestiune sursă selectată: Materiale consumabile (237258)", 'info')
-                time.sleep(1)
+                self.wait_for_network_idle(timeout=5)
                 
                 # Gestiunea Destinație este implicit "Marfuri" (237255), nu o mai selectăm explicit
                 
@@ -1806,7 +2189,7 @@ class OblioAutomation:
                 if ok_button:
                     self._log("✅ Popup găsit, click OK...", 'info')
                     ok_button.click()
-                    time.sleep(1.5)
+                    self.wait_for_overlays_gone(timeout=3)
             except:
                 self._log("ℹ️ Popup-ul nu a apărut sau a fost deja închis", 'info')
 
@@ -1827,7 +2210,7 @@ class OblioAutomation:
                             confirm_btn.click()
                         except:
                             self.driver.execute_script("arguments[0].click();", confirm_btn)
-                        time.sleep(1.5)
+                        self.wait_for_invisible(By.CSS_SELECTOR, '.ok-confirm-modal', timeout=3)
                 except:
                     pass
                 
@@ -1847,7 +2230,6 @@ class OblioAutomation:
                 
                 # Asigură-te că elementul este vizibil și interactabil
                 self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", name_input)
-                time.sleep(0.5)
                 
                 # Așteaptă ca elementul să fie interactabil
                 try:
@@ -1856,7 +2238,7 @@ class OblioAutomation:
                     self._log("⚠️ Timeout așteptare input SKU interactabil", 'warning')
 
                 name_input.clear()
-                self.type_slowly(name_input, sku, delay=0.03) # Puțin mai lent pentru stabilitate
+                self.type_slowly(name_input, sku)
                 name_input.send_keys(Keys.SPACE)
                 name_input.send_keys(Keys.BACKSPACE)
                 
@@ -1874,6 +2256,7 @@ class OblioAutomation:
                             first_item = WebDriverWait(self.driver, 3).until(
                                 EC.element_to_be_clickable(autocomplete_items[0])
                             )
+                            inainte = self._cereri_ajax()
                             first_item.click()
                             
                             # Verifică dacă s-a populat un hidden field (ex: ap_id_1 sau similar)
@@ -1884,12 +2267,12 @@ class OblioAutomation:
                                 )
                             except: pass
                             
-                            time.sleep(1.0) # Așteaptă popularea câmpurilor
+                            self.wait_for_ajax_after(inainte, timeout=3) # Oblio populează câmpurile produsului
                             product_selected = True
                             break
                         else:
                             self._log(f"⚠️ Autocomplete gol pentru {sku} (încercare {attempt+1})", 'warning')
-                            time.sleep(1)
+                            self.wait_for_network_idle(timeout=2)
                             
                     except StaleElementReferenceException:
                         self._log(f"⚠️ Stale element la selectare produs {sku}, reîncerc...", 'warning')
@@ -1902,7 +2285,7 @@ class OblioAutomation:
                     self._log(f"❌ Nu s-a putut selecta produsul {sku}!", 'error')
                     # Putem încerca un ENTER ca ultimă soluție
                     name_input.send_keys(Keys.ENTER)
-                    time.sleep(1)
+                    self.wait_for_network_idle(timeout=3)
 
                 # 3.3 Setare Cantitate
                 qty_input = self.wait_for_element(By.ID, "ap_quantity")
@@ -1915,14 +2298,14 @@ class OblioAutomation:
                 except:
                     self.driver.execute_script("arguments[0].click();", qty_input)
                     
-                time.sleep(0.2)
+                inainte = self._cereri_ajax()
                 qty_input.send_keys(Keys.CONTROL + "a")
                 qty_input.send_keys(Keys.DELETE)
                 qty_input.send_keys(str(quantity))
                 
                 # 3.4 Setare Preț (OBLIGATORIU pentru transfer)
-                # Așteptăm puțin să vedem dacă Oblio completează prețul
-                time.sleep(1.0)
+                # Așteptăm să vedem dacă Oblio completează prețul
+                self.wait_for_ajax_after(inainte, timeout=3)
                 try:
                     price_input = self.driver.find_element(By.ID, "ap_price_2")
                     self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", price_input)
@@ -1932,7 +2315,9 @@ class OblioAutomation:
                     
                     # Dacă e gol sau 0, mai așteptăm puțin
                     if not current_val or current_val.strip() == "" or current_val == "0" or current_val == "0.00":
-                        time.sleep(1.0)
+                        self.wait_for_condition(
+                            lambda d: (price_input.get_attribute('value') or '').strip() not in ('', '0', '0.00'), timeout=2
+                        )
                         current_val = price_input.get_attribute("value")
                     
                     # Verificăm din nou și setăm default 19.99 dacă e necesar
@@ -1966,7 +2351,6 @@ class OblioAutomation:
                 add_btn = self.driver.find_element(By.CSS_SELECTOR, ".btn-add-product-on-doc")
                 # Scroll la buton pentru a evita suprapunerea
                 self.driver.execute_script("arguments[0].scrollIntoView(true);", add_btn)
-                time.sleep(0.5)
                 
                 # Folosim DOAR execute_script pentru a evita dublarea click-urilor
                 self.driver.execute_script("arguments[0].click();", add_btn)
@@ -1996,7 +2380,6 @@ class OblioAutomation:
                             self.driver.execute_script("arguments[0].click();", confirm_btn)
                         
                         # Așteptăm să dispară popup-ul
-                        time.sleep(1.5)
                         try:
                             WebDriverWait(self.driver, 2).until(
                                 EC.invisibility_of_element_located((By.CSS_SELECTOR, ".ok-confirm-modal"))
@@ -2010,7 +2393,7 @@ class OblioAutomation:
                 
                 # Așteaptă ca rândul să fie procesat și input-ul să fie golit/resetat
                 # Verificăm dacă input-ul de nume este gol sau așteptăm puțin mai mult
-                time.sleep(2) 
+                self.wait_for_network_idle(timeout=5)
 
 
             # PASUL 4: Previzualizare Transfer
@@ -2032,7 +2415,7 @@ class OblioAutomation:
                                 modal_button.click()
                             except:
                                 self.driver.execute_script("arguments[0].click();", modal_button)
-                            time.sleep(1)
+                            self.wait_for_overlays_gone(timeout=3)
                     except:
                         continue
             except:
@@ -2063,7 +2446,6 @@ class OblioAutomation:
                 # Scroll și Click
                 try:
                     self.driver.execute_script("arguments[0].scrollIntoView({block: 'center'});", preview_btn)
-                    time.sleep(0.5)
                     
                     # Click robust (încearcă să execute funcția din onclick direct)
                     self.driver.execute_script("""
@@ -2083,7 +2465,7 @@ class OblioAutomation:
             # Așteptăm redirect sau popup
             max_retries = 5
             for i in range(max_retries):
-                time.sleep(1)
+                self.wait_for_condition(lambda d: 'preview_transfer' in d.current_url or self._vizibil('.ok-confirm-modal, #modal-message'), timeout=5)
                 
                 # 1. Verificăm dacă a apărut un popup de confirmare (ex: preț modificat)
                 try:
@@ -2094,7 +2476,7 @@ class OblioAutomation:
                             confirm_btn.click()
                         except:
                             self.driver.execute_script("arguments[0].click();", confirm_btn)
-                        time.sleep(2) # Așteptăm să se proceseze
+                        self.wait_for_network_idle(timeout=5) # Așteptăm să se proceseze
                         continue # Mai verificăm o dată
                 except:
                     pass
@@ -2118,14 +2500,13 @@ class OblioAutomation:
                         try:
                             ok_btn = error_modal.find_element(By.CSS_SELECTOR, ".ok-message-modal")
                             ok_btn.click()
-                            time.sleep(1)
+                            self.wait_for_invisible(By.ID, 'modal-message', timeout=2)
                         except:
                             pass
 
                         # SCREENSHOT 2: Produsele de sus (pentru debug stoc) - upload Cloudinary
                         try:
                             self.driver.execute_script("window.scrollTo(0, 0);")
-                            time.sleep(1)
                             screenshot_url2 = self.capture_error_screenshot("transfer", "products_debug")
                             if screenshot_url2:
                                 self._log(f"🖼️ Screenshot produse debug: {screenshot_url2}", 'info')
@@ -2140,13 +2521,13 @@ class OblioAutomation:
             # --- END VERIFICARE POST-SUBMIT ---
             
             # Așteptare redirect
-            time.sleep(3)
+            self.wait_for_url_contains('/stock/preview_transfer/', timeout=5)
             
             # Verificare URL
             if "/stock/preview_transfer/" not in self.driver.current_url:
                 self._log("⚠️ Redirect întârziat, mai încerc o dată submit...", 'warning')
                 self.driver.execute_script("submit_form_doc();")
-                time.sleep(3)
+                self.wait_for_url_contains('/stock/preview_transfer/', timeout=10)
 
             if "/stock/preview_transfer/" in self.driver.current_url:
                 self._log("✅ Redirectat la previzualizare transfer", 'info')
@@ -2158,7 +2539,8 @@ class OblioAutomation:
                 if issue_btn:
                     issue_btn.click()
                     self._log("🖱️ Click 'Emite Nota transfer'", 'info')
-                    time.sleep(3)
+                    self.wait_for_condition(EC.staleness_of(issue_btn), timeout=10)
+                    self.wait_for_network_idle()
                     self._log("🎉 TRANSFER FINALIZAT CU SUCCES!", 'success')
                     return True
                 else:
@@ -2206,6 +2588,12 @@ class OblioAutomation:
         Returns:
             list: Listă de rezultate [{'sku': '...', 'success': True/False, 'message': '...'}]
         """
+        order_numbers = [o for item in batch_list for o in item.get('order_numbers', [])]
+        with self._registru_activ(order_numbers):
+            return self._create_production_vouchers_batch(batch_list, oblio_cookies, oblio_email, oblio_password)
+
+    def _create_production_vouchers_batch(self, batch_list, oblio_cookies=None, oblio_email=None, oblio_password=None):
+        """Corpul create_production_vouchers_batch (bonurile reușite merg în registrul activ)."""
         results = []
         tabs = []
         main_window = self.driver.current_window_handle
@@ -2224,7 +2612,7 @@ class OblioAutomation:
         except:
             pass # Continuăm verificarea
             
-        time.sleep(1) # Extra safety
+        self.wait_for_network_idle()
         
         if "login" in self.driver.current_url.lower():
             self._log("🔐 Login necesar înainte de batch...", 'warning')
@@ -2307,7 +2695,7 @@ class OblioAutomation:
                     raise Exception("Input SKU negăsit")
                     
                 pp_name_input.clear()
-                self.type_slowly(pp_name_input, sku, delay=0.01)
+                self.type_slowly(pp_name_input, sku)
                 pp_name_input.send_keys(Keys.SPACE)
                 pp_name_input.send_keys(Keys.BACKSPACE)
                 
@@ -2326,16 +2714,12 @@ class OblioAutomation:
                 except:
                     pp_name_input.send_keys(Keys.ENTER)
                 
-                # Cantitate
+                # Cantitate (Oblio recalculează rețeta înainte de verificarea stocului)
                 pp_quantity_input = self.wait_for_element(By.ID, "pp_quantity", timeout=5)
                 if pp_quantity_input:
-                    pp_quantity_input.click()
-                    pp_quantity_input.send_keys(Keys.CONTROL + "a")
-                    pp_quantity_input.send_keys(Keys.DELETE)
-                    pp_quantity_input.send_keys(str(qty))
+                    self._completeaza_cantitate(pp_quantity_input, qty)
                 
                 # --- VERIFICARE STOC (BATCH) ---
-                time.sleep(1.0) # Așteaptă calculare rețetă
                 try:
                     # Caută input-ul de cantitate consumată (ap_1_quantity2)
                     consumed_qty_input = self.wait_for_element(By.ID, "ap_1_quantity2", timeout=2)
@@ -2470,12 +2854,12 @@ class OblioAutomation:
                                     # Salvăm câte o înregistrare pentru fiecare comandă
                                     for idx, order_num in enumerate(order_numbers):
                                         order_id = order_ids[idx] if idx < len(order_ids) else None
-                                        adauga_bon(sku, nume, 1, order_id, order_num)
-                                        self._log(f"💾 Salvat în DB: {sku} comanda #{order_num}", 'info')
+                                        self._salveaza_bon(sku, nume, 1, order_id, order_num)
+                                        self._log(f"💾 Înregistrat: {sku} comanda #{order_num}", 'info')
                                 else:
                                     # Fallback fără order tracking
-                                    adauga_bon(sku, nume, qty)
-                                    self._log(f"💾 Salvat în DB: {sku} (fără order tracking)", 'info')
+                                    self._salveaza_bon(sku, nume, qty)
+                                    self._log(f"💾 Înregistrat: {sku} (fără order tracking)", 'info')
                             except Exception as e:
                                 self._log(f"⚠️ Eroare salvare DB: {e}", 'warning')
                         else:
@@ -2532,46 +2916,222 @@ class OblioAutomation:
 
         self.stats['total'] = len(bonuri)
 
-        for i, bon in enumerate(bonuri, 1):
-            # Verifică dacă s-a cerut oprirea
-            self._check_stop()
+        with self._registru_activ([b.get('order_number') for b in bonuri]) as registru:
+            for i, bon in enumerate(bonuri, 1):
+                # Verifică dacă s-a cerut oprirea
+                self._check_stop()
 
-            sku = bon.get('sku')
-            cantitate = bon.get('cantitate', 1)
+                sku = bon.get('sku')
+                cantitate = bon.get('cantitate', 1)
+                order_number = bon.get('order_number')
 
-            self._log(f"📦 Bon {i}/{len(bonuri)}", 'info')
+                self._log(f"📦 Bon {i}/{len(bonuri)}", 'info')
 
-            success = self.create_production_voucher(sku, cantitate, oblio_cookies, oblio_email, oblio_password)
+                # Smart Resume: bonul există deja pentru comandă (verificare din memorie)
+                if order_number is not None and registru.exista(sku, order_number):
+                    self._log(f"⏭️ Bon {i}/{len(bonuri)} - deja procesat (comanda #{order_number})", 'info')
+                    self.stats['skipped'] = self.stats.get('skipped', 0) + 1
+                    continue
 
-            if success:
-                self._log(f"✅ Bon {i}/{len(bonuri)} - SUCCESS", 'success')
-            else:
-                self._log(f"❌ Bon {i}/{len(bonuri)} - FAILED", 'error')
+                success = self.create_production_voucher(
+                    sku, cantitate, oblio_cookies, oblio_email, oblio_password,
+                    nume=bon.get('nume'), order_id=bon.get('order_id'), order_number=order_number
+                )
 
-            # Pauză între bonuri
-            if i < len(bonuri):
-                # self._log(f"⏳ Pauză 2 secunde înainte de următorul bon...", 'info')
-                time.sleep(0.1) # Optimizat: pauză minimă
+                if success:
+                    self._log(f"✅ Bon {i}/{len(bonuri)} - SUCCESS", 'success')
+                else:
+                    self._log(f"❌ Bon {i}/{len(bonuri)} - FAILED", 'error')
 
-        # Raport final
+        self._raport_final()
+        return self.stats
+
+    def _raport_final(self):
+        """Loghează statisticile rulării"""
         self._log(f"{'='*60}", 'info')
         self._log(f"📊 RAPORT FINAL", 'info')
         self._log(f"{'='*60}", 'info')
         self._log(f"Total bonuri: {self.stats['total']}", 'info')
         self._log(f"✅ Succese: {self.stats['success']}", 'success')
         self._log(f"❌ Eșecuri: {self.stats['failed']}", 'error' if self.stats['failed'] > 0 else 'info')
+        if self.stats.get('skipped'):
+            self._log(f"⏭️ Deja procesate: {self.stats['skipped']}", 'info')
 
         if self.stats['failed'] > 0:
             self._log(f"❌ Bonuri eșuate:", 'error')
             for error in self.stats['errors']:
                 self._log(f"  - SKU: {error['sku']}, Eroare: {error['error']}", 'error')
 
+        timpi = self.stats.get('timings') or []
+        if timpi:
+            medii = []
+            for pas in (*PASI_BON, 'total'):
+                valori = [t[pas] for t in timpi if pas in t]
+                if valori:
+                    medii.append(f"{pas}={sum(valori) / len(valori):.2f}s")
+            self._log(f"⏱️ Timp mediu per pas ({len(timpi)} bonuri): {', '.join(medii)}", 'info')
+
         self._log(f"{'='*60}", 'info')
 
+    def process_bonuri_paralel(self, bonuri, workeri=None, oblio_cookies=None, oblio_email=None, oblio_password=None,
+                               incercari=INCERCARI_BON):
+        """
+        Procesează o listă de bonuri cu mai multe browsere headless în paralel
+
+        Bonurile intră într-o coadă comună; fiecare worker are propriul Chrome
+        (sau client HTTP în http_mode), cu aceleași cookies de sesiune, și ia
+        următorul bon din coadă. Bonurile deja procesate (registrul de bonuri)
+        sau duplicate sunt sărite. Un bon eșuat înainte de trimiterea formularului
+        se reîncearcă în același worker; după trimitere eșecul este final, ca
+        bonul să nu se dubleze. stop() oprește toți workerii după bonul curent.
+
+        Args:
+            bonuri (list): Lista de dicționare cu 'sku', 'cantitate' (și opțional 'nume', 'order_id', 'order_number')
+            workeri (int): Numărul de workeri (implicit și maxim MAX_WORKERI)
+            oblio_cookies (str/dict): Cookies Oblio pentru sesiune (PREFERAT)
+            oblio_email (str): Email Oblio (fallback: login o dată, cookies partajate)
+            oblio_password (str): Parolă Oblio
+            incercari (int): Încercări per bon
+
+        Returns:
+            dict: Statistici procesare
+        """
+        self._log(f"🚀 START PROCESARE PARALELĂ: {len(bonuri)} bonuri", 'info')
+        self.stats['total'] = len(bonuri)
+
+        cookies = self._cookies_sesiune(oblio_cookies, oblio_email, oblio_password)
+        if not cookies:
+            self._log("❌ Nu am o sesiune Oblio (cookies) de partajat între workeri!", 'error')
+            return self.stats
+
+        with self._registru_activ([b.get('order_number') for b in bonuri]) as registru:
+            coada = queue.Queue()
+            vazute = set()
+            for bon in bonuri:
+                order_number = bon.get('order_number')
+                if order_number is not None:
+                    cheie = (bon.get('sku'), order_number)
+                    if cheie in vazute or registru.exista(*cheie):
+                        self.stats['skipped'] = self.stats.get('skipped', 0) + 1
+                        continue
+                    vazute.add(cheie)
+                coada.put(bon)
+
+            numar_workeri = max(1, min(workeri or MAX_WORKERI, MAX_WORKERI, coada.qsize()))
+            self._log(f"👷 {numar_workeri} workeri pentru {coada.qsize()} bonuri", 'info')
+
+            fire = [
+                threading.Thread(target=self._worker, args=(i, coada, cookies, registru, incercari), daemon=True)
+                for i in range(1, numar_workeri + 1)
+            ]
+            for fir in fire:
+                fir.start()
+            for fir in fire:
+                fir.join()
+
+            # Bonuri rămase în coadă (oprire sau niciun worker pornit)
+            while not coada.empty():
+                bon = coada.get_nowait()
+                if not self._oprire_ceruta():
+                    self._bon_esuat(bon.get('sku'), bon.get('cantitate', 1), 'Niciun worker disponibil')
+
+        self._raport_final()
         return self.stats
 
+    def _cookies_sesiune(self, oblio_cookies=None, oblio_email=None, oblio_password=None):
+        """Cookies de sesiune pentru workeri: cele primite sau cele ale browser-ului după login."""
+        if oblio_cookies:
+            return json.loads(oblio_cookies) if isinstance(oblio_cookies, str) else oblio_cookies
+
+        if not (oblio_email and oblio_password) and not self.input_callback and not self.driver:
+            return None
+        if self.driver is None and not self.setup_driver():
+            return None
+        if not self.login_if_needed(oblio_email, oblio_password):
+            return None
+        return self.driver.get_cookies()
+
+    def _worker(self, index, coada, cookies, registru, incercari):
+        """Un worker din process_bonuri_paralel: propriul browser, bonuri din coada comună."""
+        def log_worker(message, level):
+            if self.log_callback:
+                with self._log_lock:
+                    self.log_callback(f"[W{index}] {message}", level)
+
+        worker = OblioAutomation(use_existing_profile=False, headless=True, log_callback=log_worker,
+                                 http_mode=self.http_mode)
+        worker._stop_event = self._stop_event
+        worker.registru = registru
+
+        try:
+            if not worker.http_mode:
+                if not worker.setup_driver():
+                    self._log(f"❌ [W{index}] Chrome nu a pornit - worker oprit", 'error')
+                    return
+                worker.load_cookies_from_json(cookies)
+
+            while not self._oprire_ceruta():
+                try:
+                    bon = coada.get_nowait()
+                except queue.Empty:
+                    break
+                self._proceseaza_bon_worker(worker, index, bon, cookies, registru, incercari)
+        except Exception as e:
+            self._log(f"❌ [W{index}] Eroare worker: {e}", 'error')
+        finally:
+            worker.close()
+
+    def _proceseaza_bon_worker(self, worker, index, bon, cookies, registru, incercari):
+        """Un bon în worker: verificare în registru, creare, reîncercare la erorile de dinainte de trimitere."""
+        sku = bon.get('sku')
+        cantitate = bon.get('cantitate', 1)
+        order_number = bon.get('order_number')
+
+        for incercare in range(1, incercari + 1):
+            # Idempotență: bonul poate fi fost înregistrat între timp
+            if order_number is not None and registru.exista(sku, order_number):
+                with self._stats_lock:
+                    self.stats['skipped'] = self.stats.get('skipped', 0) + 1
+                return
+
+            erori = len(worker.stats['errors'])
+            timpi = len(worker.stats['timings'])
+            success = worker.create_production_voucher(sku, cantitate, cookies, nume=bon.get('nume'),
+                                                       order_id=bon.get('order_id'), order_number=order_number)
+            with self._stats_lock:
+                self.stats['timings'].extend(worker.stats['timings'][timpi:])
+            if success:
+                with self._stats_lock:
+                    self.stats['success'] += 1
+                return
+
+            # Fără eroare înregistrată (ex. stoc insuficient) bonul nu se reia
+            if len(worker.stats['errors']) == erori:
+                return
+            # Se reiau doar erorile de dinainte de trimiterea bonului, altfel bonul s-ar dubla
+            if not worker.stats['errors'][-1].get('reincercabil') or incercare == incercari or self._oprire_ceruta():
+                break
+
+            self._log(f"🔁 [W{index}] Reîncercare {incercare + 1}/{incercari}: {sku}", 'warning')
+            if worker.driver is not None:
+                try:
+                    worker.driver.current_url
+                except Exception:
+                    self._log(f"🔧 [W{index}] Browser-ul nu mai răspunde - repornire", 'warning')
+                    worker.close()
+                    worker.driver = None
+                    if worker.setup_driver():
+                        worker.load_cookies_from_json(cookies)
+
+        with self._stats_lock:
+            self.stats['failed'] += 1
+            self.stats['errors'].append(worker.stats['errors'][-1])
+
     def close(self):
-        """Închide browser-ul"""
+        """Închide browser-ul (și sesiunea HTTP)"""
+        if self.http_client:
+            self.http_client.close()
+            self.http_client = None
         if self.driver:
             logger.info("🚪 Închidere browser...")
             try:
@@ -2589,7 +3149,7 @@ class OblioAutomation:
         try:
             self._log("🔍 Verificare istoric producție (pentru a evita duplicate)...", 'info')
             self.driver.get("https://www.oblio.eu/report/production")
-            time.sleep(2)
+            self.wait_for_network_idle()
             
             from datetime import datetime
             today = datetime.now().strftime("%d.%m.%Y")
@@ -2649,7 +3209,7 @@ class OblioAutomation:
                         
                     next_link = next_li.find_element(By.TAG_NAME, "a")
                     self.driver.execute_script("arguments[0].click();", next_link)
-                    time.sleep(2)
+                    self.wait_for_condition(EC.staleness_of(rows[0]), timeout=10)
                     page += 1
                 except Exception as e:
                     # self._log(f"ℹ️ Nu mai există pagini următoare ({e})", 'info')
@@ -2666,7 +3226,7 @@ class OblioAutomation:
         """Asigură autentificarea în Oblio"""
         try:
             self.driver.get("https://www.oblio.eu/stock/production/")
-            time.sleep(2)
+            self.wait_for_network_idle()
             
             # Verifică dacă suntem pe pagina de login
             if "login" in self.driver.current_url.lower():
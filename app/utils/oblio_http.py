@@ -0,0 +1,323 @@
+# -*- coding: utf-8 -*-
+"""
+Client HTTP pentru bonurile de producție Oblio (fără browser) - EXPERIMENTAL
+
+Reface cererile pe care le trimite formularul de producție din interfață,
+printr-o sesiune requests autentificată cu cookie-urile Oblio (același JSON
+ca la OblioAutomation.load_cookies_from_json sau driver.get_cookies()):
+
+    1. GET  /stock/production/                  formularul (câmpuri ascunse, acțiune)
+    2. GET  autocomplete produs (term=SKU)      primul rezultat -> pp_name_id
+    3. GET  rețeta produsului (id, cantitate)   componentele ap_N_* și stocul lor
+    4. POST formularul                          redirect /stock/preview_production/{id}
+    5. GET  /stock/production_save/{id}         "Lanseaza in Productie"
+    6. GET  /stock/production_complete/{id}     "Finalizeaza Productia"
+
+Un bon înseamnă câteva cereri HTTP, fără tastare caracter cu caracter și
+fără pauze fixe. Căile sunt în ENDPOINTURI, iar adresa de bază se poate
+schimba (OBLIO_BASE_URL), de exemplu spre serverul stub din
+benchmarks/oblio_stub.py.
+
+NEVERIFICAT: căile endpoint-urilor AJAX, forma răspunsurilor JSON și numele
+câmpurilor ap_N_* sunt deduse din formularul folosit de Selenium, nu din
+trafic capturat de pe oblio.eu; stub-ul din benchmarks/ a fost scris după
+aceleași presupuneri, deci nu le validează. De aceea clientul nu trimite
+formularul decât dacă pagina primită conține toate câmpurile pe care le
+completează (altfel OblioSesiuneInvalida și revenire la Selenium).
+
+Erorile de sesiune sau de structură a paginii apărute înainte de POST
+(OblioSesiuneInvalida) permit revenirea la Selenium, fiindcă bonul nu a fost
+creat; erorile de după POST și cele de business (produs inexistent, stoc
+insuficient) nu, ca să nu se dubleze bonul.
+"""
+
+import os
+import re
+import json
+import logging
+import time
+from html.parser import HTMLParser
+from typing import Dict, List, Optional, Union
+from urllib.parse import urljoin
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Adresa Oblio (suprascrisă pentru testare locală)
+OBLIO_BASE_URL = os.getenv('OBLIO_BASE_URL', 'https://www.oblio.eu')
+
+# Căile cererilor făcute de formularul de producție
+ENDPOINTURI = {
+    'productie': '/stock/production/',
+    'autocomplete': '/stock/ajax/production_products/',
+    'reteta': '/stock/ajax/production_recipe/',
+    'lansare': '/stock/production_save/{id}',
+    'finalizare': '/stock/production_complete/{id}',
+}
+
+# Secunde per cerere HTTP
+TIMEOUT = 20
+
+_RE_PREVIEW = re.compile(r'/preview_production/(\d+)')
+_RE_SUBMIT_FORM = re.compile(r"submit_form_doc\('([^']+)'\)")
+
+
+class OblioHttpEroare(Exception):
+    """Bonul nu a putut fi creat (eroare Oblio sau de business)."""
+
+
+class OblioSesiuneInvalida(OblioHttpEroare):
+    """Sesiune neautentificată sau pagină neașteptată, înainte de crearea bonului."""
+
+
+class StocInsuficient(OblioHttpEroare):
+    """Stocul unei materii prime nu acoperă rețeta bonului."""
+
+
+class _ParserPagina(HTMLParser):
+    """Extrage formularele (cu câmpurile lor), link-urile și mesajele de eroare."""
+
+    def __init__(self):
+        super().__init__()
+        self.formulare: List[Dict] = []
+        self.linkuri: List[str] = []
+        self.formulare_submit: List[str] = []
+        self.erori: List[str] = []
+        self._formular: Optional[Dict] = None
+        self._adancime_eroare = 0
+        self._text_eroare: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        attrs = {k: (v or '') for k, v in attrs}
+        clase = attrs.get('class', '').split()
+
+        if tag == 'form':
+            self._formular = {
+                'nume': attrs.get('name') or attrs.get('id', ''),
+                'actiune': attrs.get('action', ''),
+                'metoda': attrs.get('method', 'get').lower(),
+                'campuri': {},
+            }
+            self.formulare.append(self._formular)
+        elif tag in ('input', 'select', 'textarea') and self._formular is not None and attrs.get('name'):
+            if attrs.get('type') in ('checkbox', 'radio') and 'checked' not in attrs:
+                return
+            self._formular['campuri'][attrs['name']] = attrs.get('value', '')
+        elif tag == 'a':
+            if attrs.get('href'):
+                self.linkuri.append(attrs['href'])
+            potrivire = _RE_SUBMIT_FORM.search(attrs.get('onclick', ''))
+            if potrivire:
+                self.formulare_submit.append(potrivire.group(1))
+
+        if self._adancime_eroare:
+            self._adancime_eroare += 1
+        elif 'alert-danger' in clase:
+            self._adancime_eroare = 1
+            self._text_eroare = []
+
+    def handle_endtag(self, tag):
+        if tag == 'form':
+            self._formular = None
+        if self._adancime_eroare:
+            self._adancime_eroare -= 1
+            if not self._adancime_eroare:
+                text = ' '.join(''.join(self._text_eroare).split())
+                if text:
+                    self.erori.append(text)
+
+    def handle_data(self, data):
+        if self._adancime_eroare:
+            self._text_eroare.append(data)
+
+
+def _parseaza(html: str) -> _ParserPagina:
+    parser = _ParserPagina()
+    parser.feed(html)
+    parser.close()
+    return parser
+
+
+def _cookies_din_json(cookies_json: Union[str, List[Dict], Dict]) -> List[Dict]:
+    cookies = json.loads(cookies_json) if isinstance(cookies_json, str) else cookies_json
+    if isinstance(cookies, dict):
+        return [{'name': nume, 'value': valoare} for nume, valoare in cookies.items()]
+    return list(cookies or [])
+
+
+class OblioHttpClient:
+    """
+    Sesiune HTTP Oblio pentru crearea bonurilor de producție.
+
+    O instanță nu se folosește din mai multe fire în paralel (sesiunea
+    requests nu este thread-safe); fiecare worker are propriul client.
+    """
+
+    def __init__(self, cookies_json, base_url: Optional[str] = None, timeout: float = TIMEOUT):
+        self.base_url = (base_url or OBLIO_BASE_URL).rstrip('/')
+        self.timeout = timeout
+        self.timpi: Dict[str, float] = {}  # Secunde per pas ale ultimului bon (PASI_BON)
+        self.session = requests.Session()
+        self.session.headers['User-Agent'] = (
+            'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+            '(KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36'
+        )
+
+        for cookie in _cookies_din_json(cookies_json):
+            # Domeniul din JSON (.oblio.eu) nu se potrivește cu o adresă de test
+            self.session.cookies.set(cookie['name'], cookie['value'], path=cookie.get('path', '/'))
+
+    def _url(self, cale: str, **kwargs) -> str:
+        return urljoin(self.base_url + '/', ENDPOINTURI.get(cale, cale).format(**kwargs).lstrip('/'))
+
+    def _cerere(self, metoda: str, url: str, **kwargs) -> requests.Response:
+        raspuns = self.session.request(metoda, url, timeout=self.timeout, **kwargs)
+        if 'login' in raspuns.url.lower():
+            raise OblioSesiuneInvalida("Sesiunea Oblio a expirat (redirect la login)")
+        raspuns.raise_for_status()
+        return raspuns
+
+    def este_autentificat(self) -> bool:
+        """Verifică dacă cookie-urile deschid pagina de producție."""
+        try:
+            self._cerere('GET', self._url('productie'))
+            return True
+        except (OblioSesiuneInvalida, requests.RequestException):
+            return False
+
+    def _formular_productie(self) -> Dict:
+        """Formularul de producție: acțiunea și câmpurile cu valorile implicite."""
+        raspuns = self._cerere('GET', self._url('productie'))
+        pagina = _parseaza(raspuns.text)
+
+        formulare = [f for f in pagina.formulare if 'pp_name' in f['campuri']]
+        if pagina.formulare_submit:
+            formulare = [f for f in formulare if f['nume'] in pagina.formulare_submit] or formulare
+        if not formulare:
+            raise OblioSesiuneInvalida("Formularul de producție (#pp_name) nu a fost găsit")
+
+        formular = dict(formulare[0])
+        formular['url'] = urljoin(raspuns.url, formular['actiune'] or raspuns.url)
+        return formular
+
+    def cauta_produs(self, sku: str) -> Dict:
+        """
+        Primul rezultat din autocomplete pentru SKU (ca selecția din listă).
+
+        Returns:
+            Dict cu 'id' (pp_name_id) și 'label'
+        """
+        raspuns = self._cerere('GET', self._url('autocomplete'), params={'term': sku})
+        try:
+            rezultate = raspuns.json()
+        except ValueError:
+            raise OblioSesiuneInvalida("Răspuns autocomplete neașteptat (nu este JSON)")
+
+        if not rezultate or not rezultate[0].get('id'):
+            raise OblioHttpEroare(f"Produsul cu SKU '{sku}' NU EXISTĂ în baza de date Oblio! Verifică SKU-ul.")
+        return rezultate[0]
+
+    def reteta(self, produs_id, cantitate) -> List[Dict]:
+        """
+        Componentele consumate pentru cantitatea dată.
+
+        Returns:
+            Listă de dict-uri {'id', 'name', 'quantity', 'stock'}
+        """
+        raspuns = self._cerere('GET', self._url('reteta'), params={'id': produs_id, 'quantity': cantitate})
+        try:
+            return raspuns.json() or []
+        except ValueError:
+            raise OblioSesiuneInvalida("Răspuns rețetă neașteptat (nu este JSON)")
+
+    def creeaza_bon(self, sku: str, cantitate) -> Dict:
+        """
+        Creează, lansează și finalizează un bon de producție.
+
+        Returns:
+            Dict cu 'production_id' și 'produs' (eticheta din autocomplete)
+
+        Raises:
+            OblioSesiuneInvalida: înainte de crearea bonului (se poate reveni la Selenium)
+            StocInsuficient: rețeta nu are stoc (bonul nu se creează)
+            OblioHttpEroare: orice altă eroare
+        """
+        self.timpi = {}
+        start = time.perf_counter()
+
+        def pas_terminat(pas):
+            nonlocal start
+            acum = time.perf_counter()
+            self.timpi[pas] = round(acum - start, 3)
+            start = acum
+
+        try:
+            formular = self._formular_productie()
+            pas_terminat('navigate')
+            produs = self.cauta_produs(sku)
+            pas_terminat('autocomplete')
+            componente = self.reteta(produs['id'], cantitate)
+            pas_terminat('recipe')
+        except requests.RequestException as e:
+            raise OblioSesiuneInvalida(f"Oblio indisponibil: {e}")
+
+        completate = {
+            'pp_name': produs.get('label', sku),
+            'pp_name_id': produs['id'],
+            'pp_quantity': cantitate,
+        }
+        for i, componenta in enumerate(componente, 1):
+            necesar = float(componenta.get('quantity') or 0)
+            stoc = componenta.get('stock')
+            if stoc is not None and necesar > float(stoc):
+                raise StocInsuficient(
+                    f"STOC INSUFICIENT pentru {sku}! Necesar: {necesar}, Disponibil: {float(stoc)}"
+                )
+            completate[f'ap_{i}_name'] = componenta.get('name', '')
+            completate[f'ap_{i}_name_id'] = componenta.get('id', '')
+            completate[f'ap_{i}_quantity2'] = componenta.get('quantity', '')
+
+        # Câmpurile sunt presupuse, nu verificate pe oblio.eu: fără ele în formular nu se trimite nimic
+        lipsa = [camp for camp in completate if camp not in formular['campuri']]
+        if lipsa:
+            raise OblioSesiuneInvalida(
+                f"Formularul de producție nu conține câmpurile așteptate: {', '.join(lipsa)}"
+            )
+        campuri = dict(formular['campuri'])
+        campuri.update(completate)
+
+        # De aici bonul poate exista în Oblio: erorile nu mai permit reluarea cu Selenium
+        try:
+            raspuns = self.session.post(formular['url'], data=campuri, timeout=self.timeout)
+            potrivire = _RE_PREVIEW.search(raspuns.url)
+            if not potrivire:
+                erori = _parseaza(raspuns.text).erori
+                raise OblioHttpEroare(
+                    f"Eroare Oblio: {erori[0]}" if erori else f"Nu s-a făcut redirect la preview. URL curent: {raspuns.url}"
+                )
+            production_id = potrivire.group(1)
+            pas_terminat('save')
+
+            for pas, nume_pas in (('lansare', 'launch'), ('finalizare', 'finalize')):
+                pagina = _parseaza(raspuns.text)
+                cale = ENDPOINTURI[pas].split('{')[0]
+                href = next((h for h in pagina.linkuri if cale in h and production_id in h), None)
+                url = urljoin(raspuns.url, href) if href else self._url(pas, id=production_id)
+
+                raspuns = self.session.get(url, timeout=self.timeout)
+                raspuns.raise_for_status()
+                erori = _parseaza(raspuns.text).erori
+                if erori or 'login' in raspuns.url.lower():
+                    raise OblioHttpEroare(
+                        f"Eroare Oblio la {pas} (bon {production_id}): {erori[0] if erori else 'sesiune expirată'}"
+                    )
+                pas_terminat(nume_pas)
+        except requests.RequestException as e:
+            raise OblioHttpEroare(f"Eroare rețea după trimiterea bonului: {e}")
+
+        logger.info(f"✅ Bon HTTP finalizat: SKU={sku}, Cantitate={cantitate}, ID={production_id}")
+        return {'production_id': production_id, 'produs': produs.get('label', sku)}
+
+    def close(self):
+        self.session.close()
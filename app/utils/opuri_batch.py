@@ -0,0 +1,416 @@
+"""
+Export OP-uri pe mai multe luni (linie de comanda, fara Streamlit)
+
+Datele sursa (MT940, borderouri GLS, colete GLS/Sameday, tranzactii Netopia)
+se citesc o singura data pentru tot intervalul, iar AWB-urile si comenzile se
+rezolva in Gomag intr-un singur lot. Fiecare luna se construieste apoi din
+memorie, cu aceleasi reguli ca generate_opuri_export, iar workbook-urile
+lunare se scriu in paralel, intr-un pool de procese. Se afiseaza timpul
+fiecarei etape.
+
+Cu --offline datele se citesc din oglinda locala SQLite (analytics_mirror),
+fara nicio cerere catre Supabase.
+
+Rulare (din directorul app):
+    python -m utils.opuri_batch 2025-01 2025-12 [--output ../exports] [--gomag export.xlsx] [--workers N]
+    python -m utils.opuri_batch 2025-03 2025-03 --offline [--mirror ../data/mirror.sqlite]
+"""
+
+import os
+import time
+import argparse
+import calendar
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import pandas as pd
+
+from .supabase_client import get_supabase_client, fetch_all
+from .analytics_mirror import MIRROR_PATH, read_frame, read_rows, snapshot
+from .gomag_cache import incarca_gomag, normalizeaza_gomag
+from .gomag_orders import rezolva_awb, rezolva_comenzi
+from .import_registry import LOOKUP_CHUNK_SIZE, _chunks
+from .opuri_processor import (
+    filtreaza_borderouri_gls,
+    formateaza_borderouri_gls,
+    get_sameday_borderouri_from_ops,
+    group_parcels_by_delivery_date,
+    scrie_export_opuri,
+    _extrage_order_id_netopia,
+)
+
+
+def _plus_7_zile(data: str) -> str:
+    return (datetime.strptime(data, '%Y-%m-%d') + timedelta(days=7)).strftime('%Y-%m-%d')
+
+
+def luni_interval(luna_start: str, luna_sfarsit: str) -> List[Tuple[str, str, str]]:
+    """
+    Lunile dintre doua luni 'YYYY-MM' (inclusiv).
+
+    Returns:
+        Lista (eticheta 'YYYY-MM', prima zi, ultima zi)
+    """
+    an, luna = map(int, luna_start.split('-'))
+    an_final, luna_finala = map(int, luna_sfarsit.split('-'))
+
+    luni = []
+    while (an, luna) <= (an_final, luna_finala):
+        ultima_zi = calendar.monthrange(an, luna)[1]
+        luni.append((f"{an:04d}-{luna:02d}", f"{an:04d}-{luna:02d}-01", f"{an:04d}-{luna:02d}-{ultima_zi:02d}"))
+        an, luna = (an + 1, 1) if luna == 12 else (an, luna + 1)
+    return luni
+
+
+# ============================================
+# Citire date (o singura data pentru tot intervalul)
+# ============================================
+
+def _batch_ids_netopia(mt940_transactions: List[Dict]) -> List:
+    return list(dict.fromkeys(
+        t.get('batch_id') for t in mt940_transactions
+        if t.get('source', '').upper() == 'NETOPIA' and t.get('batch_id')
+    ))
+
+
+def _date_interval(
+    mt940_transactions: List[Dict],
+    gls_borderouri: List[Dict],
+    parcele_borderouri: List[Dict],
+    gls_parcels: List[Dict],
+    sameday_parcels: List[Dict],
+    tranzactii_netopia: List[Dict]
+) -> Dict:
+    """Grupeaza randurile citite (din Supabase sau din oglinda locala) pentru date_luna."""
+    parcels_per_borderou = defaultdict(list)
+    for p in parcele_borderouri:
+        parcels_per_borderou[p['borderou_id']].append(p)
+    for borderou in gls_borderouri:
+        borderou['parcels'] = parcels_per_borderou.get(borderou['id'], [])
+
+    netopia_trans_per_batch = {batch_id: [] for batch_id in _batch_ids_netopia(mt940_transactions)}
+    for trans in tranzactii_netopia:
+        netopia_trans_per_batch[trans['batch_id']].append(trans)
+
+    livrari_gls = defaultdict(list)
+    for p in gls_parcels:
+        livrari_gls[str(p.get('parcel_number'))].append(str(p.get('delivery_date', '')))
+
+    return {
+        'mt940_transactions': mt940_transactions,
+        'gls_borderouri': gls_borderouri,
+        'gls_parcels': [p for p in gls_parcels if p.get('is_delivered')],
+        'livrari_gls': livrari_gls,
+        'sameday_parcels': sameday_parcels,
+        'netopia_trans_per_batch': netopia_trans_per_batch,
+    }
+
+
+def incarca_date_interval(start_date: str, end_date: str) -> Dict:
+    """
+    Citeste din Supabase toate datele necesare export-ului pentru un interval.
+
+    Ca in generate_opuri_export, MT940 si borderourile GLS se citesc cu 7 zile
+    dupa sfarsitul intervalului.
+    """
+    client = get_supabase_client()
+    if not client:
+        raise RuntimeError("Supabase nu este configurat")
+
+    extended_end = _plus_7_zile(end_date)
+
+    mt940_transactions = fetch_all(
+        lambda: client.table("bank_transactions").select("*").gte(
+            "transaction_date", start_date
+        ).lte("transaction_date", extended_end).order("id")
+    )
+
+    gls_borderouri = fetch_all(
+        lambda: client.table("gls_borderouri").select("*").gte(
+            "borderou_date", start_date
+        ).lte("borderou_date", extended_end).order("borderou_date").order("id")
+    )
+
+    # Coletele fiecarui borderou, in loturi de borderouri
+    parcele_borderouri = []
+    for chunk in _chunks([b['id'] for b in gls_borderouri], LOOKUP_CHUNK_SIZE):
+        parcele_borderouri.extend(fetch_all(
+            lambda: client.table("gls_borderou_parcels").select("*").in_("borderou_id", chunk).order("id")
+        ))
+
+    # Coletele GLS/Sameday cu livrare in interval (lunile sunt incluse in interval)
+    gls_parcels = fetch_all(
+        lambda: client.table("gls_parcels").select("*").gte(
+            "delivery_date", start_date
+        ).lte("delivery_date", end_date).order("id")
+    )
+    sameday_parcels = fetch_all(
+        lambda: client.table("sameday_parcels").select("*").eq("is_delivered", True).gte(
+            "delivery_date", start_date
+        ).lte("delivery_date", end_date).order("id")
+    )
+
+    # Tranzactiile Netopia pentru toate batch-urile din extrase
+    tranzactii_netopia = []
+    for chunk in _chunks(_batch_ids_netopia(mt940_transactions), LOOKUP_CHUNK_SIZE):
+        tranzactii_netopia.extend(fetch_all(
+            lambda: client.table("netopia_transactions").select("*").in_("batch_id", chunk).order("id")
+        ))
+
+    return _date_interval(
+        mt940_transactions, gls_borderouri, parcele_borderouri, gls_parcels, sameday_parcels, tranzactii_netopia
+    )
+
+
+def incarca_date_interval_oglinda(start_date: str, end_date: str, path: Optional[str] = None) -> Dict:
+    """
+    Aceleasi date ca incarca_date_interval, citite din oglinda locala
+    (analytics_mirror), fara retea. Coletele borderourilor si tranzactiile
+    Netopia se leaga prin join-uri SQL.
+    """
+    extended_end = _plus_7_zile(end_date)
+
+    # Toate tabelele din aceeasi sincronizare a oglinzii
+    with snapshot(path) as conn:
+        mt940_transactions = read_rows(
+            "select * from bank_transactions where transaction_date between ? and ? order by id",
+            (start_date, extended_end), conn=conn
+        )
+        gls_borderouri = read_rows(
+            "select * from gls_borderouri where borderou_date between ? and ? order by borderou_date, id",
+            (start_date, extended_end), conn=conn
+        )
+        parcele_borderouri = read_rows(
+            "select p.* from gls_borderou_parcels p"
+            " join gls_borderouri b on b.id = p.borderou_id"
+            " where b.borderou_date between ? and ? order by p.id",
+            (start_date, extended_end), conn=conn
+        )
+        gls_parcels = read_rows(
+            "select * from gls_parcels where delivery_date between ? and ? order by id",
+            (start_date, end_date), conn=conn
+        )
+        sameday_parcels = read_rows(
+            "select * from sameday_parcels where is_delivered = 1 and delivery_date between ? and ? order by id",
+            (start_date, end_date), conn=conn
+        )
+        tranzactii_netopia = read_rows(
+            "select n.* from netopia_transactions n"
+            " where n.batch_id in ("
+            "   select t.batch_id from bank_transactions t"
+            "   where upper(t.source) = 'NETOPIA' and t.batch_id is not null and t.batch_id != ''"
+            "     and t.transaction_date between ? and ?"
+            " ) order by n.id",
+            (start_date, extended_end), conn=conn
+        )
+
+    return _date_interval(
+        mt940_transactions, gls_borderouri, parcele_borderouri, gls_parcels, sameday_parcels, tranzactii_netopia
+    )
+
+
+def gomag_din_oglinda(path: Optional[str] = None) -> pd.DataFrame:
+    """
+    Comenzile Gomag din oglinda locala, ca frame Gomag (pentru rezolva_awb / rezolva_comenzi).
+
+    Comenzile awb_principal vin primele, ca un AWB comun sa se rezolve la fel
+    ca in tabela gomag_orders.
+    """
+    coloane = {row['name'] for row in read_rows('pragma table_info("gomag_orders")', path=path)}
+    ordine = 'awb_principal desc, order_number' if 'awb_principal' in coloane else 'order_number'
+    return read_frame(
+        'select order_number as "numar comanda", awb, invoice_number as "numar factura",'
+        ' total_comanda as "total comanda", total_factura as "total factura"'
+        f' from gomag_orders order by {ordine}',
+        path=path
+    )
+
+
+def _in_perioada(data, start_date: str, end_date: str) -> bool:
+    data = str(data or '')
+    return data >= start_date and data <= end_date
+
+
+def date_luna(date_interval: Dict, start_date: str, end_date: str) -> Dict:
+    """
+    Datele export-ului pentru o luna, construite din datele intervalului
+    (aceleasi reguli ca colecteaza_date_opuri, fara rezolvarea Gomag).
+    """
+    extended_end = _plus_7_zile(end_date)
+
+    mt940_transactions = [
+        t for t in date_interval['mt940_transactions']
+        if _in_perioada(t.get('transaction_date'), start_date, extended_end)
+    ]
+
+    # Borderourile GLS REALE din email
+    livrari_gls = date_interval['livrari_gls']
+    gls_borderouri_real = filtreaza_borderouri_gls(
+        [b for b in date_interval['gls_borderouri'] if _in_perioada(b.get('borderou_date'), start_date, extended_end)],
+        start_date,
+        end_date,
+        lambda parcel_numbers: [d for n in parcel_numbers for d in livrari_gls.get(str(n), [])]
+    )
+    gls_borderouri = formateaza_borderouri_gls(gls_borderouri_real)
+
+    # Daca nu sunt borderouri din email, foloseste metoda veche (fallback)
+    if not gls_borderouri:
+        gls_parcels = [p for p in date_interval['gls_parcels'] if _in_perioada(p.get('delivery_date'), start_date, end_date)]
+        gls_borderouri = group_parcels_by_delivery_date(gls_parcels, "GLS")
+
+    sameday_parcels = date_interval['sameday_parcels']
+    sameday_borderouri = get_sameday_borderouri_from_ops(start_date, end_date, mt940_transactions, sameday_parcels)
+    if not sameday_borderouri:
+        sameday_period = [p for p in sameday_parcels if _in_perioada(p.get('delivery_date'), start_date, end_date)]
+        sameday_borderouri = group_parcels_by_delivery_date(sameday_period, "Sameday")
+
+    netopia_ops = [t for t in mt940_transactions if t.get('source', '').upper() == 'NETOPIA']
+    netopia_trans_per_batch = {
+        op['batch_id']: date_interval['netopia_trans_per_batch'].get(op['batch_id'], [])
+        for op in netopia_ops if op.get('batch_id')
+    }
+
+    return {
+        'mt940_transactions': mt940_transactions,
+        'gls_borderouri': gls_borderouri,
+        'sameday_borderouri': sameday_borderouri,
+        'awb_rezolvate': {},
+        'netopia_ops': netopia_ops,
+        'netopia_trans_per_batch': netopia_trans_per_batch,
+        'comenzi_gomag': {},
+    }
+
+
+def _awb_luna(date: Dict) -> List[str]:
+    return [
+        p.get('parcel_number', p.get('awb_number', ''))
+        for borderou in date['gls_borderouri'] + date['sameday_borderouri']
+        for p in borderou['parcels']
+    ]
+
+
+def _comenzi_luna(date: Dict) -> List[str]:
+    return [
+        _extrage_order_id_netopia(trans.get('order_id', ''))
+        for trans_list in date['netopia_trans_per_batch'].values()
+        for trans in trans_list
+    ]
+
+
+# ============================================
+# Scriere (pool de procese, cate o luna per task)
+# ============================================
+
+def _scrie_luna(eticheta: str, date: Dict, output_dir: str) -> Tuple[str, str, float]:
+    """Scrie workbook-ul unei luni; intoarce (eticheta, cale, durata)."""
+    t0 = time.perf_counter()
+    buffer = scrie_export_opuri(date)
+    cale = os.path.join(output_dir, f"opuri_export_{eticheta}.xlsx")
+    with open(cale, 'wb') as f:
+        f.write(buffer.getvalue())
+    return eticheta, cale, time.perf_counter() - t0
+
+
+def exporta_interval(
+    luna_start: str,
+    luna_sfarsit: str,
+    output_dir: str,
+    gomag_df: Optional[pd.DataFrame] = None,
+    max_workers: Optional[int] = None,
+    oglinda: Optional[str] = None
+) -> List[str]:
+    """
+    Genereaza cate un export OP-uri (XLSX) pentru fiecare luna din interval.
+
+    Cu oglinda (calea fisierului analytics_mirror) exportul ruleaza complet
+    offline: datele se citesc din oglinda locala, iar fara gomag_df comenzile
+    Gomag vin din copia locala a tabelei gomag_orders.
+
+    Returns:
+        Caile fisierelor scrise, in ordinea lunilor
+    """
+    luni = luni_interval(luna_start, luna_sfarsit)
+    if not luni:
+        return []
+    os.makedirs(output_dir, exist_ok=True)
+    t_start = time.perf_counter()
+
+    t0 = time.perf_counter()
+    if oglinda:
+        date_interval = incarca_date_interval_oglinda(luni[0][1], luni[-1][2], oglinda)
+        if gomag_df is None:
+            gomag_df = gomag_din_oglinda(oglinda)
+    else:
+        date_interval = incarca_date_interval(luni[0][1], luni[-1][2])
+    print(f"[Citire date] {time.perf_counter() - t0:.2f}s - "
+          f"{len(date_interval['mt940_transactions'])} tranzactii MT940, "
+          f"{len(date_interval['gls_borderouri'])} borderouri GLS, "
+          f"{len(date_interval['sameday_parcels'])} colete Sameday")
+
+    t0 = time.perf_counter()
+    date_lunare = [(eticheta, date_luna(date_interval, start, end)) for eticheta, start, end in luni]
+    print(f"[Pregatire luni] {time.perf_counter() - t0:.2f}s - {len(date_lunare)} luni")
+
+    # Rezolva in Gomag toate AWB-urile si comenzile din interval, intr-un singur lot
+    t0 = time.perf_counter()
+    if gomag_df is not None:
+        gomag_df = normalizeaza_gomag(gomag_df)
+    awb_rezolvate = rezolva_awb((awb for _, date in date_lunare for awb in _awb_luna(date)), gomag_df)
+    comenzi_gomag = rezolva_comenzi((o for _, date in date_lunare for o in _comenzi_luna(date)), gomag_df)
+    for _, date in date_lunare:
+        date['awb_rezolvate'] = {awb: awb_rezolvate[awb] for awb in _awb_luna(date)}
+        date['comenzi_gomag'] = {
+            str(o): comenzi_gomag[str(o)] for o in _comenzi_luna(date) if o and str(o) in comenzi_gomag
+        }
+    print(f"[Rezolvare Gomag] {time.perf_counter() - t0:.2f}s - {len(awb_rezolvate)} AWB-uri, {len(comenzi_gomag)} comenzi")
+
+    t0 = time.perf_counter()
+    if len(date_lunare) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            scrise = list(executor.map(
+                _scrie_luna,
+                [eticheta for eticheta, _ in date_lunare],
+                [date for _, date in date_lunare],
+                [output_dir] * len(date_lunare)
+            ))
+    else:
+        scrise = [_scrie_luna(eticheta, date, output_dir) for eticheta, date in date_lunare]
+    for eticheta, cale, durata in scrise:
+        print(f"  {eticheta}: {durata:.2f}s -> {cale}")
+    print(f"[Scriere workbook-uri] {time.perf_counter() - t0:.2f}s")
+
+    print(f"[Total] {time.perf_counter() - t_start:.2f}s")
+    return [cale for _, cale, _ in scrise]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export OP-uri pe mai multe luni (un fisier XLSX per luna)")
+    parser.add_argument('luna_start', help="Prima luna (YYYY-MM)")
+    parser.add_argument('luna_sfarsit', help="Ultima luna (YYYY-MM), inclusiv")
+    parser.add_argument('--output', default=os.path.join(
+        os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'exports'
+    ), help="Directorul pentru fisierele generate")
+    parser.add_argument('--gomag', help="Exportul Gomag (XLSX); fara el se folosesc comenzile din gomag_orders")
+    parser.add_argument('--workers', type=int, default=None, help="Numarul de procese pentru scriere")
+    parser.add_argument('--offline', action='store_true',
+                        help="Citeste din oglinda locala (analytics_mirror), fara Supabase")
+    parser.add_argument('--mirror', default=MIRROR_PATH, help="Fisierul oglinzii (implicit ANALYTICS_MIRROR_PATH)")
+    args = parser.parse_args()
+
+    if args.offline and not args.mirror:
+        parser.error("--offline necesita ANALYTICS_MIRROR_PATH sau --mirror")
+
+    gomag_df = None
+    if args.gomag:
+        t0 = time.perf_counter()
+        gomag_df = incarca_gomag(args.gomag)
+        print(f"[Citire Gomag] {time.perf_counter() - t0:.2f}s - {len(gomag_df)} randuri")
+
+    exporta_interval(args.luna_start, args.luna_sfarsit, args.output, gomag_df, args.workers,
+                     oglinda=args.mirror if args.offline else None)
+
+
+if __name__ == "__main__":
+    main()
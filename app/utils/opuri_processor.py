@@ -4,16 +4,25 @@ Combina datele din Supabase (GLS, Sameday, Netopia) cu Gomag si MT940
 pentru a genera export-ul in formatul original
 """
 
+import re
 import pandas as pd
-from typing import List, Dict, Tuple, Optional
+from typing import Callable, List, Dict, Tuple, Optional
 from datetime import datetime
+from copy import copy
 from io import BytesIO
 from openpyxl import Workbook
-from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+from openpyxl.cell import WriteOnlyCell
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side, NamedStyle
+from openpyxl.styles.fonts import DEFAULT_FONT
+from openpyxl.utils import get_column_letter
 
 from .supabase_client import get_supabase_client as get_client
+from .gomag_cache import normalizeaza_gomag
+from .gomag_orders import rezolva_awb, rezolva_comenzi
+from .query_cache import cached_query
 
 
+@cached_query
 def get_gls_parcels_for_period(start_date: str, end_date: str) -> List[Dict]:
     """
     Obtine coletele GLS livrate intr-o perioada.
@@ -22,19 +31,16 @@ def get_gls_parcels_for_period(start_date: str, end_date: str) -> List[Dict]:
     if not client:
         return []
 
-    try:
-        result = client.table("gls_parcels").select("*").gte(
-            "delivery_date", start_date
-        ).lte(
-            "delivery_date", end_date
-        ).eq("is_delivered", True).execute()
+    result = client.table("gls_parcels").select("*").gte(
+        "delivery_date", start_date
+    ).lte(
+        "delivery_date", end_date
+    ).eq("is_delivered", True).execute()
 
-        return result.data or []
-    except Exception as e:
-        print(f"Eroare la citirea GLS: {e}")
-        return []
+    return result.data or []
 
 
+@cached_query
 def get_sameday_parcels_for_period(start_date: str, end_date: str) -> List[Dict]:
     """
     Obtine coletele Sameday livrate intr-o perioada.
@@ -43,20 +49,21 @@ def get_sameday_parcels_for_period(start_date: str, end_date: str) -> List[Dict]
     if not client:
         return []
 
-    try:
-        result = client.table("sameday_parcels").select("*").gte(
-            "delivery_date", start_date
-        ).lte(
-            "delivery_date", end_date
-        ).eq("is_delivered", True).execute()
+    result = client.table("sameday_parcels").select("*").gte(
+        "delivery_date", start_date
+    ).lte(
+        "delivery_date", end_date
+    ).eq("is_delivered", True).execute()
 
-        return result.data or []
-    except Exception as e:
-        print(f"Eroare la citirea Sameday: {e}")
-        return []
+    return result.data or []
 
 
-def get_sameday_borderouri_from_ops(start_date: str, end_date: str, mt940_transactions: List[Dict]) -> List[Dict]:
+def get_sameday_borderouri_from_ops(
+    start_date: str,
+    end_date: str,
+    mt940_transactions: List[Dict],
+    all_parcels: Optional[List[Dict]] = None
+) -> List[Dict]:
     """
     Construieste borderouri Sameday pe baza OP-urilor din MT940.
 
@@ -65,17 +72,35 @@ def get_sameday_borderouri_from_ops(start_date: str, end_date: str, mt940_transa
 
     IMPORTANT: Include si OP-uri din primele 7 zile ale lunii urmatoare,
     deoarece coletele livrate la sfarsitul lunii pot avea OP in luna urmatoare.
-    """
-    client = get_client()
-    if not client:
-        return []
 
+    all_parcels: coletele Sameday livrate, deja citite (export pe mai multe luni);
+    altfel se citesc o singura data din Supabase.
+    """
     # Filtreaza OP-urile Sameday
     sameday_ops = [t for t in mt940_transactions if t.get('source', '').upper() == 'SAMEDAY']
 
     if not sameday_ops:
         return []
 
+    if all_parcels is None:
+        client = get_client()
+        if not client:
+            return []
+
+        try:
+            # Obtine toate coletele Sameday livrate (o singura data, nu per OP)
+            all_parcels = client.table("sameday_parcels").select("*").eq("is_delivered", True).execute().data or []
+        except Exception as e:
+            print(f"Eroare la procesarea Sameday OP: {e}")
+            return []
+
+    # Filtreaza coletele care au delivery_date in perioada selectata
+    period_parcels = []
+    for p in all_parcels:
+        delivery_date = str(p.get('delivery_date', ''))
+        if delivery_date >= start_date and delivery_date <= end_date:
+            period_parcels.append(p)
+
     borderouri = []
 
     for op in sameday_ops:
@@ -95,16 +120,6 @@ def get_sameday_borderouri_from_ops(start_date: str, end_date: str, mt940_transa
         # Gaseste coletele care se potrivesc cu suma OP-ului
         # Cauta colete Sameday livrate in perioada sau cu delivery_date in perioada
         try:
-            # Obtine toate coletele Sameday livrate
-            all_parcels = client.table("sameday_parcels").select("*").eq("is_delivered", True).execute().data or []
-
-            # Filtreaza coletele care au delivery_date in perioada selectata
-            period_parcels = []
-            for p in all_parcels:
-                delivery_date = str(p.get('delivery_date', ''))
-                if delivery_date >= start_date and delivery_date <= end_date:
-                    period_parcels.append(p)
-
             # Incearca sa gaseasca combinatia de colete care da suma OP-ului
             # Pentru simplitate, daca avem un singur colet cu suma exacta, il folosim
             matched_parcels = []
@@ -150,6 +165,7 @@ def get_sameday_borderouri_from_ops(start_date: str, end_date: str, mt940_transa
     return borderouri
 
 
+@cached_query
 def get_mt940_transactions_for_period(start_date: str, end_date: str) -> List[Dict]:
     """
     Obtine tranzactiile MT940 (OP-uri bancare) pentru o perioada.
@@ -158,19 +174,16 @@ def get_mt940_transactions_for_period(start_date: str, end_date: str) -> List[Di
     if not client:
         return []
 
-    try:
-        result = client.table("bank_transactions").select("*").gte(
-            "transaction_date", start_date
-        ).lte(
-            "transaction_date", end_date
-        ).execute()
+    result = client.table("bank_transactions").select("*").gte(
+        "transaction_date", start_date
+    ).lte(
+        "transaction_date", end_date
+    ).execute()
 
-        return result.data or []
-    except Exception as e:
-        print(f"Eroare la citirea MT940: {e}")
-        return []
+    return result.data or []
 
 
+@cached_query
 def get_gls_borderouri_for_period(start_date: str, end_date: str) -> List[Dict]:
     """
     Obtine borderourile GLS din email pentru o perioada.
@@ -184,58 +197,67 @@ def get_gls_borderouri_for_period(start_date: str, end_date: str) -> List[Dict]:
     if not client:
         return []
 
-    try:
-        # Extinde end_date cu 7 zile pentru a prinde borderouri care vin mai tarziu
-        from datetime import datetime, timedelta
-        end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
-        extended_end = (end_date_obj + timedelta(days=7)).strftime('%Y-%m-%d')
+    # Extinde end_date cu 7 zile pentru a prinde borderouri care vin mai tarziu
+    from datetime import datetime, timedelta
+    end_date_obj = datetime.strptime(end_date, '%Y-%m-%d')
+    extended_end = (end_date_obj + timedelta(days=7)).strftime('%Y-%m-%d')
 
-        result = client.table("gls_borderouri").select("*").gte(
-            "borderou_date", start_date
-        ).lte(
-            "borderou_date", extended_end
-        ).order("borderou_date").execute()
+    result = client.table("gls_borderouri").select("*").gte(
+        "borderou_date", start_date
+    ).lte(
+        "borderou_date", extended_end
+    ).order("borderou_date").execute()
 
-        borderouri = result.data or []
+    borderouri = result.data or []
 
-        # Pentru fiecare borderou, obtine coletele asociate si verifica daca au livrari in perioada
-        filtered_borderouri = []
-        for borderou in borderouri:
-            parcels_result = client.table("gls_borderou_parcels").select("*").eq(
-                "borderou_id", borderou['id']
-            ).execute()
-            borderou['parcels'] = parcels_result.data or []
-
-            # Verifica daca borderoul e in perioada originala SAU daca are colete livrate in perioada
-            borderou_date = str(borderou.get('borderou_date', ''))
-            if borderou_date >= start_date and borderou_date <= end_date:
-                # Borderou in perioada - include direct
-                filtered_borderouri.append(borderou)
-            else:
-                # Borderou in afara perioadei - include doar daca are colete cu delivery_date in perioada
-                # Verifica in gls_parcels delivery_date pentru aceste colete
-                parcel_numbers = [p.get('parcel_number') for p in borderou['parcels']]
-                if parcel_numbers:
-                    # Cauta delivery_date pentru aceste colete
-                    parcels_with_dates = client.table("gls_parcels").select("parcel_number, delivery_date").in_(
-                        "parcel_number", parcel_numbers
-                    ).execute().data or []
-
-                    # Verifica daca vreun colet a fost livrat in perioada selectata
-                    has_delivery_in_period = False
-                    for p in parcels_with_dates:
-                        delivery_date = str(p.get('delivery_date', ''))
-                        if delivery_date and delivery_date >= start_date and delivery_date <= end_date:
-                            has_delivery_in_period = True
-                            break
+    # Pentru fiecare borderou, obtine coletele asociate
+    for borderou in borderouri:
+        parcels_result = client.table("gls_borderou_parcels").select("*").eq(
+            "borderou_id", borderou['id']
+        ).execute()
+        borderou['parcels'] = parcels_result.data or []
 
-                    if has_delivery_in_period:
-                        filtered_borderouri.append(borderou)
+    def date_livrare(parcel_numbers: List[str]) -> List[str]:
+        # Cauta delivery_date pentru aceste colete in gls_parcels
+        parcels_with_dates = client.table("gls_parcels").select("parcel_number, delivery_date").in_(
+            "parcel_number", parcel_numbers
+        ).execute().data or []
+        return [str(p.get('delivery_date', '')) for p in parcels_with_dates]
 
-        return filtered_borderouri
-    except Exception as e:
-        print(f"Eroare la citirea GLS borderouri: {e}")
-        return []
+    return filtreaza_borderouri_gls(borderouri, start_date, end_date, date_livrare)
+
+
+def filtreaza_borderouri_gls(
+    borderouri: List[Dict],
+    start_date: str,
+    end_date: str,
+    date_livrare: Callable[[List[str]], List[str]]
+) -> List[Dict]:
+    """
+    Pastreaza borderourile GLS din perioada si pe cele din afara ei care au
+    colete livrate in perioada.
+
+    date_livrare(parcel_numbers) intoarce datele de livrare (gls_parcels) ale coletelor.
+    """
+    filtered_borderouri = []
+    for borderou in borderouri:
+        # Verifica daca borderoul e in perioada originala SAU daca are colete livrate in perioada
+        borderou_date = str(borderou.get('borderou_date', ''))
+        if borderou_date >= start_date and borderou_date <= end_date:
+            # Borderou in perioada - include direct
+            filtered_borderouri.append(borderou)
+        else:
+            # Borderou in afara perioadei - include doar daca are colete cu delivery_date in perioada
+            parcel_numbers = [p.get('parcel_number') for p in borderou['parcels']]
+            if parcel_numbers:
+                # Verifica daca vreun colet a fost livrat in perioada selectata
+                if any(
+                    delivery_date and delivery_date >= start_date and delivery_date <= end_date
+                    for delivery_date in date_livrare(parcel_numbers)
+                ):
+                    filtered_borderouri.append(borderou)
+
+    return filtered_borderouri
 
 
 def get_gls_parcels_not_in_borderouri(start_date: str, end_date: str, borderou_parcels: List[str]) -> List[Dict]:
@@ -313,57 +335,18 @@ def group_parcels_by_delivery_date(parcels: List[Dict], curier: str) -> List[Dic
     return result
 
 
-def match_awb_with_gomag(awb: str, gomag_df: pd.DataFrame, curier: str) -> Tuple[str, str]:
+def match_awb_with_gomag(awb: str, gomag_df: Optional[pd.DataFrame], curier: str) -> Tuple[str, str]:
     """
     Cauta AWB-ul in Gomag si returneaza (Order ID, Numar Factura).
 
     Pentru GLS: AWB-ul din borderou poate avea 3 caractere extra la final.
     Pentru Sameday: AWB-ul poate avea 3 caractere la final (001, 002, etc.)
-    """
-    if gomag_df is None or gomag_df.empty:
-        return '', ''
-
-    # Normalizeaza AWB
-    awb_norm = str(awb).strip().replace(' ', '').lstrip('0')
-
-    # Pregateste Gomag pentru cautare
-    gomag_df = gomag_df.copy()
-    gomag_df.columns = gomag_df.columns.str.strip().str.lower()
-
-    if 'awb' not in gomag_df.columns:
-        return '', ''
-
-    gomag_df['awb_norm'] = gomag_df['awb'].astype(str).str.strip().str.replace(' ', '').str.lstrip('0')
-
-    # Cauta potrivire directa
-    match = gomag_df[gomag_df['awb_norm'] == awb_norm]
 
-    # Daca nu gaseste, incearca fara ultimele 3 caractere (pentru GLS)
-    if match.empty and len(awb_norm) > 10:
-        awb_short = awb_norm[:-3]
-        match = gomag_df[gomag_df['awb_norm'] == awb_short]
-
-    # Daca nu gaseste, incearca cu ultimele 3 caractere adaugate
-    if match.empty:
-        match = gomag_df[gomag_df['awb_norm'].str.startswith(awb_norm)]
-
-    if not match.empty:
-        row = match.iloc[0]
-        order_id = str(row.get('numar comanda', row.get('id', ''))).strip()
-        numar_factura = str(row.get('numar factura', '')).strip()
-
-        # Curata numarul facturii
-        if numar_factura and numar_factura != 'nan':
-            try:
-                numar_factura = str(int(float(numar_factura)))
-            except:
-                pass
-        else:
-            numar_factura = ''
-
-        return order_id, numar_factura
-
-    return '', ''
+    Fara gomag_df, cautarea se face in tabela gomag_orders (comenzile
+    sincronizate la upload-urile anterioare). Pentru mai multe AWB-uri
+    foloseste gomag_orders.rezolva_awb (o singura cautare pe lot).
+    """
+    return rezolva_awb([awb], gomag_df).get(awb, ('', ''))
 
 
 def match_op_with_borderou(suma_borderou: float, mt940_transactions: List[Dict], curier: str) -> Tuple[str, str]:
@@ -385,18 +368,132 @@ def match_op_with_borderou(suma_borderou: float, mt940_transactions: List[Dict],
     return '', ''
 
 
-def generate_opuri_export(
+def _extrage_order_id_netopia(order_id_raw) -> Optional[str]:
+    """
+    Extrage numarul comenzii din order_id-ul Netopia
+    (ex: "Comanda nr. 569 - www.obsid.ro" -> "569").
+
+    Returns:
+        Numarul comenzii, sau None pentru transferurile bancare interne
+    """
+    if 'Comanda nr.' in str(order_id_raw):
+        match = re.search(r'Comanda nr\.\s*(\d+)', str(order_id_raw))
+        if match:
+            return match.group(1)
+    elif 'Bank transfer' in str(order_id_raw):
+        return None
+    return order_id_raw
+
+
+# ============================================
+# Export XLSX (scriere secventiala, write-only)
+# ============================================
+
+# Coloanele export-ului: (titlu, latime)
+COLOANE_OPURI = [
+    ("Data OP", 12), ("Număr OP", 20), ("Nume Borderou", 35), ("Curier", 10),
+    ("Order ID", 12), ("Număr Factură", 15), ("Sumă", 12), ("Erori", 8),
+    ("Diferență eMag", 15), ("Facturi Comision eMag", 25),
+]
+
+
+def _fill(culoare: str) -> PatternFill:
+    return PatternFill(start_color=culoare, end_color=culoare, fill_type="solid")
+
+
+def _stiluri_opuri() -> List[NamedStyle]:
+    """Stilurile partajate ale export-ului (un singur obiect per stil, nu per celula)."""
+    return [
+        NamedStyle(name="op_header", font=Font(bold=True, color="FFFFFF"),
+                   fill=_fill("1e293b"), alignment=Alignment(horizontal='center')),
+        NamedStyle(name="op_gls", font=Font(color="FFFFFF"), fill=_fill("0070C0")),
+        NamedStyle(name="op_sameday", font=Font(color="FFFFFF"), fill=_fill("FF0000")),
+        NamedStyle(name="op_netopia", font=copy(DEFAULT_FONT), fill=_fill("DAEEF3")),
+        NamedStyle(name="op_eroare", font=copy(DEFAULT_FONT), fill=_fill("FFFF00")),
+        NamedStyle(name="op_bold", font=Font(bold=True)),
+    ]
+
+
+_STIL_CURIER = {"GLS": "op_gls", "Sameday": "op_sameday"}
+
+
+class ScriitorOpuriXlsx:
+    """
+    Scrie export-ul OP-uri rand cu rand, cu openpyxl in modul write-only.
+
+    Randurile sunt trimise direct in foaia de lucru (openpyxl le tine intr-un
+    fisier temporar, nu in memorie), iar stilurile sunt NamedStyle-uri
+    inregistrate o singura data in workbook.
+    """
+
+    def __init__(self):
+        self.wb = Workbook(write_only=True)
+        for stil in _stiluri_opuri():
+            self.wb.add_named_style(stil)
+
+        self.ws = self.wb.create_sheet("OP-uri")
+        for col, (_, latime) in enumerate(COLOANE_OPURI, 1):
+            self.ws.column_dimensions[get_column_letter(col)].width = latime
+
+        titluri = [titlu for titlu, _ in COLOANE_OPURI]
+        self.rand(titluri, {col: "op_header" for col in range(len(titluri))})
+
+    def rand(self, valori: List = (), stiluri: Optional[Dict[int, str]] = None) -> None:
+        """Adauga urmatorul rand; stiluri = {index coloana (de la 0): nume stil}."""
+        valori = list(valori)
+        if stiluri:
+            for col, stil in stiluri.items():
+                cell = WriteOnlyCell(self.ws, value=valori[col])
+                cell.style = stil
+                valori[col] = cell
+        self.ws.append(valori)
+
+    def salveaza(self) -> BytesIO:
+        buffer = BytesIO()
+        self.wb.save(buffer)
+        buffer.seek(0)
+        return buffer
+
+
+def formateaza_borderouri_gls(gls_borderouri_real: List[Dict]) -> List[Dict]:
+    """Borderourile GLS din email (gls_borderouri) in formatul folosit la export."""
+    return [
+        {
+            'borderou': borderou.get('file_name', f"GLS_{borderou['borderou_date']}.xlsx"),
+            'curier': 'GLS',
+            'delivery_date': borderou.get('borderou_date', ''),
+            'parcels': borderou.get('parcels', []),
+            'suma_total': float(borderou.get('total_amount', 0)),
+            'op_reference': borderou.get('op_reference', ''),
+            'op_date': borderou.get('op_date', ''),
+            'op_matched': borderou.get('op_matched', False)
+        }
+        for borderou in gls_borderouri_real
+    ]
+
+
+def colecteaza_date_opuri(
     start_date: str,
     end_date: str,
     gomag_df: Optional[pd.DataFrame] = None
-) -> BytesIO:
+) -> Dict:
     """
-    Genereaza export-ul OP-uri in formatul original.
+    Citeste toate datele necesare export-ului OP-uri pentru o perioada.
 
     IMPORTANT: Pentru GLS foloseste borderourile REALE din email (gls_borderouri table),
     nu gruparile simulate pe data livrarii. Borderourile GLS din email contin gruparea
     exacta a coletelor asa cum apar in desfasuratorul de ramburs.
+
+    Erorile de citire din Supabase se propaga (nu sunt inlocuite cu liste goale),
+    ca un export incomplet sa nu fie generat si nici memorat de cached_query.
+
+    Returns:
+        Dict cu mt940_transactions, gls_borderouri, sameday_borderouri, awb_rezolvate,
+        netopia_ops, netopia_trans_per_batch si comenzi_gomag
     """
+    if gomag_df is not None:
+        gomag_df = normalizeaza_gomag(gomag_df)
+
     # Extinde perioada pentru MT940 cu 7 zile pentru a gasi OP-uri care vin mai tarziu
     # (ex: borderou din 28.11 poate avea OP pe 02.12)
     from datetime import datetime, timedelta
@@ -408,28 +505,7 @@ def generate_opuri_export(
     gls_borderouri_real = get_gls_borderouri_for_period(start_date, end_date)
 
     # Formateaza borderourile GLS pentru procesare
-    gls_borderouri = []
-    borderou_parcel_numbers = set()  # Track parcels already in borderouri
-
-    for borderou in gls_borderouri_real:
-        parcels = borderou.get('parcels', [])
-        suma_total = float(borderou.get('total_amount', 0))
-
-        # Track parcel numbers
-        for p in parcels:
-            borderou_parcel_numbers.add(str(p.get('parcel_number', '')))
-
-        # Formateaza borderou pentru procesare
-        gls_borderouri.append({
-            'borderou': borderou.get('file_name', f"GLS_{borderou['borderou_date']}.xlsx"),
-            'curier': 'GLS',
-            'delivery_date': borderou.get('borderou_date', ''),
-            'parcels': parcels,
-            'suma_total': suma_total,
-            'op_reference': borderou.get('op_reference', ''),
-            'op_date': borderou.get('op_date', ''),
-            'op_matched': borderou.get('op_matched', False)
-        })
+    gls_borderouri = formateaza_borderouri_gls(gls_borderouri_real)
 
     # Daca nu sunt borderouri din email, foloseste metoda veche (fallback)
     if not gls_borderouri:
@@ -445,58 +521,107 @@ def generate_opuri_export(
         sameday_parcels = get_sameday_parcels_for_period(start_date, end_date)
         sameday_borderouri = group_parcels_by_delivery_date(sameday_parcels, "Sameday")
 
-    # Obtine facturile din Oblio
+    # Rezolva toate AWB-urile (GLS si Sameday) intr-un singur lot
+    awb_rezolvate = rezolva_awb(
+        (
+            p.get('parcel_number', p.get('awb_number', ''))
+            for borderou in gls_borderouri + sameday_borderouri
+            for p in borderou['parcels']
+        ),
+        gomag_df
+    )
+
+    # Obtine tranzactiile Netopia din Supabase pentru fiecare batch
     client = get_client()
-    invoices = []
-    if client:
-        try:
-            result = client.table("invoices").select("*").execute()
-            invoices = result.data or []
-        except:
-            pass
-
-    # Creeaza workbook
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "OP-uri"
-
-    # Stiluri
-    header_fill = PatternFill(start_color="1e293b", end_color="1e293b", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF")
-    gls_fill = PatternFill(start_color="0070C0", end_color="0070C0", fill_type="solid")
-    sameday_fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
-    netopia_fill = PatternFill(start_color="DAEEF3", end_color="DAEEF3", fill_type="solid")
-    error_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
-
-    # Header
-    headers = ["Data OP", "Număr OP", "Nume Borderou", "Curier", "Order ID",
-               "Număr Factură", "Sumă", "Erori", "Diferență eMag", "Facturi Comision eMag"]
-
-    for col, header in enumerate(headers, 1):
-        cell = ws.cell(row=1, column=col, value=header)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center')
-
-    # Ajusteaza latimea coloanelor
-    ws.column_dimensions['A'].width = 12
-    ws.column_dimensions['B'].width = 20
-    ws.column_dimensions['C'].width = 35
-    ws.column_dimensions['D'].width = 10
-    ws.column_dimensions['E'].width = 12
-    ws.column_dimensions['F'].width = 15
-    ws.column_dimensions['G'].width = 12
-    ws.column_dimensions['H'].width = 8
-    ws.column_dimensions['I'].width = 15
-    ws.column_dimensions['J'].width = 25
-
-    row_num = 2
+    netopia_ops = [t for t in mt940_transactions if t.get('source', '').upper() == 'NETOPIA']
+    netopia_trans_per_batch = {}
+    for netopia_op in netopia_ops:
+        batch_id = netopia_op.get('batch_id', '')
+        if client and batch_id and batch_id not in netopia_trans_per_batch:
+            try:
+                result = client.table("netopia_transactions").select("*").eq("batch_id", batch_id).execute()
+                netopia_trans_per_batch[batch_id] = result.data or []
+            except:
+                pass
+
+    # Rezolva toate comenzile Netopia in Gomag intr-un singur lot
+    comenzi_gomag = rezolva_comenzi(
+        (
+            _extrage_order_id_netopia(trans.get('order_id', ''))
+            for trans_list in netopia_trans_per_batch.values()
+            for trans in trans_list
+        ),
+        gomag_df
+    )
+
+    return {
+        'mt940_transactions': mt940_transactions,
+        'gls_borderouri': gls_borderouri,
+        'sameday_borderouri': sameday_borderouri,
+        'awb_rezolvate': awb_rezolvate,
+        'netopia_ops': netopia_ops,
+        'netopia_trans_per_batch': netopia_trans_per_batch,
+        'comenzi_gomag': comenzi_gomag,
+    }
+
+
+def _suma_netopia(trans: Dict, gomag_match: Optional[Dict]) -> Tuple[str, float]:
+    """(numar factura, suma) pentru o tranzactie Netopia."""
+    amount = float(trans.get('amount', 0) or 0)
+
+    # Cauta factura SI suma din Gomag INAINTE de a folosi net_amount
+    numar_factura = ''
+    suma_din_gomag = 0
+    if gomag_match:
+        nf = gomag_match.get('numar factura', '')
+        if nf and str(nf) != 'nan':
+            try:
+                numar_factura = str(int(float(nf)))
+            except:
+                numar_factura = str(nf)
+        # Ia suma din Gomag (coloana 'total comanda' sau 'total factura')
+        for col in ['total comanda', 'total factura']:
+            if col in gomag_match:
+                try:
+                    val = gomag_match.get(col, 0)
+                    if val and str(val) != 'nan':
+                        val_str = str(val).replace('RON', '').replace(',', '.').strip()
+                        suma_din_gomag = float(val_str)
+                        if suma_din_gomag > 0:
+                            break
+                except:
+                    pass
+
+    # Prioritate: 1) Suma din Gomag, 2) net_amount, 3) fee absolut
+    if suma_din_gomag > 0:
+        amount = suma_din_gomag
+    elif amount == 0:
+        amount = float(trans.get('net_amount', 0) or 0)
+        if amount == 0:
+            fee = float(trans.get('fee', 0) or 0)
+            if fee < 0:
+                amount = abs(fee)
+
+    return numar_factura, amount
+
+
+def scrie_export_opuri(date: Dict) -> BytesIO:
+    """
+    Scrie export-ul OP-uri (XLSX) din datele citite de colecteaza_date_opuri.
+
+    Randurile sunt emise secvential, in ordinea din fisier.
+    """
+    scriitor = ScriitorOpuriXlsx()
+    mt940_transactions = date['mt940_transactions']
+    awb_rezolvate = date['awb_rezolvate']
 
     # Proceseaza GLS si Sameday
-    for borderouri, curier, fill_color in [
-        (gls_borderouri, "GLS", gls_fill),
-        (sameday_borderouri, "Sameday", sameday_fill)
+    for borderouri, curier in [
+        (date['gls_borderouri'], "GLS"),
+        (date['sameday_borderouri'], "Sameday")
     ]:
+        stil_curier = _STIL_CURIER[curier]
+
         for borderou in borderouri:
             parcels = borderou['parcels']
             suma_total = borderou['suma_total']
@@ -519,90 +644,50 @@ def generate_opuri_export(
                 cod_amount = float(p.get('cod_amount', 0) or 0)
 
                 # Cauta in Gomag
-                order_id, numar_factura = match_awb_with_gomag(awb, gomag_df, curier)
+                order_id, numar_factura = awb_rezolvate.get(awb, ('', ''))
 
                 if numar_factura:
-                    facturi_ok.append({
-                        'awb': awb,
-                        'order_id': order_id,
-                        'numar_factura': numar_factura,
-                        'suma': cod_amount
-                    })
+                    facturi_ok.append((awb, order_id, numar_factura, cod_amount))
                 else:
-                    facturi_ko.append({
-                        'awb': awb,
-                        'order_id': order_id,
-                        'suma': cod_amount
-                    })
+                    facturi_ko.append((awb, order_id, cod_amount))
 
             # Sorteaza facturile dupa numar
-            facturi_ok.sort(key=lambda x: int(x['numar_factura']) if x['numar_factura'].isdigit() else 0)
+            facturi_ok.sort(key=lambda x: int(x[2]) if x[2].isdigit() else 0)
 
             erori_exist = len(facturi_ko) > 0
             erori_text = "DA" if erori_exist else "NU"
 
-            # Scrie facturile OK
-            first_row = True
-            for f in facturi_ok:
-                ws.cell(row=row_num, column=1, value=data_op if first_row else "")
-                ws.cell(row=row_num, column=2, value=numar_op if first_row else "")
-                ws.cell(row=row_num, column=3, value=borderou['borderou'] if first_row else "")
-
-                cell_curier = ws.cell(row=row_num, column=4, value=curier if first_row else "")
-                if first_row:
-                    cell_curier.fill = fill_color
-                    cell_curier.font = Font(color="FFFFFF")
+            # Primul rand are datele borderoului; daca nu sunt facturi OK, doar header-ul
+            stiluri_header = {3: stil_curier, 7: "op_eroare"} if erori_exist else {3: stil_curier}
+            header = [data_op, numar_op, borderou['borderou'], curier]
 
-                ws.cell(row=row_num, column=5, value=f['order_id'])
-                ws.cell(row=row_num, column=6, value=int(f['numar_factura']) if f['numar_factura'].isdigit() else f['numar_factura'])
-                ws.cell(row=row_num, column=7, value=f['suma'])
-
-                cell_erori = ws.cell(row=row_num, column=8, value=erori_text if first_row else "")
-                if first_row and erori_exist:
-                    cell_erori.fill = error_fill
-
-                first_row = False
-                row_num += 1
-
-            # Daca nu sunt facturi OK, scrie doar header-ul
             if not facturi_ok:
-                ws.cell(row=row_num, column=1, value=data_op)
-                ws.cell(row=row_num, column=2, value=numar_op)
-                ws.cell(row=row_num, column=3, value=borderou['borderou'])
-                cell_curier = ws.cell(row=row_num, column=4, value=curier)
-                cell_curier.fill = fill_color
-                cell_curier.font = Font(color="FFFFFF")
-                cell_erori = ws.cell(row=row_num, column=8, value=erori_text)
-                if erori_exist:
-                    cell_erori.fill = error_fill
-                row_num += 1
+                scriitor.rand(header + [None, None, None, erori_text], stiluri_header)
+
+            for i, (_, order_id, numar_factura, suma) in enumerate(facturi_ok):
+                factura = int(numar_factura) if numar_factura.isdigit() else numar_factura
+                if i == 0:
+                    scriitor.rand(header + [order_id, factura, suma, erori_text], stiluri_header)
+                else:
+                    scriitor.rand([None, None, None, None, order_id, factura, suma])
 
             # Scrie AWB-urile fara factura
             if facturi_ko:
-                ws.cell(row=row_num, column=6, value="AWB-uri fără factură:")
-                row_num += 1
+                scriitor.rand([None] * 5 + ["AWB-uri fără factură:"])
+                for awb, _, suma in facturi_ko:
+                    scriitor.rand([None] * 5 + [awb, suma])
 
-                for f in facturi_ko:
-                    ws.cell(row=row_num, column=6, value=f['awb'])
-                    ws.cell(row=row_num, column=7, value=f['suma'])
-                    row_num += 1
-
-            # Rand total
-            ws.cell(row=row_num, column=6, value="Total")
-            ws.cell(row=row_num, column=6).font = Font(bold=True)
-            ws.cell(row=row_num, column=7, value=suma_total)
-            ws.cell(row=row_num, column=7).font = Font(bold=True)
-            row_num += 1
-
-            # Rand gol
-            row_num += 1
+            # Rand total + rand gol
+            scriitor.rand([None] * 5 + ["Total", suma_total], {5: "op_bold", 6: "op_bold"})
+            scriitor.rand()
 
     # ============================================
     # Proceseaza Netopia
     # ============================================
-    netopia_ops = [t for t in mt940_transactions if t.get('source', '').upper() == 'NETOPIA']
+    netopia_trans_per_batch = date['netopia_trans_per_batch']
+    comenzi_gomag = date['comenzi_gomag']
 
-    for netopia_op in netopia_ops:
+    for netopia_op in date['netopia_ops']:
         batch_id = netopia_op.get('batch_id', '')
         suma_op = float(netopia_op.get('amount', 0) or 0)
         numar_op = netopia_op.get('op_reference', '')
@@ -611,14 +696,7 @@ def generate_opuri_export(
         # Numele borderoului pentru Netopia
         borderou_name = f"batchId.{batch_id}.csv" if batch_id else f"Netopia_{data_op}.csv"
 
-        # Obtine tranzactiile Netopia din Supabase pentru acest batch
-        netopia_trans = []
-        if client and batch_id:
-            try:
-                result = client.table("netopia_transactions").select("*").eq("batch_id", batch_id).execute()
-                netopia_trans = result.data or []
-            except:
-                pass
+        netopia_trans = netopia_trans_per_batch.get(batch_id, []) if batch_id else []
 
         # Calculeaza comisioane si total facturi
         total_facturi = sum(float(t.get('amount', 0) or 0) for t in netopia_trans)
@@ -628,106 +706,52 @@ def generate_opuri_export(
             total_facturi = suma_op
             total_comisioane = 0
 
-        # Scrie header-ul borderoului Netopia
-        ws.cell(row=row_num, column=1, value=data_op)
-        ws.cell(row=row_num, column=2, value=numar_op)
-        ws.cell(row=row_num, column=3, value=borderou_name)
-        cell_curier = ws.cell(row=row_num, column=4, value="Netopia")
-        cell_curier.fill = netopia_fill
+        # Header-ul borderoului Netopia; prima tranzactie se scrie pe acelasi rand
+        rand = [data_op, numar_op, borderou_name, "Netopia"]
+        stiluri = {3: "op_netopia"}
 
         first_row = True
-        if netopia_trans:
-            for trans in netopia_trans:
-                order_id_raw = trans.get('order_id', '')
-                amount = float(trans.get('amount', 0) or 0)
-
-                # Extrage doar numarul din order_id (ex: "Comanda nr. 569 - www.obsid.ro" -> "569")
-                order_id = order_id_raw
-                if 'Comanda nr.' in str(order_id_raw):
-                    import re
-                    match = re.search(r'Comanda nr\.\s*(\d+)', str(order_id_raw))
-                    if match:
-                        order_id = match.group(1)
-                elif 'Bank transfer' in str(order_id_raw):
-                    # Skip bank transfer entries (sunt transferuri interne)
-                    continue
-
-                # Cauta factura SI suma din Gomag INAINTE de a folosi net_amount
-                numar_factura = ''
-                suma_din_gomag = 0
-                if gomag_df is not None and not gomag_df.empty and order_id:
-                    gomag_temp = gomag_df.copy()
-                    gomag_temp.columns = gomag_temp.columns.str.strip().str.lower()
-                    gomag_match = gomag_temp[gomag_temp['numar comanda'].astype(str) == str(order_id)]
-                    if not gomag_match.empty:
-                        nf = gomag_match.iloc[0].get('numar factura', '')
-                        if nf and str(nf) != 'nan':
-                            try:
-                                numar_factura = str(int(float(nf)))
-                            except:
-                                numar_factura = str(nf)
-                        # Ia suma din Gomag (coloana 'total comanda' sau 'total factura')
-                        for col in ['total comanda', 'total factura']:
-                            if col in gomag_temp.columns:
-                                try:
-                                    val = gomag_match.iloc[0].get(col, 0)
-                                    if val and str(val) != 'nan':
-                                        val_str = str(val).replace('RON', '').replace(',', '.').strip()
-                                        suma_din_gomag = float(val_str)
-                                        if suma_din_gomag > 0:
-                                            break
-                                except:
-                                    pass
-
-                # Prioritate: 1) Suma din Gomag, 2) net_amount, 3) fee absolut
-                if suma_din_gomag > 0:
-                    amount = suma_din_gomag
-                elif amount == 0:
-                    amount = float(trans.get('net_amount', 0) or 0)
-                    if amount == 0:
-                        fee = float(trans.get('fee', 0) or 0)
-                        if fee < 0:
-                            amount = abs(fee)
-
-                if not first_row:
-                    row_num += 1
-                    ws.cell(row=row_num, column=1, value="")
-                    ws.cell(row=row_num, column=2, value="")
-                    ws.cell(row=row_num, column=3, value="")
-                    ws.cell(row=row_num, column=4, value="")
-
-                ws.cell(row=row_num, column=5, value=order_id)
-                ws.cell(row=row_num, column=6, value=numar_factura)
-                ws.cell(row=row_num, column=7, value=amount)
-                ws.cell(row=row_num, column=8, value="NU" if numar_factura else "DA")
-
-                first_row = False
-
-        row_num += 1
-
-        # Linie Comisioane
-        ws.cell(row=row_num, column=6, value="Comisioane:")
-        ws.cell(row=row_num, column=7, value=round(total_comisioane, 2))
-        row_num += 1
-
-        # Linie Total facturi
-        ws.cell(row=row_num, column=6, value="Total facturi:")
-        ws.cell(row=row_num, column=7, value=round(total_facturi, 2))
-        row_num += 1
-
-        # Linie Total OP
-        ws.cell(row=row_num, column=6, value="Total OP:")
-        ws.cell(row=row_num, column=6).font = Font(bold=True)
-        ws.cell(row=row_num, column=7, value=round(suma_op, 2))
-        ws.cell(row=row_num, column=7).font = Font(bold=True)
-        row_num += 1
-
-        # Rand gol
-        row_num += 1
-
-    # Salveaza in buffer
-    buffer = BytesIO()
-    wb.save(buffer)
-    buffer.seek(0)
-
-    return buffer
+        for trans in netopia_trans:
+            # Extrage doar numarul din order_id (ex: "Comanda nr. 569 - www.obsid.ro" -> "569")
+            order_id = _extrage_order_id_netopia(trans.get('order_id', ''))
+            if order_id is None:
+                # Skip bank transfer entries (sunt transferuri interne)
+                continue
+
+            gomag_match = comenzi_gomag.get(str(order_id)) if order_id else None
+            numar_factura, amount = _suma_netopia(trans, gomag_match)
+
+            if not first_row:
+                scriitor.rand(rand, stiluri)
+                rand, stiluri = [None, None, None, None], None
+
+            rand = rand[:4] + [order_id, numar_factura, amount, "NU" if numar_factura else "DA"]
+            first_row = False
+
+        scriitor.rand(rand, stiluri)
+
+        # Linii Comisioane, Total facturi, Total OP + rand gol
+        scriitor.rand([None] * 5 + ["Comisioane:", round(total_comisioane, 2)])
+        scriitor.rand([None] * 5 + ["Total facturi:", round(total_facturi, 2)])
+        scriitor.rand([None] * 5 + ["Total OP:", round(suma_op, 2)], {5: "op_bold", 6: "op_bold"})
+        scriitor.rand()
+
+    return scriitor.salveaza()
+
+
+def generate_opuri_export(
+    start_date: str,
+    end_date: str,
+    gomag_df: Optional[pd.DataFrame] = None
+) -> BytesIO:
+    """
+    Genereaza export-ul OP-uri in formatul original.
+
+    gomag_df poate fi exportul citit cu pd.read_excel sau frame-ul deja
+    normalizat din gomag_cache.incarca_gomag; normalizarea se face o singura data.
+    Fara gomag_df, AWB-urile si comenzile se rezolva din tabela gomag_orders.
+    In ambele cazuri cautarile se fac pe lot, nu per colet.
+
+    Workbook-ul este scris secvential (write-only), cu stiluri partajate.
+    """
+    return scrie_export_opuri(colecteaza_date_opuri(start_date, end_date, gomag_df))
@@ -1,12 +1,44 @@
 """
 Parser pentru extrase de cont PDF de la Banca Transilvania
 Extrage tranzactiile in acelasi format ca MT940 pentru import in Supabase
+
+Textul paginilor se extrage in paralel, intr-un pool de procese, iar
+tranzactiile extrase se pastreaza in cache dupa hash-ul continutului PDF,
+astfel ca acelasi extras nu mai este parsat la fiecare upload.
 """
 
+import io
+import os
 import re
-from typing import List, Dict, Optional
+import copy
+import hashlib
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Dict, Optional, Union
 from datetime import datetime
 import pdfplumber
+from .query_cache import bumps_data_version
+
+
+# Sub acest numar de pagini, pornirea pool-ului costa mai mult decat castiga
+MIN_PAGINI_PARALEL = 8
+
+# Numarul maxim de extrase pastrate in cache
+MAX_EXTRASE_CACHE = 32
+
+_cache_tranzactii: "OrderedDict[str, List[Dict]]" = OrderedDict()
+
+_DATA_RE = re.compile(r'^(\d{2}/\d{2}/\d{4})')
+_REF_RE = re.compile(r'REF:\s*(\S+)')
+_SUMA_PATTERNS = (
+    re.compile(r'(\d{1,3}(?:[.,]\d{3})*[.,]\d{2})\s*$'),  # La sfarsitul textului
+    re.compile(r'(\d+[.,]\d{2})\s*$'),  # Numar simplu la sfarsit
+)
+_SUMA_CONTEXT_RE = re.compile(r'[\s;](\d+[.,]\d{2})[\s;]')
+_BATCHID_RE = re.compile(r'BATCHID\s*(\d+)', re.IGNORECASE)
+
+# Inceputurile altor tranzactii, care inchid descrierea unei incasari
+_ALTE_TRANZACTII = ('Plata la POS', 'Plata OP', 'Plata Instant', 'Comision')
 
 
 def parse_bt_pdf_extract(pdf_path: str) -> List[Dict]:
@@ -19,48 +51,85 @@ def parse_bt_pdf_extract(pdf_path: str) -> List[Dict]:
     Returns:
         Lista de tranzactii in format compatibil cu bank_transactions
     """
-    transactions = []
-
-    with pdfplumber.open(pdf_path) as pdf:
-        full_text = ""
-        for page in pdf.pages:
-            text = page.extract_text()
-            if text:
-                full_text += text + "\n"
+    with open(pdf_path, 'rb') as f:
+        return parse_bt_pdf_from_bytes(f.read())
 
-    # Extrage tranzactiile din text
-    transactions = extract_transactions_from_text(full_text)
-
-    return transactions
 
-
-def parse_bt_pdf_from_bytes(pdf_bytes) -> List[Dict]:
+def parse_bt_pdf_from_bytes(pdf_bytes, max_workers: Optional[int] = None) -> List[Dict]:
     """
     Parseaza un extras de cont PDF din bytes (pentru upload Streamlit).
 
+    Rezultatul este pastrat in cache dupa hash-ul SHA-256 al continutului.
+
     Args:
         pdf_bytes: Continutul PDF ca bytes sau file-like object
+        max_workers: Numarul de procese pentru extragerea paginilor
 
     Returns:
         Lista de tranzactii
     """
-    import io
-
     if hasattr(pdf_bytes, 'read'):
         pdf_bytes = pdf_bytes.read()
 
-    transactions = []
+    file_hash = hashlib.sha256(pdf_bytes).hexdigest()
+
+    if file_hash in _cache_tranzactii:
+        _cache_tranzactii.move_to_end(file_hash)
+    else:
+        full_text = extrage_text_pdf(pdf_bytes, max_workers)
+        _cache_tranzactii[file_hash] = extract_transactions_from_text(full_text)
+        while len(_cache_tranzactii) > MAX_EXTRASE_CACHE:
+            _cache_tranzactii.popitem(last=False)
 
-    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
-        full_text = ""
-        for page in pdf.pages:
-            text = page.extract_text()
-            if text:
-                full_text += text + "\n"
+    # Copie, ca modificarile facute de apelant sa nu ajunga in cache
+    return copy.deepcopy(_cache_tranzactii[file_hash])
 
-    transactions = extract_transactions_from_text(full_text)
 
-    return transactions
+def goleste_cache_pdf() -> None:
+    """Goleste cache-ul de tranzactii extrase din PDF."""
+    _cache_tranzactii.clear()
+
+
+def _deschide_pdf(sursa: Union[str, bytes]):
+    return pdfplumber.open(sursa if isinstance(sursa, str) else io.BytesIO(sursa))
+
+
+def _extrage_text_pagini(sursa: Union[str, bytes], start: int, stop: int) -> List[str]:
+    """Extrage textul paginilor [start, stop) (ruleaza si in procesele din pool)."""
+    with _deschide_pdf(sursa) as pdf:
+        return [page.extract_text() or "" for page in pdf.pages[start:stop]]
+
+
+def extrage_text_pdf(sursa: Union[str, bytes], max_workers: Optional[int] = None) -> str:
+    """
+    Extrage textul complet al unui PDF, pagina cu pagina.
+
+    Paginile sunt impartite in loturi continue, cate unul pe proces; textele
+    se combina in ordinea paginilor.
+
+    Args:
+        sursa: Calea catre PDF sau continutul ca bytes
+        max_workers: Numarul de procese (1 = serial, None = numarul de CPU-uri)
+
+    Returns:
+        Textul tuturor paginilor, fiecare urmata de newline
+    """
+    with _deschide_pdf(sursa) as pdf:
+        nr_pagini = len(pdf.pages)
+        workers = min(max_workers or os.cpu_count() or 1, nr_pagini)
+        if workers <= 1 or nr_pagini < MIN_PAGINI_PARALEL:
+            texte = [page.extract_text() or "" for page in pdf.pages]
+
+    if workers > 1 and nr_pagini >= MIN_PAGINI_PARALEL:
+        lot = -(-nr_pagini // workers)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [
+                executor.submit(_extrage_text_pagini, sursa, start, min(start + lot, nr_pagini))
+                for start in range(0, nr_pagini, lot)
+            ]
+            texte = [text for future in futures for text in future.result()]
+
+    return "".join(text + "\n" for text in texte if text)
 
 
 def extract_transactions_from_text(text: str) -> List[Dict]:
@@ -72,38 +141,38 @@ def extract_transactions_from_text(text: str) -> List[Dict]:
     - Data, suma, referinta
     """
     transactions = []
-    lines = text.split('\n')
+    lines = [line.strip() for line in text.split('\n')]
 
     current_date = None
     i = 0
 
     while i < len(lines):
-        line = lines[i].strip()
+        line = lines[i]
 
         # Detecteaza data (format DD/MM/YYYY la inceputul liniei)
-        date_match = re.match(r'^(\d{2}/\d{2}/\d{4})', line)
+        date_match = _DATA_RE.match(line)
         if date_match:
             current_date = date_match.group(1)
 
         # Cauta "Incasare OP" - acestea sunt tranzactiile de interes
         if 'Incasare OP' in line and current_date:
             # Colecteaza toate liniile pana la urmatoarea tranzactie sau data
-            transaction_text = line
+            parti = [line]
             j = i + 1
 
             while j < len(lines):
-                next_line = lines[j].strip()
+                next_line = lines[j]
                 # Stop daca gasim o noua data sau RULAJ ZI
-                if re.match(r'^(\d{2}/\d{2}/\d{4})', next_line) or 'RULAJ ZI' in next_line:
+                if _DATA_RE.match(next_line) or 'RULAJ ZI' in next_line:
                     break
                 # Stop daca gasim alta tranzactie (Plata, Incasare, Comision)
-                if any(x in next_line for x in ['Plata la POS', 'Plata OP', 'Plata Instant', 'Comision']):
+                if any(x in next_line for x in _ALTE_TRANZACTII):
                     break
-                transaction_text += " " + next_line
+                parti.append(next_line)
                 j += 1
 
             # Parseaza tranzactia
-            trans = parse_incasare_op(transaction_text, current_date)
+            trans = parse_incasare_op(" ".join(parti), current_date)
             if trans:
                 transactions.append(trans)
 
@@ -130,7 +199,7 @@ def parse_incasare_op(text: str, date_str: str) -> Optional[Dict]:
         transaction_date = date_str
 
     # Extrage referinta (REF: XXXXXXXXX)
-    ref_match = re.search(r'REF:\s*(\S+)', text)
+    ref_match = _REF_RE.search(text)
     op_reference = ref_match.group(1) if ref_match else ''
 
     # Extrage suma - cauta numere mari cu virgula (ex: 744.58 sau 744,58)
@@ -139,13 +208,8 @@ def parse_incasare_op(text: str, date_str: str) -> Optional[Dict]:
 
     # Pattern pentru suma: numar cu punct sau virgula ca separator zecimal
     # Suma apare de obicei la sfarsitul descrierii sau dupa un spatiu mare
-    amount_patterns = [
-        r'(\d{1,3}(?:[.,]\d{3})*[.,]\d{2})\s*$',  # La sfarsitul textului
-        r'(\d+[.,]\d{2})\s*$',  # Numar simplu la sfarsit
-    ]
-
-    for pattern in amount_patterns:
-        amount_match = re.search(pattern, text)
+    for pattern in _SUMA_PATTERNS:
+        amount_match = pattern.search(text)
         if amount_match:
             amount_str = amount_match.group(1).replace(',', '.')
             # Daca are mai multe puncte, elimina-le pe cele de mii
@@ -161,7 +225,7 @@ def parse_incasare_op(text: str, date_str: str) -> Optional[Dict]:
     # Daca nu am gasit suma in text, incearca sa o extragi din context
     if amount == 0:
         # Cauta pattern-uri specifice pentru sume
-        sum_match = re.search(r'[\s;](\d+[.,]\d{2})[\s;]', text)
+        sum_match = _SUMA_CONTEXT_RE.search(text)
         if sum_match:
             amount_str = sum_match.group(1).replace(',', '.')
             try:
@@ -179,7 +243,7 @@ def parse_incasare_op(text: str, date_str: str) -> Optional[Dict]:
     # Extrage BatchID pentru Netopia
     batch_id = None
     if source == 'Netopia':
-        batch_match = re.search(r'BATCHID\s*(\d+)', text, re.IGNORECASE)
+        batch_match = _BATCHID_RE.search(text)
         if batch_match:
             batch_id = batch_match.group(1)
 
@@ -216,10 +280,12 @@ def determine_source(text: str) -> Optional[str]:
     return None
 
 
+@bumps_data_version
 def save_pdf_transactions_to_supabase(transactions: List[Dict], file_name: str = None) -> Dict:
     """
     Salveaza tranzactiile din PDF in Supabase.
-    Ignora duplicatele (verificare dupa op_reference).
+    Ignora duplicatele (verificare dupa hash-ul canonic al tranzactiei
+    si dupa op_reference, doar pentru referintele din acest extras).
 
     Args:
         transactions: Lista de tranzactii parsate
@@ -229,6 +295,7 @@ def save_pdf_transactions_to_supabase(transactions: List[Dict], file_name: str =
         Dict cu statistici (inserted, skipped, errors)
     """
     from .supabase_client import get_client
+    from .import_registry import compute_transaction_hash, find_existing_values
 
     stats = {
         'processed': len(transactions),
@@ -242,19 +309,29 @@ def save_pdf_transactions_to_supabase(transactions: List[Dict], file_name: str =
         stats['errors'].append("Nu s-a putut conecta la Supabase")
         return stats
 
-    # Obtine referintele existente pentru a evita duplicatele
+    for trans in transactions:
+        trans['transaction_hash'] = compute_transaction_hash(
+            trans.get('transaction_date'), trans.get('op_reference', ''), trans.get('amount', 0)
+        )
+
+    # Verifica doar hash-urile si referintele din extras (nu tot tabelul)
     try:
-        existing = client.table('bank_transactions').select('op_reference').execute()
-        existing_refs = {row['op_reference'] for row in existing.data if row.get('op_reference')}
+        existing_hashes = find_existing_values(
+            'bank_transactions', 'transaction_hash', (t['transaction_hash'] for t in transactions)
+        )
+        existing_refs = find_existing_values(
+            'bank_transactions', 'op_reference', (t.get('op_reference', '') for t in transactions)
+        )
     except Exception as e:
         stats['errors'].append(f"Eroare la citirea tranzactiilor existente: {e}")
+        existing_hashes = set()
         existing_refs = set()
 
     for trans in transactions:
         op_ref = trans.get('op_reference', '')
 
         # Verifica duplicat
-        if op_ref and op_ref in existing_refs:
+        if trans['transaction_hash'] in existing_hashes or (op_ref and op_ref in existing_refs):
             stats['skipped'] += 1
             continue
 
@@ -273,6 +350,7 @@ def save_pdf_transactions_to_supabase(transactions: List[Dict], file_name: str =
                 'details': trans.get('details', ''),
                 'transaction_type': trans.get('transaction_type', 'credit'),
                 'file_name': file_name,
+                'transaction_hash': trans['transaction_hash'],
                 'synced_at': datetime.now().isoformat()
             }
 
@@ -280,7 +358,9 @@ def save_pdf_transactions_to_supabase(transactions: List[Dict], file_name: str =
 
             if result.data:
                 stats['inserted'] += 1
-                existing_refs.add(op_ref)  # Adauga la set pentru a evita duplicate in acelasi batch
+                # Adauga la set pentru a evita duplicate in acelasi batch
+                existing_refs.add(op_ref)
+                existing_hashes.add(trans['transaction_hash'])
 
         except Exception as e:
             stats['errors'].append(f"Eroare la inserare {op_ref}: {str(e)}")
@@ -288,6 +368,47 @@ def save_pdf_transactions_to_supabase(transactions: List[Dict], file_name: str =
     return stats
 
 
+def import_pdf_to_supabase(pdf_bytes, file_name: str = None) -> Dict:
+    """
+    Importa un extras PDF in Supabase, folosind registrul de importuri.
+
+    Un PDF identic cu unul deja importat (acelasi hash al continutului)
+    nu mai este parsat; importul este doar inregistrat in sync_logs.
+
+    Args:
+        pdf_bytes: Continutul PDF ca bytes sau file-like object
+        file_name: Numele fisierului sursa (optional)
+
+    Returns:
+        Dict cu statistici (processed, inserted, skipped, reused_files, errors)
+    """
+    from .import_registry import compute_file_hash, get_registry_entry, register_import, log_registry_reuse
+
+    if hasattr(pdf_bytes, 'read'):
+        pdf_bytes = pdf_bytes.read()
+
+    file_hash = compute_file_hash(pdf_bytes)
+    entry = get_registry_entry(file_hash)
+    if entry:
+        log_registry_reuse('pdf_import', [file_name] if file_name else [], [entry])
+        return {
+            'processed': 0,
+            'inserted': 0,
+            'skipped': int(entry.get('transactions_count') or 0),
+            'reused_files': 1,
+            'errors': []
+        }
+
+    transactions = parse_bt_pdf_from_bytes(pdf_bytes)
+    stats = save_pdf_transactions_to_supabase(transactions, file_name)
+    stats['reused_files'] = 0
+
+    if not stats['errors']:
+        register_import(file_hash, file_name, 'pdf', stats)
+
+    return stats
+
+
 def test_pdf_parser(pdf_path: str):
     """
     Functie de test pentru parser.
@@ -1,17 +1,220 @@
 """
 Procesoare pentru borderouri GLS, Sameday si Netopia
+
+Fisierele dintr-un folder sunt citite in paralel, intr-un pool de procese, si
+combinate in ordinea alfabetica a numelor. Fiecare borderou citit ramane in
+cache (dupa cale + mtime + dimensiune), astfel ca la o noua rulare pe acelasi
+folder se recitesc doar fisierele modificate. Exportul Gomag se normalizeaza o
+singura data (pregateste_gomag) si nu mai este modificat pe loc; se poate
+folosi direct frame-ul din cache-ul columnar (gomag_cache.incarca_gomag).
 """
 
 import pandas as pd
 import os
 import re
-from typing import List, Dict, Tuple, Optional
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, List, Dict, Tuple, Optional, Union
+
+from .gomag_cache import normalizeaza_gomag
+
+
+# (tip, cale) -> (mtime_ns, dimensiune, rezultat parsare)
+_cache_borderouri: Dict[Tuple[str, str], Tuple[int, int, tuple]] = {}
+
+
+def pregateste_gomag(gomag_df: pd.DataFrame) -> Dict[str, Optional[pd.DataFrame]]:
+    """
+    Normalizeaza o singura data exportul Gomag pentru toate procesoarele.
+
+    Accepta si frame-ul din gomag_cache.incarca_gomag, caz in care coloanele
+    normalizate sunt deja calculate. DataFrame-ul primit nu este modificat.
+
+    Returns:
+        Dict cu tabelele de potrivire 'gls', 'sameday' si 'netopia'
+        (None daca lipsesc coloanele necesare)
+    """
+    gomag = normalizeaza_gomag(gomag_df)
+
+    pregatit = {'gls': None, 'sameday': None, 'netopia': None}
+
+    if 'awb' in gomag.columns and 'numar factura' in gomag.columns:
+        pregatit['gls'] = pd.DataFrame({
+            'awb_normalizat': gomag['awb_norm_gls'],
+            'numar factura': gomag['numar factura']
+        })
+        pregatit['sameday'] = pd.DataFrame({
+            'awb_normalizat': gomag['awb_norm_sameday'],
+            'numar factura': gomag['numar factura']
+        })
+
+    if 'numar comanda' in gomag.columns:
+        coloane = {'numar comanda': gomag['numar_comanda_norm']}
+        if 'numar factura' in gomag.columns:
+            coloane['numar factura'] = gomag['numar factura']
+        pregatit['netopia'] = pd.DataFrame(coloane)
+
+    return pregatit
+
+
+def _gomag_pregatit(gomag: Union[pd.DataFrame, Dict]) -> Dict[str, Optional[pd.DataFrame]]:
+    return gomag if isinstance(gomag, dict) else pregateste_gomag(gomag)
+
+
+def goleste_cache_borderouri() -> None:
+    """Goleste cache-ul de borderouri citite."""
+    _cache_borderouri.clear()
+
 
+def _citeste_folder(
+    folder: str,
+    extensie: str,
+    tip: str,
+    citeste: Callable[[str], tuple],
+    max_workers: Optional[int] = None
+) -> List[Tuple[str, tuple]]:
+    """
+    Citeste toate fisierele cu extensia data dintr-un folder.
+
+    Fisierele nemodificate de la ultima citire vin din cache; restul sunt
+    citite in paralel (un fisier per task).
+
+    Returns:
+        Lista (nume_fisier, rezultat), in ordinea alfabetica a fisierelor
+    """
+    fisiere = sorted(f for f in os.listdir(folder) if f.endswith(extensie))
+
+    rezultate = {}
+    de_citit = []
+    for file in fisiere:
+        path = os.path.abspath(os.path.join(folder, file))
+        stat = os.stat(path)
+        cached = _cache_borderouri.get((tip, path))
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            rezultate[file] = cached[2]
+        else:
+            de_citit.append((file, path, stat))
+
+    if len(de_citit) > 1 and max_workers != 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as executor:
+            citite = list(executor.map(citeste, [path for _, path, _ in de_citit]))
+    else:
+        citite = [citeste(path) for _, path, _ in de_citit]
+
+    for (file, path, stat), rezultat in zip(de_citit, citite):
+        rezultate[file] = rezultat
+        # Erorile nu se pastreaza in cache, ca fisierul sa fie reincercat
+        if rezultat[-1] is None:
+            _cache_borderouri[(tip, path)] = (stat.st_mtime_ns, stat.st_size, rezultat)
+
+    return [(file, rezultate[file]) for file in fisiere]
+
+
+def _citeste_borderou_gls(path: str) -> Tuple[Optional[pd.DataFrame], Optional[str], Optional[str]]:
+    """
+    Citeste un borderou GLS (ruleaza si in procesele din pool).
+
+    Returns:
+        Tuple: (borderou, coloana suma, eroare)
+    """
+    try:
+        borderou = pd.read_excel(path, header=7, dtype={'Numar colet': str})
+
+        if not {'Numar colet', 'Suma ramburs'}.issubset(borderou.columns):
+            # Incearca cu diacritice
+            if not {'Număr colet', 'Sumă ramburs'}.issubset(borderou.columns):
+                return None, None, "Coloane lipsa"
+            awb_col = 'Număr colet'
+            suma_col = 'Sumă ramburs'
+        else:
+            awb_col = 'Numar colet'
+            suma_col = 'Suma ramburs'
 
-def proceseaza_borderouri_gls(folder_gls: str, gomag_df: pd.DataFrame) -> Tuple[List[Dict], List[str]]:
+        borderou['AWB_normalizat'] = borderou[awb_col].astype(str).str.replace(r'\.0$', '', regex=True).str.replace(' ', '').str.lstrip('0')
+        return borderou, suma_col, None
+
+    except Exception as e:
+        return None, None, str(e)
+
+
+def _citeste_borderou_sameday(path: str) -> Tuple[Optional[pd.DataFrame], Optional[float], Optional[str]]:
+    """
+    Citeste un borderou Sameday, cu ambele sheet-uri dintr-o singura deschidere
+    a fisierului (ruleaza si in procesele din pool).
+
+    Returns:
+        Tuple: (borderou expeditii, suma totala din sheet-ul client, eroare)
+    """
+    try:
+        with pd.ExcelFile(path) as xls:
+            if 'expeditii' not in xls.sheet_names:
+                return None, None, "Lipseste sheet-ul 'expeditii'"
+
+            sheet_names = [s for s in ('client', 'expeditii') if s in xls.sheet_names]
+            sheets = pd.read_excel(xls, sheet_name=sheet_names)
+
+        # Extrage totalul din sheet-ul 'client'
+        suma_total = None
+        if 'client' in sheets:
+            client_sheet = sheets['client']
+            client_sheet.columns = client_sheet.columns.str.strip()
+            if 'Suma totala' in client_sheet.columns:
+                try:
+                    suma_total = pd.to_numeric(client_sheet['Suma totala'].iloc[1], errors='coerce')
+                except:
+                    pass
+
+        borderou = sheets['expeditii']
+
+        if not {'AWB', 'Suma ramburs'}.issubset(borderou.columns):
+            return None, None, "Coloane lipsa"
+
+        borderou['AWB_normalizat'] = borderou['AWB'].astype(str).str.strip()
+        return borderou, suma_total, None
+
+    except Exception as e:
+        return None, None, str(e)
+
+
+def _citeste_netopia(path: str) -> Tuple[Optional[pd.DataFrame], Optional[str], Optional[str]]:
+    """
+    Citeste un fisier CSV Netopia (ruleaza si in procesele din pool).
+
+    Returns:
+        Tuple: (tranzactii, coloana cu numarul comenzii, eroare)
+    """
+    try:
+        netopia_df = pd.read_csv(path, sep=',', encoding='utf-8', dtype=str)
+        netopia_df.columns = netopia_df.columns.str.strip().str.replace('"', '').str.replace("'", "")
+
+        # Cauta coloana cu numarul comenzii
+        order_col = None
+        for col in netopia_df.columns:
+            if 'order' in col.lower() or 'comanda' in col.lower():
+                order_col = col
+                break
+
+        if order_col:
+            netopia_df['numar_comanda_norm'] = netopia_df[order_col].astype(str).str.strip()
+
+        return netopia_df, order_col, None
+
+    except Exception as e:
+        return None, None, str(e)
+
+
+def proceseaza_borderouri_gls(
+    folder_gls: str,
+    gomag_df: Union[pd.DataFrame, Dict],
+    max_workers: Optional[int] = None
+) -> Tuple[List[Dict], List[str]]:
     """
     Proceseaza borderourile GLS si potriveste AWB-urile cu facturile din Gomag.
 
+    Args:
+        folder_gls: Folderul cu borderouri .xlsx
+        gomag_df: Exportul Gomag sau rezultatul pregateste_gomag
+        max_workers: Numarul de procese pentru citire (1 = serial)
+
     Returns:
         Tuple: (rezultate, erori)
     """
@@ -21,38 +224,20 @@ def proceseaza_borderouri_gls(folder_gls: str, gomag_df: pd.DataFrame) -> Tuple[
     if not folder_gls or not os.path.isdir(folder_gls):
         return [], []
 
-    # Normalizeaza coloanele Gomag
-    gomag_df.columns = gomag_df.columns.str.strip().str.lower()
-    if 'awb' not in gomag_df.columns or 'numar factura' not in gomag_df.columns:
+    gomag = _gomag_pregatit(gomag_df)['gls']
+    if gomag is None:
         erori.append("Gomag: Lipsesc coloanele 'AWB' sau 'Numar Factura'")
         return [], erori
 
-    gomag_df['awb_normalizat'] = gomag_df['awb'].astype(str).str.replace(' ', '').str.lstrip('0')
-
-    for file in os.listdir(folder_gls):
-        if not file.endswith('.xlsx'):
+    for file, (borderou, suma_col, eroare) in _citeste_folder(folder_gls, '.xlsx', 'gls', _citeste_borderou_gls, max_workers):
+        if eroare:
+            erori.append(f"GLS {file}: {eroare}")
             continue
 
-        path = os.path.join(folder_gls, file)
         try:
-            borderou = pd.read_excel(path, header=7, dtype={'Numar colet': str})
-
-            if not {'Numar colet', 'Suma ramburs'}.issubset(borderou.columns):
-                # Incearca cu diacritice
-                if not {'Număr colet', 'Sumă ramburs'}.issubset(borderou.columns):
-                    erori.append(f"GLS {file}: Coloane lipsa")
-                    continue
-                awb_col = 'Număr colet'
-                suma_col = 'Sumă ramburs'
-            else:
-                awb_col = 'Numar colet'
-                suma_col = 'Suma ramburs'
-
-            borderou['AWB_normalizat'] = borderou[awb_col].astype(str).str.replace(r'\.0$', '', regex=True).str.replace(' ', '').str.lstrip('0')
-
             # Merge cu Gomag
             potrivite = borderou.merge(
-                gomag_df[['awb_normalizat', 'numar factura']],
+                gomag,
                 left_on='AWB_normalizat',
                 right_on='awb_normalizat',
                 how='left'
@@ -79,7 +264,11 @@ def proceseaza_borderouri_gls(folder_gls: str, gomag_df: pd.DataFrame) -> Tuple[
     return rezultate, erori
 
 
-def proceseaza_borderouri_sameday(folder_sameday: str, gomag_df: pd.DataFrame) -> Tuple[List[Dict], List[str]]:
+def proceseaza_borderouri_sameday(
+    folder_sameday: str,
+    gomag_df: Union[pd.DataFrame, Dict],
+    max_workers: Optional[int] = None
+) -> Tuple[List[Dict], List[str]]:
     """
     Proceseaza borderourile Sameday si potriveste AWB-urile cu facturile din Gomag.
     """
@@ -89,49 +278,20 @@ def proceseaza_borderouri_sameday(folder_sameday: str, gomag_df: pd.DataFrame) -
     if not folder_sameday or not os.path.isdir(folder_sameday):
         return [], []
 
-    # Normalizeaza coloanele Gomag
-    gomag_df.columns = gomag_df.columns.str.strip().str.lower()
-    if 'awb' not in gomag_df.columns or 'numar factura' not in gomag_df.columns:
+    gomag = _gomag_pregatit(gomag_df)['sameday']
+    if gomag is None:
         erori.append("Gomag: Lipsesc coloanele 'AWB' sau 'Numar Factura'")
         return [], erori
 
-    gomag_df['awb_normalizat'] = gomag_df['awb'].astype(str).str.strip()
-
-    for file in os.listdir(folder_sameday):
-        if not file.endswith('.xlsx'):
+    for file, (borderou, suma_total, eroare) in _citeste_folder(folder_sameday, '.xlsx', 'sameday', _citeste_borderou_sameday, max_workers):
+        if eroare:
+            erori.append(f"Sameday {file}: {eroare}")
             continue
 
-        path = os.path.join(folder_sameday, file)
         try:
-            xls = pd.ExcelFile(path)
-
-            # Extrage totalul din sheet-ul 'client'
-            suma_total = None
-            if 'client' in xls.sheet_names:
-                client_sheet = pd.read_excel(xls, sheet_name='client')
-                client_sheet.columns = client_sheet.columns.str.strip()
-                if 'Suma totala' in client_sheet.columns:
-                    try:
-                        suma_total = pd.to_numeric(client_sheet['Suma totala'].iloc[1], errors='coerce')
-                    except:
-                        pass
-
-            # Citeste sheet-ul 'expeditii'
-            if 'expeditii' not in xls.sheet_names:
-                erori.append(f"Sameday {file}: Lipseste sheet-ul 'expeditii'")
-                continue
-
-            borderou = pd.read_excel(xls, sheet_name='expeditii')
-
-            if not {'AWB', 'Suma ramburs'}.issubset(borderou.columns):
-                erori.append(f"Sameday {file}: Coloane lipsa")
-                continue
-
-            borderou['AWB_normalizat'] = borderou['AWB'].astype(str).str.strip()
-
             # Merge cu Gomag
             potrivite = borderou.merge(
-                gomag_df[['awb_normalizat', 'numar factura']],
+                gomag,
                 left_on='AWB_normalizat',
                 right_on='awb_normalizat',
                 how='left'
@@ -158,7 +318,11 @@ def proceseaza_borderouri_sameday(folder_sameday: str, gomag_df: pd.DataFrame) -
     return rezultate, erori
 
 
-def proceseaza_netopia(folder_netopia: str, gomag_df: pd.DataFrame) -> Tuple[List[Dict], List[str]]:
+def proceseaza_netopia(
+    folder_netopia: str,
+    gomag_df: Union[pd.DataFrame, Dict],
+    max_workers: Optional[int] = None
+) -> Tuple[List[Dict], List[str]]:
     """
     Proceseaza fisierele CSV Netopia si potriveste tranzactiile cu facturile din Gomag.
     """
@@ -168,40 +332,25 @@ def proceseaza_netopia(folder_netopia: str, gomag_df: pd.DataFrame) -> Tuple[Lis
     if not folder_netopia or not os.path.isdir(folder_netopia):
         return [], []
 
-    # Normalizeaza coloanele Gomag
-    gomag_df.columns = gomag_df.columns.str.strip().str.lower()
-    if 'numar comanda' not in gomag_df.columns:
+    gomag = _gomag_pregatit(gomag_df)['netopia']
+    if gomag is None:
         erori.append("Gomag: Lipseste coloana 'Numar Comanda'")
         return [], erori
 
-    gomag_df['numar comanda'] = gomag_df['numar comanda'].astype(str).str.strip()
-
-    for file in os.listdir(folder_netopia):
-        if not file.endswith('.csv'):
+    for file, (netopia_df, order_col, eroare) in _citeste_folder(folder_netopia, '.csv', 'netopia', _citeste_netopia, max_workers):
+        if eroare:
+            erori.append(f"Netopia {file}: {eroare}")
             continue
 
-        path = os.path.join(folder_netopia, file)
         try:
-            netopia_df = pd.read_csv(path, sep=',', encoding='utf-8', dtype=str)
-            netopia_df.columns = netopia_df.columns.str.strip().str.replace('"', '').str.replace("'", "")
-
             # Extrage batchId din numele fisierului
             batch_match = re.search(r'batchId\.(\d+)', file)
             batchid = batch_match.group(1) if batch_match else None
 
-            # Cauta coloana cu numarul comenzii
-            order_col = None
-            for col in netopia_df.columns:
-                if 'order' in col.lower() or 'comanda' in col.lower():
-                    order_col = col
-                    break
-
             if order_col:
-                netopia_df['numar_comanda_norm'] = netopia_df[order_col].astype(str).str.strip()
-
                 # Merge cu Gomag
                 potrivite = netopia_df.merge(
-                    gomag_df[['numar comanda', 'numar factura']],
+                    gomag[['numar comanda', 'numar factura']],
                     left_on='numar_comanda_norm',
                     right_on='numar comanda',
                     how='left'
@@ -240,3 +389,25 @@ def proceseaza_netopia(folder_netopia: str, gomag_df: pd.DataFrame) -> Tuple[Lis
             erori.append(f"Netopia {file}: {str(e)}")
 
     return rezultate, erori
+
+
+def proceseaza_borderouri(
+    folder_gls: Optional[str],
+    folder_sameday: Optional[str],
+    folder_netopia: Optional[str],
+    gomag_df: pd.DataFrame,
+    max_workers: Optional[int] = None
+) -> Dict[str, Tuple[List[Dict], List[str]]]:
+    """
+    Proceseaza toate folderele de borderouri cu un singur export Gomag normalizat.
+
+    Returns:
+        Dict 'gls' / 'sameday' / 'netopia' -> (rezultate, erori)
+    """
+    gomag = pregateste_gomag(gomag_df)
+
+    return {
+        'gls': proceseaza_borderouri_gls(folder_gls, gomag, max_workers),
+        'sameday': proceseaza_borderouri_sameday(folder_sameday, gomag, max_workers),
+        'netopia': proceseaza_netopia(folder_netopia, gomag, max_workers),
+    }
@@ -0,0 +1,124 @@
+"""
+Query cache for the Supabase read functions used by the Streamlit pages.
+
+Every widget interaction reruns main.py top to bottom, which used to re-issue
+the same queries. Read functions decorated with @cached_query keep their
+results in a process-wide LRU cache. The key is (function, arguments, data
+version).
+
+The data version is a process-local counter, bumped by every function
+decorated with @bumps_data_version (syncs and imports). A cache hit does
+no network I/O at all. The TTL bounds how long data written by another
+process (background jobs, another app instance) can stay stale.
+"""
+
+import copy
+import functools
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+# Default time-to-live of a cached result, in seconds
+DEFAULT_TTL = 300
+
+# Maximum number of cached results (least recently used are evicted first)
+MAX_ENTRIES = 256
+
+_lock = threading.Lock()
+_entries: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+_data_version = 0
+
+
+def get_data_version() -> int:
+    """Current local data version."""
+    return _data_version
+
+
+def bump_data_version() -> None:
+    """Mark the data as changed: every cached result becomes stale."""
+    global _data_version
+    with _lock:
+        _data_version += 1
+        _entries.clear()
+
+
+def clear_query_cache() -> None:
+    """Drop all cached results (the data version is unchanged)."""
+    with _lock:
+        _entries.clear()
+
+
+def _make_key(func: Callable, args: tuple, kwargs: Dict) -> Optional[Tuple]:
+    key = (func.__module__, func.__qualname__, args, tuple(sorted(kwargs.items())), _data_version)
+    try:
+        hash(key)
+    except TypeError:
+        return None
+    return key
+
+
+def cached_query(func: Optional[Callable] = None, *, ttl: float = DEFAULT_TTL, copy_result: bool = True):
+    """
+    Cache the results of a read function.
+
+    Calls with unhashable arguments are not cached. Results are deep-copied
+    on the way out (copy_result=False to share them), so callers may
+    mutate what they get. Exceptions are not cached.
+
+    Usage:
+        @cached_query
+        def get_invoices_for_period(start_date=None, end_date=None): ...
+
+        @cached_query(ttl=60)
+        def get_recent_sync_logs(limit=10): ...
+    """
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(func, args, kwargs)
+            if key is None:
+                return func(*args, **kwargs)
+
+            now = time.monotonic()
+            with _lock:
+                entry = _entries.get(key)
+                if entry is not None and entry[0] > now:
+                    _entries.move_to_end(key)
+                    result = entry[1]
+                    hit = True
+                else:
+                    hit = False
+            if hit:
+                return copy.deepcopy(result) if copy_result else result
+
+            result = func(*args, **kwargs)
+
+            with _lock:
+                # A sync finished while the query ran: the key is already stale
+                if key[-1] == _data_version:
+                    _entries[key] = (now + ttl, result)
+                    _entries.move_to_end(key)
+                    while len(_entries) > MAX_ENTRIES:
+                        _entries.popitem(last=False)
+
+            return copy.deepcopy(result) if copy_result else result
+
+        wrapper.cache_bypass = func
+        return wrapper
+
+    if func is not None:
+        return decorator(func)
+    return decorator
+
+
+def bumps_data_version(func: Callable) -> Callable:
+    """Bump the data version after a write function (sync/import) returns or fails."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            bump_data_version()
+
+    return wrapper
@@ -8,6 +8,7 @@ import requests
 from typing import List, Dict, Optional, Tuple
 from datetime import datetime, timedelta
 from dotenv import load_dotenv
+from .query_cache import bumps_data_version
 
 load_dotenv()
 
@@ -305,6 +306,7 @@ def get_existing_sameday_parcels() -> set:
         return set()
 
 
+@bumps_data_version
 def save_sameday_parcels_to_supabase(parcels: List[Dict], sync_month: str = None) -> Dict:
     """
     Salveaza coletele Sameday in Supabase.
@@ -0,0 +1,122 @@
+"""
+Inventarul tabelelor - numarul de randuri din tabelele Supabase afisate in UI.
+
+Numaratorile se citesc de pe server prin cereri head-only (header-ul count,
+fara randuri transferate), toate in paralel. Ele sunt memorate pana se schimba
+datele: versiunea = versiunea locala a datelor (query_cache, crescuta de orice
+import din acest proces) + marcajul datelor, cel mai recent updated_at din
+tabelele numarate (functia table_inventory_version, importurile facute de alte
+procese). Marcajul se citeste intr-o singura cerere, cel mult o data la
+INTERVAL_MARCAJ secunde, deci importurile altor procese apar cu o intarziere
+de cel mult atat.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+from .supabase_client import get_supabase_client
+from .query_cache import get_data_version
+
+# Numarator -> (tabela, filtru optional de egalitate)
+COUNTERS: Dict[str, Tuple[str, Optional[Tuple[str, object]]]] = {
+    'gls_parcels': ('gls_parcels', None),
+    'sameday_parcels': ('sameday_parcels', None),
+    'netopia_transactions': ('netopia_transactions', None),
+    'invoices': ('invoices', None),
+    'bank_transactions': ('bank_transactions', None),
+    'gls_borderouri': ('gls_borderouri', None),
+    'gls_borderouri_matched': ('gls_borderouri', ('op_matched', True)),
+}
+
+# Cereri de numarare in paralel
+MAX_WORKERS = 8
+
+# Secunde intre doua citiri ale marcajului datelor
+INTERVAL_MARCAJ = 30
+
+# (metoda count, versiunea datelor) -> {numarator: numar}
+_counts_cache: Dict[Tuple[str, Optional[tuple]], Dict[str, int]] = {}
+
+# Ultimul marcaj citit si momentul citirii (time.monotonic)
+_marcaj: Dict[str, object] = {'valoare': None, 'citit_la': None}
+
+
+def _count(name: str, method: str) -> int:
+    table, equal = COUNTERS[name]
+    query = get_supabase_client().table(table).select('id', count=method, head=True)
+    if equal:
+        query = query.eq(*equal)
+    return query.execute().count or 0
+
+
+def _versiune_date() -> Optional[tuple]:
+    """
+    Versiunea datelor tabelelor din COUNTERS.
+
+    Returns:
+        Tuple (versiune locala, marcajul datelor), sau None daca marcajul nu
+        poate fi citit (numaratorile nu se memoreaza)
+    """
+    acum = time.monotonic()
+    citit_la = _marcaj['citit_la']
+    if citit_la is None or acum - citit_la >= INTERVAL_MARCAJ:
+        try:
+            _marcaj['valoare'] = get_supabase_client().rpc('table_inventory_version', {}).execute().data
+        except Exception as e:
+            print(f"Inventar tabele: Nu s-a putut citi versiunea datelor: {e}")
+            _marcaj['citit_la'] = None
+            return None
+        _marcaj['citit_la'] = acum
+    return (get_data_version(), _marcaj['valoare'])
+
+
+def invalidate_table_counts() -> None:
+    """Uita numaratorile memorate (si marcajul datelor, recitit la urmatoarea cerere)."""
+    _counts_cache.clear()
+    _marcaj['citit_la'] = None
+
+
+def get_table_counts(names: Optional[Iterable[str]] = None, method: str = 'exact') -> Dict[str, int]:
+    """
+    Numarul de randuri pentru numaratorile date (implicit toate din COUNTERS).
+
+    Stergerile facute de alte procese nu schimba updated_at; ele apar dupa
+    urmatorul import sau dupa invalidate_table_counts().
+
+    Args:
+        names: Numaratori din COUNTERS
+        method: Metoda count PostgREST - 'exact', 'planned' sau 'estimated'
+
+    Returns:
+        Dict numarator -> numar (0 pentru numaratorile a caror cerere a esuat)
+    """
+    names = list(names) if names is not None else list(COUNTERS)
+    version = _versiune_date()
+
+    # Fara versiune, numaratorile se citesc dar nu se memoreaza
+    cached = _counts_cache.get((method, version), {}) if version is not None else {}
+    missing = [name for name in names if name not in cached]
+
+    if missing:
+        def count_or_zero(name: str) -> Tuple[str, Optional[int]]:
+            try:
+                return name, _count(name, method)
+            except Exception as e:
+                print(f"Inventar tabele: Numararea a esuat pentru {name}: {e}")
+                return name, None
+
+        with ThreadPoolExecutor(max_workers=min(MAX_WORKERS, len(missing))) as executor:
+            results = list(executor.map(count_or_zero, missing))
+        fresh = {name: count for name, count in results if count is not None}
+
+        if version is not None:
+            # Numaratorile versiunilor mai vechi nu mai sunt valide
+            for key in [k for k in _counts_cache if k[1] != version]:
+                del _counts_cache[key]
+            cached = _counts_cache.setdefault((method, version), cached)
+            cached.update(fresh)
+        else:
+            cached = fresh
+
+    return {name: cached.get(name, 0) for name in names}
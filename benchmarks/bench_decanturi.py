@@ -0,0 +1,168 @@
+"""
+Benchmark parsare comenzi decanturi (raport productie + bonuri productie).
+
+Compara implementarea veche (iterrows, split per comanda si trei regex-uri
+necompilate plus normalize_name per produs, repetate separat pentru raport
+si pentru bonuri) cu implementarea curenta (un singur tabel de produse,
+explode + str.extract cu regex-uri precompilate, SKU printr-un singur map,
+din care se construiesc ambele rezultate) si verifica faptul ca rezultatele
+sunt identice. Citirea Excel este aceeasi in ambele variante si nu este
+masurata.
+
+Rulare:
+    python benchmarks/bench_decanturi.py [comenzi]
+"""
+
+import os
+import sys
+import random
+import re
+import time
+from collections import defaultdict
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+import utils.decanturi_processor as decanturi  # noqa: E402
+from utils.decanturi_processor import (  # noqa: E402
+    normalize_name,
+    extrage_info_produs,
+    extrage_info_produs_intreg,
+    detecteaza_coloane,
+    parseaza_comenzi,
+    raport_din_produse,
+    bonuri_din_produse,
+)
+
+STATUSURI = ['Finalizata', 'Confirmata', 'Anulata', 'In asteptare']
+
+
+def genereaza_date(numar_comenzi: int, rng: random.Random):
+    """Comenzi sintetice (export Gomag) si baza de date produse."""
+    parfumuri = [f"Parfum Arabesc {i}" for i in range(400)]
+    product_db, reverse_db = {}, {}
+    for i, parfum in enumerate(parfumuri):
+        for ml in (2, 5, 10):
+            nume = f"Decant {ml} ml parfum {parfum}, original"
+            product_db[normalize_name(nume)] = f"DEC{i}-{ml}"
+            reverse_db[f"DEC{i}-{ml}"] = nume
+        product_db[normalize_name(f"{parfum} 100 ml")] = f"FULL{i}"
+
+    def produs():
+        parfum = rng.choice(parfumuri)
+        if rng.random() < 0.7:
+            text = f"Decant {rng.choice((2, 5, 10))} ml parfum {parfum}, original"
+        else:
+            text = f"{parfum} 100 ml"
+        if rng.random() < 0.6:
+            text += f", {rng.randint(1, 3)}.00"
+        return text
+
+    df = pd.DataFrame([{
+        'ID': 10000 + i,
+        'Numar comanda': 50000 + i,
+        'Status comanda': rng.choice(STATUSURI),
+        'Produse comandate': ' | '.join(produs() for _ in range(rng.randint(1, 6))),
+    } for i in range(numar_comenzi)])
+    return df, product_db, reverse_db
+
+
+def raport_vechi(df, product_db):
+    """Implementarea anterioara a proceseaza_comenzi (fara citirea Excel)."""
+    coloana_status, coloana_produse = detecteaza_coloane(df)
+    df_finalizate = df[df[coloana_status].astype(str).str.contains('Finalizata|Confirmata', case=False, na=False)]
+
+    raport = defaultdict(lambda: {'nume': '', 'cantitate_ml': 0, 'bucati': 0})
+    raport_intregi = defaultdict(lambda: {'nume': '', 'bucati': 0, 'sku': 'N/A'})
+
+    for idx, row in df_finalizate.iterrows():
+        for produs in str(row[coloana_produse]).split(' | '):
+            info = extrage_info_produs(produs.strip())
+            if info:
+                nume_parfum, cantitate_ml, numar_bucati = info
+                produs_norm = normalize_name(re.sub(r', \d+\.\d+$', '', produs.strip()))
+                sku = product_db.get(produs_norm, 'N/A')
+                if sku != 'N/A' and not re.search(r'-\d+$', sku):
+                    continue
+                raport[sku]['nume'] = nume_parfum
+                raport[sku]['cantitate_ml'] = cantitate_ml
+                raport[sku]['bucati'] += numar_bucati
+            else:
+                info_intreg = extrage_info_produs_intreg(produs.strip())
+                if info_intreg:
+                    nume_produs, numar_bucati = info_intreg
+                    produs_norm = normalize_name(re.sub(r', \d+\.\d+$', '', produs.strip()))
+                    sku = product_db.get(produs_norm, 'N/A')
+                    key = sku if sku != 'N/A' else nume_produs
+                    raport_intregi[key]['nume'] = nume_produs
+                    raport_intregi[key]['bucati'] += numar_bucati
+                    raport_intregi[key]['sku'] = sku
+
+    return dict(raport), dict(raport_intregi)
+
+
+def bonuri_vechi(df, product_db, reverse_db):
+    """Implementarea anterioara a proceseaza_bonuri_productie (fara citirea Excel)."""
+    coloana_status, coloana_produse = detecteaza_coloane(df)
+    df_filtrate = df[df[coloana_status].astype(str).str.contains('Finalizata|Confirmata', case=False, na=False)]
+
+    bonuri = []
+    for idx, row in df_filtrate.iterrows():
+        order_id = int(row['ID'])
+        order_number = int(row['Numar comanda'])
+        for produs in str(row[coloana_produse]).split(' | '):
+            info = extrage_info_produs(produs.strip())
+            if info:
+                nume_parfum, cantitate_ml, numar_bucati = info
+                produs_norm = normalize_name(re.sub(r', \d+\.\d+$', '', produs.strip()))
+                sku = product_db.get(produs_norm, 'N/A')
+                if sku != 'N/A' and not re.search(r'-\d+$', sku):
+                    continue
+                bonuri.append({
+                    'sku': sku,
+                    'nume': reverse_db.get(sku, nume_parfum),
+                    'cantitate': numar_bucati,
+                    'cantitate_ml': cantitate_ml,
+                    'order_id': order_id,
+                    'order_number': order_number
+                })
+    return bonuri
+
+
+def vechi(df, product_db, reverse_db):
+    return raport_vechi(df, product_db), bonuri_vechi(df, product_db, reverse_db)
+
+
+def nou(df):
+    comenzi, produse = parseaza_comenzi(df)
+    return raport_din_produse(produse), bonuri_din_produse(comenzi, produse)
+
+
+def cronometreaza(func, *args, repetari: int = 3, **kwargs):
+    """Returneaza (cel mai bun timp din `repetari` rulari, rezultat)."""
+    timpi = []
+    for _ in range(repetari):
+        t0 = time.perf_counter()
+        rezultat = func(*args, **kwargs)
+        timpi.append(time.perf_counter() - t0)
+    return min(timpi), rezultat
+
+
+def main():
+    numar_comenzi = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    df, product_db, reverse_db = genereaza_date(numar_comenzi, random.Random(42))
+    decanturi.get_product_database = lambda: (product_db, reverse_db)
+    print(f"Export: {numar_comenzi} comenzi, {len(product_db)} produse in baza de date")
+
+    t_vechi, rezultat_vechi = cronometreaza(vechi, df, product_db, reverse_db)
+    t_nou, rezultat_nou = cronometreaza(nou, df)
+
+    assert rezultat_vechi == rezultat_nou, "Rezultatul difera fata de implementarea veche!"
+
+    print(f"Raport + bonuri vechi: {t_vechi:.3f}s")
+    print(f"Raport + bonuri noi:   {t_nou:.3f}s  ({t_vechi / t_nou:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,307 @@
+"""
+Benchmark export Excel (export.genereaza_export_excel) pentru o luna de borderouri.
+
+Compara implementarea veche (iterrows + ws.cell celula cu celula, cautare
+MT940 refacuta per borderou Netopia) cu implementarea curenta (sectiuni
+pregatite ca DataFrame-uri, randuri scrise secvential in modul write-only)
+si verifica faptul ca fisierele au aceleasi valori, stiluri si latimi.
+
+Rulare:
+    python benchmarks/bench_export.py [borderouri_pe_curier] [randuri_pe_borderou]
+"""
+
+import os
+import sys
+import random
+import time
+from io import BytesIO
+from typing import List, Dict
+
+import numpy as np
+import pandas as pd
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+from utils.export import genereaza_export_excel  # noqa: E402
+
+
+def genereaza_date(numar_borderouri: int, randuri: int, rng: random.Random):
+    """Rezultate sintetice (ca din processors) si incasarile MT940 aferente."""
+    def facturi(n):
+        return [rng.choice([str(rng.randint(1000, 99999))] * 8 + [np.nan, '']) for _ in range(n)]
+
+    incasari = []
+    gls, sameday, netopia = [], [], []
+    for b in range(numar_borderouri):
+        n = rng.randint(randuri // 2, randuri * 3 // 2)
+        sume = [round(rng.uniform(20, 900), 2) for _ in range(n)]
+        potrivite = pd.DataFrame({
+            'AWB': [str(rng.randint(10**10, 10**11)) for _ in range(n)],
+            'numar factura': facturi(n),
+            'suma': sume,
+            'curier': 'GLS',
+            'fisier': f"GLS_{b}.xlsx",
+        })
+        potrivite['AWB_normalizat'] = potrivite['AWB'].str.lstrip('0')
+        gls.append({'borderou': f"GLS_{b}.xlsx", 'potrivite': potrivite, 'suma_total': sum(sume)})
+        incasari.append((f"OPG{b}", round(sum(sume), 2), f"2024-03-{b % 28 + 1:02d}", None,
+                         "GENERAL LOGISTICS SYSTEMS ROMANIA SRL RAMBURS"))
+
+        potrivite = potrivite.assign(curier='Sameday').drop(columns=['AWB_normalizat'] if b % 2 else [])
+        sameday.append({'borderou': f"Sameday_{b}.xlsx", 'potrivite': potrivite, 'suma_total': sum(sume) + 1})
+        incasari.append((f"OPS{b}", round(sum(sume) + 1, 2), f"2024-03-{b % 28 + 1:02d}", None,
+                         "DELIVERY SOLUTIONS SA BORDEROU"))
+
+        batchid = str(rng.randint(10**6, 10**7))
+        n = rng.randint(randuri // 4, randuri // 2)
+        sume = [round(rng.uniform(20, 500), 2) for _ in range(n)]
+        netopia.append({
+            'borderou': f"batchId.{batchid}.csv", 'batchid': batchid if b % 3 else None,
+            'suma_total': sum(sume),
+            'potrivite': pd.DataFrame({'numar_comanda_norm': [str(rng.randint(10000, 99999)) for _ in range(n)],
+                                       'numar factura': facturi(n), 'suma': sume, 'curier': 'Netopia'}),
+        })
+        incasari.append((f"OPN{b}", round(sum(sume), 2), f"2024-03-{b % 28 + 1:02d}", batchid,
+                         f"NETOPIA FINANCIAL SERVICES BATCHID {batchid}"))
+
+    rng.shuffle(incasari)
+    return gls, sameday, netopia, incasari
+
+
+def genereaza_vechi(
+    rezultate_gls: List[Dict],
+    rezultate_sameday: List[Dict],
+    rezultate_netopia: List[Dict],
+    incasari_mt940: List[tuple]
+) -> BytesIO:
+    """
+    Implementarea anterioara, pastrata ca referinta.
+
+    Returns:
+        BytesIO: Buffer cu fisierul Excel
+    """
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Facturi Grupate"
+
+    # Stiluri
+    header_font = Font(bold=True, color="FFFFFF")
+    header_fill = PatternFill(start_color="1e293b", end_color="1e293b", fill_type="solid")
+    gls_fill = PatternFill(start_color="3b82f6", end_color="3b82f6", fill_type="solid")
+    sameday_fill = PatternFill(start_color="ef4444", end_color="ef4444", fill_type="solid")
+    netopia_fill = PatternFill(start_color="06b6d4", end_color="06b6d4", fill_type="solid")
+    border = Border(
+        left=Side(style='thin'),
+        right=Side(style='thin'),
+        top=Side(style='thin'),
+        bottom=Side(style='thin')
+    )
+
+    # Header
+    headers = ["Data OP", "Numar OP", "Borderou", "Curier", "AWB/Order ID", "Nr. Factura", "Suma", "Status"]
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = Alignment(horizontal='center')
+        cell.border = border
+
+    # Ajusteaza latimea coloanelor
+    ws.column_dimensions['A'].width = 12
+    ws.column_dimensions['B'].width = 18
+    ws.column_dimensions['C'].width = 35
+    ws.column_dimensions['D'].width = 12
+    ws.column_dimensions['E'].width = 20
+    ws.column_dimensions['F'].width = 15
+    ws.column_dimensions['G'].width = 12
+    ws.column_dimensions['H'].width = 10
+
+    row_num = 2
+
+    # Creeaza dictionar cu incasari MT940 pentru potrivire
+    incasari_dict = {}
+    for op_ref, suma, data, batchid, details in incasari_mt940:
+        details_upper = details.upper()
+        if "GLS" in details_upper or "GENERAL LOGISTICS" in details_upper:
+            sursa = "GLS"
+        elif "DELIVERY SOLUTIONS" in details_upper:
+            sursa = "Sameday"
+        elif "NETOPIA" in details_upper or "BATCHID" in details_upper:
+            sursa = "Netopia"
+        else:
+            sursa = "Altul"
+
+        key = (sursa, round(suma, 2))
+        incasari_dict[key] = (op_ref, data, batchid)
+
+    # Proceseaza GLS
+    for rezultat in rezultate_gls:
+        borderou = rezultat['borderou']
+        suma_total = rezultat['suma_total']
+        potrivite = rezultat['potrivite']
+
+        # Cauta OP-ul potrivit
+        key = ("GLS", round(suma_total, 2))
+        op_info = incasari_dict.get(key, ("", "", None))
+        op_ref, data_op, _ = op_info
+
+        first_row = True
+        for _, row in potrivite.iterrows():
+            awb = row.get('AWB_normalizat', '')
+            factura = row.get('numar factura', '')
+            suma = row.get('suma', 0)
+
+            ws.cell(row=row_num, column=1, value=data_op if first_row else "")
+            ws.cell(row=row_num, column=2, value=op_ref if first_row else "")
+            ws.cell(row=row_num, column=3, value=borderou if first_row else "")
+            cell_curier = ws.cell(row=row_num, column=4, value="GLS" if first_row else "")
+            cell_curier.fill = gls_fill
+            ws.cell(row=row_num, column=5, value=awb)
+            ws.cell(row=row_num, column=6, value=factura if pd.notna(factura) else "")
+            ws.cell(row=row_num, column=7, value=suma)
+            ws.cell(row=row_num, column=8, value="OK" if pd.notna(factura) and factura else "LIPSA")
+
+            first_row = False
+            row_num += 1
+
+        # Rand total
+        ws.cell(row=row_num, column=6, value="TOTAL:")
+        ws.cell(row=row_num, column=6).font = Font(bold=True)
+        ws.cell(row=row_num, column=7, value=suma_total)
+        ws.cell(row=row_num, column=7).font = Font(bold=True)
+        row_num += 2
+
+    # Proceseaza Sameday
+    for rezultat in rezultate_sameday:
+        borderou = rezultat['borderou']
+        suma_total = rezultat['suma_total']
+        potrivite = rezultat['potrivite']
+
+        # Cauta OP-ul potrivit
+        key = ("Sameday", round(suma_total, 2))
+        op_info = incasari_dict.get(key, ("", "", None))
+        op_ref, data_op, _ = op_info
+
+        first_row = True
+        for _, row in potrivite.iterrows():
+            awb = row.get('AWB_normalizat', row.get('AWB', ''))
+            factura = row.get('numar factura', '')
+            suma = row.get('suma', 0)
+
+            ws.cell(row=row_num, column=1, value=data_op if first_row else "")
+            ws.cell(row=row_num, column=2, value=op_ref if first_row else "")
+            ws.cell(row=row_num, column=3, value=borderou if first_row else "")
+            cell_curier = ws.cell(row=row_num, column=4, value="Sameday" if first_row else "")
+            cell_curier.fill = sameday_fill
+            ws.cell(row=row_num, column=5, value=awb)
+            ws.cell(row=row_num, column=6, value=factura if pd.notna(factura) else "")
+            ws.cell(row=row_num, column=7, value=suma)
+            ws.cell(row=row_num, column=8, value="OK" if pd.notna(factura) and factura else "LIPSA")
+
+            first_row = False
+            row_num += 1
+
+        # Rand total
+        ws.cell(row=row_num, column=6, value="TOTAL:")
+        ws.cell(row=row_num, column=6).font = Font(bold=True)
+        ws.cell(row=row_num, column=7, value=suma_total)
+        ws.cell(row=row_num, column=7).font = Font(bold=True)
+        row_num += 2
+
+    # Proceseaza Netopia
+    for rezultat in rezultate_netopia:
+        borderou = rezultat['borderou']
+        suma_total = rezultat['suma_total']
+        batchid = rezultat.get('batchid')
+        potrivite = rezultat['potrivite']
+
+        # Cauta OP-ul potrivit prin batchid sau suma
+        op_ref, data_op = "", ""
+        for (op, suma, data, bid, details) in incasari_mt940:
+            if batchid and bid == batchid:
+                op_ref, data_op = op, data
+                break
+            elif "NETOPIA" in details.upper() and abs(suma - suma_total) < 1:
+                op_ref, data_op = op, data
+                break
+
+        first_row = True
+        for _, row in potrivite.iterrows():
+            order_id = row.get('numar_comanda_norm', row.get('numar comanda', ''))
+            factura = row.get('numar factura', '')
+            suma = row.get('suma', 0)
+
+            ws.cell(row=row_num, column=1, value=data_op if first_row else "")
+            ws.cell(row=row_num, column=2, value=op_ref if first_row else "")
+            ws.cell(row=row_num, column=3, value=borderou if first_row else "")
+            cell_curier = ws.cell(row=row_num, column=4, value="Netopia" if first_row else "")
+            cell_curier.fill = netopia_fill
+            ws.cell(row=row_num, column=5, value=order_id)
+            ws.cell(row=row_num, column=6, value=factura if pd.notna(factura) else "")
+            ws.cell(row=row_num, column=7, value=suma)
+            ws.cell(row=row_num, column=8, value="OK" if pd.notna(factura) and factura else "LIPSA")
+
+            first_row = False
+            row_num += 1
+
+        # Rand total
+        ws.cell(row=row_num, column=6, value="TOTAL:")
+        ws.cell(row=row_num, column=6).font = Font(bold=True)
+        ws.cell(row=row_num, column=7, value=suma_total)
+        ws.cell(row=row_num, column=7).font = Font(bold=True)
+        row_num += 2
+
+    # Salveaza in buffer
+    buffer = BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+
+    return buffer
+
+
+def continut(buffer: BytesIO):
+    """Valorile si stilurile vizibile ale celulelor, plus latimile coloanelor."""
+    ws = load_workbook(buffer).active
+    celule = {}
+    for row in ws.iter_rows():
+        for c in row:
+            valoare = None if c.value == "" else c.value
+            if valoare is None and c.fill.fill_type is None:
+                continue
+            celule[c.coordinate] = (valoare, c.font.b, c.font.color.rgb if c.font.color else None,
+                                    c.font.name, c.fill.fgColor.rgb, c.alignment.horizontal,
+                                    c.border.left.style if c.border.left else None)
+    latimi = {litera: d.width for litera, d in ws.column_dimensions.items()}
+    return celule, latimi
+
+
+def cronometreaza(func, *args, repetari: int = 3, **kwargs):
+    """Returneaza (cel mai bun timp din `repetari` rulari, rezultat)."""
+    timpi = []
+    for _ in range(repetari):
+        t0 = time.perf_counter()
+        rezultat = func(*args, **kwargs)
+        timpi.append(time.perf_counter() - t0)
+    return min(timpi), rezultat
+
+
+def main():
+    numar_borderouri = int(sys.argv[1]) if len(sys.argv) > 1 else 30
+    randuri = int(sys.argv[2]) if len(sys.argv) > 2 else 150
+    date = genereaza_date(numar_borderouri, randuri, random.Random(42))
+    total = sum(len(r['potrivite']) for sectiune in date[:3] for r in sectiune)
+    print(f"Luna: {numar_borderouri} borderouri/curier, {total} randuri, {len(date[3])} incasari MT940")
+
+    t_vechi, vechi = cronometreaza(genereaza_vechi, *date)
+    t_nou, nou = cronometreaza(genereaza_export_excel, *date)
+
+    assert continut(vechi) == continut(nou), "Export-ul difera fata de implementarea veche!"
+
+    print(f"Export vechi: {t_vechi:.3f}s")
+    print(f"Export nou:   {t_nou:.3f}s  ({t_vechi / t_nou:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark parser borderou GLS (XLSX) pe un borderou sintetic mare.
+
+Compara parserul vechi (pd.read_excel complet + df.iloc rand cu rand) cu
+parserul curent (openpyxl read-only + operatii pe coloane) si verifica
+faptul ca rezultatele sunt identice. Afiseaza si varful de memorie.
+
+Rulare:
+    python benchmarks/bench_gls_borderou.py [colete]
+"""
+
+import os
+import re
+import sys
+import random
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+from io import BytesIO
+
+import pandas as pd
+from openpyxl import Workbook
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+from utils.gls_borderou_imap import parse_gls_borderou_xlsx  # noqa: E402
+
+
+def genereaza_borderou(numar_colete: int, rng: random.Random) -> bytes:
+    """Scrie un borderou GLS sintetic, cu structura fisierelor reale."""
+    wb = Workbook()
+    ws = wb.active
+    ws.append(["GLS General Logistics Systems Romania SRL"])
+    ws.append(["COD list"])
+    ws.append([])
+    ws.append(["Client: OBSID SRL"])
+    ws.append(["Cont: RO00BTRL0000000000000000"])
+    ws.append(["Adresa: Str. Exemplu 1"])
+    ws.append(["Data tranferarii banilor: 15.03.2024"])
+    ws.append(["Număr referinta", "Număr colet", "Referire la ramb.", "Livrat la data",
+               "Sumă ramburs", "currency", "Postal Address"])
+
+    total = 0
+    start = datetime(2024, 3, 1)
+    for n in range(numar_colete):
+        suma = round(rng.uniform(20, 900), 2)
+        total += suma
+        if n % 7 == 0:
+            adresa = f"Client Fara Cod Postal {n}"
+        else:
+            adresa = f"Popescu Ion {n} RO-{rng.randint(100000, 999999)} Cluj-Napoca"
+        colet = rng.randint(10**10, 10**11) if n % 11 else str(rng.randint(10**10, 10**11))
+        ws.append([f"REF{n}", colet, f"R{n}", start + timedelta(days=rng.randint(0, 10)),
+                   suma, "RON", adresa])
+
+    ws.append([None, None, None, None, round(total, 2)])
+
+    buffer = BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+def parseaza_vechi(xlsx_bytes: bytes):
+    """Implementarea anterioara, pastrata ca referinta."""
+    df = pd.read_excel(BytesIO(xlsx_bytes), header=None)
+
+    transfer_date = None
+    if len(df) > 5:
+        date_text = str(df.iloc[5][0])
+        date_match = re.search(r'(\d{2})\.(\d{2})\.(\d{4})', date_text)
+        if date_match:
+            day, month, year = date_match.groups()
+            transfer_date = f"{year}-{month}-{day}"
+
+    header_row = 7
+    for i in range(len(df)):
+        row_str = ' '.join(str(v).lower() for v in df.iloc[i].values if pd.notna(v))
+        if 'colet' in row_str and 'ramburs' in row_str:
+            header_row = i
+            break
+
+    parcels = []
+    total_from_file = 0
+    for i in range(header_row + 1, len(df)):
+        row = df.iloc[i]
+        parcel_number = row[1] if len(row) > 1 and pd.notna(row[1]) else None
+        amount = row[4] if len(row) > 4 and pd.notna(row[4]) else 0
+        address = str(row[6]) if len(row) > 6 and pd.notna(row[6]) else ''
+        delivery_date = row[3] if len(row) > 3 and pd.notna(row[3]) else None
+
+        if parcel_number is None or str(parcel_number) == 'nan':
+            try:
+                total_from_file = float(amount)
+            except Exception:
+                pass
+            continue
+
+        recipient_name = address.split('RO-')[0].strip() if 'RO-' in address else address[:50]
+        try:
+            cod_amount = float(amount)
+        except Exception:
+            cod_amount = 0
+
+        parcels.append({
+            'parcel_number': str(int(parcel_number)) if isinstance(parcel_number, float) else str(parcel_number),
+            'cod_amount': cod_amount,
+            'recipient_name': recipient_name,
+            'delivery_date': str(delivery_date) if delivery_date else None
+        })
+
+    calculated_total = round(sum(p['cod_amount'] for p in parcels), 2)
+    final_total = total_from_file if total_from_file > 0 else calculated_total
+
+    return {
+        'total_amount': round(final_total, 2),
+        'parcels_count': len(parcels),
+        'parcels': parcels,
+        'transfer_date': transfer_date,
+        'calculated_total': calculated_total
+    }
+
+
+def cronometreaza(func, *args, repetari: int = 3, **kwargs):
+    """Returneaza (cel mai bun timp din `repetari` rulari, rezultat)."""
+    timpi = []
+    for _ in range(repetari):
+        t0 = time.perf_counter()
+        rezultat = func(*args, **kwargs)
+        timpi.append(time.perf_counter() - t0)
+    return min(timpi), rezultat
+
+
+def varf_memorie(func, *args) -> float:
+    """Varful de memorie alocata (MB) in timpul unui apel."""
+    tracemalloc.start()
+    func(*args)
+    _, varf = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return varf / (1024 * 1024)
+
+
+def main():
+    numar_colete = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+    xlsx_bytes = genereaza_borderou(numar_colete, random.Random(42))
+    print(f"Borderou: {numar_colete} colete, {len(xlsx_bytes) / 1024:.0f} KB")
+
+    t_vechi, vechi = cronometreaza(parseaza_vechi, xlsx_bytes)
+    t_nou, nou = cronometreaza(parse_gls_borderou_xlsx, xlsx_bytes)
+
+    assert vechi == nou, "Rezultatele difera fata de parserul vechi!"
+
+    print(f"Total borderou: {nou['total_amount']} ({nou['parcels_count']} colete)")
+    print(f"Parser vechi:  {t_vechi:.3f}s  {varf_memorie(parseaza_vechi, xlsx_bytes):.1f} MB")
+    print(f"Parser nou:    {t_nou:.3f}s  {varf_memorie(parse_gls_borderou_xlsx, xlsx_bytes):.1f} MB  ({t_vechi / t_nou:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Benchmark parser MT940 pe extrase multi-anuale generate sintetic.
+
+Compara parserul vechi (citire completa + split pe linii, regex-uri necompilate,
+procesare seriala) cu parserul curent (streaming pe tag-uri + pool de procese)
+si verifica faptul ca rezultatele sunt identice.
+
+Rulare:
+    python benchmarks/bench_mt940.py [ani] [tranzactii_pe_luna]
+"""
+
+import os
+import re
+import sys
+import random
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+from utils.mt940_parser import extrage_referinte_op_din_mt940_folder  # noqa: E402
+
+
+DETALII = [
+    "TRANSFER RAMBURS GLS GENERAL LOGISTICS SYSTEMS ROMANIA REF {n}",
+    "DELIVERY SOLUTIONS SA BORD {n}",
+    "NETOPIA FINANCIAL SERVICES BATCHID: {n}",
+    "DANTE INTERNATIONAL SA PLATA {n}",
+    "INCS RBS {n}",
+    "PLATA FURNIZOR SRL FACTURA {n}",
+    "COMISION ADMINISTRARE CONT {n}",
+]
+
+
+def genereaza_extras(path: str, an: int, luna: int, numar_tranzactii: int, rng: random.Random):
+    """Scrie un extras MT940 sintetic pentru o luna."""
+    linii = [
+        "{1:F01BTRLRO22AXXX0000000000}{2:O940}{4:",
+        ":20:STMT",
+        ":25:RO00BTRL0000000000000000",
+        ":28C:1/1",
+        f":60F:C{an % 100:02d}{luna:02d}01RON1000,00",
+    ]
+    for n in range(numar_tranzactii):
+        zi = rng.randint(1, 28)
+        tip = rng.choice('CCCD')
+        suma = f"{rng.randint(1, 20000)},{rng.randint(0, 99):02d}"
+        linii.append(f":61:{an % 100:02d}{luna:02d}{zi:02d}{luna:02d}{zi:02d}{tip}{suma}NTRFNONREF//OP{an}{luna:02d}{n:06d}")
+        linii.append("SUPLIMENTAR")
+        detaliu = rng.choice(DETALII).format(n=rng.randint(100000, 999999))
+        linii.append(f":86:{detaliu[:40]}")
+        if len(detaliu) > 40:
+            linii.append(detaliu[40:])
+    linii.append(f":62F:C{an % 100:02d}{luna:02d}28RON1000,00")
+    linii.append("-}")
+    with open(path, 'w', encoding='utf-8', newline='\r\n') as f:
+        f.write('\n'.join(linii))
+
+
+def parseaza_vechi(folder_path: str):
+    """Implementarea anterioara, pastrata ca referinta."""
+    referinte = []
+    for file in sorted(os.listdir(folder_path)):
+        if file.startswith('MT940') and file.endswith('.txt'):
+            with open(os.path.join(folder_path, file), 'r', encoding='utf-8') as f:
+                text = f.read()
+            referinte.extend(_parseaza_mt940_vechi(text))
+    return referinte
+
+
+def _parseaza_mt940_vechi(text: str):
+    referinte = []
+    lines = text.replace('\r\n', '\n').replace('\r', '\n').split('\n')
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        if line.startswith(':61:'):
+            tranzactie_line = line[4:]
+            if len(tranzactie_line) >= 10:
+                data_op = f"20{tranzactie_line[0:2]}-{tranzactie_line[2:4]}-{tranzactie_line[4:6]}"
+                rest = tranzactie_line[10:]
+                if rest and rest[0] in ['C', 'D']:
+                    tip_tranzactie = rest[0]
+                    rest = rest[1:]
+                    suma_match = re.match(r'([\d,]+)', rest)
+                    if suma_match:
+                        try:
+                            suma_float = float(suma_match.group(1).replace(',', '.'))
+                        except ValueError:
+                            suma_float = 0
+                        ref_match = re.search(r'//([A-Za-z0-9]+)', tranzactie_line)
+                        op_ref = ref_match.group(1) if ref_match else ""
+                        details_text = ""
+                        i += 1
+                        while i < len(lines):
+                            next_line = lines[i].strip()
+                            if next_line.startswith(':86:'):
+                                details_text = next_line[4:]
+                                i += 1
+                                while i < len(lines) and not lines[i].strip().startswith(':'):
+                                    details_text += " " + lines[i].strip()
+                                    i += 1
+                                break
+                            elif next_line.startswith(':'):
+                                break
+                            i += 1
+                        if tip_tranzactie == 'C' and suma_float > 0:
+                            d = details_text.upper()
+                            if ("GLS" in d or "GENERAL LOGISTICS" in d or "DELIVERY SOLUTIONS" in d
+                                    or "SAMEDAY" in d or "NETOPIA" in d or "BATCHID" in d
+                                    or "DANTE INTERNATIONAL" in d or "EMAG" in d
+                                    or "TRANSFER RAMBURS" in d or "INCS RBS" in d):
+                                batchid = None
+                                batch_match = re.search(r'BATCHID\s*[:\s]*(\d+)', details_text, re.IGNORECASE)
+                                if batch_match:
+                                    batchid = batch_match.group(1)
+                                referinte.append((op_ref, suma_float, data_op, batchid, details_text))
+                        continue
+        i += 1
+    return referinte
+
+
+def cronometreaza(func, *args, repetari: int = 3, **kwargs):
+    """Returneaza (cel mai bun timp din `repetari` rulari, rezultat)."""
+    timpi = []
+    for _ in range(repetari):
+        t0 = time.perf_counter()
+        rezultat = func(*args, **kwargs)
+        timpi.append(time.perf_counter() - t0)
+    return min(timpi), rezultat
+
+
+def main():
+    ani = int(sys.argv[1]) if len(sys.argv) > 1 else 3
+    pe_luna = int(sys.argv[2]) if len(sys.argv) > 2 else 3000
+    rng = random.Random(42)
+
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for an in range(2023, 2023 + ani):
+            for luna in range(1, 13):
+                genereaza_extras(os.path.join(tmpdir, f"MT940_{an}{luna:02d}.txt"), an, luna, pe_luna, rng)
+
+        print(f"Extrase: {ani * 12} fisiere, {ani * 12 * pe_luna} tranzactii")
+
+        t_vechi, vechi = cronometreaza(parseaza_vechi, tmpdir)
+        t_serial, serial = cronometreaza(extrage_referinte_op_din_mt940_folder, tmpdir, max_workers=1)
+        t_paralel, paralel = cronometreaza(extrage_referinte_op_din_mt940_folder, tmpdir)
+
+    assert vechi == serial == paralel, "Rezultatele difera fata de parserul vechi!"
+
+    print(f"Incasari relevante: {len(paralel)}")
+    print(f"Parser vechi:          {t_vechi:.3f}s")
+    print(f"Streaming (serial):    {t_serial:.3f}s  ({t_vechi / t_serial:.2f}x)")
+    print(f"Streaming (pool {os.cpu_count()}):   {t_paralel:.3f}s  ({t_vechi / t_paralel:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Benchmark bonuri de productie Oblio prin HTTP (OblioHttpClient) pe serverul stub local.
+
+Fluxul Selenium (create_production_voucher) nu se poate rula aici; timpii lui
+per pas (navigate, autocomplete, recipe, save, launch, finalize) se scriu la
+rularile reale in TIMINGS_CSV (exports/oblio_timings.csv). Aici se masoara
+bonuri/minut pentru clientul HTTP contra benchmarks/oblio_stub.py, cu latenta
+simulata per cerere, timpul mediu per pas (client.timpi) si se verifica faptul
+ca serverul a finalizat exact bonurile trimise, plus cazurile de eroare (SKU
+inexistent, stoc insuficient, sesiune expirata, formular fara campurile
+asteptate - fara POST).
+
+Stub-ul e scris dupa aceleasi presupuneri ca clientul (endpoint-uri, JSON,
+campuri ap_N_* neverificate pe oblio.eu): rezultatele arata viteza fluxului,
+nu compatibilitatea cu Oblio.
+
+Rulare:
+    python benchmarks/bench_oblio_http.py [bonuri] [latenta_ms]
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from utils.oblio_http import (  # noqa: E402
+    OblioHttpClient,
+    OblioHttpEroare,
+    OblioSesiuneInvalida,
+    StocInsuficient,
+)
+from oblio_stub import COOKIES_STUB, porneste_stub  # noqa: E402
+
+
+def verifica_erori(server):
+    client = OblioHttpClient(COOKIES_STUB, base_url=server.url)
+    try:
+        client.creeaza_bon('SKU-INEXISTENT', 1)
+        raise AssertionError("SKU inexistent acceptat")
+    except OblioSesiuneInvalida:
+        raise
+    except OblioHttpEroare:
+        pass
+
+    try:
+        client.creeaza_bon('SKU-FARA-STOC', 5)
+        raise AssertionError("Bon creat fara stoc")
+    except StocInsuficient:
+        pass
+
+    expirat = OblioHttpClient([{'name': 'PHPSESSID', 'value': 'expirat'}], base_url=server.url)
+    assert not expirat.este_autentificat()
+    try:
+        expirat.creeaza_bon('SKU-0', 1)
+        raise AssertionError("Bon creat cu sesiune expirata")
+    except OblioSesiuneInvalida:
+        pass
+
+    bonuri_inainte = len(server.bonuri)
+    server.formular_fara_reteta = True
+    try:
+        client.creeaza_bon('SKU-0', 1)
+        raise AssertionError("Bon trimis fara campurile ap_1_* in formular")
+    except OblioSesiuneInvalida:
+        pass
+    finally:
+        server.formular_fara_reteta = False
+    assert len(server.bonuri) == bonuri_inainte, "Formular trimis desi lipseau campuri"
+
+
+def main():
+    numar_bonuri = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latenta = (float(sys.argv[2]) if len(sys.argv) > 2 else 30.0) / 1000
+
+    produse = {f'SKU-{i}': 1000.0 for i in range(20)}
+    produse['SKU-FARA-STOC'] = 0.01
+    server = porneste_stub(produse, latenta)
+    try:
+        verifica_erori(server)
+        assert not server.bonuri_finalizate
+
+        bonuri = [(f'SKU-{i % 20}', 1 + i % 3) for i in range(numar_bonuri)]
+        client = OblioHttpClient(COOKIES_STUB, base_url=server.url)
+        cereri_inainte = server.numar_cereri
+
+        pasi = {}
+        t0 = time.perf_counter()
+        for sku, cantitate in bonuri:
+            client.creeaza_bon(sku, cantitate)
+            for pas, secunde in client.timpi.items():
+                pasi[pas] = pasi.get(pas, 0) + secunde
+        durata = time.perf_counter() - t0
+
+        assert server.bonuri_finalizate == [(sku, float(c)) for sku, c in bonuri], "Bonurile finalizate difera!"
+        cereri = (server.numar_cereri - cereri_inainte) / numar_bonuri
+    finally:
+        server.shutdown()
+
+    print(f"Bonuri: {numar_bonuri}, latenta stub {latenta * 1000:.0f} ms/cerere, {cereri:.0f} cereri/bon")
+    print(f"HTTP: {durata / numar_bonuri * 1000:.0f} ms/bon, {numar_bonuri / durata * 60:.0f} bonuri/minut")
+    print("Timp mediu per pas: " + ", ".join(f"{pas}={s / numar_bonuri * 1000:.0f} ms" for pas, s in pasi.items()))
+
+
+if __name__ == "__main__":
+    main()
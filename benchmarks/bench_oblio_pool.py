@@ -0,0 +1,143 @@
+"""
+Benchmark process_bonuri_paralel (pool de workeri) pe serverul stub Oblio local.
+
+Workerii ruleaza in http_mode (fara Chrome in mediul de benchmark), fiecare
+cu propria sesiune si aceleasi cookies, contra benchmarks/oblio_stub.py cu
+latenta simulata per cerere. Se masoara bonuri/minut pentru 1, 2, 4, ...
+workeri (pana la MAX_WORKERI) si se verifica, pentru fiecare rulare, ca:
+bonurile deja procesate din registru si duplicatele sunt sarite, fiecare bon
+nou este finalizat exact o data si inregistrat in registru, iar stop() opreste
+toti workerii. Un bon care esueaza dupa trimitere (la finalizare) nu se reia,
+ca sa nu se creeze un al doilea bon. Registrul de bonuri este tinut in memorie
+(fara Supabase).
+Profilul de timp per pas (stats['timings']) se verifica si se afiseaza, iar
+CSV-ul de timpi se scrie intr-un fisier temporar.
+
+Rulare:
+    python benchmarks/bench_oblio_pool.py [bonuri] [latenta_ms] [max_workeri]
+"""
+
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import utils.oblio_automation as oblio  # noqa: E402
+import utils.oblio_http as oblio_http  # noqa: E402
+from utils.decanturi_processor import RegistruBonuri  # noqa: E402
+from oblio_stub import COOKIES_STUB, porneste_stub  # noqa: E402
+
+logging.disable(logging.CRITICAL)
+
+
+class RegistruMemorie(RegistruBonuri):
+    """RegistruBonuri cu tabela bonuri_procesate in memorie."""
+
+    tabela = {}
+
+    def preincarca(self, order_numbers):
+        comenzi = set(order_numbers)
+        procesate = {cheie for cheie in self.tabela if cheie[1] in comenzi}
+        with self._lock:
+            self.procesate.update(procesate)
+        return len(procesate)
+
+    def flush(self):
+        with self._lock:
+            for rand in self._tampon.values():
+                self.tabela[(rand['sku'], rand['order_number'])] = rand
+            scrise = len(self._tampon)
+            self._tampon.clear()
+            self.scrise += scrise
+            return scrise
+
+
+def genereaza_bonuri(numar_bonuri):
+    bonuri = [
+        {'sku': f'SKU-{i % 20}', 'cantitate': 1, 'nume': f'Produs {i % 20}', 'order_id': i, 'order_number': 10000 + i}
+        for i in range(numar_bonuri)
+    ]
+    # Duplicate in lista si bonuri procesate deja intr-o rulare anterioara
+    return bonuri + bonuri[:5], {(b['sku'], b['order_number']) for b in bonuri[5:10]}
+
+
+def ruleaza(server, bonuri, procesate, workeri):
+    RegistruMemorie.tabela = {cheie: {} for cheie in procesate}
+    server.bonuri_finalizate.clear()
+
+    automation = oblio.OblioAutomation(use_existing_profile=False, headless=True, http_mode=True)
+    t0 = time.perf_counter()
+    stats = automation.process_bonuri_paralel(bonuri, workeri=workeri, oblio_cookies=COOKIES_STUB)
+    durata = time.perf_counter() - t0
+
+    noi = {(b['sku'], b['order_number']) for b in bonuri} - procesate
+    assert stats['success'] == len(noi) and stats['failed'] == 0, stats
+    assert stats['skipped'] == len(bonuri) - len(noi), stats
+    assert sorted(server.bonuri_finalizate) == sorted((sku, 1.0) for sku, _ in noi), "Bonuri finalizate gresit!"
+    assert set(RegistruMemorie.tabela) == noi | procesate, "Registrul de bonuri difera!"
+    assert len(stats['timings']) == len(noi) and all(t['mod'] == 'http' for t in stats['timings']), "Timpi lipsa!"
+    return durata, len(noi), stats['timings']
+
+
+def verifica_stop(server, bonuri):
+    RegistruMemorie.tabela = {}
+    server.bonuri_finalizate.clear()
+    automation = oblio.OblioAutomation(use_existing_profile=False, headless=True, http_mode=True)
+    threading.Timer(0.3, automation.stop).start()
+    stats = automation.process_bonuri_paralel(bonuri, workeri=2, oblio_cookies=COOKIES_STUB)
+    assert 0 < stats['success'] < len(bonuri) - 5, stats
+    assert len(server.bonuri_finalizate) == stats['success']
+
+
+def verifica_eroare_dupa_trimitere(server):
+    RegistruMemorie.tabela = {}
+    server.bonuri_finalizate.clear()
+    server.esecuri_finalizare = 1
+    bonuri_inainte = len(server.bonuri)
+
+    automation = oblio.OblioAutomation(use_existing_profile=False, headless=True, http_mode=True)
+    bon = {'sku': 'SKU-0', 'cantitate': 1, 'nume': 'Produs 0', 'order_id': 1, 'order_number': 90001}
+    stats = automation.process_bonuri_paralel([bon], workeri=1, oblio_cookies=COOKIES_STUB, incercari=3)
+
+    assert stats['success'] == 0 and stats['failed'] == 1, stats
+    assert len(server.bonuri) - bonuri_inainte == 1, "Bonul esuat dupa trimitere a fost reluat (bon dublat)!"
+    assert not server.bonuri_finalizate and not RegistruMemorie.tabela
+
+
+def main():
+    numar_bonuri = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latenta = (float(sys.argv[2]) if len(sys.argv) > 2 else 30.0) / 1000
+    oblio.MAX_WORKERI = int(sys.argv[3]) if len(sys.argv) > 3 else 8
+    oblio.RegistruBonuri = RegistruMemorie
+    oblio.TIMINGS_CSV = os.path.join(tempfile.mkdtemp(), 'oblio_timings.csv')
+
+    bonuri, procesate = genereaza_bonuri(numar_bonuri)
+    server = porneste_stub({f'SKU-{i}': 1000.0 for i in range(20)}, latenta)
+    oblio_http.OBLIO_BASE_URL = server.url
+    try:
+        print(f"Bonuri: {len(bonuri)} (5 duplicate, 5 deja procesate), latenta stub {latenta * 1000:.0f} ms/cerere")
+        workeri, referinta = 1, None
+        while workeri <= oblio.MAX_WORKERI:
+            durata, noi, timpi = ruleaza(server, bonuri, procesate, workeri)
+            referinta = referinta or durata
+            print(f"  {workeri} workeri: {noi / durata * 60:.0f} bonuri/minut ({referinta / durata:.2f}x)")
+            pasi = [p for p in (*oblio.PASI_BON, 'total') if p in timpi[0]]
+            print("    timp mediu per pas: " + ", ".join(
+                f"{p}={sum(t[p] for t in timpi) / len(timpi) * 1000:.0f} ms" for p in pasi
+            ))
+            workeri *= 2
+        verifica_stop(server, bonuri)
+        verifica_eroare_dupa_trimitere(server)
+        with open(oblio.TIMINGS_CSV, encoding='utf-8') as f:
+            print(f"CSV timpi: {oblio.TIMINGS_CSV} ({sum(1 for _ in f) - 1} randuri)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
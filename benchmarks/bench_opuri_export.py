@@ -0,0 +1,275 @@
+"""
+Benchmark scriere export OP-uri (XLSX) pentru o luna sintetica mare.
+
+Compara scrierea veche (workbook complet in memorie, ws.cell() cu acces
+aleator si un Font nou pentru aproape fiecare celula stilizata) cu scrierea
+curenta (openpyxl write-only, randuri secventiale, stiluri partajate) si
+verifica faptul ca fisierele au aceleasi valori, stiluri si latimi de coloane.
+Afiseaza timpul si varful de memorie.
+
+Rulare:
+    python benchmarks/bench_opuri_export.py [randuri]
+"""
+
+import os
+import sys
+import random
+import time
+import tracemalloc
+from io import BytesIO
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font, PatternFill, Alignment
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+from utils.opuri_processor import scrie_export_opuri, match_op_with_borderou, _extrage_order_id_netopia, _suma_netopia  # noqa: E402
+
+
+def genereaza_date(numar_randuri: int, rng: random.Random) -> dict:
+    """Date sintetice in formatul intors de colecteaza_date_opuri."""
+    date = {
+        'mt940_transactions': [], 'gls_borderouri': [], 'sameday_borderouri': [],
+        'awb_rezolvate': {}, 'netopia_ops': [], 'netopia_trans_per_batch': {}, 'comenzi_gomag': {},
+    }
+
+    randuri = 0
+    n = 0
+    while randuri < numar_randuri * 0.9:
+        curier = 'GLS' if n % 2 else 'Sameday'
+        parcels = []
+        for _ in range(rng.randint(20, 120)):
+            awb = str(rng.randint(10**10, 10**11))
+            parcels.append({'parcel_number': awb, 'cod_amount': round(rng.uniform(20, 900), 2)})
+            if rng.random() < 0.95:
+                factura = str(rng.randint(1000, 99999)) if rng.random() < 0.98 else f"FCT{n}"
+                date['awb_rezolvate'][awb] = (str(rng.randint(10000, 99999)), factura)
+        suma = round(sum(p['cod_amount'] for p in parcels), 2)
+        date[f"{curier.lower()}_borderouri"].append({
+            'borderou': f"{curier}_{n}.xlsx", 'curier': curier, 'parcels': parcels, 'suma_total': suma,
+            'op_reference': f"OP{n}", 'op_date': '2024-03-05', 'op_matched': n % 5 != 0,
+        })
+        date['mt940_transactions'].append({'source': curier, 'amount': suma, 'op_reference': f"OP{n}",
+                                           'transaction_date': '2024-03-05'})
+        randuri += len(parcels) + 3
+        n += 1
+
+    while randuri < numar_randuri:
+        batch_id = str(rng.randint(10**6, 10**7))
+        trans = []
+        for _ in range(rng.randint(10, 60)):
+            order_id = str(rng.randint(10000, 99999))
+            trans.append({'order_id': f"Comanda nr. {order_id} - www.obsid.ro",
+                          'amount': round(rng.uniform(20, 500), 2), 'fee': -1.5})
+            if rng.random() < 0.9:
+                date['comenzi_gomag'][order_id] = {'numar factura': str(rng.randint(1000, 99999)),
+                                                   'total comanda': f"{rng.uniform(20, 500):.2f}"}
+        date['netopia_ops'].append({'source': 'Netopia', 'batch_id': batch_id, 'amount': 1000.0,
+                                    'op_reference': f"N{batch_id}", 'transaction_date': '2024-03-07'})
+        date['netopia_trans_per_batch'][batch_id] = trans
+        randuri += len(trans) + 4
+
+    return date
+
+
+def scrie_vechi(date: dict) -> BytesIO:
+    """Scrierea anterioara (ws.cell cu acces aleator), pastrata ca referinta."""
+    mt940_transactions = date['mt940_transactions']
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "OP-uri"
+
+    header_fill = PatternFill(start_color="1e293b", end_color="1e293b", fill_type="solid")
+    header_font = Font(bold=True, color="FFFFFF")
+    gls_fill = PatternFill(start_color="0070C0", end_color="0070C0", fill_type="solid")
+    sameday_fill = PatternFill(start_color="FF0000", end_color="FF0000", fill_type="solid")
+    netopia_fill = PatternFill(start_color="DAEEF3", end_color="DAEEF3", fill_type="solid")
+    error_fill = PatternFill(start_color="FFFF00", end_color="FFFF00", fill_type="solid")
+
+    headers = ["Data OP", "Număr OP", "Nume Borderou", "Curier", "Order ID",
+               "Număr Factură", "Sumă", "Erori", "Diferență eMag", "Facturi Comision eMag"]
+    for col, header in enumerate(headers, 1):
+        cell = ws.cell(row=1, column=col, value=header)
+        cell.font = header_font
+        cell.fill = header_fill
+        cell.alignment = Alignment(horizontal='center')
+
+    for litera, latime in zip("ABCDEFGHIJ", [12, 20, 35, 10, 12, 15, 12, 8, 15, 25]):
+        ws.column_dimensions[litera].width = latime
+
+    row_num = 2
+    for borderouri, curier, fill_color in [
+        (date['gls_borderouri'], "GLS", gls_fill),
+        (date['sameday_borderouri'], "Sameday", sameday_fill)
+    ]:
+        for borderou in borderouri:
+            suma_total = borderou['suma_total']
+            if borderou.get('op_matched'):
+                numar_op = borderou.get('op_reference', '')
+                data_op = borderou.get('op_date', '')
+            else:
+                numar_op, data_op = match_op_with_borderou(suma_total, mt940_transactions, curier)
+
+            facturi_ok = []
+            facturi_ko = []
+            for p in borderou['parcels']:
+                awb = p.get('parcel_number', p.get('awb_number', ''))
+                cod_amount = float(p.get('cod_amount', 0) or 0)
+                order_id, numar_factura = date['awb_rezolvate'].get(awb, ('', ''))
+                if numar_factura:
+                    facturi_ok.append({'awb': awb, 'order_id': order_id, 'numar_factura': numar_factura, 'suma': cod_amount})
+                else:
+                    facturi_ko.append({'awb': awb, 'order_id': order_id, 'suma': cod_amount})
+
+            facturi_ok.sort(key=lambda x: int(x['numar_factura']) if x['numar_factura'].isdigit() else 0)
+            erori_exist = len(facturi_ko) > 0
+            erori_text = "DA" if erori_exist else "NU"
+
+            first_row = True
+            for f in facturi_ok:
+                ws.cell(row=row_num, column=1, value=data_op if first_row else "")
+                ws.cell(row=row_num, column=2, value=numar_op if first_row else "")
+                ws.cell(row=row_num, column=3, value=borderou['borderou'] if first_row else "")
+                cell_curier = ws.cell(row=row_num, column=4, value=curier if first_row else "")
+                if first_row:
+                    cell_curier.fill = fill_color
+                    cell_curier.font = Font(color="FFFFFF")
+                ws.cell(row=row_num, column=5, value=f['order_id'])
+                ws.cell(row=row_num, column=6, value=int(f['numar_factura']) if f['numar_factura'].isdigit() else f['numar_factura'])
+                ws.cell(row=row_num, column=7, value=f['suma'])
+                cell_erori = ws.cell(row=row_num, column=8, value=erori_text if first_row else "")
+                if first_row and erori_exist:
+                    cell_erori.fill = error_fill
+                first_row = False
+                row_num += 1
+
+            if not facturi_ok:
+                ws.cell(row=row_num, column=1, value=data_op)
+                ws.cell(row=row_num, column=2, value=numar_op)
+                ws.cell(row=row_num, column=3, value=borderou['borderou'])
+                cell_curier = ws.cell(row=row_num, column=4, value=curier)
+                cell_curier.fill = fill_color
+                cell_curier.font = Font(color="FFFFFF")
+                cell_erori = ws.cell(row=row_num, column=8, value=erori_text)
+                if erori_exist:
+                    cell_erori.fill = error_fill
+                row_num += 1
+
+            if facturi_ko:
+                ws.cell(row=row_num, column=6, value="AWB-uri fără factură:")
+                row_num += 1
+                for f in facturi_ko:
+                    ws.cell(row=row_num, column=6, value=f['awb'])
+                    ws.cell(row=row_num, column=7, value=f['suma'])
+                    row_num += 1
+
+            ws.cell(row=row_num, column=6, value="Total")
+            ws.cell(row=row_num, column=6).font = Font(bold=True)
+            ws.cell(row=row_num, column=7, value=suma_total)
+            ws.cell(row=row_num, column=7).font = Font(bold=True)
+            row_num += 2
+
+    for netopia_op in date['netopia_ops']:
+        batch_id = netopia_op.get('batch_id', '')
+        suma_op = float(netopia_op.get('amount', 0) or 0)
+        data_op = netopia_op.get('transaction_date', '')
+        netopia_trans = date['netopia_trans_per_batch'].get(batch_id, []) if batch_id else []
+        total_facturi = sum(float(t.get('amount', 0) or 0) for t in netopia_trans)
+        total_comisioane = sum(float(t.get('fee', 0) or 0) for t in netopia_trans)
+        if not netopia_trans:
+            total_facturi = suma_op
+            total_comisioane = 0
+
+        ws.cell(row=row_num, column=1, value=data_op)
+        ws.cell(row=row_num, column=2, value=netopia_op.get('op_reference', ''))
+        ws.cell(row=row_num, column=3, value=f"batchId.{batch_id}.csv" if batch_id else f"Netopia_{data_op}.csv")
+        cell_curier = ws.cell(row=row_num, column=4, value="Netopia")
+        cell_curier.fill = netopia_fill
+
+        first_row = True
+        for trans in netopia_trans:
+            order_id = _extrage_order_id_netopia(trans.get('order_id', ''))
+            if order_id is None:
+                continue
+            gomag_match = date['comenzi_gomag'].get(str(order_id)) if order_id else None
+            numar_factura, amount = _suma_netopia(trans, gomag_match)
+            if not first_row:
+                row_num += 1
+                for col in range(1, 5):
+                    ws.cell(row=row_num, column=col, value="")
+            ws.cell(row=row_num, column=5, value=order_id)
+            ws.cell(row=row_num, column=6, value=numar_factura)
+            ws.cell(row=row_num, column=7, value=amount)
+            ws.cell(row=row_num, column=8, value="NU" if numar_factura else "DA")
+            first_row = False
+        row_num += 1
+
+        ws.cell(row=row_num, column=6, value="Comisioane:")
+        ws.cell(row=row_num, column=7, value=round(total_comisioane, 2))
+        row_num += 1
+        ws.cell(row=row_num, column=6, value="Total facturi:")
+        ws.cell(row=row_num, column=7, value=round(total_facturi, 2))
+        row_num += 1
+        ws.cell(row=row_num, column=6, value="Total OP:")
+        ws.cell(row=row_num, column=6).font = Font(bold=True)
+        ws.cell(row=row_num, column=7, value=round(suma_op, 2))
+        ws.cell(row=row_num, column=7).font = Font(bold=True)
+        row_num += 2
+
+    buffer = BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+
+def continut(buffer: BytesIO):
+    """Valorile si stilurile vizibile ale celulelor, plus latimile coloanelor."""
+    ws = load_workbook(buffer).active
+    celule = {}
+    for row in ws.iter_rows():
+        for c in row:
+            valoare = None if c.value == "" else c.value
+            if valoare is None and c.fill.fill_type is None:
+                continue
+            celule[c.coordinate] = (valoare, c.font.b, c.font.color.rgb if c.font.color else None,
+                                    c.font.name, c.fill.fgColor.rgb, c.alignment.horizontal)
+    latimi = {litera: d.width for litera, d in ws.column_dimensions.items()}
+    return celule, latimi
+
+
+def cronometreaza(func, *args, repetari: int = 3, **kwargs):
+    """Returneaza (cel mai bun timp din `repetari` rulari, rezultat)."""
+    timpi = []
+    for _ in range(repetari):
+        t0 = time.perf_counter()
+        rezultat = func(*args, **kwargs)
+        timpi.append(time.perf_counter() - t0)
+    return min(timpi), rezultat
+
+
+def varf_memorie(func, *args) -> float:
+    """Varful de memorie alocata (MB) in timpul unui apel."""
+    tracemalloc.start()
+    func(*args)
+    _, varf = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return varf / (1024 * 1024)
+
+
+def main():
+    numar_randuri = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    date = genereaza_date(numar_randuri, random.Random(42))
+
+    t_vechi, vechi = cronometreaza(scrie_vechi, date)
+    t_nou, nou = cronometreaza(scrie_export_opuri, date)
+
+    celule, latimi = continut(nou)
+    assert (celule, latimi) == continut(vechi), "Export-ul difera fata de scrierea veche!"
+
+    print(f"Export: {len(celule)} celule, {len(nou.getvalue()) / 1024:.0f} KB")
+    print(f"Scriere veche: {t_vechi:.3f}s  {varf_memorie(scrie_vechi, date):.1f} MB")
+    print(f"Scriere noua:  {t_nou:.3f}s  {varf_memorie(scrie_export_opuri, date):.1f} MB  ({t_vechi / t_nou:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""
+Benchmark parser PDF (extrase Banca Transilvania) pe un extras sintetic.
+
+Compara parserul vechi (extragere seriala, concatenare repetata de string-uri,
+regex-uri necompilate) cu parserul curent (pool de procese pe pagini, buffer
+de tip lista, pattern-uri precompilate) si cu o citire din cache, si verifica
+faptul ca tranzactiile extrase sunt identice.
+
+Rulare:
+    python benchmarks/bench_pdf.py [pagini] [linii_pe_pagina]
+"""
+
+import io
+import os
+import re
+import sys
+import random
+import time
+from datetime import date, timedelta
+
+import pdfplumber
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+from utils import pdf_parser  # noqa: E402
+
+
+INCASARI = [
+    ("Incasare OP GENERAL LOGISTICS SYSTEMS ROMANIA SRL", "RAMBURS GLS"),
+    ("Incasare OP DELIVERY SOLUTIONS SA", "BORDEROU SAMEDAY"),
+    ("Incasare OP NETOPIA FINANCIAL SERVICES", "BATCHID {n}"),
+    ("Incasare OP DANTE INTERNATIONAL SA", "PLATA EMAG"),
+]
+ALTE_TRANZACTII = [
+    "Plata la POS MAGAZIN SRL",
+    "Plata OP FURNIZOR SRL FACTURA {n}",
+    "Comision administrare cont",
+]
+
+
+def genereaza_linii(numar_pagini: int, linii_pe_pagina: int, rng: random.Random):
+    """Genereaza liniile de text ale extrasului, pe pagini."""
+    pagini = []
+    zi = date(2024, 1, 1)
+    for _ in range(numar_pagini):
+        linii = ["EXTRAS CONT Banca Transilvania", "Data Descriere Debit Credit"]
+        while len(linii) < linii_pe_pagina - 4:
+            if rng.random() < 0.2:
+                linii.append("RULAJ ZI")
+                zi += timedelta(days=1)
+            data = zi.strftime('%d/%m/%Y')
+            if rng.random() < 0.6:
+                titlu, detaliu = rng.choice(INCASARI)
+                suma = f"{rng.randint(1, 9999)}.{rng.randint(0, 99):02d}"
+                linii.append(f"{data} {titlu}")
+                linii.append(f"REF: OP{rng.randint(10**8, 10**9)}")
+                linii.append(f"{detaliu.format(n=rng.randint(10000, 99999))} {suma}")
+            else:
+                linii.append(f"{data} {rng.choice(ALTE_TRANZACTII).format(n=rng.randint(1, 999))}")
+                linii.append(f"{rng.randint(1, 999)}.{rng.randint(0, 99):02d}")
+        pagini.append(linii)
+    return pagini
+
+
+def _escape_pdf(text: str) -> str:
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def scrie_pdf(pagini) -> bytes:
+    """Scrie un PDF minimal (text Helvetica), o pagina per lista de linii."""
+    obiecte = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        None,  # Pages, completat la final
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    kids = []
+    for linii in pagini:
+        continut = ["BT /F1 9 Tf 40 800 Td 11 TL"]
+        continut.extend(f"({_escape_pdf(linie)}) Tj T*" for linie in linii)
+        continut.append("ET")
+        stream = "\n".join(continut).encode('latin-1')
+        obiecte.append(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        obiecte.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(obiecte))
+        )
+        kids.append(len(obiecte))
+    obiecte[1] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (
+        b" ".join(b"%d 0 R" % k for k in kids), len(kids)
+    )
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offseturi = []
+    for nr, obiect in enumerate(obiecte, 1):
+        offseturi.append(out.tell())
+        out.write(b"%d 0 obj\n" % nr + obiect + b"\nendobj\n")
+    xref = out.tell()
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % (len(obiecte) + 1))
+    for offset in offseturi:
+        out.write(b"%010d 00000 n \n" % offset)
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(obiecte) + 1, xref))
+    return out.getvalue()
+
+
+def parseaza_vechi(pdf_bytes: bytes):
+    """Implementarea anterioara, pastrata ca referinta."""
+    with pdfplumber.open(io.BytesIO(pdf_bytes)) as pdf:
+        full_text = ""
+        for page in pdf.pages:
+            text = page.extract_text()
+            if text:
+                full_text += text + "\n"
+
+    transactions = []
+    lines = full_text.split('\n')
+    current_date = None
+    i = 0
+    while i < len(lines):
+        line = lines[i].strip()
+        date_match = re.match(r'^(\d{2}/\d{2}/\d{4})', line)
+        if date_match:
+            current_date = date_match.group(1)
+        if 'Incasare OP' in line and current_date:
+            transaction_text = line
+            j = i + 1
+            while j < len(lines):
+                next_line = lines[j].strip()
+                if re.match(r'^(\d{2}/\d{2}/\d{4})', next_line) or 'RULAJ ZI' in next_line:
+                    break
+                if any(x in next_line for x in ['Plata la POS', 'Plata OP', 'Plata Instant', 'Comision']):
+                    break
+                transaction_text += " " + next_line
+                j += 1
+            trans = pdf_parser.parse_incasare_op(transaction_text, current_date)
+            if trans:
+                transactions.append(trans)
+        i += 1
+    return transactions
+
+
+def parseaza_fara_cache(pdf_bytes: bytes, max_workers=None):
+    pdf_parser.goleste_cache_pdf()
+    return pdf_parser.parse_bt_pdf_from_bytes(pdf_bytes, max_workers=max_workers)
+
+
+def cronometreaza(func, *args, repetari: int = 3, **kwargs):
+    """Returneaza (cel mai bun timp din `repetari` rulari, rezultat)."""
+    timpi = []
+    for _ in range(repetari):
+        t0 = time.perf_counter()
+        rezultat = func(*args, **kwargs)
+        timpi.append(time.perf_counter() - t0)
+    return min(timpi), rezultat
+
+
+def main():
+    numar_pagini = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    linii_pe_pagina = int(sys.argv[2]) if len(sys.argv) > 2 else 60
+    rng = random.Random(42)
+
+    pdf_bytes = scrie_pdf(genereaza_linii(numar_pagini, linii_pe_pagina, rng))
+    print(f"Extras: {numar_pagini} pagini, {len(pdf_bytes) / 1024:.0f} KB")
+
+    t_vechi, vechi = cronometreaza(parseaza_vechi, pdf_bytes)
+    t_serial, serial = cronometreaza(parseaza_fara_cache, pdf_bytes, max_workers=1)
+    t_paralel, paralel = cronometreaza(parseaza_fara_cache, pdf_bytes)
+    t_cache, din_cache = cronometreaza(pdf_parser.parse_bt_pdf_from_bytes, pdf_bytes)
+
+    assert vechi == serial == paralel == din_cache, "Rezultatele difera fata de parserul vechi!"
+
+    print(f"Incasari extrase: {len(paralel)}")
+    print(f"Parser vechi:          {t_vechi:.3f}s")
+    print(f"Parser nou (serial):   {t_serial:.3f}s  ({t_vechi / t_serial:.2f}x)")
+    print(f"Parser nou (pool {os.cpu_count()}):  {t_paralel:.3f}s  ({t_vechi / t_paralel:.2f}x)")
+    print(f"Din cache:             {t_cache:.4f}s  ({t_vechi / t_cache:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Benchmark evolutie profit (data_sync.get_profit_data) pe un an de incasari.
+
+Compara implementarea veche (toate tranzactiile din interval, strptime si
+strftime per rand) cu implementarea curenta (rollup-ul zilnic
+bank_transactions_daily, grupat vectorizat pe zi/luna/an) si verifica
+faptul ca rezultatele sunt aceleasi. Supabase este inlocuit de un client
+in memorie care pagineaza ca PostgREST (maxim 1000 randuri per cerere),
+astfel incat se vede si numarul de randuri transferate.
+
+Rulare:
+    python benchmarks/bench_profit_data.py [tranzactii]
+"""
+
+import os
+import sys
+import math
+import random
+import time
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'app'))
+
+import utils.data_sync as data_sync  # noqa: E402
+
+SURSE = ['GLS', 'Sameday', 'Netopia', 'eMAG', 'Transfer']
+MAX_ROWS = 1000
+
+
+class _Raspuns:
+    def __init__(self, data):
+        self.data = data
+
+
+class _Query:
+    """Subsetul de query builder folosit de get_profit_data (gte/lte/order/range)."""
+
+    def __init__(self, client, randuri):
+        self.client = client
+        self.randuri = randuri
+        self.filtre = []
+        self.ordine = []
+        self.interval = (0, MAX_ROWS - 1)
+
+    def select(self, coloane):
+        self.coloane = [c.strip() for c in coloane.split(',')]
+        return self
+
+    def gte(self, coloana, valoare):
+        self.filtre.append(('gte', coloana, valoare))
+        return self
+
+    def lte(self, coloana, valoare):
+        self.filtre.append(('lte', coloana, valoare))
+        return self
+
+    def order(self, coloana):
+        self.ordine.append(coloana)
+        return self
+
+    def range(self, start, end):
+        self.interval = (start, end)
+        return self
+
+    def execute(self):
+        # Rezultatul filtrat si sortat se refoloseste pentru paginile urmatoare
+        cheie = (id(self.randuri), tuple(self.filtre), tuple(self.ordine))
+        randuri = self.client.rezultate.get(cheie)
+        if randuri is None:
+            randuri = [r for r in self.randuri if all(
+                (r[c] >= v) if op == 'gte' else (r[c] <= v) for op, c, v in self.filtre
+            )]
+            if self.ordine:
+                randuri.sort(key=lambda r: tuple(r[c] for c in self.ordine))
+            self.client.rezultate[cheie] = randuri
+        start, end = self.interval
+        pagina = randuri[start:min(end + 1, start + MAX_ROWS)]
+        self.client.transferate += len(pagina)
+        return _Raspuns([{c: r[c] for c in self.coloane} for r in pagina])
+
+
+class _Client:
+    def __init__(self, tabele):
+        self.tabele = tabele
+        self.transferate = 0
+        self.rezultate = {}
+
+    def table(self, nume):
+        return _Query(self, self.tabele[nume])
+
+
+def genereaza_tabele(numar: int, rng: random.Random):
+    """Tranzactii sintetice pe un an si rollup-ul zilnic (ca trigger-ul din migrare)."""
+    start = date(2024, 1, 1)
+    tranzactii = [{
+        'transaction_date': (start + timedelta(days=rng.randrange(366))).isoformat(),
+        'amount': round(rng.uniform(10, 5000), 2),
+        'source': rng.choice(SURSE),
+    } for _ in range(numar)]
+
+    zilnic = defaultdict(float)
+    for t in tranzactii:
+        zilnic[(t['transaction_date'], t['source'])] += t['amount']
+    rollup = [{'transaction_date': zi, 'source': sursa, 'total_amount': round(suma, 2)}
+              for (zi, sursa), suma in zilnic.items()]
+
+    return {'bank_transactions': tranzactii, 'bank_transactions_daily': rollup}
+
+
+def profit_vechi(client, start_date=None, end_date=None, group_by='month'):
+    """
+    Implementarea anterioara, pastrata ca referinta.
+
+    Citirea este paginata aici: varianta originala primea doar primele 1000
+    de randuri (limita PostgREST), deci subestima intervalele mari.
+    """
+    def build_query():
+        query = client.table('bank_transactions').select('transaction_date, amount, source')
+        if start_date:
+            query = query.gte('transaction_date', start_date.isoformat())
+        if end_date:
+            query = query.lte('transaction_date', end_date.isoformat())
+        return query.order('transaction_date')
+
+    transactions = data_sync.fetch_all(build_query)
+
+    grouped = {}
+    for trans in transactions:
+        trans_date = datetime.strptime(trans['transaction_date'], '%Y-%m-%d')
+
+        if group_by == 'day':
+            key = trans_date.strftime('%Y-%m-%d')
+        elif group_by == 'month':
+            key = trans_date.strftime('%Y-%m')
+        else:  # year
+            key = trans_date.strftime('%Y')
+
+        if key not in grouped:
+            grouped[key] = {'date': key, 'total': 0, 'by_source': {}}
+
+        grouped[key]['total'] += float(trans['amount'])
+
+        source = trans['source']
+        if source not in grouped[key]['by_source']:
+            grouped[key]['by_source'][source] = 0
+        grouped[key]['by_source'][source] += float(trans['amount'])
+
+    return list(grouped.values())
+
+
+def profit_nou(client, start_date=None, end_date=None, group_by='month'):
+    data_sync.get_supabase_client = lambda: client
+    return data_sync.get_profit_data.cache_bypass(start_date, end_date, group_by)
+
+
+def acelasi_rezultat(vechi, nou) -> bool:
+    """Aceleasi perioade si surse, sume egale la rotunjirea sumelor float."""
+    if [d['date'] for d in vechi] != [d['date'] for d in nou]:
+        return False
+    for a, b in zip(vechi, nou):
+        if sorted(a['by_source']) != sorted(b['by_source']) or not math.isclose(a['total'], b['total'], abs_tol=0.01):
+            return False
+        if any(not math.isclose(v, b['by_source'][s], abs_tol=0.01) for s, v in a['by_source'].items()):
+            return False
+    return True
+
+
+def cronometreaza(func, *args, repetari: int = 3, **kwargs):
+    """Returneaza (cel mai bun timp din `repetari` rulari, rezultat)."""
+    timpi = []
+    for _ in range(repetari):
+        t0 = time.perf_counter()
+        rezultat = func(*args, **kwargs)
+        timpi.append(time.perf_counter() - t0)
+    return min(timpi), rezultat
+
+
+def main():
+    numar = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    client = _Client(genereaza_tabele(numar, random.Random(42)))
+    print(f"An: {numar} tranzactii, {len(client.tabele['bank_transactions_daily'])} randuri in rollup-ul zilnic")
+
+    for group_by in ('day', 'month', 'year'):
+        client.transferate = 0
+        t_vechi, vechi = cronometreaza(profit_vechi, client, date(2024, 1, 1), date(2024, 12, 31), group_by,
+                                       repetari=1)
+        randuri_vechi, client.transferate = client.transferate, 0
+        t_nou, nou = cronometreaza(profit_nou, client, date(2024, 1, 1), date(2024, 12, 31), group_by,
+                                   repetari=1)
+        randuri_nou = client.transferate
+
+        assert acelasi_rezultat(vechi, nou), f"Rezultatul difera fata de implementarea veche ({group_by})!"
+
+        print(f"[{group_by}] vechi: {t_vechi:.3f}s, {randuri_vechi} randuri | "
+              f"nou: {t_nou:.3f}s, {randuri_nou} randuri ({t_vechi / t_nou:.2f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,198 @@
+"""
+Server stub local care imita endpoint-urile Oblio folosite la bonurile de productie.
+
+Acopera fluxul din utils.oblio_http (formular, autocomplete, reteta, POST cu
+redirect la preview, lansare, finalizare), cu sesiune prin cookie si redirect
+la /login/ fara ea. Bonurile finalizate raman in `server.bonuri_finalizate`.
+`server.esecuri_finalizare = N` face ca urmatoarele N finalizari sa raspunda
+cu eroare (bonul ramane lansat, nefinalizat), iar `server.formular_fara_reteta = True`
+trimite formularul fara campurile ap_1_*.
+Latenta optionala per cerere simuleaza drumul pana la oblio.eu.
+
+Stub-ul reproduce presupunerile clientului (cai, JSON, campuri ap_N_*), nu
+trafic capturat de pe oblio.eu: masoara viteza si tratarea erorilor, nu
+compatibilitatea cu Oblio.
+
+Folosire:
+    server = porneste_stub(produse={'SKU-1': 10.0}, latenta=0.05)
+    ... OblioHttpClient(COOKIES_STUB, base_url=server.url) ...
+    server.shutdown()
+"""
+
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+COOKIE_SESIUNE = ('PHPSESSID', 'stub-sesiune')
+COOKIES_STUB = [{'name': COOKIE_SESIUNE[0], 'value': COOKIE_SESIUNE[1], 'domain': '.oblio.eu', 'path': '/'}]
+
+# Consum din materia prima per bucata produsa
+CONSUM_PER_BUCATA = 0.01
+
+_FORMULAR = """<html><body>
+<form name="production_form" id="production_form" method="post" action="/stock/production/">
+  <input type="hidden" name="_token" value="{token}">
+  <input type="text" id="pp_name" name="pp_name" value="">
+  <input type="hidden" id="pp_name_id" name="pp_name_id" value="">
+  <input type="text" id="pp_quantity" name="pp_quantity" value="1">
+{reteta}  <input type="checkbox" name="pp_print" value="1">
+  <a id="invoice_preview_btn" onclick="submit_form_doc('production_form')">Previzualizare</a>
+</form>
+</body></html>"""
+
+_RETETA = """  <input type="text" id="ap_1_name" name="ap_1_name" value="">
+  <input type="hidden" id="ap_1_name_id" name="ap_1_name_id" value="">
+  <input type="text" id="ap_1_quantity2" name="ap_1_quantity2" value="">
+"""
+
+_PREVIEW = """<html><body>
+<a class="btn btn-warning issue-btn" href="/stock/production_save/{id}">Lanseaza in Productie</a>
+</body></html>"""
+
+_LANSAT = """<html><body>
+<a class="btn btn-warning" href="/stock/production_complete/{id}">Finalizeaza Productia</a>
+</body></html>"""
+
+_EROARE = """<html><body><div class="alert alert-danger"><strong>Eroare:</strong> {mesaj}</div></body></html>"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: 'ServerStubOblio'
+
+    def log_message(self, format, *args):
+        pass
+
+    def _autentificat(self) -> bool:
+        cookie = self.headers.get('Cookie', '')
+        return f"{COOKIE_SESIUNE[0]}={COOKIE_SESIUNE[1]}" in cookie
+
+    def _trimite(self, cod: int, corp: str, tip: str = 'text/html', locatie: str = None):
+        date = corp.encode('utf-8')
+        self.send_response(cod)
+        if locatie:
+            self.send_header('Location', locatie)
+        self.send_header('Content-Type', f'{tip}; charset=utf-8')
+        self.send_header('Content-Length', str(len(date)))
+        self.end_headers()
+        self.wfile.write(date)
+
+    def _inceput(self):
+        if self.server.latenta:
+            time.sleep(self.server.latenta)
+        self.server.numar_cereri += 1
+        return urlparse(self.path)
+
+    def do_GET(self):
+        url = self._inceput()
+        parametri = {k: v[0] for k, v in parse_qs(url.query).items()}
+
+        if url.path.startswith('/login'):
+            return self._trimite(200, '<html><body><form id="login"></form></body></html>')
+        if not self._autentificat():
+            return self._trimite(302, '', locatie='/login/')
+
+        server = self.server
+        if url.path == '/stock/production/':
+            reteta = '' if server.formular_fara_reteta else _RETETA
+            return self._trimite(200, _FORMULAR.format(token=server.token, reteta=reteta))
+
+        if url.path == '/stock/ajax/production_products/':
+            sku = parametri.get('term', '')
+            rezultate = [] if sku not in server.produse else [
+                {'id': server.id_produs(sku), 'label': f"{sku} - Produs {sku}", 'value': sku}
+            ]
+            return self._trimite(200, json.dumps(rezultate), 'application/json')
+
+        if url.path == '/stock/ajax/production_recipe/':
+            sku = server.sku_din_id(parametri.get('id'))
+            cantitate = float(parametri.get('quantity', 1))
+            componente = [] if sku is None else [{
+                'id': f"mp-{server.id_produs(sku)}",
+                'name': f"Parfum {sku}",
+                'quantity': round(cantitate * CONSUM_PER_BUCATA, 4),
+                'stock': server.produse[sku],
+            }]
+            return self._trimite(200, json.dumps(componente), 'application/json')
+
+        potrivire = re.fullmatch(r'/stock/(preview_production|production_save|production_complete)/(\d+)', url.path)
+        if potrivire and potrivire.group(2) in server.bonuri:
+            pas, bon_id = potrivire.groups()
+            bon = server.bonuri[bon_id]
+            if pas == 'preview_production':
+                return self._trimite(200, _PREVIEW.format(id=bon_id))
+            if pas == 'production_save':
+                bon['lansat'] = True
+                return self._trimite(200, _LANSAT.format(id=bon_id))
+            if not bon.get('lansat'):
+                return self._trimite(200, _EROARE.format(mesaj='Bonul nu este lansat in productie'))
+            with server.lock:
+                if server.esecuri_finalizare > 0:
+                    server.esecuri_finalizare -= 1
+                    return self._trimite(200, _EROARE.format(mesaj='Finalizarea productiei a esuat'))
+                if not bon.get('finalizat'):
+                    bon['finalizat'] = True
+                    server.produse[bon['sku']] -= bon['cantitate'] * CONSUM_PER_BUCATA
+                    server.bonuri_finalizate.append((bon['sku'], bon['cantitate']))
+            return self._trimite(200, '<html><body>Productie finalizata</body></html>')
+
+        return self._trimite(404, 'Not found')
+
+    def do_POST(self):
+        url = self._inceput()
+        if not self._autentificat():
+            return self._trimite(302, '', locatie='/login/')
+        if url.path != '/stock/production/':
+            return self._trimite(404, 'Not found')
+
+        lungime = int(self.headers.get('Content-Length', 0))
+        campuri = {k: v[0] for k, v in parse_qs(self.rfile.read(lungime).decode('utf-8')).items()}
+
+        server = self.server
+        sku = server.sku_din_id(campuri.get('pp_name_id'))
+        if campuri.get('_token') != server.token:
+            return self._trimite(200, _EROARE.format(mesaj='Sesiune invalida, reincarcati pagina'))
+        if sku is None:
+            return self._trimite(200, _EROARE.format(mesaj='Selecteaza produsul pentru productie'))
+
+        with server.lock:
+            bon_id = str(len(server.bonuri) + 1000)
+            server.bonuri[bon_id] = {'sku': sku, 'cantitate': float(campuri.get('pp_quantity', 1))}
+        return self._trimite(302, '', locatie=f'/stock/preview_production/{bon_id}')
+
+
+class ServerStubOblio(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, produse, latenta: float = 0.0):
+        super().__init__(('127.0.0.1', 0), _Handler)
+        self.produse = dict(produse)
+        self.latenta = latenta
+        self.token = 'stub-token'
+        self.bonuri = {}
+        self.bonuri_finalizate = []
+        self.numar_cereri = 0
+        self.esecuri_finalizare = 0
+        self.formular_fara_reteta = False
+        self.lock = threading.Lock()
+        self._id_uri = {sku: str(i) for i, sku in enumerate(self.produse, 1)}
+        self._sku_uri = {i: sku for sku, i in self._id_uri.items()}
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def id_produs(self, sku):
+        return self._id_uri[sku]
+
+    def sku_din_id(self, produs_id):
+        return self._sku_uri.get(str(produs_id))
+
+
+def porneste_stub(produse, latenta: float = 0.0) -> ServerStubOblio:
+    """Porneste serverul stub intr-un fir separat; oprire cu server.shutdown()."""
+    server = ServerStubOblio(produse, latenta)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
@@ -0,0 +1,19 @@
+-- Registrul fisierelor de extras importate (MT940, PDF, CSV), cheie = SHA-256 al continutului
+create table if not exists import_registry (
+    id bigserial primary key,
+    file_hash text not null unique,
+    file_name text,
+    file_type text,
+    transactions_count integer default 0,
+    records_inserted integer default 0,
+    records_skipped integer default 0,
+    sync_log_id bigint,
+    imported_at timestamptz default now()
+);
+
+-- Hash canonic al tranzactiei ("data|referinta|suma"), comun tuturor formatelor de import
+alter table bank_transactions add column if not exists transaction_hash text;
+
+-- Nu e unic: randurile importate inainte de hash pot avea valori lipsa sau repetate
+create index if not exists idx_bank_transactions_transaction_hash
+    on bank_transactions (transaction_hash);
@@ -0,0 +1,19 @@
+-- Comenzile Gomag sincronizate din exporturile incarcate (doar delta la fiecare upload)
+create table if not exists gomag_orders (
+    id bigserial primary key,
+    order_number text not null unique,
+    awb text,
+    awb_norm text,
+    invoice_number text,
+    total_comanda text,
+    total_factura text,
+    row_hash text,
+    updated_at timestamptz default now()
+);
+
+-- Cautari exacte si dupa prefix (like 'X%') pe AWB-ul normalizat
+create index if not exists idx_gomag_orders_awb_norm
+    on gomag_orders (awb_norm text_pattern_ops);
+
+create index if not exists idx_gomag_orders_invoice_number
+    on gomag_orders (invoice_number);
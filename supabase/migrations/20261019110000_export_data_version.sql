@@ -0,0 +1,26 @@
+-- Versiunea datelor citite de export-ul OP-uri: updated_at (setat automat) pe fiecare tabela,
+-- folosit de export_cache pentru a invalida exporturile memorate dupa o sincronizare
+create or replace function set_updated_at() returns trigger as $$
+begin
+    new.updated_at = now();
+    return new;
+end;
+$$ language plpgsql;
+
+do $$
+declare
+    t text;
+begin
+    foreach t in array array[
+        'bank_transactions', 'gls_borderouri', 'gls_borderou_parcels', 'gls_parcels',
+        'sameday_parcels', 'netopia_transactions', 'gomag_orders'
+    ] loop
+        execute format('alter table %I add column if not exists updated_at timestamptz default now()', t);
+        execute format('create index if not exists %I on %I (updated_at desc)', 'idx_' || t || '_updated_at', t);
+        execute format('drop trigger if exists %I on %I', 'trg_' || t || '_updated_at', t);
+        execute format(
+            'create trigger %I before insert or update on %I for each row execute function set_updated_at()',
+            'trg_' || t || '_updated_at', t
+        );
+    end loop;
+end $$;
@@ -0,0 +1,43 @@
+-- Agregari pentru dashboard, calculate in baza de date: se transfera doar
+-- totalurile (per luna, sursa, tip factura), nu toate randurile
+
+create index if not exists idx_invoices_issue_date on invoices (issue_date);
+create index if not exists idx_bank_transactions_transaction_date on bank_transactions (transaction_date);
+
+-- Facturi per luna (YYYY-MM), tip si stare
+create or replace view invoices_monthly as
+select
+    left(issue_date::text, 7) as month,
+    invoice_type,
+    is_canceled,
+    count(*) as invoice_count,
+    coalesce(sum(total), 0) as total_amount
+from invoices
+group by 1, 2, 3;
+
+-- Incasari per luna (YYYY-MM) si sursa
+create or replace view bank_transactions_monthly as
+select
+    left(transaction_date::text, 7) as month,
+    source,
+    count(*) as transaction_count,
+    coalesce(sum(amount), 0) as total_amount
+from bank_transactions
+group by 1, 2;
+
+-- Facturile neanulate dintr-o perioada (capete optionale), pe tip factura
+create or replace function dashboard_invoice_stats(p_start date default null, p_end date default null)
+returns table (invoice_type text, invoice_count bigint, total_amount numeric)
+language sql
+stable
+as $$
+    select
+        i.invoice_type::text,
+        count(*),
+        coalesce(sum(i.total), 0)::numeric
+    from invoices i
+    where i.is_canceled = false
+      and (p_start is null or i.issue_date >= p_start)
+      and (p_end is null or i.issue_date <= p_end)
+    group by i.invoice_type;
+$$;
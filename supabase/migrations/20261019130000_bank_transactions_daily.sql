@@ -0,0 +1,52 @@
+-- Rollup zilnic al incasarilor per sursa, pentru tab-ul de evolutie profit.
+-- Se actualizeaza incremental printr-un trigger pe bank_transactions, deci
+-- fiecare import (MT940, PDF, sincronizari) il tine la zi fara recalculare.
+-- Lunile si anii se obtin in aplicatie din randurile zilnice.
+
+create table if not exists bank_transactions_daily (
+    transaction_date date not null,
+    source text not null default '',
+    transaction_count integer not null default 0,
+    total_amount numeric not null default 0,
+    primary key (transaction_date, source)
+);
+
+-- Aplica delta unei tranzactii (semn +1 la adaugare, -1 la stergere)
+create or replace function bank_transactions_daily_add(p_date date, p_source text, p_sign integer, p_amount numeric)
+returns void
+language sql
+as $$
+    insert into bank_transactions_daily as d (transaction_date, source, transaction_count, total_amount)
+    values (p_date, coalesce(p_source, ''), p_sign, p_sign * coalesce(p_amount, 0))
+    on conflict (transaction_date, source) do update
+        set transaction_count = d.transaction_count + excluded.transaction_count,
+            total_amount = d.total_amount + excluded.total_amount;
+$$;
+
+create or replace function bank_transactions_daily_apply()
+returns trigger
+language plpgsql
+as $$
+begin
+    if tg_op in ('UPDATE', 'DELETE') and old.transaction_date is not null then
+        perform bank_transactions_daily_add(old.transaction_date, old.source, -1, old.amount);
+    end if;
+    if tg_op in ('INSERT', 'UPDATE') and new.transaction_date is not null then
+        perform bank_transactions_daily_add(new.transaction_date, new.source, 1, new.amount);
+    end if;
+    return null;
+end;
+$$;
+
+-- Populare initiala din tranzactiile existente
+truncate bank_transactions_daily;
+insert into bank_transactions_daily (transaction_date, source, transaction_count, total_amount)
+select transaction_date, coalesce(source, ''), count(*), coalesce(sum(amount), 0)
+from bank_transactions
+where transaction_date is not null
+group by 1, 2;
+
+drop trigger if exists bank_transactions_daily_sync on bank_transactions;
+create trigger bank_transactions_daily_sync
+    after insert or delete or update of transaction_date, source, amount on bank_transactions
+    for each row execute function bank_transactions_daily_apply();
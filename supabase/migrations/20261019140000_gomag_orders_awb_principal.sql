@@ -0,0 +1,5 @@
+-- Prima comanda din exportul Gomag pentru fiecare AWB (AWB comun mai multor
+-- comenzi). Cautarile dupa awb_norm o prefera, ca match_awb_with_gomag.
+-- Randurile existente raman true pana la urmatoarea sincronizare, care le
+-- rescrie pe toate (hash-ul randului include coloana).
+alter table gomag_orders add column if not exists awb_principal boolean not null default true;
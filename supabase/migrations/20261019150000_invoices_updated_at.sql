@@ -0,0 +1,9 @@
+-- updated_at (setat automat) si pe invoices, ca inventarul tabelelor
+-- (table_inventory) sa vada importurile de facturi facute de alte procese
+alter table invoices add column if not exists updated_at timestamptz default now();
+create index if not exists idx_invoices_updated_at on invoices (updated_at desc);
+
+drop trigger if exists trg_invoices_updated_at on invoices;
+create trigger trg_invoices_updated_at
+    before insert or update on invoices
+    for each row execute function set_updated_at();
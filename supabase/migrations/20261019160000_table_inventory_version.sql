@@ -0,0 +1,17 @@
+-- Marcajul datelor pentru inventarul tabelelor (table_inventory): cel mai recent
+-- updated_at din tabelele numarate, intr-o singura cerere (fiecare max foloseste
+-- indexul idx_<tabela>_updated_at)
+create or replace function table_inventory_version()
+returns timestamptz
+language sql
+stable
+as $$
+    select greatest(
+        (select max(updated_at) from gls_parcels),
+        (select max(updated_at) from sameday_parcels),
+        (select max(updated_at) from netopia_transactions),
+        (select max(updated_at) from invoices),
+        (select max(updated_at) from bank_transactions),
+        (select max(updated_at) from gls_borderouri)
+    );
+$$;